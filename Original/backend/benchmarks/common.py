@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import List, Sequence
+
+
+def configure_temp_database(prefix: str = "sparehub-bench-") -> str:
+    """Point ``DATABASE_URL`` at a throwaway SQLite file.
+
+    Must run before ``backend.database`` is imported.
+    """
+    handle, path = tempfile.mkstemp(prefix=prefix, suffix=".db")
+    os.close(handle)
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    return path
+
+
+def remove_database_file(path: str) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered: List[float] = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
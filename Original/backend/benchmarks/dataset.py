@@ -0,0 +1,340 @@
+"""Scalable synthetic dataset generator.
+
+Usage (from the repository root that contains ``backend/``):
+
+    python -m backend.benchmarks.dataset --suppliers 500 --catalog 50000 --buyers 200 --orders 5000
+
+Bulk-loads suppliers, catalog rows, buyers and orders into ``DATABASE_URL``.
+Suppliers and buyers are scattered around industrial clusters and catalog
+part numbers follow a Zipf-like popularity curve, so popular parts are stocked
+by many suppliers and ordered often, as in production.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import func, insert, select
+
+INDUSTRIAL_CLUSTERS: List[Tuple[str, float, float]] = [
+    ("Mumbai", 19.076, 72.8777),
+    ("Pune", 18.5204, 73.8567),
+    ("Chennai", 13.0827, 80.2707),
+    ("Bengaluru", 12.9716, 77.5946),
+    ("Hyderabad", 17.385, 78.4867),
+    ("Delhi NCR", 28.4595, 77.0266),
+    ("Ahmedabad", 23.0225, 72.5714),
+    ("Kolkata", 22.5726, 88.3639),
+    ("Coimbatore", 11.0168, 76.9558),
+    ("Nashik", 20.0063, 73.7895),
+]
+
+CATEGORY_NAMES: List[Tuple[str, str]] = [
+    ("Bearings", "Deep Groove Ball Bearings"),
+    ("Hydraulics", "Hydraulic Pumps"),
+    ("Fasteners", "Industrial Bolts"),
+    ("Power Transmission", "V-Belts"),
+    ("Seals", "Oil Seals"),
+    ("Gears", "Spur Gears"),
+    ("Electrical", "Contactors"),
+    ("Pneumatics", "Solenoid Valves"),
+]
+
+PART_PREFIXES = ["SKF", "NSK", "FAG", "HTB", "NOK", "SG", "A10VSO", "GATES", "ABB", "FESTO"]
+URGENCY_WEIGHTS = {"standard": 0.6, "urgent": 0.3, "critical": 0.1}
+BENCH_PASSWORD = "password123"
+
+
+@dataclass
+class DatasetSpec:
+    suppliers: int = 50
+    catalog_rows: int = 2000
+    buyers: int = 20
+    orders: int = 200
+    part_pool: int = 0
+    max_items_per_order: int = 5
+    cluster_spread_deg: float = 0.35
+    zipf_exponent: float = 1.1
+    seed: int = 42
+    batch_size: int = 5000
+
+    def resolved_part_pool(self) -> int:
+        if self.part_pool > 0:
+            return self.part_pool
+        # Roughly a quarter of rows share a part number with another supplier.
+        return max(10, self.catalog_rows // 4)
+
+
+@dataclass
+class DatasetSummary:
+    admin_user_id: int
+    buyer_user_ids: List[int] = field(default_factory=list)
+    buyer_coords: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+    supplier_user_ids: List[int] = field(default_factory=list)
+    category_ids: List[int] = field(default_factory=list)
+    part_numbers: List[str] = field(default_factory=list)
+    part_weights: List[float] = field(default_factory=list)
+    order_ids: List[int] = field(default_factory=list)
+    rows_inserted: Dict[str, int] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+
+def _scatter(rng: random.Random, spread: float) -> Tuple[float, float]:
+    _, lat, lng = rng.choice(INDUSTRIAL_CLUSTERS)
+    return round(rng.gauss(lat, spread), 6), round(rng.gauss(lng, spread), 6)
+
+
+def _zipf_weights(count: int, exponent: float) -> List[float]:
+    return [1.0 / ((rank + 1) ** exponent) for rank in range(count)]
+
+
+class _WeightedSampler:
+    def __init__(self, rng: random.Random, items: Sequence, weights: Sequence[float]):
+        self._rng = rng
+        self._items = items
+        self._cumulative = list(itertools.accumulate(weights))
+
+    def draw(self):
+        target = self._rng.random() * self._cumulative[-1]
+        return self._items[bisect.bisect_left(self._cumulative, target)]
+
+
+async def _next_id(session, model) -> int:
+    current = (await session.execute(select(func.max(model.id)))).scalar()
+    return int(current or 0) + 1
+
+
+async def _bulk_insert(session, model, rows: List[dict], batch_size: int) -> int:
+    for start in range(0, len(rows), batch_size):
+        await session.execute(insert(model), rows[start:start + batch_size])
+    return len(rows)
+
+
+async def generate_dataset(spec: DatasetSpec) -> DatasetSummary:
+    import backend.models  # noqa: F401
+    from backend.database import AsyncSessionLocal, init_db
+    from backend.middleware.auth import hash_password
+    from backend.models.catalog import PartCategory, PartsCatalog
+    from backend.models.orders import Order, OrderItem, OrderStatusHistory
+    from backend.models.user import BuyerProfile, SupplierProfile, User
+    from backend.services.matching_service import normalize_part_number
+
+    started = time.perf_counter()
+    rng = random.Random(spec.seed)
+    await init_db()
+
+    # One hash is shared by every synthetic account; hashing per user would
+    # dominate load time at realistic scale.
+    password_hash = hash_password(BENCH_PASSWORD)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    async with AsyncSessionLocal() as session:
+        user_id = await _next_id(session, User)
+        buyer_id = await _next_id(session, BuyerProfile)
+        supplier_id = await _next_id(session, SupplierProfile)
+        category_id = await _next_id(session, PartCategory)
+        catalog_id = await _next_id(session, PartsCatalog)
+        order_id = await _next_id(session, Order)
+        item_id = await _next_id(session, OrderItem)
+        run_tag = f"{spec.seed}-{user_id}"
+
+        users: List[dict] = []
+        buyers: List[dict] = []
+        suppliers: List[dict] = []
+
+        summary = DatasetSummary(admin_user_id=user_id)
+        users.append(
+            {"id": user_id, "email": f"admin.{run_tag}@bench.example.com", "password_hash": password_hash, "role": "admin"}
+        )
+        user_id += 1
+
+        for index in range(spec.buyers):
+            lat, lng = _scatter(rng, spec.cluster_spread_deg)
+            users.append(
+                {"id": user_id, "email": f"buyer{index}.{run_tag}@bench.example.com", "password_hash": password_hash, "role": "buyer"}
+            )
+            buyers.append(
+                {
+                    "id": buyer_id,
+                    "user_id": user_id,
+                    "factory_name": f"Bench Factory {index}",
+                    "industry_type": "Synthetic",
+                    "delivery_address": "Synthetic address",
+                    "latitude": lat,
+                    "longitude": lng,
+                }
+            )
+            summary.buyer_user_ids.append(user_id)
+            summary.buyer_coords[user_id] = (lat, lng)
+            user_id += 1
+            buyer_id += 1
+
+        supplier_profile_ids: List[int] = []
+        for index in range(spec.suppliers):
+            lat, lng = _scatter(rng, spec.cluster_spread_deg)
+            users.append(
+                {"id": user_id, "email": f"supplier{index}.{run_tag}@bench.example.com", "password_hash": password_hash, "role": "supplier"}
+            )
+            suppliers.append(
+                {
+                    "id": supplier_id,
+                    "user_id": user_id,
+                    "business_name": f"Bench Supplier {index}",
+                    "warehouse_address": "Synthetic warehouse",
+                    "service_radius_km": rng.choice([50, 100, 150, 200, 300]),
+                    "latitude": lat,
+                    "longitude": lng,
+                    "reliability_score": round(rng.uniform(0.4, 0.98), 3),
+                }
+            )
+            summary.supplier_user_ids.append(user_id)
+            supplier_profile_ids.append(supplier_id)
+            user_id += 1
+            supplier_id += 1
+
+        categories = []
+        for name, subcategory in CATEGORY_NAMES:
+            categories.append({"id": category_id, "name": name, "subcategory": subcategory})
+            summary.category_ids.append(category_id)
+            category_id += 1
+
+        pool_size = spec.resolved_part_pool()
+        part_numbers = [
+            f"{PART_PREFIXES[index % len(PART_PREFIXES)]}-{1000 + index}" for index in range(pool_size)
+        ]
+        part_categories = {part: rng.choice(summary.category_ids) for part in part_numbers}
+        weights = _zipf_weights(pool_size, spec.zipf_exponent)
+        part_sampler = _WeightedSampler(rng, part_numbers, weights)
+        summary.part_numbers = part_numbers
+        summary.part_weights = weights
+
+        catalog_rows: List[dict] = []
+        seen_pairs: set[Tuple[int, str]] = set()
+        attempts = 0
+        while len(catalog_rows) < spec.catalog_rows and attempts < spec.catalog_rows * 5 and supplier_profile_ids:
+            attempts += 1
+            owner = rng.choice(supplier_profile_ids)
+            part_number = part_sampler.draw()
+            if (owner, part_number) in seen_pairs:
+                continue
+            seen_pairs.add((owner, part_number))
+            min_qty = rng.choice([1, 1, 2, 5, 10])
+            catalog_rows.append(
+                {
+                    "id": catalog_id,
+                    "supplier_id": owner,
+                    "category_id": part_categories[part_number],
+                    "part_name": f"Synthetic part {part_number}",
+                    "part_number": part_number,
+                    "normalized_part_number": normalize_part_number(part_number),
+                    "brand": part_number.split("-")[0],
+                    "unit_price": round(rng.uniform(50, 25000), 2),
+                    "quantity_in_stock": rng.randint(0, 500),
+                    "min_order_quantity": min_qty,
+                    "lead_time_hours": rng.choice([2, 4, 8, 12, 24, 48, 72]),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            catalog_id += 1
+
+        urgency_sampler = _WeightedSampler(rng, list(URGENCY_WEIGHTS), list(URGENCY_WEIGHTS.values()))
+        orders: List[dict] = []
+        items: List[dict] = []
+        history: List[dict] = []
+        buyer_profiles = [(row["id"], row["user_id"]) for row in buyers]
+        for _ in range(spec.orders if buyer_profiles else 0):
+            profile_id, owner_user_id = rng.choice(buyer_profiles)
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+            orders.append(
+                {
+                    "id": order_id,
+                    "buyer_id": profile_id,
+                    "status": "PLACED",
+                    "urgency": urgency_sampler.draw(),
+                    "required_delivery_date": created_at + timedelta(hours=rng.choice([12, 24, 48, 96, 168])),
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+            history.append(
+                {"order_id": order_id, "from_status": None, "to_status": "PLACED", "changed_by": owner_user_id, "created_at": created_at}
+            )
+            for _ in range(rng.randint(1, spec.max_items_per_order)):
+                part_number = part_sampler.draw()
+                items.append(
+                    {
+                        "id": item_id,
+                        "order_id": order_id,
+                        "category_id": part_categories[part_number],
+                        "part_number": part_number,
+                        "part_description": "Synthetic demand",
+                        "quantity": rng.randint(1, 20),
+                        "status": "PENDING",
+                    }
+                )
+                item_id += 1
+            summary.order_ids.append(order_id)
+            order_id += 1
+
+        inserted = summary.rows_inserted
+        inserted["users"] = await _bulk_insert(session, User, users, spec.batch_size)
+        inserted["buyer_profiles"] = await _bulk_insert(session, BuyerProfile, buyers, spec.batch_size)
+        inserted["supplier_profiles"] = await _bulk_insert(session, SupplierProfile, suppliers, spec.batch_size)
+        inserted["part_categories"] = await _bulk_insert(session, PartCategory, categories, spec.batch_size)
+        inserted["parts_catalog"] = await _bulk_insert(session, PartsCatalog, catalog_rows, spec.batch_size)
+        inserted["orders"] = await _bulk_insert(session, Order, orders, spec.batch_size)
+        inserted["order_items"] = await _bulk_insert(session, OrderItem, items, spec.batch_size)
+        inserted["order_status_history"] = await _bulk_insert(session, OrderStatusHistory, history, spec.batch_size)
+        await session.commit()
+
+    summary.elapsed_s = time.perf_counter() - started
+    return summary
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suppliers", type=int, default=DatasetSpec.suppliers)
+    parser.add_argument("--catalog", type=int, default=DatasetSpec.catalog_rows)
+    parser.add_argument("--buyers", type=int, default=DatasetSpec.buyers)
+    parser.add_argument("--orders", type=int, default=DatasetSpec.orders)
+    parser.add_argument("--part-pool", type=int, default=0, help="Distinct part numbers (default: catalog/4)")
+    parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    spec = DatasetSpec(
+        suppliers=args.suppliers,
+        catalog_rows=args.catalog,
+        buyers=args.buyers,
+        orders=args.orders,
+        part_pool=args.part_pool,
+        seed=args.seed,
+    )
+
+    async def run() -> DatasetSummary:
+        from backend.database import close_db
+
+        try:
+            return await generate_dataset(spec)
+        finally:
+            await close_db()
+
+    summary = asyncio.run(run())
+    for table, count in summary.rows_inserted.items():
+        print(f"{table:>22}: {count}")
+    print(f"{'elapsed':>22}: {summary.elapsed_s:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""Micro-benchmarks for the matching and routing kernels.
+
+Usage (from the repository root that contains ``backend/``):
+
+    python -m backend.benchmarks.kernels                    # run and compare to baseline
+    python -m backend.benchmarks.kernels --save-baseline    # record a new baseline
+    python -m backend.benchmarks.kernels --full --filter vrp
+
+Each kernel runs across a parameter sweep. Results are compared against the
+stored baseline and any case slower than ``--threshold`` (default 20%) is
+reported as a regression; the process then exits with status 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.benchmarks.common import configure_temp_database, remove_database_file
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "kernels.json"
+
+CANDIDATE_SWEEP = [10, 100, 1000, 10000]
+VRP_NODE_SWEEP = [5, 11, 21, 51, 101, 201]
+QUICK_CANDIDATE_SWEEP = [10, 100, 1000]
+QUICK_VRP_NODE_SWEEP = [5, 11, 21]
+
+PART_NUMBER_SAMPLES = [
+    "SKF-6205", "skf 6205 zz", "HTB-M12-75", "A10VSO-45DR", "NOK TC 35x52x7",
+    "SG-M2-40T", "gates 5vx-800", "FESTO/VUVG-L14", "  abb af09-30-10  ", "6205-2RS1",
+]
+
+
+@dataclass
+class CaseResult:
+    kernel: str
+    param: int
+    seconds_per_call: float
+    calls: int
+    cost: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.kernel}[{self.param}]"
+
+
+def _time_callable(func: Callable[[], object], min_time: float, max_calls: int) -> Tuple[float, int]:
+    # Repeat in rounds and keep the median per-call time of each round.
+    samples: List[float] = []
+    calls = 0
+    started = time.perf_counter()
+    while calls < max_calls and (time.perf_counter() - started) < min_time or not samples:
+        round_start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - round_start)
+        calls += 1
+    return statistics.median(samples), calls
+
+
+def _random_points(rng: random.Random, count: int, center=(19.076, 72.8777), spread=1.5) -> List[Tuple[float, float]]:
+    return [(rng.gauss(center[0], spread), rng.gauss(center[1], spread)) for _ in range(count)]
+
+
+def _build_candidates(count: int, rng: random.Random):
+    from backend.models.inventory import PartsCatalog
+    from backend.models.users import SupplierProfile
+    from backend.services.matching_service import SupplierCandidate
+
+    candidates = []
+    for index, (lat, lng) in enumerate(_random_points(rng, count)):
+        supplier = SupplierProfile(
+            id=index + 1,
+            user_id=index + 1,
+            business_name=f"Supplier {index}",
+            service_radius_km=200.0,
+            latitude=lat,
+            longitude=lng,
+            reliability_score=rng.uniform(0.3, 1.0),
+        )
+        catalog = PartsCatalog(
+            id=index + 1,
+            supplier_id=supplier.id,
+            category_id=1,
+            part_name="Bench part",
+            part_number="SKF-6205",
+            normalized_part_number="SKF6205",
+            unit_price=rng.uniform(100, 5000),
+            quantity_in_stock=100,
+            min_order_quantity=1,
+            lead_time_hours=rng.choice([4, 8, 24, 48]),
+        )
+        candidates.append(SupplierCandidate(supplier=supplier, catalog=catalog, distance_km=rng.uniform(1, 400)))
+    return candidates
+
+
+def bench_haversine(param: int, rng: random.Random, opts) -> CaseResult:
+    from backend.services.matching_service import haversine_km
+
+    points = _random_points(rng, param)
+    origin = (19.076, 72.8777)
+
+    def run() -> None:
+        for lat, lng in points:
+            haversine_km(origin[0], origin[1], lat, lng)
+
+    seconds, calls = _time_callable(run, opts.min_time, opts.max_calls)
+    return CaseResult("haversine_km", param, seconds, calls)
+
+
+def bench_normalize_part_number(param: int, rng: random.Random, opts) -> CaseResult:
+    from backend.services.matching_service import normalize_part_number
+
+    values = [rng.choice(PART_NUMBER_SAMPLES) for _ in range(param)]
+
+    def run() -> None:
+        for value in values:
+            normalize_part_number(value)
+
+    seconds, calls = _time_callable(run, opts.min_time, opts.max_calls)
+    return CaseResult("normalize_part_number", param, seconds, calls)
+
+
+def bench_score_candidates(param: int, rng: random.Random, opts) -> CaseResult:
+    from backend.models.orders import Order, OrderItem
+    from backend.services.matching_service import DEFAULT_WEIGHT_PROFILES, score_candidates
+
+    candidates = _build_candidates(param, rng)
+    distance_map = {c.supplier.id: c.distance_km * 1.3 for c in candidates}
+    order = Order(id=1, urgency="urgent", required_delivery_date=datetime.now(timezone.utc) + timedelta(days=2))
+    item = OrderItem(id=1, order_id=1, part_number="SKF-6205", quantity=1)
+    weights = DEFAULT_WEIGHT_PROFILES["urgent"]
+
+    seconds, calls = _time_callable(
+        lambda: score_candidates(order, item, candidates, distance_map, weights), opts.min_time, opts.max_calls
+    )
+    return CaseResult("score_candidates", param, seconds, calls)
+
+
+def bench_single_supplier_bonus(param: int, rng: random.Random, opts) -> CaseResult:
+    from backend.models.orders import Order, OrderItem
+    from backend.services.matching_service import (
+        DEFAULT_WEIGHT_PROFILES,
+        apply_single_supplier_bonus,
+        score_candidates,
+    )
+
+    order = Order(id=1, urgency="standard", required_delivery_date=None)
+    weights = DEFAULT_WEIGHT_PROFILES["standard"]
+    per_item_template = {}
+    for item_id in range(1, 6):
+        candidates = _build_candidates(param, rng)
+        distance_map = {c.supplier.id: c.distance_km for c in candidates}
+        item = OrderItem(id=item_id, order_id=1, part_number="SKF-6205", quantity=1)
+        per_item_template[item_id] = score_candidates(order, item, candidates, distance_map, weights)
+
+    def run() -> None:
+        # The kernel mutates scores in place, so it runs on fresh copies.
+        per_item = {key: list(value) for key, value in per_item_template.items()}
+        apply_single_supplier_bonus(per_item)
+
+    seconds, calls = _time_callable(run, opts.min_time, opts.max_calls)
+    return CaseResult("apply_single_supplier_bonus", param, seconds, calls)
+
+
+def bench_fallback_duration_matrix(param: int, rng: random.Random, opts) -> CaseResult:
+    from backend.services.routing_service import _fallback_duration_matrix
+
+    # Matrix cost is quadratic, so the candidate sweep maps to sqrt-scaled node counts.
+    nodes = max(2, int(param ** 0.5) * 4)
+    locations = _random_points(rng, nodes)
+    seconds, calls = _time_callable(lambda: _fallback_duration_matrix(locations), opts.min_time, opts.max_calls)
+    return CaseResult("_fallback_duration_matrix", nodes, seconds, calls)
+
+
+def _grid_road_network(side: int, rng: random.Random):
+    from backend.services.road_network import RoadNetwork
+
+    # Square street grid around Mumbai, ~1.1 km blocks, mixed road classes
+    # and every fifth street one-way.
+    network = RoadNetwork()
+    step = 0.01
+    origin = (19.0, 72.8)
+    for index in range(side):
+        highway = "primary" if index % 10 == 0 else rng.choice(["residential", "secondary", "tertiary"])
+        oneway = "yes" if index % 5 == 3 else "no"
+        row = [[origin[1] + column * step, origin[0] + index * step] for column in range(side)]
+        column = [[origin[1] + index * step, origin[0] + row_index * step] for row_index in range(side)]
+        network.add_way(row, {"highway": highway, "oneway": oneway})
+        network.add_way(column, {"highway": highway, "oneway": oneway})
+    network.prepare()
+    return network, [(origin[0] + (side - 1) * step * rng.random(), origin[1] + (side - 1) * step * rng.random())
+                     for _ in range(200)]
+
+
+def bench_road_network_route(param: int, rng: random.Random, opts) -> CaseResult:
+    # Graph size grows with the sweep; each call routes ten random pairs.
+    side = min(200, max(10, int(param ** 0.5) * 6))
+    network, points = _grid_road_network(side, rng)
+    pairs = [(points[2 * index], points[2 * index + 1]) for index in range(10)]
+
+    def run() -> None:
+        for (origin_lat, origin_lng), (dest_lat, dest_lng) in pairs:
+            network.route(origin_lat, origin_lng, dest_lat, dest_lng)
+
+    seconds, calls = _time_callable(run, opts.min_time, opts.max_calls)
+    return CaseResult("road_network_route", side * side, seconds, calls)
+
+
+def bench_road_network_matrix(param: int, rng: random.Random, opts) -> CaseResult:
+    # One buyer against ``param`` suppliers on a 60 x 60 grid, as in matching.
+    network, points = _grid_road_network(60, rng)
+    destinations = [points[index % len(points)] for index in range(param)]
+
+    seconds, calls = _time_callable(
+        lambda: network.matrix([points[0]], destinations), opts.min_time, opts.max_calls
+    )
+    return CaseResult("road_network_matrix", param, seconds, calls)
+
+
+def bench_solve_vrp(param: int, rng: random.Random, opts) -> CaseResult:
+    from backend.services.routing_service import _fallback_duration_matrix, solve_vrp
+
+    pairs = max(1, (param - 1) // 2)
+    # Metro-scale spread keeps every instance feasible within the time windows.
+    locations = _random_points(rng, 1 + pairs * 2, spread=0.1)
+    matrix = _fallback_duration_matrix(locations)
+    pickups_deliveries = [(1 + 2 * index, 2 + 2 * index) for index in range(pairs)]
+    time_windows = [(0, 7 * 24 * 60 * 60)] * len(locations)
+
+    routes: List[List[int]] = []
+
+    def run() -> None:
+        routes[:] = solve_vrp(
+            matrix,
+            pickups_deliveries,
+            time_windows,
+            num_vehicles=min(3, pairs),
+            time_limit_seconds=opts.vrp_time_limit,
+            solution_limit=opts.vrp_solution_limit,
+        )
+
+    # Guided local search would run to any time limit it is given; stopping
+    # after a fixed number of solutions makes each solve the same work, so
+    # wall time compares across runs. The route cost catches quality
+    # regressions.
+    seconds, calls = _time_callable(run, opts.min_time, opts.max_calls)
+    cost = sum(matrix[a][b] for route in routes for a, b in zip(route, route[1:]))
+    return CaseResult("solve_vrp", len(locations), seconds, calls, cost=cost)
+
+
+def bench_find_eligible_suppliers(params: Sequence[int], rng: random.Random, opts) -> List[CaseResult]:
+    return asyncio.run(_find_eligible_suppliers_async(params, rng, opts))
+
+
+async def _find_eligible_suppliers_async(params: Sequence[int], rng: random.Random, opts) -> List[CaseResult]:
+    from sqlalchemy import delete, insert
+
+    import backend.models  # noqa: F401
+    from backend.database import AsyncSessionLocal, close_db, init_db
+    from backend.models.inventory import PartCategory, PartsCatalog
+    from backend.models.orders import OrderItem
+    from backend.models.users import BuyerProfile, SupplierProfile
+    from backend.services.matching_service import find_eligible_suppliers
+
+    await init_db()
+    results: List[CaseResult] = []
+    buyer = BuyerProfile(id=1, user_id=1, factory_name="Bench", latitude=19.076, longitude=72.8777)
+    item = OrderItem(id=1, order_id=1, part_number="SKF-6205", quantity=1)
+
+    async with AsyncSessionLocal() as session:
+        # Foreign keys are enforced; the catalog rows point at this category.
+        session.add(PartCategory(id=1, name="Bearings"))
+        await session.commit()
+        for param in params:
+            await session.execute(delete(PartsCatalog))
+            await session.execute(delete(SupplierProfile))
+            suppliers = []
+            catalog = []
+            for index, (lat, lng) in enumerate(_random_points(rng, param)):
+                suppliers.append(
+                    {
+                        "id": index + 1,
+                        "business_name": f"Supplier {index}",
+                        "service_radius_km": 150.0,
+                        "latitude": lat,
+                        "longitude": lng,
+                        "reliability_score": 0.7,
+                    }
+                )
+                catalog.append(
+                    {
+                        "id": index + 1,
+                        "supplier_id": index + 1,
+                        "category_id": 1,
+                        "part_name": "Bench part",
+                        "part_number": "SKF-6205",
+                        "normalized_part_number": "SKF6205",
+                        "unit_price": 100.0,
+                        "quantity_in_stock": 10,
+                        "min_order_quantity": 1,
+                        "lead_time_hours": 8,
+                    }
+                )
+            await session.execute(insert(SupplierProfile), suppliers)
+            await session.execute(insert(PartsCatalog), catalog)
+            await session.commit()
+
+            samples: List[float] = []
+            started = time.perf_counter()
+            while (time.perf_counter() - started) < opts.min_time and len(samples) < opts.max_calls or not samples:
+                call_start = time.perf_counter()
+                await find_eligible_suppliers(session, item, buyer)
+                samples.append(time.perf_counter() - call_start)
+                session.expunge_all()
+            results.append(CaseResult("find_eligible_suppliers", param, statistics.median(samples), len(samples)))
+
+    await close_db()
+    return results
+
+
+SYNC_CASES: Dict[str, Tuple[Callable, str]] = {
+    "haversine_km": (bench_haversine, "candidates"),
+    "normalize_part_number": (bench_normalize_part_number, "candidates"),
+    "score_candidates": (bench_score_candidates, "candidates"),
+    "apply_single_supplier_bonus": (bench_single_supplier_bonus, "candidates"),
+    "_fallback_duration_matrix": (bench_fallback_duration_matrix, "candidates"),
+    "road_network_route": (bench_road_network_route, "candidates"),
+    "road_network_matrix": (bench_road_network_matrix, "candidates"),
+    "solve_vrp": (bench_solve_vrp, "vrp"),
+}
+
+
+def run_suite(opts) -> List[CaseResult]:
+    candidate_sweep = CANDIDATE_SWEEP if opts.full else QUICK_CANDIDATE_SWEEP
+    vrp_sweep = VRP_NODE_SWEEP if opts.full else QUICK_VRP_NODE_SWEEP
+    results: List[CaseResult] = []
+
+    for name, (bench, sweep_kind) in SYNC_CASES.items():
+        if opts.filter and opts.filter not in name:
+            continue
+        sweep = vrp_sweep if sweep_kind == "vrp" else candidate_sweep
+        for param in sweep:
+            result = bench(param, random.Random(opts.seed), opts)
+            results.append(result)
+            _print_result(result)
+
+    if not opts.filter or opts.filter in "find_eligible_suppliers":
+        for result in bench_find_eligible_suppliers(candidate_sweep, random.Random(opts.seed), opts):
+            results.append(result)
+            _print_result(result)
+
+    return results
+
+
+def _print_result(result: CaseResult) -> None:
+    cost = f"  cost {result.cost:,.0f}" if result.cost is not None else ""
+    print(f"{result.key:<40}{result.seconds_per_call * 1e6:>14.1f} us/call  ({result.calls} calls){cost}")
+
+
+def load_baseline(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle).get("results", {})
+
+
+def save_baseline(path: Path, results: List[CaseResult]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {
+            result.key: {"seconds_per_call": result.seconds_per_call, "cost": result.cost}
+            for result in results
+        },
+    }
+    with path.open("w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+
+
+def find_regressions(results: List[CaseResult], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions: List[str] = []
+    for result in results:
+        previous = baseline.get(result.key)
+        if not previous:
+            continue
+        before = float(previous.get("seconds_per_call") or 0.0)
+        if before > 0 and result.seconds_per_call > before * (1 + threshold):
+            regressions.append(
+                f"{result.key}: {before * 1e6:.1f} -> {result.seconds_per_call * 1e6:.1f} us/call "
+                f"(+{(result.seconds_per_call / before - 1) * 100:.0f}%)"
+            )
+        previous_cost = previous.get("cost")
+        if previous_cost and result.cost is not None and result.cost > previous_cost * (1 + threshold):
+            regressions.append(f"{result.key}: route cost {previous_cost:,.0f} -> {result.cost:,.0f}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="Run the full sweeps (10k candidates, 200 VRP nodes)")
+    parser.add_argument("--filter", help="Only run kernels whose name contains this string")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend per case")
+    parser.add_argument("--max-calls", type=int, default=200)
+    parser.add_argument("--vrp-solution-limit", type=int, default=100, help="OR-Tools solutions per VRP solve")
+    parser.add_argument(
+        "--vrp-time-limit", type=int, default=60, help="OR-Tools time limit per VRP solve, a safety cap only"
+    )
+    parser.add_argument("--seed", type=int, default=1234)
+    opts = parser.parse_args()
+
+    # Keep ORS out of the measurements.
+    os.environ.pop("ORS_API_KEY", None)
+    # Before any case imports backend.database, which reads DATABASE_URL once.
+    db_path = configure_temp_database(prefix="sparehub-kernels-")
+    try:
+        results = run_suite(opts)
+    finally:
+        remove_database_file(db_path)
+
+    if opts.save_baseline:
+        save_baseline(opts.baseline, results)
+        print(f"baseline written to {opts.baseline}")
+        return
+
+    baseline = load_baseline(opts.baseline)
+    if not baseline:
+        print("no baseline recorded; run with --save-baseline to create one")
+        return
+
+    regressions = find_regressions(results, baseline, opts.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {opts.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        raise SystemExit(1)
+    print(f"\nno regressions beyond {opts.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""End-to-end load-test harness.
+
+Usage (from the repository root that contains ``backend/``):
+
+    python -m backend.benchmarks.load_test --suppliers 200 --catalog 20000 --orders 2000 --requests 2000
+
+Generates a synthetic dataset in a throwaway SQLite database (or uses
+``--database-url``), then drives the real FastAPI app through an in-process
+ASGI transport with a weighted mix of order placement, matching, search,
+dashboards and notification polling. Reports p50/p95/p99 latency and
+throughput per endpoint.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+from backend.benchmarks.common import configure_temp_database, percentile, remove_database_file
+from backend.benchmarks.dataset import DatasetSpec, DatasetSummary
+
+DEFAULT_MIX: Dict[str, float] = {
+    "place_order": 0.10,
+    "match_order": 0.05,
+    "search": 0.25,
+    "order_list": 0.15,
+    "dashboard": 0.05,
+    "unread_count": 0.40,
+}
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    status_codes: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class LoadHarness:
+    def __init__(self, client, summary: DatasetSummary, rng: random.Random):
+        from backend.middleware.auth import create_access_token
+
+        self.client = client
+        self.summary = summary
+        self.rng = rng
+        self.stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.admin_headers = self._headers(create_access_token({"sub": summary.admin_user_id, "role": "admin"}))
+        self.buyer_headers = {
+            user_id: self._headers(create_access_token({"sub": user_id, "role": "buyer"}))
+            for user_id in summary.buyer_user_ids
+        }
+        self.placed_order_ids: List[int] = list(summary.order_ids)
+
+    @staticmethod
+    def _headers(token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {token}"}
+
+    def _part_number(self) -> str:
+        return self.rng.choices(self.summary.part_numbers, weights=self.summary.part_weights, k=1)[0]
+
+    async def _timed(self, name: str, request: Callable[[], Awaitable]) -> None:
+        started = time.perf_counter()
+        try:
+            response = await request()
+        except Exception:
+            self.stats[name].errors += 1
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        entry = self.stats[name]
+        entry.latencies_ms.append(elapsed_ms)
+        entry.status_codes[response.status_code] += 1
+        if response.status_code >= 400:
+            entry.errors += 1
+        elif name == "place_order":
+            self.placed_order_ids.append(int(response.json()["id"]))
+
+    async def place_order(self) -> None:
+        buyer_user_id = self.rng.choice(self.summary.buyer_user_ids)
+        items = [
+            {
+                "category_id": self.rng.choice(self.summary.category_ids),
+                "part_number": self._part_number(),
+                "quantity": self.rng.randint(1, 10),
+            }
+            for _ in range(self.rng.randint(1, 4))
+        ]
+        payload = {"items": items, "urgency": self.rng.choice(["standard", "urgent", "critical"])}
+        await self._timed(
+            "place_order",
+            lambda: self.client.post("/api/orders/", json=payload, headers=self.buyer_headers[buyer_user_id]),
+        )
+
+    async def match_order(self) -> None:
+        if not self.placed_order_ids:
+            return
+        order_id = self.rng.choice(self.placed_order_ids)
+        await self._timed(
+            "match_order",
+            lambda: self.client.post(f"/api/matching/order/{order_id}", headers=self.admin_headers),
+        )
+
+    async def search(self) -> None:
+        buyer_user_id = self.rng.choice(self.summary.buyer_user_ids)
+        lat, lng = self.summary.buyer_coords[buyer_user_id]
+        params = {"q": self._part_number(), "lat": lat, "lng": lng, "radius_km": 150}
+        await self._timed("search", lambda: self.client.get("/api/inventory/search", params=params))
+
+    async def order_list(self) -> None:
+        buyer_user_id = self.rng.choice(self.summary.buyer_user_ids)
+        await self._timed(
+            "order_list",
+            lambda: self.client.get(
+                "/api/orders/", params={"page": 1, "page_size": 20}, headers=self.buyer_headers[buyer_user_id]
+            ),
+        )
+
+    async def dashboard(self) -> None:
+        await self._timed("dashboard", lambda: self.client.get("/api/admin/dashboard", headers=self.admin_headers))
+
+    async def unread_count(self) -> None:
+        buyer_user_id = self.rng.choice(self.summary.buyer_user_ids)
+        await self._timed(
+            "unread_count",
+            lambda: self.client.get("/api/notifications/unread-count", headers=self.buyer_headers[buyer_user_id]),
+        )
+
+    async def run(self, total_requests: int, concurrency: int, mix: Dict[str, float]) -> float:
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        plan = self.rng.choices(names, weights=weights, k=total_requests)
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for name in plan:
+            queue.put_nowait(name)
+
+        async def worker() -> None:
+            while True:
+                try:
+                    name = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await getattr(self, name)()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def format_report(stats: Dict[str, EndpointStats], elapsed_s: float) -> str:
+    header = f"{'endpoint':<14}{'count':>7}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+    total = 0
+    for name in sorted(stats):
+        entry = stats[name]
+        count = len(entry.latencies_ms)
+        total += count
+        lines.append(
+            f"{name:<14}{count:>7}{entry.errors:>8}{count / elapsed_s:>9.1f}"
+            f"{percentile(entry.latencies_ms, 50):>9.1f}{percentile(entry.latencies_ms, 95):>9.1f}"
+            f"{percentile(entry.latencies_ms, 99):>9.1f}"
+        )
+    lines.append("-" * len(header))
+    lines.append(f"{'total':<14}{total:>7}{'':>8}{total / elapsed_s:>9.1f}   elapsed {elapsed_s:.2f}s")
+    return "\n".join(lines)
+
+
+def _parse_mix(raw: str | None) -> Dict[str, float]:
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix: Dict[str, float] = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown workload {name!r}; expected one of {sorted(DEFAULT_MIX)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+async def _main(args: argparse.Namespace) -> None:
+    import httpx
+
+    from backend.benchmarks.dataset import generate_dataset
+    from backend.database import close_db
+    from backend.main import fastapi_app
+
+    spec = DatasetSpec(
+        suppliers=args.suppliers,
+        catalog_rows=args.catalog,
+        buyers=args.buyers,
+        orders=args.orders,
+        seed=args.seed,
+    )
+    summary = await generate_dataset(spec)
+    print(f"dataset loaded in {summary.elapsed_s:.2f}s: {dict(summary.rows_inserted)}")
+
+    transport = httpx.ASGITransport(app=fastapi_app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120.0) as client:
+            harness = LoadHarness(client, summary, random.Random(args.seed))
+            elapsed = await harness.run(args.requests, args.concurrency, _parse_mix(args.mix))
+        print(format_report(harness.stats, elapsed))
+    finally:
+        # Let background work spawned by event handlers settle before disposing the engine.
+        await asyncio.sleep(0.5)
+        await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suppliers", type=int, default=50)
+    parser.add_argument("--catalog", type=int, default=2000)
+    parser.add_argument("--buyers", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mix", help="Comma-separated workload weights, e.g. search=3,unread_count=5")
+    parser.add_argument("--database-url", help="Load into this database instead of a throwaway SQLite file")
+    args = parser.parse_args()
+
+    db_path = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        db_path = configure_temp_database(prefix="sparehub-load-")
+    try:
+        asyncio.run(_main(args))
+    finally:
+        if db_path:
+            remove_database_file(db_path)
+
+
+if __name__ == "__main__":
+    main()
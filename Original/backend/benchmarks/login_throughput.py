@@ -0,0 +1,140 @@
+"""Login throughput and event-loop stall benchmark.
+
+Usage (from the repository root that contains ``backend/``):
+
+    python -m backend.benchmarks.login_throughput --logins 200 --concurrency 20
+
+Runs against a throwaway SQLite database and drives ``POST /api/auth/login``
+through an in-process ASGI transport while a heartbeat task measures how long
+the event loop is blocked.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from backend.benchmarks.common import configure_temp_database, percentile, remove_database_file
+
+
+async def _measure_loop_lag(stop: asyncio.Event, interval: float, samples: List[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval) * 1000.0)
+
+
+async def _run_with_heartbeat(work: Callable[[], Awaitable[None]]) -> dict:
+    stop = asyncio.Event()
+    lag_samples: List[float] = []
+    heartbeat = asyncio.create_task(_measure_loop_lag(stop, 0.005, lag_samples))
+    started = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await heartbeat
+    return {
+        "elapsed_s": elapsed,
+        "max_loop_lag_ms": max(lag_samples, default=0.0),
+        "p95_loop_lag_ms": percentile(lag_samples, 95),
+    }
+
+
+async def _kernel_comparison(verifications: int, concurrency: int) -> None:
+    from backend.middleware.auth import hash_password, verify_password, verify_password_async
+
+    hashed = hash_password("password123")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def inline_verify() -> None:
+        async with semaphore:
+            verify_password("password123", hashed)
+            await asyncio.sleep(0)
+
+    async def offloaded_verify() -> None:
+        async with semaphore:
+            await verify_password_async("password123", hashed)
+
+    for label, factory in (("inline", inline_verify), ("offloaded", offloaded_verify)):
+        async def work() -> None:
+            await asyncio.gather(*(factory() for _ in range(verifications)))
+
+        stats = await _run_with_heartbeat(work)
+        print(
+            f"{label:>10}: {verifications / stats['elapsed_s']:8.1f} verify/s  "
+            f"max loop lag {stats['max_loop_lag_ms']:7.1f} ms  "
+            f"p95 loop lag {stats['p95_loop_lag_ms']:7.1f} ms"
+        )
+
+
+async def _login_benchmark(users: int, logins: int, concurrency: int) -> None:
+    import httpx
+
+    import backend.models  # noqa: F401
+    from backend.database import AsyncSessionLocal, close_db, init_db
+    from backend.main import fastapi_app
+    from backend.middleware.auth import hash_password
+    from backend.models.user import User
+
+    await init_db()
+    hashed = hash_password("password123")
+    async with AsyncSessionLocal() as session:
+        for index in range(users):
+            session.add(User(email=f"bench{index}@sparehub.example.com", password_hash=hashed, role="buyer"))
+        await session.commit()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one_login(index: int) -> None:
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/auth/login",
+                    json={"email": f"bench{index % users}@sparehub.example.com", "password": "password123"},
+                )
+                latencies.append((time.perf_counter() - started) * 1000.0)
+                if response.status_code != 200:
+                    failures += 1
+
+        async def work() -> None:
+            await asyncio.gather(*(one_login(i) for i in range(logins)))
+
+        stats = await _run_with_heartbeat(work)
+
+    await close_db()
+    print(
+        f"{'login':>10}: {logins / stats['elapsed_s']:8.1f} login/s  "
+        f"p50 {statistics.median(latencies):7.1f} ms  p95 {percentile(latencies, 95):7.1f} ms  "
+        f"max loop lag {stats['max_loop_lag_ms']:7.1f} ms  failures {failures}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    db_path = configure_temp_database()
+    try:
+        print(f"bcrypt rounds={os.getenv('BCRYPT_ROUNDS', '12')} workers={os.getenv('PASSWORD_HASH_WORKERS', '4')}")
+        asyncio.run(_kernel_comparison(args.logins, args.concurrency))
+        asyncio.run(_login_benchmark(args.users, args.logins, args.concurrency))
+    finally:
+        remove_database_file(db_path)
+
+
+if __name__ == "__main__":
+    main()
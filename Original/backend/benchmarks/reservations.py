@@ -0,0 +1,137 @@
+"""Stock reservation throughput and oversell check.
+
+Usage (from the repository root that contains ``backend/``):
+
+    python -m backend.benchmarks.reservations --confirmations 2000 --concurrency 50 --parts 5
+
+Runs hold-then-commit cycles (one short transaction each, as a confirmation
+does) against a few hot catalog rows in a throwaway SQLite database. Reports
+confirmations per second and latency, then checks that the stock granted
+never exceeds the stock available.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from backend.benchmarks.common import configure_temp_database, percentile, remove_database_file
+
+
+async def _main(args: argparse.Namespace) -> None:
+    import backend.models  # noqa: F401
+    from sqlalchemy import func, insert, select
+
+    from backend.database import AsyncSessionLocal, Base, close_db, engine
+    from backend.models.inventory import PartCategory, PartsCatalog, StockReservation
+    from backend.models.orders import Order, OrderAssignment, OrderItem
+    from backend.models.users import BuyerProfile, SupplierProfile
+    from backend.services.reservation_service import commit_reservation, hold_stock
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Foreign keys are enforced, so holds need real assignments behind them.
+    async with AsyncSessionLocal() as session:
+        session.add(PartCategory(id=1, name="Bearings"))
+        session.add(BuyerProfile(id=1, factory_name="Plant", latitude=12.97, longitude=77.59))
+        session.add(Order(id=1, buyer_id=1, status="MATCHED"))
+        session.add(OrderItem(id=1, order_id=1, category_id=1, part_number="HOT", quantity=1, status="MATCHED"))
+        for part_id in range(1, args.parts + 1):
+            session.add(
+                SupplierProfile(id=part_id, business_name=f"Supplier {part_id}", latitude=12.98, longitude=77.6)
+            )
+            session.add(
+                PartsCatalog(
+                    id=part_id,
+                    supplier_id=part_id,
+                    category_id=1,
+                    part_name=f"Hot part {part_id}",
+                    part_number=f"HOT-{part_id}",
+                    normalized_part_number=f"HOT{part_id}",
+                    unit_price=100.0,
+                    quantity_in_stock=args.stock,
+                    lead_time_hours=4,
+                )
+            )
+        await session.flush()
+        await session.execute(
+            insert(OrderAssignment),
+            [
+                {
+                    "id": assignment_id,
+                    "order_item_id": 1,
+                    "supplier_id": assignment_id % args.parts + 1,
+                    "catalog_id": assignment_id % args.parts + 1,
+                    "status": "PROPOSED",
+                }
+                for assignment_id in range(1, args.confirmations + 1)
+            ],
+        )
+        await session.commit()
+
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for assignment_id in range(1, args.confirmations + 1):
+        queue.put_nowait(assignment_id)
+    latencies_ms: List[float] = []
+    granted = 0
+
+    async def worker() -> None:
+        nonlocal granted
+        while True:
+            try:
+                assignment_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            catalog_id = assignment_id % args.parts + 1
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as session:
+                if await hold_stock(session, catalog_id, 1, assignment_id) is not None:
+                    await session.flush()
+                    if await commit_reservation(session, assignment_id, catalog_id, 1):
+                        granted += 1
+                await session.commit()
+            latencies_ms.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as session:
+        negative = await session.scalar(
+            select(func.count()).select_from(PartsCatalog).where(PartsCatalog.quantity_in_stock < 0)
+        )
+        committed = await session.scalar(
+            select(func.count()).select_from(StockReservation).where(StockReservation.status == "COMMITTED")
+        )
+    await close_db()
+
+    available = args.parts * args.stock
+    print(f"confirmations  {args.confirmations} ({granted} granted, {available} units available)")
+    print(f"throughput     {args.confirmations / elapsed:.1f}/s over {elapsed:.2f}s")
+    print(f"latency ms     p50 {percentile(latencies_ms, 50):.1f}  p95 {percentile(latencies_ms, 95):.1f}  "
+          f"p99 {percentile(latencies_ms, 99):.1f}")
+    oversold = granted > available or committed != granted or negative
+    print(f"oversold       {'YES' if oversold else 'no'}")
+    if oversold:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--confirmations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--parts", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=150, help="Units per hot part")
+    args = parser.parse_args()
+
+    db_path = configure_temp_database(prefix="sparehub-reserve-")
+    try:
+        asyncio.run(_main(args))
+    finally:
+        remove_database_file(db_path)
+
+
+if __name__ == "__main__":
+    main()
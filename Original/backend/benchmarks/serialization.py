@@ -0,0 +1,249 @@
+"""Bytes and CPU per response for the REST and Socket.IO serializers.
+
+Usage (from the repository root that contains ``backend/``):
+
+    python -m backend.benchmarks.serialization
+    python -m backend.benchmarks.serialization --orders 50 --catalog 500 --min-time 1.0
+
+Builds representative payloads (an order list page, a catalog search result,
+a delivery route line and a notification) and encodes each the way the API
+does:
+
+- ``stdlib``: jsonable_encoder + json.dumps, FastAPI's path before it gained
+  the pydantic fast path and still the path for untyped routes
+- ``orjson``: jsonable_encoder + orjson (the ``OrjsonResponse`` default)
+- ``typed``: a pre-built TypeAdapter's ``dump_json`` (``typed_response``)
+
+and reports CPU time per encode, body size, and gzip/brotli size and CPU.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.middleware.compression import RESPONSE_BROTLI_QUALITY, RESPONSE_GZIP_LEVEL, brotli
+from backend.schemas.inventory import CATALOG_ENTRY_LIST_ADAPTER, CatalogEntryResponse
+from backend.schemas.order import (
+    ORDERS_LIST_ADAPTER,
+    OrderAssignmentResponse,
+    OrderHistoryEntry,
+    OrderItemResponse,
+    OrderResponse,
+    OrdersListResponse,
+)
+from backend.serialization import OrjsonResponse, SocketJson
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def _orders_page(orders: int) -> OrdersListResponse:
+    now = datetime(2026, 3, 2, 9, 30)
+    items = []
+    for order_id in range(1, orders + 1):
+        order_items = [
+            OrderItemResponse(
+                id=order_id * 10 + index,
+                order_id=order_id,
+                category_id=index + 1,
+                part_number=f"SKF-62{order_id % 90:02d}-{index}",
+                part_description="Deep groove ball bearing, sealed",
+                quantity=4 + index,
+                status="MATCHED",
+                category_name="Bearings",
+                assignments=[
+                    OrderAssignmentResponse(
+                        id=order_id * 100 + index * 10 + rank,
+                        order_item_id=order_id * 10 + index,
+                        supplier_id=rank + 1,
+                        catalog_id=order_id * 7 + rank,
+                        assigned_price=118.5 + rank,
+                        match_score=0.91 - rank * 0.07,
+                        status="PROPOSED",
+                        created_at=now,
+                        supplier_business_name=f"Supplier {rank + 1} Industrial Supply",
+                        supplier_user_id=rank + 11,
+                        supplier_latitude=12.97 + rank * 0.01,
+                        supplier_longitude=77.59 + rank * 0.01,
+                        distance_km=3.4 + rank,
+                    )
+                    for rank in range(2)
+                ],
+            )
+            for index in range(3)
+        ]
+        items.append(
+            OrderResponse(
+                id=order_id,
+                buyer_id=1,
+                status="MATCHED",
+                urgency="standard",
+                required_delivery_date=now + timedelta(days=2),
+                created_at=now,
+                updated_at=now,
+                buyer_factory_name="Peenya Works",
+                buyer_user_id=2,
+                buyer_latitude=13.03,
+                buyer_longitude=77.52,
+                total_items=len(order_items),
+                total_value=2140.0,
+                items=order_items,
+                history=[OrderHistoryEntry(to_status="PLACED", timestamp=now, changed_by=2)],
+            )
+        )
+    return OrdersListResponse(items=items, page=1, page_size=orders, total=orders * 10)
+
+
+def _catalog_search(entries: int) -> List[CatalogEntryResponse]:
+    now = datetime(2026, 3, 2, 9, 30)
+    return [
+        CatalogEntryResponse(
+            id=index,
+            supplier_id=index % 25 + 1,
+            category_id=index % 8 + 1,
+            part_name=f"Bearing {index}",
+            part_number=f"SKF-{6200 + index}",
+            normalized_part_number=f"SKF{6200 + index}",
+            brand="SKF",
+            unit_price=12.5 + index % 40,
+            quantity_in_stock=index % 90,
+            min_order_quantity=1,
+            lead_time_hours=4,
+            created_at=now,
+            updated_at=now,
+            supplier_business_name=f"Supplier {index % 25 + 1}",
+            category_name="Bearings",
+            distance_km=round(index * 0.13, 2),
+        )
+        for index in range(entries)
+    ]
+
+
+def _route_line(points: int) -> Dict:
+    coordinates, lat, lng = [], 12.90, 77.60
+    for index in range(points):
+        heading = math.sin(index / 15.0)
+        lat += math.cos(heading) * 0.0003
+        lng += math.sin(heading) * 0.0003
+        coordinates.append([round(lng, 6), round(lat, 6)])
+    return {"type": "LineString", "coordinates": coordinates}
+
+
+def _notification() -> Dict:
+    return {
+        "event_type": "ASSIGNMENT_PROPOSED",
+        "entity_type": "order_assignment",
+        "entity_id": 4411,
+        "metadata": {"order_id": 812, "part_number": "SKF-6205", "quantity": 4, "supplier_id": 7},
+        "timestamp": "2026-03-02T09:30:00+00:00",
+        "target_user_ids": [2, 11, 12],
+        "title": "New assignment proposed",
+        "message": "Order #812: 4 x SKF-6205 proposed to you",
+        "notification_id": 90211,
+        "user_id": 11,
+        "is_read": False,
+        "created_at": "2026-03-02T09:30:00+00:00",
+    }
+
+
+def _cpu_per_call(func: Callable[[], Any], min_time: float) -> float:
+    calls = 0
+    started = time.process_time()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.process_time() - started
+        if elapsed >= min_time and calls >= 5:
+            return elapsed / calls
+
+
+def _stdlib_http(content: Any) -> bytes:
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_http(content: Any) -> bytes:
+    return OrjsonResponse(None).render(jsonable_encoder(content))
+
+
+def _encoders(payload: Any, adapter=None) -> List[Tuple[str, Callable[[], bytes]]]:
+    if adapter is None:
+        return [("stdlib", lambda: _stdlib_http(payload)), ("orjson", lambda: _orjson_http(payload))]
+
+    def validated() -> Any:
+        # What FastAPI hands the response class for a typed route.
+        return adapter.dump_python(adapter.validate_python(payload), mode="json")
+
+    return [
+        ("stdlib", lambda: _stdlib_http(validated())),
+        ("orjson", lambda: _orjson_http(validated())),
+        ("typed", lambda: adapter.dump_json(payload)),
+    ]
+
+
+def _compressors() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    compressors = [("gzip", lambda body: gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL))]
+    if brotli is not None:
+        compressors.append(("br", lambda body: brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)))
+    return compressors
+
+
+def _report(name: str, encoders: List[Tuple[str, Callable[[], bytes]]], min_time: float) -> None:
+    for encoder_name, encode in encoders:
+        body = encode()
+        cpu = _cpu_per_call(encode, min_time)
+        line = f"{name:<16}{encoder_name:<10}{len(body):>10}{cpu * 1e3:>10.3f}"
+        for _, compress in _compressors():
+            compressed = compress(body)
+            line += f"{len(compressed):>10}{_cpu_per_call(lambda: compress(body), min_time / 4) * 1e3:>10.3f}"
+        print(line)
+
+
+def _report_socket(min_time: float) -> None:
+    payload = _notification()
+    encoders: List[Tuple[str, Callable[[], Any]]] = [
+        ("stdlib", lambda: json.dumps(payload, separators=(",", ":"))),
+        ("orjson", lambda: SocketJson.dumps(payload)),
+    ]
+    if msgpack is not None:
+        encoders.append(("msgpack", lambda: msgpack.packb(payload)))
+    for encoder_name, encode in encoders:
+        body = encode()
+        size = len(body.encode("utf-8") if isinstance(body, str) else body)
+        print(f"{'notification':<16}{encoder_name:<10}{size:>10}{_cpu_per_call(encode, min_time) * 1e3:>10.4f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=20, help="Orders on the list page")
+    parser.add_argument("--catalog", type=int, default=200, help="Catalog search results")
+    parser.add_argument("--route-points", type=int, default=900)
+    parser.add_argument("--min-time", type=float, default=0.3, help="CPU seconds per measurement")
+    args = parser.parse_args(argv)
+
+    header = f"{'payload':<16}{'encoder':<10}{'bytes':>10}{'cpu ms':>10}"
+    for compressor_name, _ in _compressors():
+        header += f"{compressor_name + ' B':>10}{compressor_name + ' ms':>10}"
+    print(header)
+    print("-" * len(header))
+    _report("order_list", _encoders(_orders_page(args.orders), ORDERS_LIST_ADAPTER), args.min_time)
+    _report("catalog_search", _encoders(_catalog_search(args.catalog), CATALOG_ENTRY_LIST_ADAPTER), args.min_time)
+    _report("route_geometry", _encoders(_route_line(args.route_points)), args.min_time)
+    _report_socket(args.min_time)
+    if brotli is None:
+        print("(brotli not installed: br columns skipped)")
+    if msgpack is None:
+        print("(msgpack not installed: Socket.IO msgpack row skipped)")
+
+
+if __name__ == "__main__":
+    main()
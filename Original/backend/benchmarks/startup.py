@@ -0,0 +1,157 @@
+"""Cold-start cost of an API worker: module imports and schema bootstrap.
+
+Usage (from the repository root that contains ``backend/``):
+
+    python -m backend.benchmarks.startup
+    python -m backend.benchmarks.startup --runs 7 --top 25
+
+Every measurement runs in a fresh interpreter, as a new worker would:
+
+- ``imports``: ``python -X importtime -c "import backend.main"``; reports the
+  median import time of each backend module (its own code, children
+  excluded) and of each third-party package (all of its submodules)
+- ``boot``: import plus ``init_db`` against a new SQLite file (first boot)
+  and again against the same file once its schema version is recorded
+  (restart)
+- ``deferred``: what each lazily imported dependency costs on first use
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from backend.benchmarks.common import configure_temp_database, remove_database_file
+
+# Imported on first use rather than at startup.
+DEFERRED_MODULES = (
+    "ortools.sat.python.cp_model",
+    "ortools.constraint_solver.pywrapcp",
+    "pyarrow.parquet",
+    "scipy.sparse.csgraph",
+    "httpx",
+)
+
+_BOOT_SCRIPT = """
+import time
+started = time.perf_counter()
+import backend.main
+imported = time.perf_counter()
+import asyncio
+from backend.database import close_db, init_db
+
+async def boot():
+    ran = await init_db()
+    await close_db()
+    return ran
+
+ran = asyncio.run(boot())
+print(imported - started, time.perf_counter() - imported, int(ran))
+"""
+
+_DEFERRED_SCRIPT = """
+import importlib, time
+import backend.main
+started = time.perf_counter()
+try:
+    importlib.import_module({module!r})
+except ImportError:
+    print(-1)
+else:
+    print(time.perf_counter() - started)
+"""
+
+
+def _run(code: str, env: Optional[Dict[str, str]] = None, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(command, capture_output=True, text=True, check=True, env=env)
+
+
+def _parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """Total ``backend.main`` import time and seconds attributed per module/package."""
+    costs: Dict[str, float] = defaultdict(float)
+    total = 0.0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = (field.strip() for field in line[len("import time:") :].split("|"))
+        if not self_us.isdigit():
+            continue
+        if name == "backend.main":
+            total = int(cumulative_us) / 1e6
+        key = name if name.startswith("backend.") else name.split(".")[0]
+        costs[key] += int(self_us) / 1e6
+    return total, costs
+
+
+def _report_imports(runs: int, top: int) -> None:
+    totals: List[float] = []
+    per_module: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        total, costs = _parse_importtime(_run("import backend.main", importtime=True).stderr)
+        totals.append(total)
+        for name, seconds in costs.items():
+            per_module[name].append(seconds)
+
+    medians = {name: statistics.median(values + [0.0] * (runs - len(values))) for name, values in per_module.items()}
+    print(f"import backend.main: median {statistics.median(totals) * 1e3:.1f} ms over {runs} runs")
+    print(f"{'module / package':<48}{'ms':>10}")
+    print("-" * 58)
+    for name, seconds in sorted(medians.items(), key=lambda entry: entry[1], reverse=True)[:top]:
+        print(f"{name:<48}{seconds * 1e3:>10.1f}")
+
+
+def _report_boot(runs: int) -> None:
+    first: List[Tuple[float, float]] = []
+    restart: List[Tuple[float, float]] = []
+    for _ in range(runs):
+        path = configure_temp_database(prefix="sparehub-startup-")
+        env = dict(os.environ)
+        try:
+            for samples, expect_ddl in ((first, 1), (restart, 0)):
+                import_s, init_s, ran = _run(_BOOT_SCRIPT, env=env).stdout.split()
+                if int(ran) != expect_ddl:
+                    raise RuntimeError(f"init_db ran DDL={ran}, expected {expect_ddl}")
+                samples.append((float(import_s), float(init_s)))
+        finally:
+            remove_database_file(path)
+
+    print()
+    print(f"{'boot':<24}{'import ms':>12}{'init_db ms':>12}{'total ms':>12}")
+    print("-" * 60)
+    for name, samples in (("first boot (empty db)", first), ("restart (schema current)", restart)):
+        import_ms = statistics.median(sample[0] for sample in samples) * 1e3
+        init_ms = statistics.median(sample[1] for sample in samples) * 1e3
+        print(f"{name:<24}{import_ms:>12.1f}{init_ms:>12.1f}{import_ms + init_ms:>12.1f}")
+
+
+def _report_deferred(runs: int) -> None:
+    print()
+    print(f"{'deferred import':<48}{'ms':>10}")
+    print("-" * 58)
+    for module in DEFERRED_MODULES:
+        samples = [float(_run(_DEFERRED_SCRIPT.format(module=module)).stdout) for _ in range(runs)]
+        if samples[0] < 0:
+            print(f"{module:<48}{'not installed':>10}")
+            continue
+        print(f"{module:<48}{statistics.median(samples) * 1e3:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=20, help="Modules listed in the import breakdown")
+    args = parser.parse_args(argv)
+
+    _report_imports(args.runs, args.top)
+    _report_boot(args.runs)
+    _report_deferred(args.runs)
+
+
+if __name__ == "__main__":
+    main()
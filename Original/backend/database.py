@@ -1,14 +1,66 @@
+import hashlib
+import logging
 import os
+from typing import Optional, Tuple
+
+from sqlalchemy import (
+    CheckConstraint,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    Table,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from backend.middleware.metrics import instrument_engine
+from backend.middleware.query_diagnostics import install_query_diagnostics
+
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./sparehub.db")
+# Bump with model changes that need DDL. A boot that finds this version (and
+# the same model fingerprint) recorded in schema_version skips create_all.
+# Part of the code, not the environment: it describes the models this build
+# ships, so a deployment cannot pin it.
+SCHEMA_VERSION = 14
+
+
+def _sqlite_foreign_keys_on(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def enable_sqlite_foreign_keys(engine) -> None:
+    """Enforce foreign keys, ON DELETE actions included, on every SQLite connection.
+
+    SQLite ignores them unless each connection turns them on; other
+    databases are left as they are.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if sync_engine.dialect.name != "sqlite" or event.contains(sync_engine, "connect", _sqlite_foreign_keys_on):
+        return
+    event.listen(sync_engine, "connect", _sqlite_foreign_keys_on)
+
 
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
     future=True,
 )
+enable_sqlite_foreign_keys(engine)
+instrument_engine(engine)
+install_query_diagnostics(engine)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -18,15 +70,193 @@ AsyncSessionLocal = sessionmaker(
 
 Base = declarative_base()
 
+schema_version_table = Table(
+    "schema_version",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False),
+    Column("fingerprint", String, nullable=False),
+    Column("applied_at", DateTime, server_default=func.current_timestamp(), nullable=False),
+)
+
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
 
-async def init_db():
+def _create_missing_indexes(sync_conn) -> None:
+    # create_all skips tables that already exist, including their indexes.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+def _add_missing_columns(sync_conn) -> None:
+    # create_all does not add columns to existing tables either. Nullable
+    # columns without constraints of their own can be added in place; any
+    # other change still needs a migration.
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable or column.primary_key or column.foreign_keys or column.server_default is not None:
+                logger.warning("Column %s.%s needs a migration", table.name, column.name)
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+
+def _check_constraints(table: Table) -> list:
+    return [constraint for constraint in table.constraints if isinstance(constraint, CheckConstraint)]
+
+
+def _compact(sql: str) -> str:
+    return "".join(sql.split())
+
+
+def _rebuild_sqlite_table(sync_conn, table: Table) -> None:
+    # The documented SQLite recipe: move the old table aside, create the
+    # new one with its indexes, copy the rows and keep the id sequence.
+    # The driver does not wrap DDL in a transaction, so a savepoint keeps
+    # a failed rebuild from leaving the table half moved.
+    inspector = inspect(sync_conn)
+    columns = ", ".join(
+        f'"{column["name"]}"' for column in inspector.get_columns(table.name) if column["name"] in table.columns
+    )
+    sequence = None
+    # sqlite_sequence only exists once a row went into an AUTOINCREMENT table.
+    if table.dialect_options["sqlite"]["autoincrement"] and inspector.has_table("sqlite_sequence"):
+        sequence = sync_conn.scalar(
+            text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": table.name}
+        )
+    old_name = f"{table.name}__rebuild"
+    sync_conn.execute(text("SAVEPOINT rebuild_table"))
+    try:
+        for index in inspector.get_indexes(table.name):
+            sync_conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+        sync_conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"'))
+        table.create(sync_conn)
+        sync_conn.execute(text(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old_name}"'))
+        sync_conn.execute(text(f'DROP TABLE "{old_name}"'))
+        if sequence is not None:
+            sync_conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": table.name})
+            sync_conn.execute(
+                text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                {"name": table.name, "seq": sequence},
+            )
+    except Exception:
+        sync_conn.execute(text("ROLLBACK TO SAVEPOINT rebuild_table"))
+        sync_conn.execute(text("RELEASE SAVEPOINT rebuild_table"))
+        raise
+    sync_conn.execute(text("RELEASE SAVEPOINT rebuild_table"))
+
+
+def _rebuild_changed_checks(sync_conn) -> None:
+    # SQLite cannot alter a CHECK constraint in place, so a table whose
+    # stored definition lacks one of the model's checks (a new allowed
+    # value, say) is rebuilt. Tables other tables reference are left to a
+    # migration: moving them aside would move those references too.
+    if sync_conn.dialect.name != "sqlite":
+        return
+    referenced = {
+        foreign_key.target_fullname.split(".")[0]
+        for table in Base.metadata.sorted_tables
+        for foreign_key in table.foreign_keys
+    }
+    for table in Base.metadata.sorted_tables:
+        checks = _check_constraints(table)
+        if not checks:
+            continue
+        stored = sync_conn.scalar(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+        )
+        if stored is None or all(_compact(str(check.sqltext)) in _compact(stored) for check in checks):
+            continue
+        if table.name in referenced:
+            logger.warning("Check constraints of %s need a migration", table.name)
+            continue
+        logger.info("Rebuilding %s for its changed check constraints", table.name)
+        _rebuild_sqlite_table(sync_conn, table)
+
+
+def schema_fingerprint() -> str:
+    """Hash of the tables, columns, indexes and checks the imported models declare.
+
+    Catches a model change shipped without a SCHEMA_VERSION bump.
+    """
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(f"|{column.name}:{column.type.__class__.__name__}:{column.nullable}".encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(f"|{index.name}:{','.join(column.name for column in index.columns)}".encode())
+        for check in sorted(_check_constraints(table), key=lambda check: check.name or ""):
+            digest.update(f"|{check.name}:{_compact(str(check.sqltext))}".encode())
+    return digest.hexdigest()[:16]
+
+
+async def _recorded_schema() -> Optional[Tuple[int, str]]:
+    try:
+        async with engine.connect() as conn:
+            row = (
+                await conn.execute(
+                    select(schema_version_table.c.version, schema_version_table.c.fingerprint).where(
+                        schema_version_table.c.id == 1
+                    )
+                )
+            ).first()
+    except DBAPIError:
+        # No schema_version table: a new database or one from before the check.
+        return None
+    return (row.version, row.fingerprint) if row is not None else None
+
+
+async def init_db() -> bool:
+    """Bring the schema up to date; returns False when it already was.
+
+    create_all and the index sweep inspect every table, which dominates a
+    cold start on a large schema, so they only run when the recorded
+    version or fingerprint differs from this build's.
+
+    Only a build with a newer version records itself. Two builds sharing a
+    version but not a fingerprint (a model change shipped without a bump)
+    both get their DDL, which only adds, but neither overwrites the other's
+    record, so they do not take turns re-running it for each other. Check
+    constraints are only rebuilt by a build that records itself, so an
+    unbumped build cannot narrow them back either.
+    """
+    fingerprint = schema_fingerprint()
+    recorded = await _recorded_schema()
+    if recorded == (SCHEMA_VERSION, fingerprint):
+        return False
+    if recorded is not None and recorded[0] > SCHEMA_VERSION:
+        # An older build during a rolling deploy; leave the newer schema alone.
+        logger.warning("Database schema version %s is newer than this build's %s", recorded[0], SCHEMA_VERSION)
+        return False
+    record = recorded is None or recorded[0] < SCHEMA_VERSION
+    if not record:
+        logger.warning(
+            "Models changed without a SCHEMA_VERSION bump (recorded %s, this build %s); bump the version",
+            recorded[1],
+            fingerprint,
+        )
+
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_create_missing_indexes)
+        if record:
+            await conn.run_sync(_rebuild_changed_checks)
+            await conn.execute(delete(schema_version_table))
+            await conn.execute(
+                insert(schema_version_table).values(id=1, version=SCHEMA_VERSION, fingerprint=fingerprint)
+            )
+    logger.info("Database schema at version %s (%s)", SCHEMA_VERSION, fingerprint)
+    return True
 
 
 async def close_db():
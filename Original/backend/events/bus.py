@@ -1,19 +1,154 @@
+import asyncio
 import json
+import logging
+import os
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from backend.database import AsyncSessionLocal
-from backend.events.handlers import prepare_event
+from backend.events.handlers import EventHandlingResult, prepare_event
+from backend.middleware.metrics import create_background_task, record_emits
+from backend.services.notification_counters import adjust_unread, remember
 from backend.models.events import EventLog, Notification
 
+logger = logging.getLogger(__name__)
+
 sio_server: Optional[Any] = None
 
+# Events of these types raised within the window are merged per recipient
+# into one digest notification. The window runs from the first buffered event,
+# so no event waits longer than the window (or until the batch fills up).
+NOTIFICATION_COALESCE_WINDOW_MS = int(os.getenv("NOTIFICATION_COALESCE_WINDOW_MS", "2000"))
+NOTIFICATION_COALESCE_MAX_ITEMS = int(os.getenv("NOTIFICATION_COALESCE_MAX_ITEMS", "200"))
+COALESCED_EVENT_TYPES = frozenset(
+    item.strip()
+    for item in os.getenv("COALESCED_EVENT_TYPES", "LOW_STOCK_ALERT").split(",")
+    if item.strip()
+)
+DIGEST_PREVIEW_ITEMS = 3
+
+
+@dataclass
+class _PendingBatch:
+    events: List[Tuple[Dict[str, Any], List[int]]] = field(default_factory=list)
+    timer: Optional[asyncio.Task] = None
+
+
+_pending: Dict[str, _PendingBatch] = {}
+_flush_tasks: set[asyncio.Task] = set()
+
+
+async def emit_event(
+    event_type: str,
+    payload: Dict[str, Any],
+    target_user_ids: List[int],
+    coalesce: Optional[bool] = None,
+):
+    """Persist and push an event; bursty types are buffered and delivered as digests.
+
+    ``coalesce`` overrides the ``COALESCED_EVENT_TYPES`` setting for this call.
+    Buffered calls return without an ``event_id``; the rows are written when
+    the batch flushes.
+    """
+    if coalesce is None:
+        coalesce = event_type in COALESCED_EVENT_TYPES
+    if coalesce and NOTIFICATION_COALESCE_WINDOW_MS > 0:
+        return _buffer_event(event_type, payload, target_user_ids)
+    return await _deliver(event_type, [(payload, target_user_ids)])
+
+
+def _buffer_event(event_type: str, payload: Dict[str, Any], target_user_ids: List[int]) -> Dict[str, Any]:
+    batch = _pending.get(event_type)
+    if batch is None:
+        batch = _pending[event_type] = _PendingBatch()
+        batch.timer = _spawn(_flush_after(event_type, batch, NOTIFICATION_COALESCE_WINDOW_MS / 1000.0))
+    batch.events.append((dict(payload or {}), list(target_user_ids)))
+    if len(batch.events) >= NOTIFICATION_COALESCE_MAX_ITEMS:
+        _pending.pop(event_type, None)
+        if batch.timer is not None:
+            batch.timer.cancel()
+        _spawn(_flush_batch(event_type, batch))
+
+    return {
+        "event_id": None,
+        "event_type": event_type,
+        "coalesced": True,
+        "metadata": payload,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target_user_ids": list(target_user_ids),
+        "notification_ids": [],
+        "notifications_created": 0,
+    }
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = create_background_task(coro)
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
+    return task
 
-async def emit_event(event_type: str, payload: Dict[str, Any], target_user_ids: List[int]):
+
+async def _flush_after(event_type: str, batch: _PendingBatch, delay: float) -> None:
+    await asyncio.sleep(delay)
+    if _pending.get(event_type) is batch:
+        _pending.pop(event_type, None)
+    await _flush_batch(event_type, batch)
+
+
+async def _flush_batch(event_type: str, batch: _PendingBatch) -> None:
+    if not batch.events:
+        return
+    try:
+        await _deliver(event_type, batch.events)
+    except Exception:
+        logger.exception("Failed to deliver %d coalesced %s events", len(batch.events), event_type)
+
+
+async def flush_pending_events() -> None:
+    """Deliver every buffered batch now; called on shutdown and from tests."""
+    batches = list(_pending.items())
+    _pending.clear()
+    for event_type, batch in batches:
+        if batch.timer is not None:
+            batch.timer.cancel()
+        await _flush_batch(event_type, batch)
+    in_flight = [task for task in _flush_tasks if not task.done()]
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+def _digest(event_type: str, results: List[EventHandlingResult]) -> EventHandlingResult:
+    if len(results) == 1:
+        return results[0]
+    count = len(results)
+    preview = "; ".join(result.message for result in results[:DIGEST_PREVIEW_ITEMS])
+    if count > DIGEST_PREVIEW_ITEMS:
+        preview = f"{preview} and {count - DIGEST_PREVIEW_ITEMS} more"
+    targets = sorted({user_id for result in results for user_id in result.target_user_ids})
+    return EventHandlingResult(
+        title=f"{results[0].title} ({count} items)",
+        message=preview,
+        metadata={"digest": True, "count": count, "items": [result.metadata for result in results]},
+        target_user_ids=targets,
+    )
+
+
+async def _deliver(event_type: str, events: List[Tuple[Dict[str, Any], List[int]]]) -> Dict[str, Any]:
     async with AsyncSessionLocal() as session:
-        event_result = await prepare_event(session, event_type, payload, target_user_ids)
+        results = [await prepare_event(session, event_type, payload, targets) for payload, targets in events]
+        event_result = _digest(event_type, results)
         now_iso = datetime.now(timezone.utc).isoformat()
 
+        # Each recipient gets a digest of only the items addressed to them.
+        results_by_user: dict[int, list[EventHandlingResult]] = {}
+        for result in results:
+            for user_id in result.target_user_ids:
+                results_by_user.setdefault(user_id, []).append(result)
+        user_results = {
+            user_id: _digest(event_type, user_items) for user_id, user_items in results_by_user.items()
+        }
+
         notifications_by_user: dict[int, Notification] = {}
 
         event = EventLog(
@@ -24,18 +159,21 @@ async def emit_event(event_type: str, payload: Dict[str, Any], target_user_ids:
         )
         session.add(event)
         for user_id in event_result.target_user_ids:
+            user_result = user_results[user_id]
             notification = Notification(
                 user_id=user_id,
                 event_type=event_type,
-                title=event_result.title,
-                message=event_result.message,
-                metadata_json=json.dumps(event_result.metadata),
+                title=user_result.title,
+                message=user_result.message,
+                metadata_json=json.dumps(user_result.metadata),
             )
             session.add(notification)
             notifications_by_user[user_id] = notification
 
         await session.flush()
+        counter_values = await adjust_unread(session, notifications_by_user.keys(), 1)
         await session.commit()
+    unread_counts = remember(counter_values)
 
     notification_ids = [
         notifications_by_user[user_id].id
@@ -66,9 +204,13 @@ async def emit_event(event_type: str, payload: Dict[str, Any], target_user_ids:
 
         for user_id in event_result.target_user_ids:
             notification = notifications_by_user.get(user_id)
+            user_result = user_results[user_id]
             created_at = notification.created_at.isoformat() if notification and notification.created_at else now_iso
             notification_payload = {
                 **event_payload,
+                "title": user_result.title,
+                "message": user_result.message,
+                "metadata": user_result.metadata,
                 "notification_id": notification.id if notification else None,
                 "user_id": user_id,
                 "is_read": False,
@@ -81,5 +223,17 @@ async def emit_event(event_type: str, payload: Dict[str, Any], target_user_ids:
             )
 
         await sio_server.emit("system_event", event_payload, room="role_admin")
+        record_emits(len(event_result.target_user_ids) + 1)
+
+    await push_unread_counts(unread_counts)
 
     return result_payload
+
+
+async def push_unread_counts(unread_counts: Dict[int, int]) -> None:
+    """Send each user's current unread badge count to their Socket.IO room."""
+    if sio_server is None or not unread_counts:
+        return
+    for user_id, count in unread_counts.items():
+        await sio_server.emit("unread_count", {"count": count}, room=f"user_{user_id}")
+    record_emits(len(unread_counts))
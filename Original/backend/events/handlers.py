@@ -1,4 +1,3 @@
-import asyncio
 from dataclasses import dataclass
 from typing import Any
 
@@ -6,8 +5,10 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import AsyncSessionLocal
+from backend.models.delivery import DeliveryStop
 from backend.models.orders import Order, OrderAssignment, OrderItem
 from backend.models.user import BuyerProfile, SupplierProfile, User
+from backend.services.job_queue import PermanentJobError, commit_callback, enqueue, job_handler, order_priority
 
 
 @dataclass
@@ -92,50 +93,85 @@ def _human_event_title(event_type: str) -> str:
     return event_type.replace("_", " ").title()
 
 
-async def _trigger_matching_for_order(order_id: int):
-    from backend.services.matching_service import match_full_order
+@job_handler("match_order", concurrency=4)
+async def run_match_order_job(payload: dict[str, Any]):
+    from backend.services.matching_coalescer import match_order_coalesced
 
-    await match_full_order(order_id)
+    order_id = _safe_int(payload.get("order_id"))
+    async with AsyncSessionLocal() as session:
+        status = await session.scalar(select(Order.status).where(Order.id == order_id))
+        if status is None:
+            raise PermanentJobError(f"Order {order_id} not found")
+        # A retry after a commit that landed, or a replayed event, finds the
+        # order already past PLACED; matching again would discard proposals.
+        if status != "PLACED":
+            return
+    await match_order_coalesced(order_id, on_commit=commit_callback())
+
+
+@job_handler("plan_delivery", concurrency=2)
+async def run_plan_delivery_job(payload: dict[str, Any]):
+    from backend.services.routing_service import create_single_delivery
 
+    async with AsyncSessionLocal() as session:
+        assignment_id = _safe_int(payload.get("order_assignment_id"))
+        if assignment_id is not None:
+            assignment_ids = [assignment_id]
+        else:
+            result = await session.execute(
+                select(OrderAssignment.id)
+                .join(OrderItem, OrderAssignment.order_item_id == OrderItem.id)
+                .where(OrderItem.order_id == _safe_int(payload.get("order_id")), OrderAssignment.status == "ACCEPTED")
+            )
+            assignment_ids = [int(row[0]) for row in result.all()]
 
-async def _trigger_matching_safely(order_id: int):
-    try:
-        await _trigger_matching_for_order(order_id)
-    except Exception:
-        # Matching service failures should not block event emission.
-        return
+        planned = await session.execute(
+            select(DeliveryStop.order_assignment_id).where(DeliveryStop.order_assignment_id.in_(assignment_ids))
+        )
+        already_planned = {int(row[0]) for row in planned.all()}
+        for found_assignment_id in assignment_ids:
+            if found_assignment_id not in already_planned:
+                await create_single_delivery(session, found_assignment_id)
 
 
-async def _trigger_routing_for_order_confirmation(metadata: dict[str, Any]):
-    from backend.services.routing_service import create_single_delivery
+async def _order_job_priority(
+    session: AsyncSession, order_id: int | None = None, assignment_id: int | None = None
+) -> int:
+    query = select(Order.urgency, Order.required_delivery_date)
+    if assignment_id is not None:
+        query = (
+            query.join(OrderItem, OrderItem.order_id == Order.id)
+            .join(OrderAssignment, OrderAssignment.order_item_id == OrderItem.id)
+            .where(OrderAssignment.id == assignment_id)
+        )
+    else:
+        query = query.where(Order.id == order_id)
+    row = (await session.execute(query)).first()
+    return order_priority(row.urgency, row.required_delivery_date) if row else order_priority(None)
+
 
+async def _enqueue_delivery_planning(session: AsyncSession, metadata: dict[str, Any]):
     assignment_id = _safe_int(metadata.get("order_assignment_id"))
     if assignment_id is not None:
-        await create_single_delivery(assignment_id)
+        await enqueue(
+            session,
+            "plan_delivery",
+            {"order_assignment_id": assignment_id},
+            dedup_key=f"plan_delivery:assignment:{assignment_id}",
+            priority=await _order_job_priority(session, assignment_id=assignment_id),
+        )
         return
 
     order_id = _safe_int(metadata.get("order_id")) or _safe_int(metadata.get("entity_id"))
     if order_id is None:
         return
-
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(OrderAssignment.id)
-            .join(OrderItem, OrderAssignment.order_item_id == OrderItem.id)
-            .where(OrderItem.order_id == order_id, OrderAssignment.status == "ACCEPTED")
-        )
-        assignment_ids = [int(row[0]) for row in result.all()]
-
-    for found_assignment_id in assignment_ids:
-        await create_single_delivery(found_assignment_id)
-
-
-async def _trigger_routing_safely(metadata: dict[str, Any]):
-    try:
-        await _trigger_routing_for_order_confirmation(metadata)
-    except Exception:
-        # Routing failures should not block notifications.
-        return
+    await enqueue(
+        session,
+        "plan_delivery",
+        {"order_id": order_id},
+        dedup_key=f"plan_delivery:order:{order_id}",
+        priority=await _order_job_priority(session, order_id=order_id),
+    )
 
 
 async def _update_supplier_reliability(session: AsyncSession, metadata: dict[str, Any]):
@@ -195,7 +231,13 @@ async def prepare_event(
         message = f"{factory_name} placed an order for {part_count} parts"
 
         if order_id is not None:
-            asyncio.create_task(_trigger_matching_safely(order_id))
+            await enqueue(
+                session,
+                "match_order",
+                {"order_id": order_id},
+                dedup_key=f"match_order:{order_id}",
+                priority=await _order_job_priority(session, order_id=order_id),
+            )
 
         return EventHandlingResult(title=title, message=message, metadata=metadata, target_user_ids=sorted(deduped_targets))
 
@@ -222,7 +264,7 @@ async def prepare_event(
         else:
             message = f"{supplier_name} confirmed your order"
 
-        asyncio.create_task(_trigger_routing_safely(metadata))
+        await _enqueue_delivery_planning(session, metadata)
         return EventHandlingResult(title=title, message=message, metadata=metadata, target_user_ids=sorted(deduped_targets))
 
     if event_type == "ORDER_DISPATCHED":
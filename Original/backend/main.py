@@ -2,16 +2,29 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import asyncio
 from urllib.parse import parse_qs
 
 import socketio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.database import close_db, init_db
+from backend.database import AsyncSessionLocal, close_db, init_db
 from backend.events import bus
-from backend.middleware.auth import verify_token
+from backend.middleware.auth import shutdown_hash_executor, verify_token
+from backend.middleware.compression import RESPONSE_COMPRESSION_MIN_BYTES, CompressionMiddleware
+from backend.middleware.metrics import MetricsMiddleware
+from backend.middleware.query_diagnostics import SQL_DIAGNOSTICS_ENABLED, QueryDiagnosticsMiddleware
 import backend.models  # noqa: F401
+from backend.serialization import OrjsonResponse, socketio_server_options
+from backend.services.distance_table import DISTANCE_TABLE_INTERVAL_SECONDS, distance_table_loop
+from backend.services.inventory_ledger import INVENTORY_LEDGER_INTERVAL_SECONDS, ledger_maintenance_loop
+from backend.services.job_queue import JOB_POLL_SECONDS, run_workers
+from backend.services.notification_counters import get_unread_count
+from backend.services.rematch_service import REMATCH_BATCH_MS, rematch_loop
+from backend.services.road_network import ROAD_GRAPH_PATH, warm_road_network
+from backend.services.routing_service import ETA_REFRESH_INTERVAL_SECONDS, eta_refresh_loop
+from backend.services.retention_service import RETENTION_INTERVAL_SECONDS, retention_loop
 from backend.routers import auth as auth_router
 from backend.routers import analytics as analytics_router
 from backend.routers import deliveries as deliveries_router
@@ -22,7 +35,7 @@ from backend.routers import orders as orders_router
 from backend.routers import suppliers as suppliers_router
 from backend.routers import users as users_router
 
-fastapi_app = FastAPI(title="SpareHub API")
+fastapi_app = FastAPI(title="SpareHub API", default_response_class=OrjsonResponse)
 
 fastapi_app.add_middleware(
     CORSMiddleware,
@@ -30,9 +43,15 @@ fastapi_app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+if RESPONSE_COMPRESSION_MIN_BYTES > 0:
+    fastapi_app.add_middleware(CompressionMiddleware)
+if SQL_DIAGNOSTICS_ENABLED:
+    fastapi_app.add_middleware(QueryDiagnosticsMiddleware)
+fastapi_app.add_middleware(MetricsMiddleware)
 
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*", **socketio_server_options())
 app = socketio.ASGIApp(sio, other_asgi_app=fastapi_app, socketio_path="ws/socket.io")
 
 bus.sio_server = sio
@@ -73,6 +92,10 @@ async def connect(sid, environ, auth):
     await sio.save_session(
         sid, {"user_id": user_id_int, "role": role, "rooms": [user_room, role_room]}
     )
+    # Seed the bell badge; later changes are pushed by the event bus.
+    async with AsyncSessionLocal() as session:
+        unread = await get_unread_count(session, user_id_int)
+    await sio.emit("unread_count", {"count": unread}, to=sid)
     return True
 
 
@@ -88,14 +111,38 @@ async def disconnect(sid):
         await sio.leave_room(sid, room)
 
 
+_background_tasks: list[asyncio.Task] = []
+
+
 @fastapi_app.on_event("startup")
 async def on_startup():
     await init_db()
+    if ROAD_GRAPH_PATH:
+        _background_tasks.append(asyncio.create_task(warm_road_network()))
+    if INVENTORY_LEDGER_INTERVAL_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(ledger_maintenance_loop(INVENTORY_LEDGER_INTERVAL_SECONDS)))
+    if RETENTION_INTERVAL_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(retention_loop(RETENTION_INTERVAL_SECONDS)))
+    if DISTANCE_TABLE_INTERVAL_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(distance_table_loop(DISTANCE_TABLE_INTERVAL_SECONDS)))
+    if REMATCH_BATCH_MS > 0:
+        _background_tasks.append(asyncio.create_task(rematch_loop(REMATCH_BATCH_MS)))
+    if JOB_POLL_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(run_workers(JOB_POLL_SECONDS)))
+    if ETA_REFRESH_INTERVAL_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(eta_refresh_loop(ETA_REFRESH_INTERVAL_SECONDS)))
 
 
 @fastapi_app.on_event("shutdown")
 async def on_shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    # Lets job workers hand interrupted jobs back before the engine closes.
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    await bus.flush_pending_events()
     await close_db()
+    shutdown_hash_executor()
 
 
 fastapi_app.include_router(auth_router.router)
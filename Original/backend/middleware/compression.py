@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Responses smaller than this go out uncompressed; 0 disables compression.
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+# gzip level 1-9 and brotli quality 0-11. The defaults keep most of the size
+# win at a fraction of the CPU of the maximum settings.
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+# Streams that must reach the client as they are written, and bodies that are
+# already compressed (columnar catalog exports among them).
+EXCLUDED_CONTENT_TYPES = (
+    "text/event-stream",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/vnd.apache.parquet",
+    "application/vnd.apache.arrow.stream",
+)
+
+
+class _GzipEncoder:
+    def __init__(self, level: int) -> None:
+        # wbits 31: deflate with a gzip header and trailer.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, body: bytes) -> bytes:
+        return self._compressor.compress(body)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, body: bytes) -> bytes:
+        return self._compressor.process(body)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _CompressionResponder:
+    """Wraps ``send`` for one response: holds the start message until the first body chunk decides."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, content_encoding: str, make_encoder: Callable) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_encoding = content_encoding
+        self.make_encoder = make_encoder
+        self.send: Optional[Send] = None
+        self.initial_message: Optional[Message] = None
+        self.started = False
+        self.encoder = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.initial_message = message
+            return
+        if message["type"] != "http.response.body":
+            if self.initial_message is not None and not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.started:
+            if self.encoder is None:
+                await self.send(message)
+                return
+            chunk = self.encoder.process(body) + (self.encoder.flush() if more_body else self.encoder.finish())
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        self.started = True
+        headers = Headers(raw=self.initial_message["headers"])
+        content_type = headers.get("content-type", "")
+        if (
+            "content-encoding" in headers
+            or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            or (not more_body and len(body) < self.minimum_size)
+        ):
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        self.encoder = self.make_encoder()
+        response_headers = MutableHeaders(raw=self.initial_message["headers"])
+        response_headers["Content-Encoding"] = self.content_encoding
+        response_headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del response_headers["Content-Length"]
+            chunk = self.encoder.process(body) + self.encoder.flush()
+        else:
+            chunk = self.encoder.process(body) + self.encoder.finish()
+            response_headers["Content-Length"] = str(len(chunk))
+        await self.send(self.initial_message)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """gzip for large responses, or brotli when the client accepts it and the brotli package is installed.
+
+    Plain ASGI ``send`` wrapping, so it does not depend on Starlette's own
+    gzip internals.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = RESPONSE_COMPRESSION_MIN_BYTES,
+        compresslevel: int = RESPONSE_GZIP_LEVEL,
+        brotli_quality: int = RESPONSE_BROTLI_QUALITY,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accepted = {
+            token.split(";")[0].strip().lower() for token in Headers(scope=scope).get("Accept-Encoding", "").split(",")
+        }
+        if "br" in accepted and brotli is not None:
+            responder = _CompressionResponder(
+                self.app, self.minimum_size, "br", lambda: _BrotliEncoder(self.brotli_quality)
+            )
+        elif "gzip" in accepted:
+            responder = _CompressionResponder(
+                self.app, self.minimum_size, "gzip", lambda: _GzipEncoder(self.compresslevel)
+            )
+        else:
+            await self.app(scope, receive, send)
+            return
+        await responder(scope, receive, send)
@@ -0,0 +1,332 @@
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Emit a Server-Timing header on every response so request cost shows up in
+# the browser devtools network panel.
+SERVER_TIMING_ENABLED = os.getenv("METRICS_SERVER_TIMING", "0").lower() in {"1", "true", "yes"}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+BACKGROUND_ROUTE = "<background>"
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestMetrics:
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    ors_count: int = 0
+    ors_seconds: float = 0.0
+    emit_count: int = 0
+    ors_by_endpoint: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+
+
+@dataclass
+class _RouteTotals:
+    requests: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    duration_sum: float = 0.0
+    duration_count: int = 0
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+    ors_count: int = 0
+    ors_seconds: float = 0.0
+    emit_count: int = 0
+
+
+@dataclass
+class _Histogram:
+    bounds: Tuple[float, ...]
+    bucket_counts: List[int] = field(default_factory=list)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        self.bucket_counts = [0] * len(self.bounds)
+
+    def observe(self, seconds: float) -> None:
+        self.total += seconds
+        self.count += 1
+        for index, bound in enumerate(self.bounds):
+            if seconds <= bound:
+                self.bucket_counts[index] += 1
+
+
+@dataclass
+class _JobTotals:
+    outcomes: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    # Due (run_after) until a worker claims the job, per attempt.
+    wait: _Histogram = field(default_factory=lambda: _Histogram(JOB_LATENCY_BUCKETS))
+    # Enqueued until finally SUCCEEDED or FAILED, retries included.
+    latency: _Histogram = field(default_factory=lambda: _Histogram(JOB_LATENCY_BUCKETS))
+    preemptions: int = 0
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteTotals] = defaultdict(_RouteTotals)
+        self._ors: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+        self._jobs: Dict[Tuple[str, str], _JobTotals] = defaultdict(_JobTotals)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, metrics: RequestMetrics) -> None:
+        with self._lock:
+            totals = self._routes[(method, route)]
+            totals.requests[status] += 1
+            totals.duration_sum += seconds
+            totals.duration_count += 1
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    totals.bucket_counts[index] += 1
+            self._merge(totals, route, metrics)
+
+    def observe_background(self, metrics: RequestMetrics) -> None:
+        with self._lock:
+            self._merge(self._routes[("", BACKGROUND_ROUTE)], BACKGROUND_ROUTE, metrics)
+
+    def observe_job(
+        self, job_type: str, priority: str, status: str, wait_seconds: float, latency_seconds: Optional[float]
+    ) -> None:
+        with self._lock:
+            totals = self._jobs[(job_type, priority)]
+            totals.outcomes[status] += 1
+            totals.wait.observe(wait_seconds)
+            if latency_seconds is not None:
+                totals.latency.observe(latency_seconds)
+
+    def observe_job_preempted(self, job_type: str, priority: str) -> None:
+        with self._lock:
+            self._jobs[(job_type, priority)].preemptions += 1
+
+    def _merge(self, totals: _RouteTotals, route: str, metrics: RequestMetrics) -> None:
+        totals.sql_count += metrics.sql_count
+        totals.sql_seconds += metrics.sql_seconds
+        totals.ors_count += metrics.ors_count
+        totals.ors_seconds += metrics.ors_seconds
+        totals.emit_count += metrics.emit_count
+        for endpoint, (count, seconds) in metrics.ors_by_endpoint.items():
+            entry = self._ors[(route, endpoint)]
+            entry[0] += count
+            entry[1] += seconds
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._ors.clear()
+            self._jobs.clear()
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            routes = sorted(self._routes.items())
+            ors = sorted(self._ors.items())
+            jobs = sorted(self._jobs.items())
+
+        http_routes = [(key, totals) for key, totals in routes if key[1] != BACKGROUND_ROUTE]
+
+        lines.append("# HELP sparehub_http_requests_total HTTP requests by route and status.")
+        lines.append("# TYPE sparehub_http_requests_total counter")
+        for (method, route), totals in http_routes:
+            for status, count in sorted(totals.requests.items()):
+                lines.append(
+                    f'sparehub_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}'
+                )
+
+        lines.append("# HELP sparehub_http_request_duration_seconds Wall time per request.")
+        lines.append("# TYPE sparehub_http_request_duration_seconds histogram")
+        for (method, route), totals in http_routes:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for bound, count in zip(LATENCY_BUCKETS, totals.bucket_counts):
+                lines.append(f'sparehub_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'sparehub_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {totals.duration_count}')
+            lines.append(f"sparehub_http_request_duration_seconds_sum{{{labels}}} {totals.duration_sum:.6f}")
+            lines.append(f"sparehub_http_request_duration_seconds_count{{{labels}}} {totals.duration_count}")
+
+        counters = [
+            ("sparehub_db_statements_total", "SQL statements executed.", "sql_count", "{}"),
+            ("sparehub_db_statement_seconds_total", "Time spent executing SQL.", "sql_seconds", "{:.6f}"),
+            ("sparehub_ors_calls_total", "OpenRouteService HTTP calls.", "ors_count", "{}"),
+            ("sparehub_ors_call_seconds_total", "Time spent waiting on OpenRouteService.", "ors_seconds", "{:.6f}"),
+            ("sparehub_socketio_emits_total", "Socket.IO messages emitted by the event bus.", "emit_count", "{}"),
+        ]
+        for name, help_text, attr, fmt in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), totals in routes:
+                value = fmt.format(getattr(totals, attr))
+                lines.append(f'{name}{{method="{method}",route="{_escape(route)}"}} {value}')
+
+        lines.append("# HELP sparehub_ors_endpoint_calls_total OpenRouteService calls by API endpoint.")
+        lines.append("# TYPE sparehub_ors_endpoint_calls_total counter")
+        for (route, endpoint), (count, _) in ors:
+            lines.append(f'sparehub_ors_endpoint_calls_total{{route="{_escape(route)}",endpoint="{endpoint}"}} {count}')
+
+        lines.append("# HELP sparehub_jobs_total Background job attempts by outcome.")
+        lines.append("# TYPE sparehub_jobs_total counter")
+        for (job_type, priority), totals in jobs:
+            for status, count in sorted(totals.outcomes.items()):
+                lines.append(f'sparehub_jobs_total{{job_type="{job_type}",priority="{priority}",status="{status}"}} {count}')
+
+        lines.append("# HELP sparehub_job_preemptions_total Running jobs cancelled and re-queued for a critical job.")
+        lines.append("# TYPE sparehub_job_preemptions_total counter")
+        for (job_type, priority), totals in jobs:
+            lines.append(f'sparehub_job_preemptions_total{{job_type="{job_type}",priority="{priority}"}} {totals.preemptions}')
+
+        histograms = [
+            ("sparehub_job_wait_seconds", "Time a due job waited for a worker.", "wait"),
+            ("sparehub_job_latency_seconds", "Time from enqueue to a job's final outcome.", "latency"),
+        ]
+        for name, help_text, attr in histograms:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (job_type, priority), totals in jobs:
+                histogram = getattr(totals, attr)
+                labels = f'job_type="{job_type}",priority="{priority}"'
+                for bound, count in zip(histogram.bounds, histogram.bucket_counts):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def create_background_task(coro) -> asyncio.Task:
+    """``asyncio.create_task`` for work that outlives the request that started it.
+
+    A task copies the context it was created in, so a plain task spawned
+    during a request keeps adding to that request's metrics after they were
+    recorded. This one reports under ``<background>`` instead.
+    """
+    context = copy_context()
+    context.run(_current.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+def record_ors_call(endpoint: str, seconds: float) -> None:
+    metrics = _current.get()
+    if metrics is None:
+        registry.observe_background(RequestMetrics(ors_count=1, ors_seconds=seconds, ors_by_endpoint={endpoint: (1, seconds)}))
+        return
+    metrics.ors_count += 1
+    metrics.ors_seconds += seconds
+    count, total = metrics.ors_by_endpoint.get(endpoint, (0, 0.0))
+    metrics.ors_by_endpoint[endpoint] = (count + 1, total + seconds)
+
+
+@contextmanager
+def track_ors_call(endpoint: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_ors_call(endpoint, time.perf_counter() - started)
+
+
+def record_emits(count: int) -> None:
+    metrics = _current.get()
+    if metrics is None:
+        registry.observe_background(RequestMetrics(emit_count=count))
+        return
+    metrics.emit_count += count
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    metrics = _current.get()
+    if metrics is None:
+        registry.observe_background(RequestMetrics(sql_count=1, sql_seconds=elapsed))
+        return
+    metrics.sql_count += 1
+    metrics.sql_seconds += elapsed
+
+
+def instrument_engine(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _server_timing(metrics: RequestMetrics, total_seconds: float) -> str:
+    parts = [
+        f"db;desc=\"{metrics.sql_count} queries\";dur={metrics.sql_seconds * 1000:.1f}",
+        f"ors;desc=\"{metrics.ors_count} calls\";dur={metrics.ors_seconds * 1000:.1f}",
+        f"emit;desc=\"{metrics.emit_count} emits\"",
+        f"total;dur={total_seconds * 1000:.1f}",
+    ]
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so the request context is shared with the endpoint."""
+
+    def __init__(self, app, server_timing: Optional[bool] = None):
+        self.app = app
+        self.server_timing = SERVER_TIMING_ENABLED if server_timing is None else server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    value = _server_timing(metrics, time.perf_counter() - started)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            registry.observe_request(
+                scope.get("method", ""),
+                route_path,
+                status_code,
+                time.perf_counter() - started,
+                metrics,
+            )
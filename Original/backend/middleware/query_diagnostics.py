@@ -0,0 +1,139 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Diagnostics mode: slow-query logging with EXPLAIN plans and per-request
+# N+1 detection. Off by default; the engine hooks are always installed so
+# query budgets work in tests regardless of this flag.
+SQL_DIAGNOSTICS_ENABLED = os.getenv("SQL_DIAGNOSTICS", "0").lower() in {"1", "true", "yes"}
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN ", "mysql": "EXPLAIN "}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass
+class QueryLog:
+    statements: List[str] = field(default_factory=list)
+    total_seconds: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """Statements executed more than ``threshold`` times, most frequent first."""
+        return [(sql, n) for sql, n in Counter(self.statements).most_common() if n > threshold]
+
+
+_active_log: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+
+
+@contextmanager
+def track_queries():
+    """Collect every statement executed in the current context (and tasks it spawns)."""
+    log = QueryLog()
+    token = _active_log.set(log)
+    try:
+        yield log
+    finally:
+        _active_log.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    with track_queries() as log:
+        yield log
+    if log.count > max_queries:
+        lines = "\n".join(f"  {n}x {sql}" for sql, n in Counter(log.statements).most_common(5))
+        raise QueryBudgetExceeded(f"Executed {log.count} SQL statements, budget is {max_queries}:\n{lines}")
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[str]:
+    prefix = _EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+    except Exception:
+        logger.debug("EXPLAIN failed for slow query", exc_info=True)
+        return None
+    return "\n".join(" | ".join(str(col) for col in row) for row in rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("diagnostics_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("diagnostics_start_time")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    log = _active_log.get()
+    if log is not None:
+        log.statements.append(statement)
+        log.total_seconds += elapsed
+
+    if SQL_DIAGNOSTICS_ENABLED and elapsed * 1000.0 >= SLOW_QUERY_MS:
+        plan = None if executemany else _explain(conn, statement, parameters)
+        logger.warning(
+            "Slow query (%.1f ms): %s\nparameters: %r%s",
+            elapsed * 1000.0,
+            statement,
+            parameters,
+            f"\nplan:\n{plan}" if plan else "",
+        )
+
+
+def install_query_diagnostics(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryDiagnosticsMiddleware:
+    """Warns when one request runs the same parameterised statement too often."""
+
+    def __init__(self, app, threshold: Optional[int] = None):
+        self.app = app
+        self.threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as log:
+            await self.app(scope, receive, send)
+
+        route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+        for statement, count in log.repeated(self.threshold):
+            logger.warning(
+                "Possible N+1 in %s %s: statement executed %d times: %s",
+                scope.get("method", ""),
+                route,
+                count,
+                " ".join(statement.split()),
+            )
@@ -1,9 +1,10 @@
 from backend.models.user import User, BuyerProfile, SupplierProfile
-from backend.models.catalog import PartCategory, PartsCatalog, InventoryTransaction
+from backend.models.catalog import PartCategory, PartsCatalog, InventoryTransaction, InventoryBalanceSnapshot, StockReservation
 from backend.models.orders import Order, OrderItem, OrderAssignment, OrderStatusHistory
-from backend.models.matching import MatchingLog
-from backend.models.delivery import Delivery, DeliveryStop, DeliveryEtaLog
-from backend.models.events import Notification, EventLog
+from backend.models.matching import BuyerSupplierDistance, MatchingLog
+from backend.models.delivery import Delivery, DeliveryStop, DeliveryEtaLog, DeliveryRouteGeometry, DeliverySegment
+from backend.models.events import Notification, NotificationCounter, EventLog
+from backend.models.jobs import BackgroundJob
 
 __all__ = [
     "User",
@@ -12,14 +13,21 @@ __all__ = [
     "PartCategory",
     "PartsCatalog",
     "InventoryTransaction",
+    "InventoryBalanceSnapshot",
+    "StockReservation",
     "Order",
     "OrderItem",
     "OrderAssignment",
     "OrderStatusHistory",
     "MatchingLog",
+    "BuyerSupplierDistance",
     "Delivery",
     "DeliveryStop",
     "DeliveryEtaLog",
+    "DeliveryRouteGeometry",
+    "DeliverySegment",
     "Notification",
+    "NotificationCounter",
     "EventLog",
+    "BackgroundJob",
 ]
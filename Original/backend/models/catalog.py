@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, CheckConstraint
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, CheckConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -49,5 +49,60 @@ class InventoryTransaction(Base):
     catalog = relationship("PartsCatalog", back_populates="inventory_transactions")
 
     __table_args__ = (
-        CheckConstraint("reason IN ('restock','order_confirmed','manual_adjustment','csv_upload')", name="ck_inventory_transactions_reason"),
+        CheckConstraint("reason IN ('restock','order_confirmed','manual_adjustment','csv_upload','columnar_upload')", name="ck_inventory_transactions_reason"),
+        Index("ix_inventory_transactions_catalog_created", "catalog_id", "created_at"),
+        Index("ix_inventory_transactions_created_at", "created_at"),
+        # Ids must never be reused once old rows are archived; balance
+        # snapshots use them as a watermark.
+        {"sqlite_autoincrement": True},
+    )
+
+
+class InventoryBalanceSnapshot(Base):
+    """Running ledger balance of a catalog entry up to ``last_transaction_id``.
+
+    Transactions covered by a snapshot can be archived out of
+    ``inventory_transactions``; balance queries read the latest snapshot
+    plus the live tail after it.
+    """
+
+    __tablename__ = "inventory_balance_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    catalog_id = Column(Integer, ForeignKey("parts_catalog.id"), nullable=False)
+    balance = Column(Integer, nullable=False)
+    transaction_count = Column(Integer, nullable=False)
+    last_transaction_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_inventory_balance_snapshots_catalog_last", "catalog_id", "last_transaction_id"),
+    )
+
+
+class StockReservation(Base):
+    """Ledger of stock held for order assignments.
+
+    Held units are already subtracted from ``PartsCatalog.quantity_in_stock``,
+    so that column is the stock available to new matches. A hold is committed
+    when its assignment is confirmed and released when it is rejected or
+    cancelled, or by the ledger maintenance pass once ``expires_at`` passes.
+    """
+
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    catalog_id = Column(Integer, ForeignKey("parts_catalog.id"), nullable=False, index=True)
+    assignment_id = Column(Integer, ForeignKey("order_assignments.id", ondelete="SET NULL"), index=True)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, server_default="HELD")
+    # None for holds that never lapse (STOCK_HOLD_HOURS=0, or made before expiry existed).
+    expires_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_reservations_status_expires", "status", "expires_at"),
+        CheckConstraint("quantity > 0", name="ck_stock_reservations_quantity"),
+        CheckConstraint("status IN ('HELD','COMMITTED','RELEASED')", name="ck_stock_reservations_status"),
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, CheckConstraint
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, CheckConstraint, UniqueConstraint
 from sqlalchemy.sql import func
 
 from backend.database import Base
@@ -39,6 +39,7 @@ class DeliveryStop(Base):
 
     __table_args__ = (
         CheckConstraint("stop_type IN ('pickup','dropoff')", name="ck_delivery_stops_type"),
+        Index("ix_delivery_stops_assignment", "order_assignment_id"),
     )
 
 
@@ -49,3 +50,41 @@ class DeliveryEtaLog(Base):
     delivery_id = Column(Integer, ForeignKey("deliveries.id"))
     estimated_arrival = Column(DateTime)
     computed_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+
+class DeliverySegment(Base):
+    """Travel time of the leg into ``stop_id`` from the stop before it, cached for ETA refreshes.
+
+    The endpoints are stored so a moved stop is noticed and its leg re-routed.
+    """
+
+    __tablename__ = "delivery_segments"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    delivery_id = Column(Integer, ForeignKey("deliveries.id"), nullable=False)
+    stop_id = Column(Integer, ForeignKey("delivery_stops.id"), nullable=False, unique=True)
+    from_latitude = Column(Float, nullable=False)
+    from_longitude = Column(Float, nullable=False)
+    to_latitude = Column(Float, nullable=False)
+    to_longitude = Column(Float, nullable=False)
+    duration_minutes = Column(Float, nullable=False)
+    computed_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+    __table_args__ = (Index("ix_delivery_segments_delivery", "delivery_id"),)
+
+
+class DeliveryRouteGeometry(Base):
+    """A delivery's route line as an encoded polyline, one row per detail level."""
+
+    __tablename__ = "delivery_route_geometries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    delivery_id = Column(Integer, ForeignKey("deliveries.id"), nullable=False)
+    detail = Column(String, nullable=False)
+    polyline = Column(String, nullable=False)
+    point_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("delivery_id", "detail", name="uq_delivery_route_geometries_level"),
+        CheckConstraint("detail IN ('full','medium','low')", name="ck_delivery_route_geometries_detail"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.sql import func
 
 from backend.database import Base
@@ -18,6 +18,24 @@ class Notification(Base):
         DateTime, server_default=func.current_timestamp(), nullable=False
     )
 
+    __table_args__ = (
+        Index("ix_notifications_user_read", "user_id", "is_read"),
+        Index("ix_notifications_created_at", "created_at"),
+    )
+
+
+class NotificationCounter(Base):
+    """Persistent unread-notification count per user, kept in step with ``notifications``."""
+
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, server_default="0")
+    version = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(
+        DateTime, server_default=func.current_timestamp(), nullable=False
+    )
+
 
 class EventLog(Base):
     __tablename__ = "event_logs"
@@ -31,6 +49,11 @@ class EventLog(Base):
         DateTime, server_default=func.current_timestamp(), nullable=False
     )
 
+    __table_args__ = (
+        Index("ix_event_logs_created_at", "created_at"),
+        Index("ix_event_logs_type_created", "event_type", "created_at"),
+    )
+
 
 class NotificationTemplate(Base):
     __tablename__ = "notification_templates"
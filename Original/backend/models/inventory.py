@@ -1,4 +1,10 @@
 # Re-export alias — services reference models.inventory, actual classes live in catalog.py
-from backend.models.catalog import InventoryTransaction, PartCategory, PartsCatalog
+from backend.models.catalog import (
+    InventoryBalanceSnapshot,
+    InventoryTransaction,
+    PartCategory,
+    PartsCatalog,
+    StockReservation,
+)
 
-__all__ = ["PartCategory", "PartsCatalog", "InventoryTransaction"]
+__all__ = ["PartCategory", "PartsCatalog", "InventoryTransaction", "InventoryBalanceSnapshot", "StockReservation"]
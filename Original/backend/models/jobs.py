@@ -0,0 +1,41 @@
+from sqlalchemy import CheckConstraint, Column, DateTime, Index, Integer, String, text
+from sqlalchemy.sql import func
+
+from backend.database import Base
+
+
+class BackgroundJob(Base):
+    """Durable unit of background work, claimed and run by ``services.job_queue`` workers."""
+
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_type = Column(String, nullable=False)
+    payload = Column(String, nullable=False, server_default="{}")
+    # At most one QUEUED or RUNNING job per key; finished jobs free it again.
+    dedup_key = Column(String)
+    status = Column(String, nullable=False, server_default="QUEUED")
+    # Lower runs first: 0 critical, 1 urgent, 2 standard.
+    priority = Column(Integer, nullable=False, server_default="2")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="5")
+    run_after = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+    locked_at = Column(DateTime)
+    last_error = Column(String)
+    created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('QUEUED','RUNNING','SUCCEEDED','FAILED')",
+            name="ck_background_jobs_status",
+        ),
+        Index("ix_background_jobs_claim", "job_type", "status", "priority", "run_after"),
+        Index(
+            "uq_background_jobs_active_dedup",
+            "dedup_key",
+            unique=True,
+            sqlite_where=text("status IN ('QUEUED','RUNNING')"),
+            postgresql_where=text("status IN ('QUEUED','RUNNING')"),
+        ),
+    )
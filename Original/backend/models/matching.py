@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.sql import func
 
 from backend.database import Base
@@ -18,3 +18,28 @@ class MatchingLog(Base):
     total_score = Column(Float)
     rank = Column(Integer)
     created_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+
+class BuyerSupplierDistance(Base):
+    """Precomputed road distance from a supplier's warehouse to a buyer's factory.
+
+    The coordinates the row was computed for are stored with it; a row whose
+    coordinates no longer match the profiles is stale and ignored by readers.
+    """
+
+    __tablename__ = "buyer_supplier_distances"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    buyer_id = Column(Integer, ForeignKey("buyer_profiles.id"), nullable=False)
+    supplier_id = Column(Integer, ForeignKey("supplier_profiles.id"), nullable=False, index=True)
+    distance_km = Column(Float, nullable=False)
+    duration_minutes = Column(Float, nullable=False)
+    # "graph" (local road network) or "ors" for routed results, "estimate" for haversine x 1.3.
+    source = Column(String, nullable=False)
+    buyer_latitude = Column(Float, nullable=False)
+    buyer_longitude = Column(Float, nullable=False)
+    supplier_latitude = Column(Float, nullable=False)
+    supplier_longitude = Column(Float, nullable=False)
+    computed_at = Column(DateTime, server_default=func.current_timestamp(), nullable=False)
+
+    __table_args__ = (UniqueConstraint("buyer_id", "supplier_id", name="uq_buyer_supplier_distances_pair"),)
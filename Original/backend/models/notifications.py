@@ -1,4 +1,4 @@
 # Re-export alias — services reference models.notifications, actual classes live in events.py
-from backend.models.events import EventLog, Notification, NotificationTemplate
+from backend.models.events import EventLog, Notification, NotificationCounter, NotificationTemplate
 
-__all__ = ["Notification", "EventLog", "NotificationTemplate"]
+__all__ = ["Notification", "NotificationCounter", "EventLog", "NotificationTemplate"]
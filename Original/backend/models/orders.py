@@ -3,6 +3,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     CheckConstraint,
@@ -65,6 +66,7 @@ class OrderItem(Base):
             "status IN ('PENDING','MATCHED','CONFIRMED','DISPATCHED','IN_TRANSIT','DELIVERED','CANCELLED')",
             name="ck_order_items_status",
         ),
+        Index("ix_order_items_order", "order_id"),
     )
 
 
@@ -92,6 +94,7 @@ class OrderAssignment(Base):
             "status IN ('PROPOSED','ACCEPTED','REJECTED','FULFILLED')",
             name="ck_order_assignments_status",
         ),
+        Index("ix_order_assignments_item", "order_item_id"),
     )
 
 
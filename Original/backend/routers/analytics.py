@@ -1,10 +1,20 @@
-from fastapi import APIRouter, Depends, Query
+import json
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import get_db
 from backend.middleware.auth import RoleChecker
+from backend.middleware.metrics import registry
+from backend.models.jobs import BackgroundJob
 from backend.schemas.analytics import AnalyticsSnapshot
+from backend.schemas.jobs import BackgroundJobListResponse, BackgroundJobResponse, JobStatsResponse
 from backend.services.analytics_service import get_full_snapshot
+from backend.services.export_service import MEDIA_TYPES, stream_export
+from backend.services.job_queue import job_stats, list_jobs, retry_job
 
 router = APIRouter(
     prefix="/api/analytics",
@@ -76,3 +86,83 @@ async def admin_dashboard(db: AsyncSession = Depends(get_db)):
     from backend.services.analytics_service import get_overview
 
     return await get_overview(db)
+
+
+@admin_router.get("/metrics", response_class=PlainTextResponse)
+async def admin_metrics():
+    """Per-route request, SQL, ORS and Socket.IO counters in Prometheus text format."""
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@admin_router.get("/exports/{dataset}")
+async def export_dataset(
+    dataset: Literal["orders", "matching_logs", "event_logs", "inventory_transactions"],
+    format: Literal["ndjson", "csv"] = Query(default="ndjson"),
+    start_date: datetime | None = Query(default=None),
+    end_date: datetime | None = Query(default=None),
+):
+    """Stream a full table export; rows are read in batches, so memory stays flat at any size."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        stream_export(dataset, format, start_date, end_date),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}-{stamp}.{format}"'},
+    )
+
+
+def _job_to_response(job: BackgroundJob) -> BackgroundJobResponse:
+    return BackgroundJobResponse(
+        id=job.id,
+        job_type=job.job_type,
+        payload=json.loads(job.payload) if job.payload else None,
+        dedup_key=job.dedup_key,
+        status=job.status,
+        priority=job.priority,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_after=job.run_after,
+        locked_at=job.locked_at,
+        last_error=job.last_error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+@admin_router.get("/jobs", response_model=BackgroundJobListResponse)
+async def read_background_jobs(
+    job_status: Literal["QUEUED", "RUNNING", "SUCCEEDED", "FAILED"] | None = Query(default=None, alias="status"),
+    job_type: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    jobs, total = await list_jobs(db, status=job_status, job_type=job_type, limit=limit, offset=offset)
+    return BackgroundJobListResponse(
+        items=[_job_to_response(job) for job in jobs], limit=limit, offset=offset, total=total
+    )
+
+
+@admin_router.get("/jobs/stats", response_model=JobStatsResponse)
+async def read_background_job_stats(db: AsyncSession = Depends(get_db)):
+    """Queue depth per status and priority, workers and oldest waiting job per job type."""
+    return JobStatsResponse(job_types=await job_stats(db))
+
+
+@admin_router.get("/jobs/{job_id}", response_model=BackgroundJobResponse)
+async def read_background_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    job = await db.get(BackgroundJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_to_response(job)
+
+
+@admin_router.post("/jobs/{job_id}/retry", response_model=BackgroundJobResponse)
+async def retry_background_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """Queue a FAILED job again with a fresh attempt budget."""
+    job = await retry_job(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only a failed job with no active duplicate can be retried",
+        )
+    return _job_to_response(job)
@@ -3,7 +3,13 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import get_db
-from backend.middleware.auth import create_access_token, get_current_user, hash_password, verify_password
+from backend.middleware.auth import (
+    create_access_token,
+    get_current_user,
+    hash_password_async,
+    needs_rehash,
+    verify_password_async,
+)
 from backend.models.user import BuyerProfile, SupplierProfile, User
 from backend.schemas.auth import (
     LoginRequest,
@@ -12,6 +18,7 @@ from backend.schemas.auth import (
     TokenResponse,
     UserProfile,
 )
+from backend.services.notification_counters import start_counter
 from backend.services.user_profiles import get_full_profile
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -25,7 +32,7 @@ async def register_buyer(payload: RegisterBuyerRequest, db: AsyncSession = Depen
 
     user = User(
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
         role="buyer",
     )
     db.add(user)
@@ -40,6 +47,7 @@ async def register_buyer(payload: RegisterBuyerRequest, db: AsyncSession = Depen
         longitude=payload.longitude,
     )
     db.add(profile)
+    start_counter(db, user.id)
     await db.commit()
 
     token = create_access_token({"sub": user.id, "role": user.role})
@@ -54,7 +62,7 @@ async def register_supplier(payload: RegisterSupplierRequest, db: AsyncSession =
 
     user = User(
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password_async(payload.password),
         role="supplier",
     )
     db.add(user)
@@ -70,6 +78,7 @@ async def register_supplier(payload: RegisterSupplierRequest, db: AsyncSession =
         longitude=payload.longitude,
     )
     db.add(profile)
+    start_counter(db, user.id)
     await db.commit()
 
     token = create_access_token({"sub": user.id, "role": user.role})
@@ -83,9 +92,13 @@ async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if not verify_password(payload.password, user.password_hash):
+    if not await verify_password_async(payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(payload.password)
+        await db.commit()
+
     token = create_access_token({"sub": user.id, "role": user.role})
     return TokenResponse(access_token=token, token_type="bearer", role=user.role, user_id=user.id)
 
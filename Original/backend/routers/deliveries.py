@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,6 +14,7 @@ from ..schemas.delivery import (
     DeliveryResponse,
     DeliveryStatsResponse,
     DeliveryStatusUpdate,
+    RouteDetail,
     VRPBatchRequest,
     VRPBatchResult,
 )
@@ -160,18 +161,19 @@ async def delivery_stats(
     "/{delivery_id}",
     response_model=DeliveryResponse,
     summary="Get delivery detail",
-    description="Returns delivery, ordered stops, route geometry, and latest ETA.",
+    description="Returns delivery, ordered stops, route geometry at the requested detail, and latest ETA.",
     responses=ERROR_RESPONSES,
 )
 async def get_delivery(
     delivery_id: int = Path(..., gt=0, description="Delivery ID"),
+    detail: RouteDetail = Query(default="medium", description="Route geometry resolution"),
     session: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     try:
         user_dict = {"role": user.role, "sub": user.id}
         return await get_delivery_for_user(
-            session=session, delivery_id=delivery_id, user=user_dict
+            session=session, delivery_id=delivery_id, user=user_dict, detail=detail
         )
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
@@ -182,18 +184,23 @@ async def get_delivery(
 @router.get(
     "/{delivery_id}/route",
     summary="Get delivery route geometry",
-    description="Returns GeoJSON LineString for map rendering.",
+    description=(
+        "Returns a GeoJSON LineString for map rendering, or the stored encoded polyline "
+        "with encoding=polyline. detail=full keeps every routed point; medium and low are simplified."
+    ),
     responses=ERROR_RESPONSES,
 )
 async def get_delivery_route(
     delivery_id: int = Path(..., gt=0, description="Delivery ID"),
+    detail: RouteDetail = Query(default="medium", description="Route geometry resolution"),
+    encoding: Literal["geojson", "polyline"] = Query(default="geojson"),
     session: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     try:
         user_dict = {"role": user.role, "sub": user.id}
         return await get_delivery_route_geometry(
-            session=session, delivery_id=delivery_id, user=user_dict
+            session=session, delivery_id=delivery_id, user=user_dict, detail=detail, encoding=encoding
         )
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
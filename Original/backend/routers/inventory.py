@@ -1,8 +1,10 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import get_db
@@ -11,15 +13,27 @@ from backend.models.user import User
 from backend.models.inventory import InventoryTransaction, PartCategory, PartsCatalog
 from backend.models.users import SupplierProfile
 from backend.schemas.inventory import (
+    CATALOG_ENTRY_LIST_ADAPTER,
+    CATALOG_LIST_ADAPTER,
     CSVUploadResponse,
     CatalogEntryCreate,
     CatalogEntryResponse,
     CatalogEntryUpdate,
     CatalogListResponse,
+    InventoryBalanceResponse,
+    InventoryTransactionPage,
     InventoryTransactionResponse,
     PartCategoryCreate,
     PartCategoryResponse,
 )
+from backend.serialization import typed_response
+from backend.services import catalog_columnar
+from backend.services.inventory_ledger import (
+    HISTORY_PAGE_SIZE,
+    get_catalog_balance,
+    read_transaction_history,
+    run_ledger_maintenance,
+)
 from backend.services.inventory_service import (
     check_low_stock,
     normalize_part_number,
@@ -157,7 +171,7 @@ async def update_catalog_entry(
             continue
         setattr(entry, field, value)
 
-    entry.updated_at = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+    entry.updated_at = datetime.utcnow().replace(microsecond=0)
 
     if payload.quantity_in_stock is not None and payload.quantity_in_stock != previous_qty:
         session.add(
@@ -210,7 +224,15 @@ async def delete_catalog_entry(
         raise HTTPException(status_code=403, detail="Not allowed")
 
     await session.delete(entry)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Foreign keys are enforced: orders, holds or ledger rows still point at it.
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Catalog entry is referenced by orders or stock history",
+        )
 
 
 @router.post(
@@ -227,6 +249,52 @@ async def csv_upload(
     return await process_csv_upload(session, file, supplier.id)
 
 
+def _require_columnar() -> None:
+    if not catalog_columnar.columnar_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Columnar import/export needs pyarrow installed",
+        )
+
+
+@router.post(
+    "/catalog/columnar-upload",
+    response_model=CSVUploadResponse,
+    dependencies=[Depends(RoleChecker(["supplier"]))],
+)
+async def columnar_upload(
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Bulk catalog load from Parquet or Arrow IPC, with the CSV upload's columns."""
+    _require_columnar()
+    supplier = await _get_supplier_profile(session, current_user.id)
+    return await catalog_columnar.import_catalog(session, await file.read(), supplier.id)
+
+
+@router.get(
+    "/catalog/columnar-export",
+    dependencies=[Depends(RoleChecker(["supplier", "admin"]))],
+)
+async def columnar_export(
+    format: Literal["parquet", "arrow"] = Query(default="parquet"),
+    supplier_id: Optional[int] = Query(default=None),
+    session: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the catalog as Parquet or an Arrow IPC stream; suppliers get their own, admins any or all."""
+    _require_columnar()
+    if current_user.role == "supplier":
+        supplier_id = (await _get_supplier_profile(session, current_user.id)).id
+    extension = "parquet" if format == "parquet" else "arrows"
+    return StreamingResponse(
+        catalog_columnar.export_catalog(format, supplier_id),
+        media_type=catalog_columnar.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="catalog.{extension}"'},
+    )
+
+
 @router.get("/search", response_model=List[CatalogEntryResponse])
 async def search_inventory(
     q: str = Query("", alias="q"),
@@ -236,7 +304,9 @@ async def search_inventory(
     radius_km: float = Query(50.0),
     session: AsyncSession = Depends(get_db),
 ):
-    return await search_parts(session, q, category_id, lat, lng, radius_km)
+    return typed_response(
+        CATALOG_ENTRY_LIST_ADAPTER, await search_parts(session, q, category_id, lat, lng, radius_km)
+    )
 
 
 @router.get(
@@ -245,22 +315,68 @@ async def search_inventory(
 )
 async def list_transactions(
     catalog_id: int,
+    response: Response,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=1000),
+    before_id: Optional[int] = Query(None, ge=1),
     session: AsyncSession = Depends(get_db),
 ):
-    result = await session.execute(
-        select(InventoryTransaction)
-        .where(InventoryTransaction.catalog_id == catalog_id)
-        .order_by(InventoryTransaction.created_at.desc())
+    """Latest ledger rows, newest first; ``X-Next-Cursor`` continues into older (possibly archived) rows."""
+    page = await read_transaction_history(session, catalog_id, limit=limit, before_id=before_id)
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(page.next_cursor)
+    if page.older_rows_archived:
+        response.headers["X-Older-Rows-Archived"] = "true"
+    return page.items
+
+
+@router.get(
+    "/transactions/{catalog_id}/history",
+    response_model=InventoryTransactionPage,
+)
+async def page_transactions(
+    catalog_id: int,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=1000),
+    before_id: Optional[int] = Query(None, ge=1),
+    session: AsyncSession = Depends(get_db),
+):
+    """One page of ledger history; pass ``next_cursor`` back as ``before_id`` to continue into older rows."""
+    page = await read_transaction_history(session, catalog_id, limit=limit, before_id=before_id)
+    return InventoryTransactionPage(
+        items=page.items,
+        next_cursor=page.next_cursor,
+        includes_archived=page.includes_archived,
+        older_rows_archived=page.older_rows_archived,
     )
-    return [
-        InventoryTransactionResponse(
-            catalog_id=row.catalog_id,
-            change_amount=row.change_amount,
-            reason=row.reason,
-            created_at=row.created_at,
-        )
-        for row in result.scalars().all()
-    ]
+
+
+@router.get(
+    "/transactions/{catalog_id}/balance",
+    response_model=InventoryBalanceResponse,
+)
+async def read_ledger_balance(
+    catalog_id: int,
+    session: AsyncSession = Depends(get_db),
+):
+    """Ledger balance from the latest snapshot plus the transactions after it."""
+    return await get_catalog_balance(session, catalog_id)
+
+
+@router.post(
+    "/transactions/compact",
+    dependencies=[Depends(RoleChecker(["admin"]))],
+)
+async def compact_ledger(
+    retention_days: Optional[int] = Query(None, ge=0),
+    session: AsyncSession = Depends(get_db),
+):
+    """Snapshot balances and archive old transactions now instead of waiting for the background pass."""
+    result = await run_ledger_maintenance(session, retention_days=retention_days)
+    return {
+        "snapshots_written": result.snapshots_written,
+        "transactions_archived": result.transactions_archived,
+        "snapshots_pruned": result.snapshots_pruned,
+        "archive_files": result.archive_files or [],
+    }
 
 
 @router.get(
@@ -384,6 +500,7 @@ async def list_own_catalog(
             )
         )
 
-    return CatalogListResponse(
-        items=items, page=page, page_size=page_size, total=total
+    return typed_response(
+        CATALOG_LIST_ADAPTER,
+        CatalogListResponse(items=items, page=page, page_size=page_size, total=total),
     )
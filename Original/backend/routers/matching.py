@@ -19,6 +19,7 @@ from ..schemas.matching import (
     MatchSimulationRequest,
     OrderSummary,
 )
+from ..services.matching_coalescer import match_order_coalesced
 from ..services.matching_service import (
     load_weight_profiles,
     match_full_order,
@@ -47,14 +48,11 @@ ERROR_RESPONSES = {
 )
 async def run_order_matching(
     order_id: int = Path(..., gt=0, description="Order ID in PLACED status"),
-    session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        changed_by = current_user.id
-        return await match_full_order(
-            session, order_id, simulate=False, changed_by_user_id=changed_by
-        )
+        # Joins a run already in flight for this order (e.g. the ORDER_PLACED job).
+        return await match_order_coalesced(order_id, changed_by_user_id=current_user.id)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
@@ -1,16 +1,19 @@
+import asyncio
 import json
 from datetime import datetime
+from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import get_db
-from backend.events.bus import emit_event
+from backend.events.bus import emit_event, push_unread_counts
 from backend.middleware.auth import RoleChecker, get_current_user
 from backend.models.events import EventLog, Notification
 from backend.models.user import BuyerProfile, SupplierProfile, User
 from backend.schemas.notifications import (
+    ArchiveQueryResponse,
     EventLifecycleTestRequest,
     EventLifecycleTestResponse,
     EventLogListResponse,
@@ -22,8 +25,11 @@ from backend.schemas.notifications import (
     MarkAllReadResponse,
     NotificationListResponse,
     NotificationResponse,
+    RetentionRunResponse,
     UnreadCountResponse,
 )
+from backend.services.notification_counters import adjust_unread, get_unread_count, remember, reset_unread
+from backend.services.retention_service import query_archive, run_retention
 
 notifications_router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 events_router = APIRouter(prefix="/api/events", tags=["events"])
@@ -104,8 +110,19 @@ async def mark_notification_read(
             status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found"
         )
 
-    notification.is_read = True
+    # Conditional update so a double click or a concurrent read-all cannot
+    # decrement the counter twice.
+    marked = await db.execute(
+        update(Notification)
+        .where(Notification.id == notification.id, Notification.is_read.is_(False))
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    counter_values = {}
+    if marked.rowcount:
+        counter_values = await adjust_unread(db, [current_user.id], -1)
     await db.commit()
+    await push_unread_counts(remember(counter_values))
     await db.refresh(notification)
     return _notification_to_response(notification)
 
@@ -120,7 +137,9 @@ async def mark_all_read(
         .where(Notification.user_id == current_user.id, Notification.is_read.is_(False))
         .values(is_read=True)
     )
+    counter_values = await reset_unread(db, current_user.id)
     await db.commit()
+    await push_unread_counts(remember(counter_values))
     return MarkAllReadResponse(updated=result.rowcount or 0)
 
 
@@ -129,14 +148,7 @@ async def unread_count(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(func.count(Notification.id)).where(
-            Notification.user_id == current_user.id,
-            Notification.is_read.is_(False),
-        )
-    )
-    count = int(result.scalar() or 0)
-    return UnreadCountResponse(count=count)
+    return UnreadCountResponse(count=await get_unread_count(db, current_user.id))
 
 
 @events_router.get(
@@ -189,6 +201,49 @@ async def list_event_logs(
     return EventLogListResponse(items=items, limit=limit, offset=offset, total=total)
 
 
+@events_router.get(
+    "/archive",
+    response_model=ArchiveQueryResponse,
+    dependencies=[Depends(RoleChecker(["admin"]))],
+)
+async def query_archived_events(
+    table: Literal["event_logs", "notifications"] = Query(default="event_logs"),
+    event_type: str | None = Query(default=None),
+    entity_type: str | None = Query(default=None),
+    user_id: int | None = Query(default=None),
+    start_date: datetime | None = Query(default=None),
+    end_date: datetime | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """Read rows the retention compactor moved out of the live tables."""
+    filters = {"event_type": event_type}
+    if table == "event_logs":
+        filters["entity_type"] = entity_type
+    else:
+        filters["user_id"] = user_id
+    items = await asyncio.to_thread(query_archive, table, start_date, end_date, filters, limit)
+    return ArchiveQueryResponse(table=table, items=items, count=len(items))
+
+
+@events_router.post(
+    "/archive/compact",
+    response_model=RetentionRunResponse,
+    dependencies=[Depends(RoleChecker(["admin"]))],
+)
+async def compact_events(
+    event_log_days: int | None = Query(default=None, ge=0),
+    read_notification_days: int | None = Query(default=None, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    """Run the retention compactor now instead of waiting for the background pass."""
+    result = await run_retention(db, event_log_days, read_notification_days)
+    return RetentionRunResponse(
+        event_logs_archived=result.event_logs_archived,
+        notifications_archived=result.notifications_archived,
+        archive_files=result.archive_files,
+    )
+
+
 @events_router.get(
     "/test/context",
     response_model=EventTestContextResponse,
@@ -384,7 +439,7 @@ async def test_emit_event(
                 detail=f"Unknown target_user_ids: {missing}",
             )
 
-    result = await emit_event(payload.event_type, payload.payload, requested_targets)
+    result = await emit_event(payload.event_type, payload.payload, requested_targets, coalesce=False)
     return EventTestEmitResponse(**result)
 
 
@@ -432,7 +487,7 @@ async def test_order_lifecycle(payload: EventLifecycleTestRequest):
     emitted_events: list[str] = []
     results: list[EventTestEmitResponse] = []
     for event_type, event_payload in ordered_events:
-        result = await emit_event(event_type, event_payload, [])
+        result = await emit_event(event_type, event_payload, [], coalesce=False)
         emitted_events.append(event_type)
         results.append(EventTestEmitResponse(**result))
 
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
@@ -9,14 +9,19 @@ from backend.middleware.auth import RoleChecker, get_current_user
 from backend.models.user import User
 from backend.models.users import BuyerProfile, SupplierProfile
 from backend.schemas.order import (
+    ORDER_RESPONSE_ADAPTER,
+    ORDER_SUMMARY_LIST_ADAPTER,
+    ORDERS_LIST_ADAPTER,
     OrderAssignmentCreate,
     OrderAssignmentResponse,
     OrderCreate,
     OrderHistoryEntry,
     OrderResponse,
     OrdersListResponse,
+    OrderSummaryListResponse,
     StatusTransitionRequest,
 )
+from backend.serialization import typed_response
 from backend.services.order_service import (
     assign_supplier_to_item,
     cancel_order,
@@ -24,6 +29,7 @@ from backend.services.order_service import (
     get_assignment_with_details,
     get_order_history,
     get_order_with_details,
+    list_order_summaries,
     list_orders_for_role,
     reject_assignment,
     serialize_order,
@@ -114,10 +120,11 @@ async def create_order_route(
 
 @router.get(
     "/",
-    response_model=OrdersListResponse,
+    response_model=Union[OrdersListResponse, OrderSummaryListResponse],
     dependencies=[Depends(RoleChecker(["buyer", "supplier", "admin"]))],
 )
 async def list_orders_route(
+    view: Literal["full", "summary"] = Query("full"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
     status_filter: Optional[str] = Query(None, alias="status"),
@@ -130,7 +137,7 @@ async def list_orders_route(
     current_user: User = Depends(get_current_user),
 ):
     user_dict = {"role": current_user.role, "user_id": current_user.id}
-    orders, total = await list_orders_for_role(
+    filters = dict(
         session=session,
         user=user_dict,
         status_filter=_normalize_optional(status_filter),
@@ -142,12 +149,23 @@ async def list_orders_route(
         page=page,
         page_size=page_size,
     )
+    if view == "summary":
+        summaries, total = await list_order_summaries(**filters)
+        return typed_response(
+            ORDER_SUMMARY_LIST_ADAPTER,
+            OrderSummaryListResponse(items=summaries, page=page, page_size=page_size, total=total),
+        )
 
-    return OrdersListResponse(
-        items=[serialize_order(order, include_history=False) for order in orders],
-        page=page,
-        page_size=page_size,
-        total=total,
+    orders, total = await list_orders_for_role(**filters)
+
+    return typed_response(
+        ORDERS_LIST_ADAPTER,
+        OrdersListResponse(
+            items=[serialize_order(order, include_history=False) for order in orders],
+            page=page,
+            page_size=page_size,
+            total=total,
+        ),
     )
 
 
@@ -170,7 +188,7 @@ async def get_order_detail(
         supplier_id = supplier.id
 
     _ensure_order_access(serialized, current_user, supplier_id=supplier_id)
-    return serialized
+    return typed_response(ORDER_RESPONSE_ADAPTER, serialized)
 
 
 @router.patch(
@@ -6,6 +6,9 @@ from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
+RouteDetail = Literal["full", "medium", "low"]
+
+
 class DeliveryStopResponse(BaseModel):
     id: int
     delivery_id: int
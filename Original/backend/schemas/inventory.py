@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import List, Optional
 
+from pydantic import TypeAdapter
+
 try:
     from pydantic import BaseModel, ConfigDict
 
@@ -68,10 +70,29 @@ class CatalogEntryResponse(ORMBaseModel):
 
 
 class InventoryTransactionResponse(ORMBaseModel):
+    id: Optional[int] = None
     catalog_id: int
     change_amount: int
     reason: str
     created_at: Optional[datetime] = None
+    # Read back from the compressed archive rather than the live table.
+    archived: bool = False
+
+
+class InventoryTransactionPage(ORMBaseModel):
+    items: List[InventoryTransactionResponse]
+    next_cursor: Optional[int] = None
+    includes_archived: bool = False
+    older_rows_archived: bool = False
+
+
+class InventoryBalanceResponse(ORMBaseModel):
+    catalog_id: int
+    balance: int
+    snapshot_balance: int
+    snapshot_last_transaction_id: int
+    snapshot_at: Optional[datetime] = None
+    tail_transactions: int
 
 
 class CSVUploadError(ORMBaseModel):
@@ -92,3 +113,9 @@ class CatalogListResponse(ORMBaseModel):
     page: int
     page_size: int
     total: int
+
+
+# Pre-built serializers for the hottest catalog responses; see
+# ``backend.serialization.typed_response``.
+CATALOG_ENTRY_LIST_ADAPTER = TypeAdapter(List[CatalogEntryResponse])
+CATALOG_LIST_ADAPTER = TypeAdapter(CatalogListResponse)
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class BackgroundJobResponse(BaseModel):
+    id: int
+    job_type: str
+    payload: dict[str, Any] | None = None
+    dedup_key: str | None = None
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    locked_at: datetime | None = None
+    last_error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
+class BackgroundJobListResponse(BaseModel):
+    items: list[BackgroundJobResponse]
+    limit: int
+    offset: int
+    total: int
+
+
+class JobTypeStats(BaseModel):
+    workers: int
+    reserved_critical_workers: int
+    counts: dict[str, int]
+    queued_by_priority: dict[str, int]
+    oldest_queued_seconds: float | None = None
+
+
+class JobStatsResponse(BaseModel):
+    job_types: dict[str, JobTypeStats]
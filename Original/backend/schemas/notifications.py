@@ -50,6 +50,18 @@ class EventLogListResponse(BaseModel):
     total: int
 
 
+class ArchiveQueryResponse(BaseModel):
+    table: str
+    items: list[dict[str, Any]]
+    count: int
+
+
+class RetentionRunResponse(BaseModel):
+    event_logs_archived: int
+    notifications_archived: int
+    archive_files: list[str]
+
+
 SupportedEventType = Literal[
     "ORDER_PLACED",
     "SUPPLIER_MATCHED",
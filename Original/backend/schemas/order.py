@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import Field
+from pydantic import Field, TypeAdapter
 
 from backend.schemas.inventory import ORMBaseModel
 
@@ -89,3 +89,36 @@ class OrdersListResponse(ORMBaseModel):
     page: int
     page_size: int
     total: int
+
+
+class OrderSummaryResponse(ORMBaseModel):
+    """One row of ``GET /api/orders?view=summary``; items and assignments come from the detail route."""
+
+    id: int
+    buyer_id: int
+    status: str
+    urgency: str
+    required_delivery_date: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    buyer_factory_name: Optional[str] = None
+    total_items: int = 0
+    total_value: float = 0.0
+    part_number: Optional[str] = None
+    part_description: Optional[str] = None
+    supplier_business_name: Optional[str] = None
+    # The assignment behind supplier_business_name and its drop-off ETA, if a delivery is planned.
+    assignment_id: Optional[int] = None
+    eta: Optional[datetime] = None
+
+
+class OrderSummaryListResponse(ORMBaseModel):
+    items: List[OrderSummaryResponse]
+    page: int
+    page_size: int
+    total: int
+
+
+ORDER_RESPONSE_ADAPTER = TypeAdapter(OrderResponse)
+ORDERS_LIST_ADAPTER = TypeAdapter(OrdersListResponse)
+ORDER_SUMMARY_LIST_ADAPTER = TypeAdapter(OrderSummaryListResponse)
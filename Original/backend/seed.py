@@ -13,6 +13,7 @@ from backend.models.events import NotificationTemplate
 from backend.models.orders import Order, OrderAssignment, OrderItem, OrderStatusHistory
 from backend.models.user import BuyerProfile, SupplierProfile, User
 from backend.services.matching_service import match_full_order, normalize_part_number
+from backend.services.notification_counters import start_counter
 from backend.services.routing_service import create_single_delivery
 
 
@@ -122,6 +123,7 @@ async def _ensure_user(session, *, email: str, role: str, password: str) -> User
     user = User(email=email, password_hash=hash_password(password), role=role)
     session.add(user)
     await session.flush()
+    start_counter(session, user.id)
     return user
 
 
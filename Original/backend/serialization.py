@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+# Socket.IO packet encoding: "json" (default; what the bundled frontend speaks)
+# or "msgpack", which needs the msgpack package on the server and
+# socket.io-msgpack-parser on every client.
+SOCKETIO_SERIALIZER = os.getenv("SOCKETIO_SERIALIZER", "json").lower()
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonResponse(JSONResponse):
+    """Default response class for routes without a response model (analytics, route geometry, notifications)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def typed_response(adapter: TypeAdapter, value: Any, status_code: int = 200) -> Response:
+    """Serialize an already-built response model with a pre-built adapter.
+
+    FastAPI would validate ``value`` against the route's response model again
+    before encoding it; hot routes whose payload was just constructed from
+    trusted rows skip that and go straight to pydantic-core's JSON encoder.
+    Keep ``response_model`` on the route so the OpenAPI schema is unchanged.
+    """
+    return Response(adapter.dump_json(value), status_code=status_code, media_type="application/json")
+
+
+class SocketJson:
+    """``json``-module stand-in for python-socketio/engineio packets, backed by orjson."""
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        # Packets are always compact; the stdlib ``separators`` argument is ignored.
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode("utf-8")
+
+    @staticmethod
+    def loads(data: Any, **kwargs: Any) -> Any:
+        return orjson.loads(data)
+
+
+def socketio_server_options() -> dict:
+    if SOCKETIO_SERIALIZER == "msgpack":
+        try:
+            import msgpack  # noqa: F401
+        except ImportError as exc:
+            raise RuntimeError("SOCKETIO_SERIALIZER=msgpack requires the msgpack package") from exc
+        return {"serializer": "msgpack", "json": SocketJson}
+    if SOCKETIO_SERIALIZER != "json":
+        raise RuntimeError(f"Unknown SOCKETIO_SERIALIZER {SOCKETIO_SERIALIZER!r}; use json or msgpack")
+    return {"json": SocketJson}
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import functools
+import gzip
+import heapq
+import itertools
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Cold storage for rows moved out of the live tables. Layout:
+#   <ARCHIVE_DIR>/<table>/<YYYY-MM>/<first_id>-<last_id>-<token>.jsonl.gz
+# One gzip JSONL file per compaction batch and month, so readers can skip
+# whole months when a query has a date range. Tables written with
+# ``group_by`` store each group (e.g. one catalog part) as its own gzip
+# member and list the members in ``<file>.idx.json``, so one group's rows are
+# read without decompressing the rest of the file.
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", Path(__file__).resolve().parents[1] / "data" / "archive"))
+
+
+def _month_key(value: datetime) -> str:
+    return value.strftime("%Y-%m")
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.idx.json")
+
+
+def _jsonl(rows: List[dict]) -> bytes:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows).encode("utf-8")
+
+
+def write_partitions(
+    table: str, rows: List[dict], root: Optional[Path] = None, group_by: Optional[str] = None
+) -> List[str]:
+    """Write rows (each with ``id`` and ``created_at``) into monthly gzip files; returns paths.
+
+    With ``group_by``, rows sharing that field's value become one gzip member
+    and an index of ``value -> [offset, length, first_id, last_id]`` is
+    written next to the file. Blocking; call through ``asyncio.to_thread``
+    from request or task code.
+    """
+    by_month: Dict[str, List[dict]] = {}
+    for row in rows:
+        by_month.setdefault(_month_key(row["created_at"]), []).append(row)
+
+    base = (root or ARCHIVE_DIR) / table
+    paths: List[str] = []
+    for month, month_rows in sorted(by_month.items()):
+        directory = base / month
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{month_rows[0]['id']:012d}-{month_rows[-1]['id']:012d}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+        path = directory / name
+        tmp_path = directory / f".{name}.tmp"
+        if group_by is None:
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+                for row in month_rows:
+                    handle.write(json.dumps(row, default=str))
+                    handle.write("\n")
+        else:
+            groups: Dict[str, List[dict]] = {}
+            for row in month_rows:
+                groups.setdefault(str(row[group_by]), []).append(row)
+            index: Dict[str, List[int]] = {}
+            with tmp_path.open("wb") as handle:
+                for key, group in groups.items():
+                    member = gzip.compress(_jsonl(group))
+                    index[key] = [handle.tell(), len(member), group[0]["id"], group[-1]["id"]]
+                    handle.write(member)
+            tmp_index = directory / f".{name}.idx.tmp"
+            tmp_index.write_text(json.dumps(index), encoding="utf-8")
+            # The index lands first: a data file is only visible once it can be looked up.
+            tmp_index.replace(_index_path(path))
+        tmp_path.replace(path)
+        paths.append(str(path))
+    return paths
+
+
+def iter_partitions(
+    table: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    predicate: Optional[Callable[[dict], bool]] = None,
+    root: Optional[Path] = None,
+) -> Iterator[dict]:
+    """Yield archived rows oldest month first, skipping months outside ``start``..``end``."""
+    base = (root or ARCHIVE_DIR) / table
+    if not base.exists():
+        return
+    start_month = _month_key(start) if start else None
+    end_month = _month_key(end) if end else None
+    for month_dir in sorted(path for path in base.iterdir() if path.is_dir()):
+        if start_month and month_dir.name < start_month:
+            continue
+        if end_month and month_dir.name > end_month:
+            continue
+        for path in sorted(month_dir.glob("*.jsonl.gz")):
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                for line in handle:
+                    row = json.loads(line)
+                    if predicate is None or predicate(row):
+                        yield row
+
+
+@functools.lru_cache(maxsize=4096)
+def _read_index(path: str) -> Optional[Dict[str, List[int]]]:
+    # Archive files never change once written, so their indexes are cached.
+    index_path = _index_path(Path(path))
+    if not index_path.exists():
+        return None
+    return json.loads(index_path.read_text(encoding="utf-8"))
+
+
+def _group_members(
+    table: str, group_by: str, key, before_id: Optional[int], root: Optional[Path]
+) -> List[Tuple[int, int, Path, Optional[int], Optional[int]]]:
+    """``(first_id, last_id, path, offset, length)`` of every stored member for ``key``.
+
+    Files written without an index come back whole (``offset`` None), bounded
+    by the ids in their names.
+    """
+    base = (root or ARCHIVE_DIR) / table
+    if not base.exists():
+        return []
+    members = []
+    for path in base.glob("*/*.jsonl.gz"):
+        first_id, last_id, _ = path.name.split("-", 2)
+        if before_id is not None and int(first_id) >= before_id:
+            continue
+        index = _read_index(str(path))
+        if index is None:
+            members.append((int(first_id), int(last_id), path, None, None))
+            continue
+        member = index.get(str(key))
+        if member is not None and (before_id is None or member[2] < before_id):
+            members.append((member[2], member[3], path, member[0], member[1]))
+    return members
+
+
+def newest_group_id(
+    table: str, group_by: str, key, before_id: Optional[int] = None, root: Optional[Path] = None
+) -> Optional[int]:
+    """Upper bound on the ids archived for ``key`` below ``before_id``; ``None`` when there are none.
+
+    Reads only file names and indexes.
+    """
+    last_ids = [member[1] for member in _group_members(table, group_by, key, before_id, root)]
+    return max(last_ids) if last_ids else None
+
+
+def _read_member(path: Path, offset: Optional[int], length: Optional[int]) -> List[dict]:
+    if offset is None:
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle]
+    with path.open("rb") as handle:
+        handle.seek(offset)
+        data = gzip.decompress(handle.read(length))
+    return [json.loads(line) for line in data.decode("utf-8").splitlines()]
+
+
+def iter_group_newest_first(
+    table: str, group_by: str, key, before_id: Optional[int] = None, root: Optional[Path] = None
+) -> Iterator[dict]:
+    """Yield the archived rows whose ``group_by`` equals ``key``, highest id first, below ``before_id``.
+
+    Only that group's members are decompressed, and a member is only read
+    once every row above its last id has been yielded, so a reader that
+    stops early touches only the newest ones.
+    """
+    members = sorted(_group_members(table, group_by, key, before_id, root), key=lambda member: member[1], reverse=True)
+    heap: List[Tuple[int, int, dict]] = []
+    sequence = itertools.count()
+    index = 0
+    while index < len(members) or heap:
+        while index < len(members) and (not heap or members[index][1] >= -heap[0][0]):
+            _, _, path, offset, length = members[index]
+            for row in _read_member(path, offset, length):
+                if row.get(group_by) == key and (before_id is None or row["id"] < before_id):
+                    heapq.heappush(heap, (-row["id"], next(sequence), row))
+            index += 1
+        if heap:
+            yield heapq.heappop(heap)[2]
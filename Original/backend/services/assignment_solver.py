@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from ortools.sat.python import cp_model
+
+    from .matching_service import ScoredCandidate
+
+logger = logging.getLogger(__name__)
+
+# "greedy" proposes each item's best candidate (with the flat single-supplier
+# bonus); "joint" assigns every item of an order, or of a re-match batch, in
+# one CP-SAT solve that trades score against the number of suppliers used.
+MATCHING_ASSIGNMENT_MODE = os.getenv("MATCHING_ASSIGNMENT_MODE", "greedy").strip().lower()
+# Score an order gives up to avoid one more supplier (scores run 0..1).
+MATCHING_CONSOLIDATION_PENALTY = float(os.getenv("MATCHING_CONSOLIDATION_PENALTY", "0.10"))
+ASSIGNMENT_SOLVER_TIME_LIMIT_SECONDS = float(os.getenv("ASSIGNMENT_SOLVER_TIME_LIMIT_SECONDS", "2"))
+
+# CP-SAT works on integers; scores are kept to 1/1000.
+_SCALE = 1000
+# Reward for assigning an item at all, so leaving one unassigned never pays
+# for a consolidation.
+_ASSIGN_REWARD = 1.0
+
+
+@dataclass
+class AssignmentItem:
+    item_id: int
+    # Items sharing a group (an order) pay the consolidation penalty once per supplier.
+    group_id: int
+    quantity: int
+    candidates: List["ScoredCandidate"]
+
+
+def joint_assignment_enabled() -> bool:
+    return MATCHING_ASSIGNMENT_MODE == "joint"
+
+
+def solve_assignment(
+    items: Sequence[AssignmentItem],
+    already_used: Optional[Mapping[int, Set[int]]] = None,
+    consolidation_penalty: float = MATCHING_CONSOLIDATION_PENALTY,
+    time_limit_seconds: float = ASSIGNMENT_SOLVER_TIME_LIMIT_SECONDS,
+) -> Dict[int, "ScoredCandidate"]:
+    """Chosen candidate per item id; items left out could not be placed.
+
+    Maximises the summed match score minus ``consolidation_penalty`` for each
+    distinct supplier an order uses, without assigning more of a catalog row
+    than the stock seen at scoring time. Suppliers in ``already_used[group]``
+    (serving other items of that order) cost nothing extra. Returns ``{}``
+    when the solver finds nothing in time, so callers keep their greedy
+    ranking.
+    """
+    # CP-SAT pulls in numpy and pandas (~0.5 s); greedy mode never needs it.
+    from ortools.sat.python import cp_model
+
+    model = cp_model.CpModel()
+    choices: List[Tuple[AssignmentItem, "ScoredCandidate", cp_model.IntVar]] = []
+    by_catalog: Dict[int, List[Tuple[int, cp_model.IntVar]]] = defaultdict(list)
+    stock: Dict[int, int] = {}
+    by_group_supplier: Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
+
+    for item in items:
+        item_vars = []
+        for index, candidate in enumerate(item.candidates):
+            if candidate.catalog.quantity_in_stock < item.quantity:
+                continue
+            var = model.NewBoolVar(f"x_{item.item_id}_{index}")
+            item_vars.append(var)
+            choices.append((item, candidate, var))
+            by_catalog[candidate.catalog.id].append((item.quantity, var))
+            stock[candidate.catalog.id] = candidate.catalog.quantity_in_stock
+            by_group_supplier[(item.group_id, candidate.supplier_id)].append(var)
+        if item_vars:
+            model.AddAtMostOne(item_vars)
+    if not choices:
+        return {}
+
+    for catalog_id, demands in by_catalog.items():
+        if sum(quantity for quantity, _ in demands) > stock[catalog_id]:
+            model.Add(sum(quantity * var for quantity, var in demands) <= stock[catalog_id])
+
+    objective = [int(round((_ASSIGN_REWARD + candidate.total_score) * _SCALE)) * var for _, candidate, var in choices]
+    penalty = int(round(consolidation_penalty * _SCALE))
+    already_used = already_used or {}
+    for (group_id, supplier_id), assigned in by_group_supplier.items():
+        if supplier_id in already_used.get(group_id, ()):
+            continue
+        used = model.NewBoolVar(f"used_{group_id}_{supplier_id}")
+        for var in assigned:
+            model.AddImplication(var, used)
+        objective.append(-penalty * used)
+    model.Maximize(sum(objective))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit_seconds
+    solver.parameters.num_workers = 1
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        logger.warning("Joint assignment found no solution for %d items (%s)", len(items), solver.StatusName(status))
+        return {}
+    return {item.item_id: candidate for item, candidate, var in choices if solver.Value(var)}
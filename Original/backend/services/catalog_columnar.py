@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.events.bus import emit_event
+from backend.models.inventory import InventoryTransaction, PartCategory, PartsCatalog
+from backend.models.users import SupplierProfile
+from backend.schemas.inventory import CSVUploadError, CSVUploadResponse
+from backend.services.inventory_service import LOW_STOCK_MULTIPLIER, normalize_part_number
+from backend.services.matching_cache import note_parts_changed
+
+# pyarrow (with numpy under it) adds ~0.2 s to every worker's start, so it
+# is imported on the first columnar import or export instead.
+pa = pc = ipc = pq = None
+_pyarrow_checked = False
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and written per bulk statement on import, and rows per record
+# batch (Parquet row group) on export.
+CATALOG_COLUMNAR_BATCH_SIZE = int(os.getenv("CATALOG_COLUMNAR_BATCH_SIZE", "5000"))
+# Row errors reported back; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.stream"}
+
+# Same columns as the CSV upload; extra columns (e.g. from an export) are ignored.
+_IMPORT_COLUMNS = {
+    "part_name": "string",
+    "part_number": "string",
+    "category": "string",
+    "brand": "string",
+    "unit_price": "float64",
+    "quantity": "int64",
+    "min_order_qty": "int64",
+    "lead_time_hours": "int64",
+}
+_OPTIONAL_COLUMNS = {"brand", "min_order_qty"}
+
+
+def columnar_available() -> bool:
+    global pa, pc, ipc, pq, _pyarrow_checked
+    if not _pyarrow_checked:
+        _pyarrow_checked = True
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            import pyarrow.ipc as ipc
+            import pyarrow.parquet as pq
+        except ImportError:  # pragma: no cover
+            pa = None
+    return pa is not None
+
+
+def _export_schema():
+    columnar_available()
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("supplier_id", pa.int64()),
+            ("part_name", pa.string()),
+            ("part_number", pa.string()),
+            ("normalized_part_number", pa.string()),
+            ("category", pa.string()),
+            ("brand", pa.string()),
+            ("unit_price", pa.float64()),
+            ("quantity", pa.int64()),
+            ("min_order_qty", pa.int64()),
+            ("lead_time_hours", pa.int64()),
+            ("updated_at", pa.timestamp("s")),
+        ]
+    )
+
+
+@dataclass
+class _ValidatedBatch:
+    row_numbers: List[int]
+    columns: Dict[str, list]
+
+
+def read_table(content: bytes):
+    """Parquet, Arrow IPC file or Arrow IPC stream, told apart by their magic bytes."""
+    columnar_available()
+    buffer = pa.BufferReader(content)
+    if content[:4] == b"PAR1":
+        return pq.read_table(buffer)
+    if content[:6] == b"ARROW1":
+        return ipc.open_file(buffer).read_all()
+    return ipc.open_stream(buffer).read_all()
+
+
+def _column_errors(table) -> Tuple[Dict[str, object], List[str]]:
+    """Cast each expected column to its type; returns the cast columns and one error per bad column."""
+    columns: Dict[str, object] = {}
+    errors: List[str] = []
+    for name, type_name in _IMPORT_COLUMNS.items():
+        if name not in table.column_names:
+            if name not in _OPTIONAL_COLUMNS:
+                errors.append(f"Missing required column: {name}")
+            continue
+        column = table.column(name)
+        try:
+            # Safe casts: integral floats (a pandas artefact) pass, fractions do not.
+            columns[name] = column.cast(type_name)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as exc:
+            errors.append(f"Column {name} is {column.type}, expected {type_name}: {exc}")
+    return columns, errors
+
+
+def _read_and_check(content: bytes):
+    table = read_table(content)
+    return (table, *_column_errors(table))
+
+
+def _validate(table, offset: int, columns: Dict[str, object]) -> Tuple[_ValidatedBatch, List[CSVUploadError], int]:
+    """Row checks as boolean masks over a slice; returns the valid rows, reported errors and failed count."""
+    length = len(next(iter(columns.values())))
+    checks = []
+    for name in ("part_name", "part_number", "category"):
+        stripped = pc.utf8_trim_whitespace(columns[name])
+        columns[name] = stripped
+        checks.append((pc.fill_null(pc.greater(pc.utf8_length(stripped), 0), False), f"{name} is required"))
+    if "brand" in columns:
+        brand = pc.utf8_trim_whitespace(columns["brand"])
+        columns["brand"] = pc.if_else(pc.equal(brand, ""), pa.scalar(None, pa.string()), brand)
+    if "min_order_qty" not in columns:
+        columns["min_order_qty"] = pa.array([1] * length, pa.int64())
+    else:
+        columns["min_order_qty"] = pc.fill_null(columns["min_order_qty"], 1)
+    checks.extend(
+        [
+            (pc.fill_null(pc.greater(columns["unit_price"], 0), False), "unit_price must be > 0"),
+            (pc.fill_null(pc.greater_equal(columns["quantity"], 0), False), "quantity must be >= 0"),
+            (pc.greater(columns["min_order_qty"], 0), "min_order_qty must be > 0"),
+            (pc.fill_null(pc.greater(columns["lead_time_hours"], 0), False), "lead_time_hours must be > 0"),
+        ]
+    )
+
+    valid = checks[0][0]
+    for mask, _ in checks[1:]:
+        valid = pc.and_(valid, mask)
+    failed = length - pc.sum(valid).as_py() if length else 0
+    errors: List[CSVUploadError] = []
+    if failed:
+        invalid_rows = pc.indices_nonzero(pc.invert(valid)).to_pylist()
+        for index in invalid_rows[:MAX_REPORTED_ERRORS]:
+            reasons = [message for mask, message in checks if not mask[index].as_py()]
+            errors.append(
+                CSVUploadError(
+                    row_number=offset + index + 1,
+                    error="; ".join(reasons),
+                    row_data=table.slice(index, 1).to_pylist()[0],
+                )
+            )
+    row_numbers = [offset + index + 1 for index in pc.indices_nonzero(valid).to_pylist()]
+    kept = {name: pc.filter(column, valid).to_pylist() for name, column in columns.items()}
+    if "brand" not in kept:
+        kept["brand"] = [None] * len(row_numbers)
+    return _ValidatedBatch(row_numbers, kept), errors, failed
+
+
+async def _category_ids(session: AsyncSession, names: List[str]) -> Dict[str, int]:
+    """Category id per lower-cased name, creating missing categories in one insert."""
+    wanted = {name.lower(): name for name in names}
+    rows = await session.execute(
+        select(PartCategory.name, PartCategory.id).where(func.lower(PartCategory.name).in_(list(wanted)))
+    )
+    found = {name.lower(): category_id for name, category_id in rows.all()}
+    missing = [{"name": wanted[key], "subcategory": None} for key in wanted if key not in found]
+    if missing:
+        inserted = await session.execute(insert(PartCategory).returning(PartCategory.name, PartCategory.id), missing)
+        found.update({name.lower(): category_id for name, category_id in inserted.all()})
+    return found
+
+
+async def _write_batch(
+    session: AsyncSession, supplier_id: int, batch: _ValidatedBatch, now: datetime
+) -> List[Tuple[int, int, int]]:
+    """Upsert one validated batch; returns (catalog id, quantity, min order qty) of every row written."""
+    columns = batch.columns
+    categories = await _category_ids(session, columns["category"])
+    existing_rows = await session.execute(
+        select(PartsCatalog.part_number, PartsCatalog.id, PartsCatalog.quantity_in_stock).where(
+            PartsCatalog.supplier_id == supplier_id,
+            PartsCatalog.part_number.in_(set(columns["part_number"])),
+        )
+    )
+    existing = {part_number: (catalog_id, stock) for part_number, catalog_id, stock in existing_rows.all()}
+
+    # A part number repeated in one file: the last row wins, as with the CSV upload.
+    by_part: Dict[str, dict] = {}
+    for index, part_number in enumerate(columns["part_number"]):
+        by_part[part_number] = {
+            "supplier_id": supplier_id,
+            "category_id": categories[columns["category"][index].lower()],
+            "part_name": columns["part_name"][index],
+            "part_number": part_number,
+            "normalized_part_number": normalize_part_number(part_number),
+            "brand": columns["brand"][index],
+            "unit_price": columns["unit_price"][index],
+            "quantity_in_stock": columns["quantity"][index],
+            "min_order_quantity": columns["min_order_qty"][index],
+            "lead_time_hours": columns["lead_time_hours"][index],
+            "updated_at": now,
+        }
+
+    updates = []
+    inserts = []
+    transactions = []
+    for part_number, values in by_part.items():
+        if part_number in existing:
+            catalog_id, stock = existing[part_number]
+            updates.append({"id": catalog_id, **values})
+            if values["quantity_in_stock"] != stock:
+                transactions.append(
+                    {
+                        "catalog_id": catalog_id,
+                        "change_amount": values["quantity_in_stock"] - stock,
+                        "reason": "columnar_upload",
+                    }
+                )
+        else:
+            inserts.append(values)
+
+    written = [(row["id"], row["quantity_in_stock"], row["min_order_quantity"]) for row in updates]
+    if updates:
+        await session.execute(update(PartsCatalog), updates)
+    if inserts:
+        inserted = await session.execute(
+            insert(PartsCatalog).returning(PartsCatalog.id, PartsCatalog.part_number), inserts
+        )
+        for catalog_id, part_number in inserted.all():
+            values = by_part[part_number]
+            written.append((catalog_id, values["quantity_in_stock"], values["min_order_quantity"]))
+            if values["quantity_in_stock"]:
+                transactions.append(
+                    {"catalog_id": catalog_id, "change_amount": values["quantity_in_stock"], "reason": "columnar_upload"}
+                )
+    if transactions:
+        await session.execute(insert(InventoryTransaction), transactions)
+    note_parts_changed(session, [values["normalized_part_number"] for values in by_part.values()])
+    return written
+
+
+async def import_catalog(session: AsyncSession, content: bytes, supplier_id: int) -> CSVUploadResponse:
+    """Bulk-load a Parquet / Arrow catalog for one supplier in a single transaction.
+
+    Columns are type-checked once for the whole file, rows are checked with
+    vectorised masks, and valid rows are written with one bulk insert and
+    one bulk update per batch. Invalid rows are skipped and reported, as with
+    the CSV upload. Decoding and validation run in a worker thread, so a
+    large file does not stall the event loop.
+    """
+    try:
+        table, columns, column_errors = await asyncio.to_thread(_read_and_check, content)
+    except (pa.ArrowInvalid, OSError) as exc:
+        return CSVUploadResponse(
+            total_rows=0,
+            successful=0,
+            failed=1,
+            errors=[CSVUploadError(row_number=0, error=f"Not a Parquet or Arrow file: {exc}", row_data=None)],
+        )
+
+    if column_errors:
+        return CSVUploadResponse(
+            total_rows=table.num_rows,
+            successful=0,
+            failed=table.num_rows or 1,
+            errors=[CSVUploadError(row_number=0, error=error, row_data=None) for error in column_errors],
+        )
+
+    now = datetime.utcnow().replace(microsecond=0)
+    errors: List[CSVUploadError] = []
+    failed = 0
+    written: List[Tuple[int, int, int]] = []
+    for offset in range(0, table.num_rows, CATALOG_COLUMNAR_BATCH_SIZE):
+        length = min(CATALOG_COLUMNAR_BATCH_SIZE, table.num_rows - offset)
+        batch_columns = {name: column.slice(offset, length) for name, column in columns.items()}
+        batch, batch_errors, batch_failed = await asyncio.to_thread(
+            _validate, table.slice(offset, length), offset, batch_columns
+        )
+        failed += batch_failed
+        errors.extend(batch_errors[: MAX_REPORTED_ERRORS - len(errors)])
+        if batch.row_numbers:
+            written.extend(await _write_batch(session, supplier_id, batch, now))
+    await session.commit()
+
+    low_stock = [
+        (catalog_id, quantity, min_order_qty)
+        for catalog_id, quantity, min_order_qty in written
+        if quantity < min_order_qty * LOW_STOCK_MULTIPLIER
+    ]
+    if low_stock:
+        supplier = await session.get(SupplierProfile, supplier_id)
+        for catalog_id, quantity, min_order_qty in low_stock:
+            await emit_event(
+                "LOW_STOCK_ALERT",
+                {
+                    "entity_type": "parts_catalog",
+                    "entity_id": catalog_id,
+                    "catalog_id": catalog_id,
+                    "supplier_id": supplier_id,
+                    "quantity_in_stock": quantity,
+                    "min_order_quantity": min_order_qty,
+                },
+                [supplier.user_id] if supplier and supplier.user_id else [],
+            )
+
+    return CSVUploadResponse(
+        total_rows=table.num_rows,
+        successful=table.num_rows - failed,
+        failed=failed,
+        errors=errors,
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands its bytes back between writer calls."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def export_catalog(export_format: str, supplier_id: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Stream the catalog as Parquet (one row group per batch) or an Arrow IPC stream.
+
+    Rows come off a server-side cursor as plain tuples and are transposed
+    straight into Arrow arrays, one record batch per fetch.
+    """
+    if export_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format: {export_format}")
+    schema = _export_schema()
+    query = (
+        select(
+            PartsCatalog.id,
+            PartsCatalog.supplier_id,
+            PartsCatalog.part_name,
+            PartsCatalog.part_number,
+            PartsCatalog.normalized_part_number,
+            PartCategory.name,
+            PartsCatalog.brand,
+            PartsCatalog.unit_price,
+            PartsCatalog.quantity_in_stock,
+            PartsCatalog.min_order_quantity,
+            PartsCatalog.lead_time_hours,
+            PartsCatalog.updated_at,
+        )
+        .outerjoin(PartCategory, PartsCatalog.category_id == PartCategory.id)
+        .order_by(PartsCatalog.id)
+        .execution_options(yield_per=CATALOG_COLUMNAR_BATCH_SIZE)
+    )
+    if supplier_id is not None:
+        query = query.where(PartsCatalog.supplier_id == supplier_id)
+
+    sink = _ChunkSink()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = ipc.new_stream(sink, schema)
+    # The response outlives the request's session, so the export owns one.
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    writer.close()
+    yield sink.drain()
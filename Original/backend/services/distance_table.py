@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import math
+import os
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.database import AsyncSessionLocal
+from backend.middleware.metrics import track_ors_call
+from backend.models.matching import BuyerSupplierDistance
+from backend.models.user import BuyerProfile, SupplierProfile
+from backend.services import road_network
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Pairs farther apart than this (straight line) are not precomputed; matching
+# never searches beyond 500 km.
+DISTANCE_TABLE_RADIUS_KM = float(os.getenv("DISTANCE_TABLE_RADIUS_KM", "500"))
+# Buyers x suppliers per ORS matrix request; ORS caps a request at 3500 cells.
+DISTANCE_TABLE_TILE_SIZE = int(os.getenv("DISTANCE_TABLE_TILE_SIZE", "50"))
+# Seconds between full passes; 0 disables the background task. Profile moves
+# wake it up immediately.
+DISTANCE_TABLE_INTERVAL_SECONDS = int(os.getenv("DISTANCE_TABLE_INTERVAL_SECONDS", "3600"))
+
+ORS_MATRIX_URL = "https://api.openrouteservice.org/v2/matrix/driving-car"
+ESTIMATE_DETOUR_FACTOR = 1.3
+ESTIMATE_SPEED_KMPH = 45.0
+
+_PENDING_KEY = "distance_table_moves"
+
+_moved_buyers: Set[int] = set()
+_moved_suppliers: Set[int] = set()
+_wakeup: Optional[asyncio.Event] = None
+
+Point = Tuple[float, float]
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    radius = 6371.0
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return radius * c
+
+
+def _estimate(buyer: Point, supplier: Point) -> Tuple[float, float]:
+    distance_km = _haversine_km(buyer[0], buyer[1], supplier[0], supplier[1]) * ESTIMATE_DETOUR_FACTOR
+    return distance_km, distance_km / ESTIMATE_SPEED_KMPH * 60.0
+
+
+def _routing_available() -> bool:
+    return bool(os.getenv("ORS_API_KEY")) or road_network.get_road_network() is not None
+
+
+def _is_current(row: BuyerSupplierDistance, buyer: Point, supplier: Point) -> bool:
+    return (
+        (row.buyer_latitude, row.buyer_longitude) == buyer
+        and (row.supplier_latitude, row.supplier_longitude) == supplier
+    )
+
+
+async def lookup_distances(
+    session: AsyncSession,
+    buyer: BuyerProfile,
+    suppliers: Iterable[SupplierProfile],
+) -> Dict[int, BuyerSupplierDistance]:
+    """Stored rows for ``buyer`` and each supplier, keyed by supplier id; stale rows are left out.
+
+    With ``ORS_API_KEY`` set or a road network loaded, estimated rows are left
+    out too so callers route the pair properly instead.
+    """
+    by_id = {supplier.id: supplier for supplier in suppliers}
+    if not by_id:
+        return {}
+    rows = await session.execute(
+        select(BuyerSupplierDistance).where(
+            BuyerSupplierDistance.buyer_id == buyer.id,
+            BuyerSupplierDistance.supplier_id.in_(list(by_id)),
+        )
+    )
+    accept_estimates = not _routing_available()
+    buyer_point = (buyer.latitude, buyer.longitude)
+    found: Dict[int, BuyerSupplierDistance] = {}
+    for row in rows.scalars():
+        supplier = by_id[row.supplier_id]
+        if row.source == "estimate" and not accept_estimates:
+            continue
+        if _is_current(row, buyer_point, (supplier.latitude, supplier.longitude)):
+            found[row.supplier_id] = row
+    return found
+
+
+async def lookup_distance(
+    session: AsyncSession, buyer: BuyerProfile, supplier: SupplierProfile
+) -> Optional[BuyerSupplierDistance]:
+    return (await lookup_distances(session, buyer, [supplier])).get(supplier.id)
+
+
+async def _ors_matrix(
+    client: httpx.AsyncClient, api_key: str, sources: Sequence[Point], destinations: Sequence[Point]
+) -> Optional[Tuple[List[List[float]], List[List[float]]]]:
+    locations = [[lng, lat] for lat, lng in itertools.chain(sources, destinations)]
+    payload = {
+        "locations": locations,
+        "sources": list(range(len(sources))),
+        "destinations": list(range(len(sources), len(locations))),
+        "metrics": ["distance", "duration"],
+    }
+    try:
+        with track_ors_call("matrix"):
+            response = await client.post(ORS_MATRIX_URL, json=payload, headers={"Authorization": api_key})
+        response.raise_for_status()
+        data = response.json()
+        return data["distances"], data["durations"]
+    except Exception:
+        logger.exception("ORS matrix tile failed; storing estimates for it")
+        return None
+
+
+def _chunks(values: List[int], size: int) -> Iterable[List[int]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+async def refresh_distance_table(
+    session: AsyncSession,
+    buyer_ids: Optional[Iterable[int]] = None,
+    supplier_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """Compute missing and stale pairs within the radius; returns rows written.
+
+    Without filters every buyer/supplier pair is checked; with them, only the
+    pairs touching those profiles. Pairs are routed on the local road network
+    when one is loaded, otherwise through ORS; estimated rows are upgraded
+    once either is available.
+    """
+    buyer_query = select(BuyerProfile.id, BuyerProfile.latitude, BuyerProfile.longitude)
+    supplier_query = select(SupplierProfile.id, SupplierProfile.latitude, SupplierProfile.longitude)
+    buyer_filter = set(buyer_ids) if buyer_ids is not None else None
+    supplier_filter = set(supplier_ids) if supplier_ids is not None else None
+    if buyer_filter is not None and supplier_filter is None:
+        buyer_query = buyer_query.where(BuyerProfile.id.in_(buyer_filter))
+    if supplier_filter is not None and buyer_filter is None:
+        supplier_query = supplier_query.where(SupplierProfile.id.in_(supplier_filter))
+    buyers = {row.id: (row.latitude, row.longitude) for row in (await session.execute(buyer_query)).all()}
+    suppliers = {row.id: (row.latitude, row.longitude) for row in (await session.execute(supplier_query)).all()}
+    if not buyers or not suppliers:
+        return 0
+
+    existing_query = select(
+        BuyerSupplierDistance.buyer_id,
+        BuyerSupplierDistance.supplier_id,
+        BuyerSupplierDistance.source,
+        BuyerSupplierDistance.buyer_latitude,
+        BuyerSupplierDistance.buyer_longitude,
+        BuyerSupplierDistance.supplier_latitude,
+        BuyerSupplierDistance.supplier_longitude,
+    )
+    if buyer_filter is not None and supplier_filter is None:
+        existing_query = existing_query.where(BuyerSupplierDistance.buyer_id.in_(list(buyers)))
+    elif supplier_filter is not None and buyer_filter is None:
+        existing_query = existing_query.where(BuyerSupplierDistance.supplier_id.in_(list(suppliers)))
+    elif buyer_filter is not None and supplier_filter is not None:
+        existing_query = existing_query.where(
+            or_(
+                BuyerSupplierDistance.buyer_id.in_(list(buyer_filter)),
+                BuyerSupplierDistance.supplier_id.in_(list(supplier_filter)),
+            )
+        )
+    existing = {
+        (row.buyer_id, row.supplier_id): row for row in (await session.execute(existing_query)).all()
+    }
+
+    api_key = os.getenv("ORS_API_KEY")
+    network = road_network.get_road_network()
+    routed_source = "graph" if network is not None else "ors"
+    accept_estimates = not _routing_available()
+    needed: Dict[int, Set[int]] = defaultdict(set)
+    for buyer_id, buyer_point in buyers.items():
+        for supplier_id, supplier_point in suppliers.items():
+            if buyer_filter is not None and supplier_filter is not None:
+                if buyer_id not in buyer_filter and supplier_id not in supplier_filter:
+                    continue
+            if _haversine_km(*buyer_point, *supplier_point) > DISTANCE_TABLE_RADIUS_KM:
+                continue
+            row = existing.get((buyer_id, supplier_id))
+            if row is not None and _is_current(row, buyer_point, supplier_point) and (
+                row.source != "estimate" or accept_estimates
+            ):
+                continue
+            needed[buyer_id].add(supplier_id)
+    if not needed:
+        return 0
+
+    # Tile by buyer groups; each group asks only for the suppliers its buyers need.
+    import httpx
+
+    values: List[dict] = []
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        for buyer_tile in _chunks(sorted(needed), DISTANCE_TABLE_TILE_SIZE):
+            tile_suppliers = sorted({supplier_id for buyer_id in buyer_tile for supplier_id in needed[buyer_id]})
+            for supplier_tile in _chunks(tile_suppliers, DISTANCE_TABLE_TILE_SIZE):
+                matrix = None
+                tile_sources = [buyers[buyer_id] for buyer_id in buyer_tile]
+                tile_destinations = [suppliers[supplier_id] for supplier_id in supplier_tile]
+                if network is not None:
+                    matrix = await asyncio.to_thread(network.matrix, tile_sources, tile_destinations)
+                elif api_key:
+                    matrix = await _ors_matrix(client, api_key, tile_sources, tile_destinations)
+                for row_index, buyer_id in enumerate(buyer_tile):
+                    for column_index, supplier_id in enumerate(supplier_tile):
+                        if supplier_id not in needed[buyer_id]:
+                            continue
+                        buyer_point, supplier_point = buyers[buyer_id], suppliers[supplier_id]
+                        # Matrix rows run buyer -> supplier; deliveries run the
+                        # other way, which is close enough on a road network.
+                        meters = matrix[0][row_index][column_index] if matrix else None
+                        seconds = matrix[1][row_index][column_index] if matrix else None
+                        if meters is None or seconds is None:
+                            distance_km, duration_minutes = _estimate(buyer_point, supplier_point)
+                            source = "estimate"
+                        else:
+                            distance_km, duration_minutes, source = meters / 1000.0, seconds / 60.0, routed_source
+                        values.append(
+                            {
+                                "buyer_id": buyer_id,
+                                "supplier_id": supplier_id,
+                                "distance_km": distance_km,
+                                "duration_minutes": duration_minutes,
+                                "source": source,
+                                "buyer_latitude": buyer_point[0],
+                                "buyer_longitude": buyer_point[1],
+                                "supplier_latitude": supplier_point[0],
+                                "supplier_longitude": supplier_point[1],
+                            }
+                        )
+
+    insert = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+    for start in range(0, len(values), 500):
+        stmt = insert(BuyerSupplierDistance).values(values[start : start + 500])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BuyerSupplierDistance.buyer_id, BuyerSupplierDistance.supplier_id],
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "distance_km",
+                    "duration_minutes",
+                    "source",
+                    "buyer_latitude",
+                    "buyer_longitude",
+                    "supplier_latitude",
+                    "supplier_longitude",
+                    "computed_at",
+                )
+            },
+        )
+        await session.execute(stmt)
+    await session.commit()
+    return len(values)
+
+
+async def distance_table_loop(interval_seconds: int = DISTANCE_TABLE_INTERVAL_SECONDS) -> None:
+    global _wakeup
+    _wakeup = asyncio.Event()
+    full_pass = True
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                if full_pass:
+                    _moved_buyers.clear()
+                    _moved_suppliers.clear()
+                    written = await refresh_distance_table(session)
+                else:
+                    buyer_ids, supplier_ids = set(_moved_buyers), set(_moved_suppliers)
+                    _moved_buyers.clear()
+                    _moved_suppliers.clear()
+                    written = await refresh_distance_table(session, buyer_ids, supplier_ids)
+            if written:
+                logger.info("Distance table: %d buyer/supplier pairs computed", written)
+        except Exception:
+            logger.exception("Distance table refresh failed")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=interval_seconds)
+            full_pass = False
+        except asyncio.TimeoutError:
+            full_pass = True
+        _wakeup.clear()
+
+
+_LOCATION_FIELDS = ("latitude", "longitude", "service_radius_km")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_profile_moves(session: Session, flush_context) -> None:
+    for obj in itertools.chain(session.new, session.dirty):
+        if not isinstance(obj, (BuyerProfile, SupplierProfile)) or obj.id is None:
+            continue
+        state = inspect(obj)
+        if obj in session.new or any(
+            field in state.attrs and state.attrs[field].history.has_changes() for field in _LOCATION_FIELDS
+        ):
+            kind = "buyer" if isinstance(obj, BuyerProfile) else "supplier"
+            session.info.setdefault(_PENDING_KEY, set()).add((kind, obj.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_profile_moves(session: Session) -> None:
+    moves = session.info.pop(_PENDING_KEY, None)
+    if not moves:
+        return
+    for kind, profile_id in moves:
+        (_moved_buyers if kind == "buyer" else _moved_suppliers).add(profile_id)
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_profile_moves(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
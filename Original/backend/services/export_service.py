@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Select, select
+
+from backend.database import AsyncSessionLocal
+from backend.models.catalog import InventoryTransaction
+from backend.models.events import EventLog
+from backend.models.matching import MatchingLog
+from backend.models.orders import Order, OrderAssignment, OrderItem
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while streaming; also how many rows go into
+# one chunk of the response body.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+_ORDER_COLUMNS = [
+    Order.id.label("order_id"),
+    Order.buyer_id,
+    Order.status.label("order_status"),
+    Order.urgency,
+    Order.required_delivery_date,
+    Order.created_at,
+    OrderItem.id.label("order_item_id"),
+    OrderItem.part_number,
+    OrderItem.part_description,
+    OrderItem.quantity,
+    OrderItem.status.label("item_status"),
+    OrderAssignment.id.label("assignment_id"),
+    OrderAssignment.supplier_id,
+    OrderAssignment.catalog_id,
+    OrderAssignment.assigned_price,
+    OrderAssignment.match_score,
+    OrderAssignment.status.label("assignment_status"),
+]
+
+
+def _orders_query() -> Select:
+    # One row per order x item x assignment; orders without items still appear.
+    return (
+        select(*_ORDER_COLUMNS)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(OrderAssignment, OrderAssignment.order_item_id == OrderItem.id)
+        .order_by(Order.id, OrderItem.id, OrderAssignment.id)
+    )
+
+
+def _table_query(model) -> Callable[[], Select]:
+    return lambda: select(*model.__table__.columns).order_by(model.id)
+
+
+# name -> (query, created_at column used for date filters)
+EXPORT_DATASETS: Dict[str, Tuple[Callable[[], Select], Any]] = {
+    "orders": (_orders_query, Order.created_at),
+    "matching_logs": (_table_query(MatchingLog), MatchingLog.created_at),
+    "event_logs": (_table_query(EventLog), EventLog.created_at),
+    "inventory_transactions": (_table_query(InventoryTransaction), InventoryTransaction.created_at),
+}
+
+
+def _build_query(dataset: str, start_date: Optional[datetime], end_date: Optional[datetime]) -> Select:
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    build, created_at = EXPORT_DATASETS[dataset]
+    query = build()
+    if start_date is not None:
+        query = query.where(created_at >= start_date.replace(tzinfo=None))
+    if end_date is not None:
+        query = query.where(created_at <= end_date.replace(tzinfo=None))
+    return query
+
+
+def _jsonable(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def _iter_row_batches(
+    dataset: str, start_date: Optional[datetime], end_date: Optional[datetime]
+) -> AsyncIterator[Tuple[List[str], List[Any]]]:
+    """Column names and row batches from a server-side cursor; never holds more than one batch.
+
+    An empty export still yields its column names once, with no rows.
+    """
+    query = _build_query(dataset, start_date, end_date).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    # The response outlives the request's session, so the export owns one.
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        columns = list(result.keys())
+        empty = True
+        async for batch in result.partitions():
+            empty = False
+            yield columns, batch
+        if empty:
+            yield columns, []
+
+
+def _nest_orders(columns: List[str], rows: List[Any], current: Optional[dict]) -> Tuple[List[dict], Optional[dict]]:
+    """Fold flat order rows into one document per order.
+
+    Rows arrive ordered by order, item and assignment id, so an order is
+    complete once a row for the next one shows up; the open order carries
+    over to the next batch.
+    """
+    finished: List[dict] = []
+    for row in rows:
+        values = dict(zip(columns, row))
+        if current is None or current["id"] != values["order_id"]:
+            if current is not None:
+                finished.append(current)
+            current = {
+                "id": values["order_id"],
+                "buyer_id": values["buyer_id"],
+                "status": values["order_status"],
+                "urgency": values["urgency"],
+                "required_delivery_date": _jsonable(values["required_delivery_date"]),
+                "created_at": _jsonable(values["created_at"]),
+                "items": [],
+            }
+        if values["order_item_id"] is None:
+            continue
+        items = current["items"]
+        if not items or items[-1]["id"] != values["order_item_id"]:
+            items.append(
+                {
+                    "id": values["order_item_id"],
+                    "part_number": values["part_number"],
+                    "part_description": values["part_description"],
+                    "quantity": values["quantity"],
+                    "status": values["item_status"],
+                    "assignments": [],
+                }
+            )
+        if values["assignment_id"] is not None:
+            items[-1]["assignments"].append(
+                {
+                    "id": values["assignment_id"],
+                    "supplier_id": values["supplier_id"],
+                    "catalog_id": values["catalog_id"],
+                    "assigned_price": values["assigned_price"],
+                    "match_score": values["match_score"],
+                    "status": values["assignment_status"],
+                }
+            )
+    return finished, current
+
+
+async def stream_ndjson(
+    dataset: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+) -> AsyncIterator[bytes]:
+    """One JSON object per line; orders come nested with their items and assignments."""
+    open_order: Optional[dict] = None
+    async for columns, rows in _iter_row_batches(dataset, start_date, end_date):
+        if dataset == "orders":
+            documents, open_order = _nest_orders(columns, rows, open_order)
+        else:
+            documents = [{key: _jsonable(value) for key, value in zip(columns, row)} for row in rows]
+        if documents:
+            yield "".join(json.dumps(document) + "\n" for document in documents).encode("utf-8")
+    if open_order is not None:
+        yield (json.dumps(open_order) + "\n").encode("utf-8")
+
+
+async def stream_csv(
+    dataset: str, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+) -> AsyncIterator[bytes]:
+    """Header plus one flat row per record; orders repeat per item and assignment."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    async for columns, rows in _iter_row_batches(dataset, start_date, end_date):
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows([_jsonable(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_export(
+    dataset: str,
+    export_format: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> AsyncIterator[bytes]:
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    _build_query(dataset, start_date, end_date)
+    if export_format == "csv":
+        return stream_csv(dataset, start_date, end_date)
+    return stream_ndjson(dataset, start_date, end_date)
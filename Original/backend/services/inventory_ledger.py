@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.models.inventory import InventoryBalanceSnapshot, InventoryTransaction
+from backend.services.archive_store import (
+    iter_group_newest_first,
+    iter_partitions,
+    newest_group_id,
+    write_partitions,
+)
+from backend.services.reservation_service import release_expired_holds
+
+logger = logging.getLogger(__name__)
+
+# Transactions older than this are moved to compressed monthly archive files
+# once a balance snapshot covers them.
+INVENTORY_LEDGER_RETENTION_DAYS = int(os.getenv("INVENTORY_LEDGER_RETENTION_DAYS", "90"))
+# Seconds between snapshot/archive passes of the background task; 0 disables it.
+INVENTORY_LEDGER_INTERVAL_SECONDS = int(os.getenv("INVENTORY_LEDGER_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SIZE = 10_000
+# Rows per history page when the caller does not ask for a size.
+HISTORY_PAGE_SIZE = 100
+
+
+@dataclass
+class LedgerBalance:
+    catalog_id: int
+    balance: int
+    snapshot_balance: int
+    snapshot_last_transaction_id: int
+    snapshot_at: Optional[datetime]
+    tail_transactions: int
+
+
+@dataclass
+class TransactionHistoryPage:
+    # Newest first; each row says whether it was read from the archive.
+    items: List[Dict[str, Any]]
+    # Pass back as ``before_id`` for the next page; None once history is exhausted.
+    next_cursor: Optional[int]
+    includes_archived: bool
+    # More history exists past ``next_cursor`` and it comes from the archive.
+    older_rows_archived: bool = False
+
+
+@dataclass
+class LedgerMaintenanceResult:
+    holds_expired: int = 0
+    snapshots_written: int = 0
+    transactions_archived: int = 0
+    snapshots_pruned: int = 0
+    archive_files: Optional[List[str]] = None
+
+
+async def _snapshot_watermark(session: AsyncSession) -> int:
+    return await session.scalar(select(func.coalesce(func.max(InventoryBalanceSnapshot.last_transaction_id), 0)))
+
+
+async def _latest_snapshots(session: AsyncSession, catalog_ids: List[int]) -> Dict[int, InventoryBalanceSnapshot]:
+    if not catalog_ids:
+        return {}
+    latest_ids = (
+        select(func.max(InventoryBalanceSnapshot.id))
+        .where(InventoryBalanceSnapshot.catalog_id.in_(catalog_ids))
+        .group_by(InventoryBalanceSnapshot.catalog_id)
+    )
+    rows = await session.execute(select(InventoryBalanceSnapshot).where(InventoryBalanceSnapshot.id.in_(latest_ids)))
+    return {row.catalog_id: row for row in rows.scalars().all()}
+
+
+async def snapshot_balances(session: AsyncSession) -> int:
+    """Fold transactions since the last pass into new per-catalog snapshots.
+
+    Only catalog entries with new transactions get a new row, so a pass costs
+    O(new transactions) rather than O(ledger). The id watermark relies on ids
+    being committed in order, which holds for SQLite's single writer.
+    """
+    watermark = await _snapshot_watermark(session)
+    new_watermark = await session.scalar(
+        select(func.max(InventoryTransaction.id)).where(InventoryTransaction.id > watermark)
+    )
+    if new_watermark is None:
+        return 0
+
+    delta_rows = (
+        await session.execute(
+            select(
+                InventoryTransaction.catalog_id,
+                func.sum(InventoryTransaction.change_amount),
+                func.count(InventoryTransaction.id),
+            )
+            .where(InventoryTransaction.id > watermark, InventoryTransaction.id <= new_watermark)
+            .where(InventoryTransaction.catalog_id.is_not(None))
+            .group_by(InventoryTransaction.catalog_id)
+        )
+    ).all()
+    previous = await _latest_snapshots(session, [row[0] for row in delta_rows])
+
+    snapshots = []
+    for catalog_id, delta, count in delta_rows:
+        prior = previous.get(catalog_id)
+        snapshots.append(
+            {
+                "catalog_id": catalog_id,
+                "balance": (prior.balance if prior else 0) + int(delta or 0),
+                "transaction_count": (prior.transaction_count if prior else 0) + int(count),
+                "last_transaction_id": new_watermark,
+            }
+        )
+    if snapshots:
+        await session.execute(insert(InventoryBalanceSnapshot), snapshots)
+    await session.commit()
+    return len(snapshots)
+
+
+async def archive_transactions(session: AsyncSession, older_than: datetime) -> tuple[int, List[str]]:
+    """Move snapshot-covered transactions older than ``older_than`` to gzip JSONL files.
+
+    Each batch is written to disk (see ``archive_store``) before its rows
+    are deleted.
+    """
+    watermark = await _snapshot_watermark(session)
+    # Always leave the newest row in place: tables created before
+    # sqlite_autoincrement was set would otherwise reuse archived ids.
+    newest_id = await session.scalar(select(func.max(InventoryTransaction.id)))
+    if newest_id is not None:
+        watermark = min(watermark, newest_id - 1)
+    archived = 0
+    files: List[str] = []
+    last_id = 0
+    while True:
+        rows = (
+            await session.execute(
+                select(
+                    InventoryTransaction.id,
+                    InventoryTransaction.catalog_id,
+                    InventoryTransaction.change_amount,
+                    InventoryTransaction.reason,
+                    InventoryTransaction.created_at,
+                )
+                .where(
+                    InventoryTransaction.id > last_id,
+                    InventoryTransaction.id <= watermark,
+                    InventoryTransaction.created_at < older_than,
+                )
+                .order_by(InventoryTransaction.id)
+                .limit(ARCHIVE_BATCH_SIZE)
+            )
+        ).all()
+        if not rows:
+            break
+
+        files.extend(
+            await asyncio.to_thread(
+                write_partitions, "inventory_transactions", [row._asdict() for row in rows], group_by="catalog_id"
+            )
+        )
+
+        await session.execute(
+            delete(InventoryTransaction).where(
+                InventoryTransaction.id.between(rows[0].id, rows[-1].id),
+                InventoryTransaction.created_at < older_than,
+            )
+        )
+        await session.commit()
+        archived += len(rows)
+        last_id = rows[-1].id
+    return archived, files
+
+
+async def prune_snapshots(session: AsyncSession, older_than: datetime) -> int:
+    """Drop superseded snapshots older than the retention window; the latest per catalog is kept."""
+    latest_ids = select(func.max(InventoryBalanceSnapshot.id)).group_by(InventoryBalanceSnapshot.catalog_id)
+    result = await session.execute(
+        delete(InventoryBalanceSnapshot).where(
+            InventoryBalanceSnapshot.created_at < older_than,
+            InventoryBalanceSnapshot.id.not_in(latest_ids),
+        )
+    )
+    await session.commit()
+    return result.rowcount or 0
+
+
+async def run_ledger_maintenance(
+    session: AsyncSession, retention_days: Optional[int] = None
+) -> LedgerMaintenanceResult:
+    days = INVENTORY_LEDGER_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    result = LedgerMaintenanceResult()
+    result.holds_expired = await release_expired_holds(session)
+    await session.commit()
+    result.snapshots_written = await snapshot_balances(session)
+    result.transactions_archived, result.archive_files = await archive_transactions(session, cutoff)
+    result.snapshots_pruned = await prune_snapshots(session, cutoff)
+    return result
+
+
+async def get_catalog_balance(session: AsyncSession, catalog_id: int) -> LedgerBalance:
+    """Ledger balance from the latest snapshot plus the live transactions after it."""
+    snapshot = (
+        await session.execute(
+            select(InventoryBalanceSnapshot)
+            .where(InventoryBalanceSnapshot.catalog_id == catalog_id)
+            .order_by(InventoryBalanceSnapshot.id.desc())
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    since_id = snapshot.last_transaction_id if snapshot else 0
+    tail_sum, tail_count = (
+        await session.execute(
+            select(func.coalesce(func.sum(InventoryTransaction.change_amount), 0), func.count(InventoryTransaction.id))
+            .where(InventoryTransaction.catalog_id == catalog_id, InventoryTransaction.id > since_id)
+        )
+    ).one()
+    snapshot_balance = snapshot.balance if snapshot else 0
+    return LedgerBalance(
+        catalog_id=catalog_id,
+        balance=snapshot_balance + int(tail_sum),
+        snapshot_balance=snapshot_balance,
+        snapshot_last_transaction_id=since_id,
+        snapshot_at=snapshot.created_at if snapshot else None,
+        tail_transactions=int(tail_count),
+    )
+
+
+def _archived_history(catalog_id: int, before_id: int, count: int) -> List[Dict[str, Any]]:
+    rows = iter_group_newest_first("inventory_transactions", "catalog_id", catalog_id, before_id)
+    history = []
+    for row in itertools.islice(rows, count):
+        created_at = row.get("created_at")
+        history.append(
+            {
+                **row,
+                "created_at": datetime.fromisoformat(created_at) if isinstance(created_at, str) else created_at,
+                "archived": True,
+            }
+        )
+    return history
+
+
+async def read_transaction_history(
+    session: AsyncSession,
+    catalog_id: int,
+    limit: int = HISTORY_PAGE_SIZE,
+    before_id: Optional[int] = None,
+) -> TransactionHistoryPage:
+    """One page of a catalog's ledger history, newest first, paged by id.
+
+    Pages come from the live table. Once it runs out, ``older_rows_archived``
+    says whether the archive holds more and ``next_cursor`` points into it;
+    only a request that passes that cursor back reads archived rows, and then
+    only this catalog's members of the archive files.
+    """
+    stmt = (
+        select(
+            InventoryTransaction.id,
+            InventoryTransaction.catalog_id,
+            InventoryTransaction.change_amount,
+            InventoryTransaction.reason,
+            InventoryTransaction.created_at,
+        )
+        .where(InventoryTransaction.catalog_id == catalog_id)
+        .order_by(InventoryTransaction.id.desc())
+        .limit(limit + 1)
+    )
+    if before_id is not None:
+        stmt = stmt.where(InventoryTransaction.id < before_id)
+    rows = [{**row._asdict(), "archived": False} for row in (await session.execute(stmt)).all()]
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return TransactionHistoryPage(items=rows, next_cursor=rows[-1]["id"], includes_archived=False)
+
+    # Archived ids all sit below the live rows of the same catalog.
+    archive_before = rows[-1]["id"] if rows else before_id
+    newest_archived = await asyncio.to_thread(
+        newest_group_id, "inventory_transactions", "catalog_id", catalog_id, archive_before
+    )
+    if newest_archived is None:
+        return TransactionHistoryPage(items=rows, next_cursor=None, includes_archived=False)
+    if before_id is None:
+        return TransactionHistoryPage(
+            items=rows,
+            next_cursor=archive_before if rows else newest_archived + 1,
+            includes_archived=False,
+            older_rows_archived=True,
+        )
+
+    rows.extend(
+        await asyncio.to_thread(_archived_history, catalog_id, archive_before, limit + 1 - len(rows))
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["id"]
+    return TransactionHistoryPage(
+        items=rows,
+        next_cursor=next_cursor,
+        includes_archived=any(row["archived"] for row in rows),
+        older_rows_archived=next_cursor is not None,
+    )
+
+
+def iter_archived_transactions(catalog_id: Optional[int] = None) -> Iterator[dict]:
+    """Stream archived transactions back from disk, oldest partition first."""
+    predicate = None if catalog_id is None else (lambda row: row.get("catalog_id") == catalog_id)
+    yield from iter_partitions("inventory_transactions", predicate=predicate)
+
+
+async def ledger_maintenance_loop(interval_seconds: int = INVENTORY_LEDGER_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await run_ledger_maintenance(session)
+            if result.holds_expired or result.snapshots_written or result.transactions_archived:
+                logger.info(
+                    "Inventory ledger: %d held units expired, %d snapshots written, %d transactions archived, "
+                    "%d snapshots pruned",
+                    result.holds_expired,
+                    result.snapshots_written,
+                    result.transactions_archived,
+                    result.snapshots_pruned,
+                )
+        except Exception:
+            logger.exception("Inventory ledger maintenance failed")
@@ -6,13 +6,14 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import UploadFile
-from sqlalchemy import func, or_, select
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.events.bus import emit_event
 from backend.models.inventory import InventoryTransaction, PartCategory, PartsCatalog
 from backend.models.users import SupplierProfile
 from backend.schemas.inventory import CSVUploadError, CSVUploadResponse, CatalogEntryResponse
+from backend.services.matching_cache import note_parts_changed
 
 LOW_STOCK_MULTIPLIER = 2
 ABBREVIATION_MAP = {
@@ -64,8 +65,8 @@ def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     return radius * c
 
 
-def _utc_timestamp() -> str:
-    return datetime.utcnow().isoformat(sep=" ", timespec="seconds")
+def _utc_timestamp() -> datetime:
+    return datetime.utcnow().replace(microsecond=0)
 
 
 async def check_low_stock(session: AsyncSession, catalog_entry: PartsCatalog) -> bool:
@@ -239,23 +240,32 @@ async def process_csv_upload(
 async def decrement_stock(
     session: AsyncSession, catalog_id: int, quantity: int
 ) -> bool:
-    entry = await session.get(PartsCatalog, catalog_id)
-    if not entry:
-        return False
-    if entry.quantity_in_stock < quantity:
+    result = await session.execute(
+        update(PartsCatalog)
+        .where(PartsCatalog.id == catalog_id, PartsCatalog.quantity_in_stock >= quantity)
+        .values(
+            quantity_in_stock=PartsCatalog.quantity_in_stock - quantity,
+            updated_at=_utc_timestamp(),
+        )
+        .returning(PartsCatalog.normalized_part_number)
+        .execution_options(synchronize_session=False)
+    )
+    decremented = result.first()
+    if decremented is None:
         return False
+    note_parts_changed(session, [decremented[0]])
 
-    entry.quantity_in_stock -= quantity
-    entry.updated_at = _utc_timestamp()
     session.add(
         InventoryTransaction(
-            catalog_id=entry.id,
+            catalog_id=catalog_id,
             change_amount=-quantity,
             reason="order_confirmed",
         )
     )
     await session.commit()
-    await check_low_stock(session, entry)
+    entry = await session.get(PartsCatalog, catalog_id, populate_existing=True)
+    if entry:
+        await check_low_stock(session, entry)
     return True
 
 
@@ -0,0 +1,608 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.database import AsyncSessionLocal
+from backend.middleware.metrics import registry
+from backend.models.jobs import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Seconds an idle worker waits before polling again; commits that enqueue
+# work wake workers in this process immediately. 0 disables the workers here
+# (another process runs them).
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# Workers per job type, e.g. "match_order=4,plan_delivery=2"; types not
+# listed keep the default they were registered with.
+JOB_CONCURRENCY = os.getenv("JOB_CONCURRENCY", "")
+# Failed attempts wait base * 2^(attempt - 1) seconds, capped, with jitter.
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+# A RUNNING job not finished within this many seconds is assumed lost with
+# its process and queued again.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+# Extra workers per job type that only take critical jobs, so a backlog of
+# standard work never leaves an emergency order waiting for a free worker.
+JOB_CRITICAL_RESERVED_WORKERS = int(os.getenv("JOB_CRITICAL_RESERVED_WORKERS", "1"))
+# When every worker is busy, a due critical job cancels and re-queues the
+# least urgent running job that has not committed anything yet.
+JOB_PREEMPTION_ENABLED = os.getenv("JOB_PREEMPTION", "1").lower() in {"1", "true", "yes"}
+# Orders due within this many hours run one priority level higher.
+JOB_DEADLINE_ESCALATION_HOURS = float(os.getenv("JOB_DEADLINE_ESCALATION_HOURS", "24"))
+
+PRIORITY_CRITICAL = 0
+PRIORITY_URGENT = 1
+PRIORITY_STANDARD = 2
+PRIORITY_NAMES = {PRIORITY_CRITICAL: "critical", PRIORITY_URGENT: "urgent", PRIORITY_STANDARD: "standard"}
+_URGENCY_PRIORITY = {"critical": PRIORITY_CRITICAL, "urgent": PRIORITY_URGENT, "standard": PRIORITY_STANDARD}
+
+ACTIVE_STATUSES = ("QUEUED", "RUNNING")
+_WAKE_KEY = "job_queue_wake"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job fails immediately."""
+
+
+@dataclass
+class JobType:
+    name: str
+    handler: JobHandler
+    concurrency: int
+    max_attempts: int
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    job_type: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    priority: int = PRIORITY_STANDARD
+    created_at: Optional[datetime] = None
+    wait_seconds: float = 0.0
+
+
+@dataclass
+class _Slot:
+    """One worker's view of the job it is running, for pre-emption."""
+
+    reserved: bool
+    job: Optional[ClaimedJob] = None
+    task: Optional[asyncio.Task] = None
+    committed: bool = False
+    preempted: bool = False
+
+
+_registry: Dict[str, JobType] = {}
+_pools: Dict[str, "_WorkerPool"] = {}
+_running_slot: ContextVar[Optional[_Slot]] = ContextVar("job_queue_running_slot", default=None)
+
+
+def job_handler(name: str, concurrency: int = 2, max_attempts: int = 5) -> Callable[[JobHandler], JobHandler]:
+    """Register ``async def handler(payload)`` for ``name``; raising schedules a retry."""
+
+    def register(handler: JobHandler) -> JobHandler:
+        _registry[name] = JobType(name, handler, concurrency, max_attempts)
+        return handler
+
+    return register
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+def order_priority(urgency: Optional[str], required_delivery_date: Optional[datetime] = None) -> int:
+    """Job priority for work on an order: its urgency, one level up when the deadline is close."""
+    priority = _URGENCY_PRIORITY.get(urgency or "standard", PRIORITY_STANDARD)
+    if required_delivery_date is not None:
+        due = required_delivery_date
+        if due.tzinfo is not None:
+            due = due.astimezone(timezone.utc).replace(tzinfo=None)
+        if due - _utcnow() <= timedelta(hours=JOB_DEADLINE_ESCALATION_HOURS):
+            priority = max(PRIORITY_CRITICAL, priority - 1)
+    return priority
+
+
+def _concurrency_overrides() -> Dict[str, int]:
+    overrides: Dict[str, int] = {}
+    for entry in JOB_CONCURRENCY.split(","):
+        name, _, value = entry.partition("=")
+        if name.strip() and value.strip():
+            overrides[name.strip()] = int(value)
+    return overrides
+
+
+async def _active_job_id(session: AsyncSession, dedup_key: str) -> Optional[int]:
+    return await session.scalar(
+        select(BackgroundJob.id).where(
+            BackgroundJob.dedup_key == dedup_key, BackgroundJob.status.in_(ACTIVE_STATUSES)
+        )
+    )
+
+
+async def enqueue(
+    session: AsyncSession,
+    job_type: str,
+    payload: Dict[str, Any],
+    dedup_key: Optional[str] = None,
+    delay_seconds: float = 0.0,
+    priority: int = PRIORITY_STANDARD,
+) -> int:
+    """Add a job in the caller's transaction; returns its id.
+
+    With ``dedup_key``, a job already queued or running under that key is
+    returned instead of adding another; a queued one is raised to
+    ``priority`` if that is more urgent. Workers in this process wake when
+    the caller commits.
+    """
+    if job_type not in _registry:
+        raise ValueError(f"Unknown job type: {job_type}")
+    insert = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+    now = _utcnow()
+    statement = insert(BackgroundJob).values(
+        job_type=job_type,
+        payload=json.dumps(payload),
+        dedup_key=dedup_key,
+        status="QUEUED",
+        priority=priority,
+        attempts=0,
+        max_attempts=_registry[job_type].max_attempts,
+        run_after=now + timedelta(seconds=delay_seconds),
+        created_at=now,
+    )
+    if dedup_key is not None:
+        # Skips the insert when an active job holds the key, without aborting
+        # the caller's transaction the way a failed flush would.
+        statement = statement.on_conflict_do_nothing(
+            index_elements=[BackgroundJob.dedup_key], index_where=BackgroundJob.status.in_(ACTIVE_STATUSES)
+        )
+    job_id = await session.scalar(statement.returning(BackgroundJob.id))
+    if job_id is None:
+        job_id = await _active_job_id(session, dedup_key)
+        raised = await session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == "QUEUED", BackgroundJob.priority > priority)
+            .values(priority=priority)
+            .execution_options(synchronize_session=False)
+        )
+        if not raised.rowcount:
+            return job_id
+    session.info.setdefault(_WAKE_KEY, set()).add((job_type, priority))
+    return job_id
+
+
+async def enqueue_job(
+    job_type: str,
+    payload: Dict[str, Any],
+    dedup_key: Optional[str] = None,
+    delay_seconds: float = 0.0,
+    priority: int = PRIORITY_STANDARD,
+) -> int:
+    """``enqueue`` in its own transaction."""
+    async with AsyncSessionLocal() as session:
+        job_id = await enqueue(session, job_type, payload, dedup_key, delay_seconds, priority)
+        await session.commit()
+    return job_id
+
+
+def _wake(wakeups) -> None:
+    for job_type, priority in wakeups:
+        pool = _pools.get(job_type)
+        if pool is not None:
+            pool.wakeup.set()
+            if priority == PRIORITY_CRITICAL:
+                pool.critical_wakeup.set()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session: Session) -> None:
+    wakeups = session.info.pop(_WAKE_KEY, None)
+    if wakeups:
+        _wake(wakeups)
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_slot_committed(session: Session) -> None:
+    # Fires before COMMIT is sent, so a job is never cancelled mid-commit.
+    slot = _running_slot.get()
+    if slot is not None:
+        slot.committed = True
+
+
+def commit_callback() -> Callable[[], None]:
+    """A callable that marks the calling job as committed, safe to call from any task.
+
+    Handlers pass it to work they wait on in a task they do not own (a
+    shared matching run): commits there happen outside the job's context
+    but must still stop the job from being pre-empted. Outside a job, and
+    once the job has finished, calling it does nothing.
+    """
+    slot, job = _running_slot.get(), None
+    if slot is not None:
+        job = slot.job
+
+    def mark() -> None:
+        if slot is not None and slot.job is job:
+            slot.committed = True
+
+    return mark
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_wakeups(session: Session) -> None:
+    session.info.pop(_WAKE_KEY, None)
+
+
+def _due_jobs(job_type: str, now: datetime, max_priority: Optional[int]):
+    conditions = [
+        BackgroundJob.job_type == job_type,
+        BackgroundJob.status == "QUEUED",
+        BackgroundJob.run_after <= now,
+    ]
+    if max_priority is not None:
+        conditions.append(BackgroundJob.priority <= max_priority)
+    return conditions
+
+
+async def claim_job(job_type: str, max_priority: Optional[int] = None) -> Optional[ClaimedJob]:
+    """Move the most urgent, then oldest, due job of ``job_type`` to RUNNING.
+
+    ``max_priority`` limits the claim to that level or more urgent. Returns
+    ``None`` when nothing is due.
+    """
+    now = _utcnow()
+    async with AsyncSessionLocal() as session:
+        candidate = (
+            select(BackgroundJob.id)
+            .where(*_due_jobs(job_type, now, max_priority))
+            .order_by(BackgroundJob.priority, BackgroundJob.run_after, BackgroundJob.id)
+            .limit(1)
+        )
+        if session.bind.dialect.name == "postgresql":
+            candidate = candidate.with_for_update(skip_locked=True)
+        row = (
+            await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == candidate.scalar_subquery(), BackgroundJob.status == "QUEUED")
+                .values(status="RUNNING", locked_at=now, attempts=BackgroundJob.attempts + 1)
+                .returning(
+                    BackgroundJob.id,
+                    BackgroundJob.payload,
+                    BackgroundJob.attempts,
+                    BackgroundJob.max_attempts,
+                    BackgroundJob.priority,
+                    BackgroundJob.created_at,
+                    BackgroundJob.run_after,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        ).first()
+        await session.commit()
+    if row is None:
+        return None
+    return ClaimedJob(
+        row.id,
+        job_type,
+        json.loads(row.payload or "{}"),
+        row.attempts,
+        row.max_attempts,
+        row.priority,
+        row.created_at,
+        max(0.0, (now - row.run_after).total_seconds()),
+    )
+
+
+async def count_due_jobs(job_type: str, max_priority: Optional[int] = None) -> int:
+    async with AsyncSessionLocal() as session:
+        return int(
+            await session.scalar(
+                select(func.count(BackgroundJob.id)).where(*_due_jobs(job_type, _utcnow(), max_priority))
+            )
+            or 0
+        )
+
+
+def _backoff_seconds(attempts: int) -> float:
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def _finish(job: ClaimedJob, error: Optional[str] = None, permanent: bool = False) -> str:
+    now = _utcnow()
+    if error is None:
+        values = {"status": "SUCCEEDED", "finished_at": now, "last_error": None}
+    elif permanent or job.attempts >= job.max_attempts:
+        values = {"status": "FAILED", "finished_at": now, "last_error": error}
+    else:
+        values = {
+            "status": "QUEUED",
+            "locked_at": None,
+            "last_error": error,
+            "run_after": now + timedelta(seconds=_backoff_seconds(job.attempts)),
+        }
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job.id, BackgroundJob.status == "RUNNING")
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+    return values["status"]
+
+
+async def _release(job: ClaimedJob) -> None:
+    """Hand an interrupted job back without counting the attempt."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job.id, BackgroundJob.status == "RUNNING")
+            .values(status="QUEUED", locked_at=None, attempts=BackgroundJob.attempts - 1)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+
+async def run_job(job: ClaimedJob) -> str:
+    """Run one claimed job and record the outcome; returns the job's new status."""
+    handler = _registry[job.job_type].handler
+    try:
+        await handler(job.payload)
+    except asyncio.CancelledError:
+        await asyncio.shield(_release(job))
+        raise
+    except PermanentJobError as exc:
+        logger.warning("Job %d (%s) failed permanently: %s", job.id, job.job_type, exc)
+        return _record(job, await _finish(job, str(exc) or type(exc).__name__, permanent=True))
+    except Exception as exc:
+        logger.exception("Job %d (%s) attempt %d failed", job.id, job.job_type, job.attempts)
+        return _record(job, await _finish(job, f"{type(exc).__name__}: {exc}"))
+    return _record(job, await _finish(job))
+
+
+def _record(job: ClaimedJob, status: str) -> str:
+    latency = None
+    if status in ("SUCCEEDED", "FAILED") and job.created_at is not None:
+        latency = max(0.0, (_utcnow() - job.created_at).total_seconds())
+    registry.observe_job(job.job_type, PRIORITY_NAMES.get(job.priority, str(job.priority)), status, job.wait_seconds, latency)
+    return status
+
+
+class _WorkerPool:
+    """Shared workers take any job most-urgent-first; reserved workers take only critical ones."""
+
+    def __init__(self, job_type: str, shared: int, reserved: int, poll_seconds: float) -> None:
+        self.job_type = job_type
+        self.poll_seconds = poll_seconds
+        self.slots = [_Slot(reserved=False) for _ in range(shared)] + [_Slot(reserved=True) for _ in range(reserved)]
+        self.wakeup = asyncio.Event()
+        self.critical_wakeup = asyncio.Event()
+
+    async def run(self) -> None:
+        tasks = [asyncio.create_task(self._work(slot)) for slot in self.slots]
+        if JOB_PREEMPTION_ENABLED:
+            tasks.append(asyncio.create_task(self._preempt_loop()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _work(self, slot: _Slot) -> None:
+        max_priority = PRIORITY_CRITICAL if slot.reserved else None
+        while True:
+            # Cleared before claiming, so a commit landing mid-claim is not missed.
+            self.wakeup.clear()
+            try:
+                job = await claim_job(self.job_type, max_priority)
+            except Exception:
+                logger.exception("Claiming a %s job failed", self.job_type)
+                job = None
+            if job is not None:
+                await self._run(slot, job)
+                continue
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, slot: _Slot, job: ClaimedJob) -> None:
+        slot.job, slot.committed, slot.preempted = job, False, False
+        slot.task = asyncio.create_task(self._run_in_slot(slot, job))
+        try:
+            await slot.task
+        except asyncio.CancelledError:
+            if not slot.preempted:
+                raise
+            logger.info("Job %d (%s) pre-empted for a critical job", job.id, job.job_type)
+            registry.observe_job_preempted(job.job_type, PRIORITY_NAMES.get(job.priority, str(job.priority)))
+        finally:
+            slot.job = slot.task = None
+
+    @staticmethod
+    async def _run_in_slot(slot: _Slot, job: ClaimedJob) -> str:
+        _running_slot.set(slot)
+        return await run_job(job)
+
+    async def _preempt_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.critical_wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self.critical_wakeup.clear()
+            try:
+                await self.preempt()
+            except Exception:
+                logger.exception("Pre-emption check for %s failed", self.job_type)
+
+    async def preempt(self) -> int:
+        """Cancel enough uncommitted lower-priority jobs to start the due critical ones."""
+        if any(slot.job is None for slot in self.slots):
+            return 0
+        # Least urgent first, then the most recently claimed.
+        candidates = sorted(
+            (
+                (slot, slot.job)
+                for slot in self.slots
+                if slot.job is not None
+                and slot.job.priority > PRIORITY_CRITICAL
+                and not slot.committed
+                and not slot.preempted
+            ),
+            key=lambda entry: (-entry[1].priority, -entry[1].id),
+        )
+        if not candidates:
+            return 0
+        waiting = await count_due_jobs(self.job_type, PRIORITY_CRITICAL)
+        preempted = 0
+        for slot, job in candidates[:waiting]:
+            # The count query yielded; skip slots that finished, committed or moved on.
+            if slot.job is not job or slot.committed:
+                continue
+            slot.preempted = True
+            slot.task.cancel()
+            preempted += 1
+        return preempted
+
+
+async def requeue_expired_jobs() -> int:
+    """Queue RUNNING jobs whose lease ran out again; returns how many."""
+    cutoff = _utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.status == "RUNNING", BackgroundJob.locked_at < cutoff)
+            .values(status="QUEUED", locked_at=None, last_error="Lease expired")
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+    if result.rowcount:
+        logger.warning("Re-queued %d jobs whose worker stopped responding", result.rowcount)
+        _wake((job_type, PRIORITY_CRITICAL) for job_type in _registry)
+    return result.rowcount
+
+
+async def run_workers(poll_seconds: float = JOB_POLL_SECONDS) -> None:
+    """Start the worker pools for every registered job type and sweep expired leases."""
+    overrides = _concurrency_overrides()
+    tasks: List[asyncio.Task] = []
+    for job_type in _registry.values():
+        pool = _WorkerPool(
+            job_type.name,
+            overrides.get(job_type.name, job_type.concurrency),
+            JOB_CRITICAL_RESERVED_WORKERS,
+            poll_seconds,
+        )
+        _pools[job_type.name] = pool
+        tasks.append(asyncio.create_task(pool.run()))
+    try:
+        while True:
+            try:
+                await requeue_expired_jobs()
+            except Exception:
+                logger.exception("Lease sweep failed")
+            await asyncio.sleep(max(1.0, JOB_LEASE_SECONDS / 2))
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def list_jobs(
+    session: AsyncSession,
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+) -> tuple[List[BackgroundJob], int]:
+    query = select(BackgroundJob)
+    count_query = select(func.count(BackgroundJob.id))
+    if status is not None:
+        query = query.where(BackgroundJob.status == status)
+        count_query = count_query.where(BackgroundJob.status == status)
+    if job_type is not None:
+        query = query.where(BackgroundJob.job_type == job_type)
+        count_query = count_query.where(BackgroundJob.job_type == job_type)
+    rows = await session.execute(query.order_by(BackgroundJob.id.desc()).limit(limit).offset(offset))
+    return list(rows.scalars()), int(await session.scalar(count_query) or 0)
+
+
+async def job_stats(session: AsyncSession) -> Dict[str, Dict[str, Any]]:
+    """Per job type: counts by status, queued jobs per priority, workers and the oldest queued job's age."""
+    overrides = _concurrency_overrides()
+    running_here = JOB_POLL_SECONDS > 0
+
+    def empty_entry(workers: int = 0, reserved: int = 0) -> Dict[str, Any]:
+        return {
+            "workers": workers,
+            "reserved_critical_workers": reserved,
+            "counts": {},
+            "queued_by_priority": {},
+            "oldest_queued_seconds": None,
+        }
+
+    stats: Dict[str, Dict[str, Any]] = {
+        name: empty_entry(
+            overrides.get(name, job_type.concurrency) if running_here else 0,
+            JOB_CRITICAL_RESERVED_WORKERS if running_here else 0,
+        )
+        for name, job_type in _registry.items()
+    }
+    rows = await session.execute(
+        select(
+            BackgroundJob.job_type,
+            BackgroundJob.status,
+            BackgroundJob.priority,
+            func.count(BackgroundJob.id),
+            func.min(BackgroundJob.run_after),
+        ).group_by(BackgroundJob.job_type, BackgroundJob.status, BackgroundJob.priority)
+    )
+    now = _utcnow()
+    for job_type, status, priority, count, oldest in rows.all():
+        entry = stats.setdefault(job_type, empty_entry())
+        entry["counts"][status] = entry["counts"].get(status, 0) + count
+        if status != "QUEUED":
+            continue
+        entry["queued_by_priority"][PRIORITY_NAMES.get(priority, str(priority))] = count
+        if oldest is not None:
+            age = max(0.0, (now - oldest).total_seconds())
+            entry["oldest_queued_seconds"] = max(entry["oldest_queued_seconds"] or 0.0, age)
+    return stats
+
+
+async def retry_job(session: AsyncSession, job_id: int) -> Optional[BackgroundJob]:
+    """Queue a FAILED job again with a fresh attempt budget; ``None`` if it is not FAILED."""
+    job = await session.get(BackgroundJob, job_id)
+    if job is None or job.status != "FAILED":
+        return None
+    if job.dedup_key is not None and await _active_job_id(session, job.dedup_key) is not None:
+        return None
+    job.status = "QUEUED"
+    job.attempts = 0
+    job.run_after = _utcnow()
+    job.finished_at = None
+    job.locked_at = None
+    session.info.setdefault(_WAKE_KEY, set()).add((job.job_type, job.priority))
+    await session.commit()
+    return job
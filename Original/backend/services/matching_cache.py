@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import dataclasses
+import itertools
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from backend.models.inventory import PartsCatalog
+from backend.models.orders import Order, OrderItem
+from backend.models.user import SupplierProfile
+
+# Scored candidates per order item, reused while none of their inputs changed.
+#
+# Every change to a dependency stamps it with the next value of a global
+# clock: ("part", normalized_part_number) for any catalog row of that part,
+# ("supplier", id) for supplier profiles. An entry records the clock at the
+# moment its computation started and stays valid while none of its
+# dependencies carries a later stamp. Stamps are applied when the writing
+# transaction commits, so a computation that read the old rows can never be
+# stored under the new version.
+#
+# Order-side inputs (quantity, urgency, deadline, buyer location, weight
+# profile) are part of the entry fingerprint instead. Edits to them still
+# stamp ("order", id) for change listeners such as the matching coalescer. The urgency score
+# depends on the current time, hence the TTL. The cache is per process;
+# writes made by other processes are only picked up when the TTL expires.
+MATCHING_CACHE_TTL_SECONDS = float(os.getenv("MATCHING_CACHE_TTL_SECONDS", "300"))
+MATCHING_CACHE_MAX_ENTRIES = int(os.getenv("MATCHING_CACHE_MAX_ENTRIES", "5000"))
+
+_PENDING_KEY = "matching_cache_changes"
+
+_clock = itertools.count(1)
+_now = 0
+_stamps: Dict[Hashable, int] = {}
+_entries: "OrderedDict[int, _Entry]" = OrderedDict()
+_hits = 0
+_misses = 0
+_change_listeners: List[Callable[[Set[Hashable]], None]] = []
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """The catalog fields matching reads, detached from any session."""
+
+    id: int
+    supplier_id: int
+    category_id: Optional[int]
+    part_name: str
+    part_number: str
+    brand: Optional[str]
+    unit_price: float
+    quantity_in_stock: int
+    lead_time_hours: int
+
+
+@dataclass
+class _Entry:
+    fingerprint: Tuple[Any, ...]
+    started_at: int
+    stored_at: float
+    dependencies: Tuple[Hashable, ...]
+    candidates: List[Any]
+
+
+def snapshot_catalog(catalog: PartsCatalog) -> CatalogSnapshot:
+    return CatalogSnapshot(
+        id=catalog.id,
+        supplier_id=catalog.supplier_id,
+        category_id=catalog.category_id,
+        part_name=catalog.part_name,
+        part_number=catalog.part_number,
+        brand=catalog.brand,
+        unit_price=catalog.unit_price,
+        quantity_in_stock=catalog.quantity_in_stock,
+        lead_time_hours=catalog.lead_time_hours,
+    )
+
+
+def current_version() -> int:
+    """Clock value to pass to :func:`store` for a computation starting now."""
+    return _now
+
+
+def part_dependency(normalized_part_number: str) -> Hashable:
+    return ("part", normalized_part_number)
+
+
+def supplier_dependency(supplier_id: int) -> Hashable:
+    return ("supplier", supplier_id)
+
+
+def order_dependency(order_id: int) -> Hashable:
+    return ("order", order_id)
+
+
+def lookup(order_item_id: int, fingerprint: Tuple[Any, ...]) -> Optional[List[Any]]:
+    """Fresh copies of the cached candidates, or ``None`` when anything they depend on changed."""
+    global _hits, _misses
+    entry = _entries.get(order_item_id)
+    if (
+        entry is None
+        or entry.fingerprint != fingerprint
+        or time.monotonic() - entry.stored_at > MATCHING_CACHE_TTL_SECONDS
+        or any(_stamps.get(dependency, 0) > entry.started_at for dependency in entry.dependencies)
+    ):
+        _misses += 1
+        return None
+    _entries.move_to_end(order_item_id)
+    _hits += 1
+    # Callers adjust total_score (single-supplier bonus); never hand out the cached objects.
+    return [dataclasses.replace(candidate) for candidate in entry.candidates]
+
+
+def store(
+    session: Session,
+    order_item_id: int,
+    fingerprint: Tuple[Any, ...],
+    started_at: int,
+    dependencies: Iterable[Hashable],
+    candidates: List[Any],
+) -> None:
+    # Results computed on top of this session's own uncommitted writes may
+    # never become visible to anyone else.
+    if session.info.get(_PENDING_KEY):
+        return
+    _entries[order_item_id] = _Entry(
+        fingerprint=fingerprint,
+        started_at=started_at,
+        stored_at=time.monotonic(),
+        dependencies=tuple(dependencies),
+        candidates=[dataclasses.replace(candidate) for candidate in candidates],
+    )
+    _entries.move_to_end(order_item_id)
+    while len(_entries) > MATCHING_CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+
+
+def note_parts_changed(session: Session, normalized_part_numbers: Iterable[Optional[str]]) -> None:
+    """Record catalog writes made with Core statements; applied when ``session`` commits."""
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    pending.update(part_dependency(part) for part in normalized_part_numbers if part)
+
+
+def invalidate(dependencies: Iterable[Hashable]) -> None:
+    global _now
+    for dependency in dependencies:
+        _now = next(_clock)
+        _stamps[dependency] = _now
+
+
+def add_change_listener(callback: Callable[[Set[Hashable]], None]) -> None:
+    """Call ``callback`` with the dependencies of every committed change, after invalidation."""
+    _change_listeners.append(callback)
+
+
+def stats() -> Dict[str, int]:
+    return {"entries": len(_entries), "hits": _hits, "misses": _misses}
+
+
+def clear() -> None:
+    global _hits, _misses
+    _entries.clear()
+    _stamps.clear()
+    _hits = 0
+    _misses = 0
+
+
+def _any_changed(obj: Any, *attributes: str) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_changes(session: Session, flush_context) -> None:
+    changed: set = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, PartsCatalog):
+            history = inspect(obj).attrs.normalized_part_number.history
+            changed.update(
+                part_dependency(part)
+                for part in itertools.chain(history.added, history.unchanged, history.deleted)
+                if part
+            )
+        elif isinstance(obj, SupplierProfile) and obj.id is not None:
+            changed.add(supplier_dependency(obj.id))
+        elif isinstance(obj, Order) and obj.id is not None:
+            if _any_changed(obj, "urgency", "required_delivery_date", "buyer_id"):
+                changed.add(order_dependency(obj.id))
+        elif isinstance(obj, OrderItem) and obj.order_id is not None:
+            # Status changes are matching's own output, not an input.
+            if obj in session.dirty and not _any_changed(obj, "part_number", "quantity"):
+                continue
+            changed.add(order_dependency(obj.order_id))
+    if changed:
+        session.info.setdefault(_PENDING_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session: Session) -> None:
+    changed = session.info.pop(_PENDING_KEY, None)
+    if changed:
+        invalidate(changed)
+        for callback in _change_listeners:
+            callback(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Optional, Set
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from backend.database import AsyncSessionLocal
+from backend.middleware.metrics import create_background_task
+from backend.models.inventory import PartsCatalog
+from backend.models.orders import OrderItem
+from . import matching_cache
+from .matching_service import match_full_order, normalize_part_number
+
+logger = logging.getLogger(__name__)
+
+# Single-flight matching per order.
+#
+# The ORDER_PLACED job, an admin re-running matching and job retries can all
+# ask for the same order at once. The first caller starts a run; anyone
+# arriving while it is in flight waits for that run instead of deleting and
+# re-proposing the same assignments (and notifying everyone) a second time.
+#
+# A run reads the catalog and the order as they were when it started. If a
+# commit from elsewhere touched those inputs meanwhile (the order's parts,
+# the profile of a supplier listing one of them, or the order's items,
+# urgency or deadline), callers that joined get one trailing run, shared
+# between them, instead of a result that may be stale. Commits made by the
+# run itself, such as its stock holds, do not count.
+#
+# When the last caller still waiting is cancelled (a pre-empted job, a
+# dropped request) before the run has committed anything, the run is
+# cancelled with it, so pre-emption actually frees the work. Once the run
+# has committed it always finishes, and callers that passed ``on_commit``
+# are told, so a waiting job counts as committed.
+
+
+@dataclass
+class _Flight:
+    order_id: int
+    task: Optional[asyncio.Task] = None
+    # None until the run has read the order's items; any change counts until then.
+    dependencies: Optional[Set[Hashable]] = None
+    inputs_changed: bool = False
+    joined: int = 0
+    waiters: int = 0
+    committed: bool = False
+    commit_callbacks: List[Callable[[], None]] = field(default_factory=list)
+
+
+_flights: Dict[int, _Flight] = {}
+_running: ContextVar[Optional[_Flight]] = ContextVar("matching_flight", default=None)
+_stats = {"runs": 0, "joined": 0, "trailing_runs": 0}
+
+
+async def _order_dependencies(order_id: int) -> Set[Hashable]:
+    async with AsyncSessionLocal() as session:
+        rows = await session.execute(select(OrderItem.part_number).where(OrderItem.order_id == order_id))
+        parts = {normalize_part_number(part_number) for (part_number,) in rows.all()}
+        # Any supplier listing one of the parts, whatever its stock: stock
+        # changes arrive as part changes, and a new listing is one as well.
+        suppliers = (
+            await session.execute(
+                select(PartsCatalog.supplier_id.distinct()).where(PartsCatalog.normalized_part_number.in_(parts))
+            )
+        ).scalars().all()
+    return (
+        {matching_cache.order_dependency(order_id)}
+        | {matching_cache.part_dependency(part) for part in parts}
+        | {matching_cache.supplier_dependency(supplier_id) for supplier_id in suppliers}
+    )
+
+
+async def _run(flight: _Flight, changed_by_user_id: Optional[int]) -> List[Dict]:
+    _running.set(flight)
+    flight.dependencies = await _order_dependencies(flight.order_id)
+    async with AsyncSessionLocal() as session:
+        return await match_full_order(session, flight.order_id, changed_by_user_id=changed_by_user_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _mark_flight_committed(session: Session) -> None:
+    flight = _running.get()
+    if flight is not None and not flight.committed:
+        flight.committed = True
+        for on_commit in flight.commit_callbacks:
+            on_commit()
+
+
+async def _wait(flight: _Flight, on_commit: Optional[Callable[[], None]]) -> List[Dict]:
+    if on_commit is not None:
+        if flight.committed:
+            on_commit()
+        flight.commit_callbacks.append(on_commit)
+    flight.waiters += 1
+    try:
+        return await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        if flight.waiters == 1 and not flight.committed:
+            flight.task.cancel()
+        raise
+    finally:
+        flight.waiters -= 1
+        if on_commit is not None:
+            flight.commit_callbacks.remove(on_commit)
+
+
+def _land(flight: _Flight, task: asyncio.Task) -> None:
+    if _flights.get(flight.order_id) is flight:
+        del _flights[flight.order_id]
+    # Callers still waiting get the error through their shield; this only
+    # keeps a run whose callers all went away from warning at shutdown.
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Matching run for order %d failed: %r", flight.order_id, task.exception())
+
+
+def _on_inputs_changed(dependencies: Set[Hashable]) -> None:
+    own = _running.get()
+    for flight in _flights.values():
+        if flight is own or flight.inputs_changed:
+            continue
+        if flight.dependencies is None or not flight.dependencies.isdisjoint(dependencies):
+            flight.inputs_changed = True
+
+
+matching_cache.add_change_listener(_on_inputs_changed)
+
+
+async def match_order_coalesced(
+    order_id: int,
+    changed_by_user_id: Optional[int] = None,
+    on_commit: Optional[Callable[[], None]] = None,
+) -> List[Dict]:
+    """``match_full_order`` in its own session, shared with concurrent callers for the same order.
+
+    Raises whatever the run raised (``ValueError`` for an unknown order) to
+    every caller. Cancelling a caller cancels the shared run only when no
+    other caller is waiting and the run has not committed yet. ``on_commit``
+    is called once the run serving this caller commits, from the run's task.
+    """
+    flight = _flights.get(order_id)
+    if flight is None:
+        flight = _Flight(order_id)
+        flight.task = create_background_task(_run(flight, changed_by_user_id))
+        flight.task.add_done_callback(lambda task: _land(flight, task))
+        _flights[order_id] = flight
+        _stats["runs"] += 1
+        return await _wait(flight, on_commit)
+
+    flight.joined += 1
+    _stats["joined"] += 1
+    results = await _wait(flight, on_commit)
+    if not flight.inputs_changed:
+        return results
+    if order_id not in _flights:
+        _stats["trailing_runs"] += 1
+    # The first joiner back starts the trailing run; the rest join it.
+    return await match_order_coalesced(order_id, changed_by_user_id, on_commit)
+
+
+def stats() -> Dict[str, int]:
+    return dict(_stats)
@@ -1,23 +1,28 @@
 ﻿from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import math
 import os
-from dataclasses import dataclass
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
-import httpx
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..events.bus import emit_event
-from ..models.inventory import PartsCatalog
+from ..middleware.metrics import track_ors_call
+from ..models.inventory import PartsCatalog, StockReservation
 from ..models.matching import MatchingLog
 from ..models.orders import Order, OrderAssignment, OrderItem, OrderStatusHistory
 from ..models.users import BuyerProfile, SupplierProfile
+from . import assignment_solver, matching_cache, road_network
+from .distance_table import lookup_distances
+from .reservation_service import hold_stock, release_reservations
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,10 @@ WEIGHT_CONFIG_PATH = Path(__file__).resolve().parents[1] / "config" / "matching_
 
 ORS_MATRIX_URL = "https://api.openrouteservice.org/v2/matrix/driving-car"
 
+# Items that catalog changes can still re-match, and the orders they may belong to.
+REMATCH_ITEM_STATUSES = ("PENDING", "MATCHED")
+REMATCH_ORDER_STATUSES = ("PLACED", "MATCHED")
+
 
 @dataclass
 class SupplierCandidate:
@@ -43,7 +52,8 @@ class SupplierCandidate:
 class ScoredCandidate:
     supplier_id: int
     business_name: str
-    catalog: PartsCatalog
+    # Detached snapshot once scored, so cached results outlive the session.
+    catalog: PartsCatalog | matching_cache.CatalogSnapshot
     distance_km: float
     distance_score: float
     reliability_score: float
@@ -52,6 +62,12 @@ class ScoredCandidate:
     total_score: float
 
 
+@dataclass
+class RematchResult:
+    proposed: List[int] = field(default_factory=list)
+    withdrawn: List[int] = field(default_factory=list)
+
+
 def normalize_part_number(part_number: str) -> str:
     if not part_number:
         return ""
@@ -94,7 +110,7 @@ def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return radius * c
 
 
-async def find_eligible_suppliers(
+async def _query_supplier_candidates(
     session: AsyncSession, order_item: OrderItem, buyer_profile: BuyerProfile
 ) -> List[SupplierCandidate]:
     normalized = normalize_part_number(order_item.part_number)
@@ -119,7 +135,10 @@ async def find_eligible_suppliers(
             supplier.longitude,
         )
         candidates.append(SupplierCandidate(supplier=supplier, catalog=catalog, distance_km=distance_km))
+    return candidates
+
 
+def _filter_by_service_radius(candidates: List[SupplierCandidate]) -> List[SupplierCandidate]:
     if not candidates:
         return []
 
@@ -140,6 +159,12 @@ async def find_eligible_suppliers(
     return []
 
 
+async def find_eligible_suppliers(
+    session: AsyncSession, order_item: OrderItem, buyer_profile: BuyerProfile
+) -> List[SupplierCandidate]:
+    return _filter_by_service_radius(await _query_supplier_candidates(session, order_item, buyer_profile))
+
+
 async def compute_distance_batch(
     buyer_coords: Tuple[float, float],
     candidates: List[SupplierCandidate],
@@ -147,6 +172,19 @@ async def compute_distance_batch(
     if not candidates:
         return {}
 
+    network = road_network.get_road_network()
+    if network is not None:
+        destinations = [(candidate.supplier.latitude, candidate.supplier.longitude) for candidate in candidates]
+        distances, _ = await asyncio.to_thread(network.matrix, [buyer_coords], destinations)
+        return {
+            candidate.supplier.id: (
+                distances[0][idx] / 1000
+                if distances[0][idx] is not None
+                else haversine_km(buyer_coords[0], buyer_coords[1], *destinations[idx]) * 1.3
+            )
+            for idx, candidate in enumerate(candidates)
+        }
+
     locations = [[buyer_coords[1], buyer_coords[0]]]
     for candidate in candidates:
         locations.append([candidate.supplier.longitude, candidate.supplier.latitude])
@@ -172,13 +210,16 @@ async def compute_distance_batch(
             for candidate in candidates
         }
 
+    import httpx
+
     try:
         async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post(
-                ORS_MATRIX_URL,
-                json=payload,
-                headers={"Authorization": ors_api_key},
-            )
+            with track_ors_call("matrix"):
+                response = await client.post(
+                    ORS_MATRIX_URL,
+                    json=payload,
+                    headers={"Authorization": ors_api_key},
+                )
             response.raise_for_status()
             data = response.json()
 
@@ -305,7 +346,29 @@ def _rank_candidates(candidates: List[ScoredCandidate]) -> List[ScoredCandidate]
     return sorted(candidates, key=lambda c: c.total_score, reverse=True)
 
 
-def _to_match_result(order_item_id: int, candidates: List[ScoredCandidate]) -> Dict:
+def _with_preferred(
+    candidates: List[ScoredCandidate], preferred: Optional[ScoredCandidate]
+) -> List[ScoredCandidate]:
+    """Ranked candidates with the joint solver's pick, if any, tried first."""
+    ranked = _rank_candidates(candidates)
+    if preferred is None:
+        return ranked
+    return [preferred] + [c for c in ranked if c.catalog.id != preferred.catalog.id]
+
+
+def _allowed_candidates(
+    candidates: List[ScoredCandidate], assignments: List[OrderAssignment]
+) -> List[ScoredCandidate]:
+    """Candidates minus the suppliers that already rejected the item."""
+    rejected = {a.supplier_id for a in assignments if a.status == "REJECTED"}
+    return [c for c in candidates if c.supplier_id not in rejected]
+
+
+def _to_match_result(
+    order_item_id: int,
+    candidates: List[ScoredCandidate],
+    selected: Optional[ScoredCandidate] = None,
+) -> Dict:
     ranked = _rank_candidates(candidates)
     top_matches = [
         {
@@ -331,7 +394,10 @@ def _to_match_result(order_item_id: int, candidates: List[ScoredCandidate]) -> D
         }
         for c in ranked[:3]
     ]
-    selected_supplier_id = ranked[0].supplier_id if ranked else None
+    if selected is not None:
+        selected_supplier_id = selected.supplier_id
+    else:
+        selected_supplier_id = ranked[0].supplier_id if ranked else None
     return {
         "order_item_id": order_item_id,
         "top_matches": top_matches,
@@ -339,6 +405,52 @@ def _to_match_result(order_item_id: int, candidates: List[ScoredCandidate]) -> D
     }
 
 
+async def _score_order_item(
+    session: AsyncSession,
+    order: Order,
+    order_item: OrderItem,
+    buyer_profile: BuyerProfile,
+    weights: Dict[str, float],
+) -> List[ScoredCandidate]:
+    """Scored candidates for one item, served from ``matching_cache`` while its inputs are unchanged."""
+    normalized = normalize_part_number(order_item.part_number)
+    fingerprint = (
+        normalized,
+        order_item.quantity,
+        order.urgency,
+        order.required_delivery_date,
+        buyer_profile.latitude,
+        buyer_profile.longitude,
+        tuple(sorted(weights.items())),
+    )
+    cached = matching_cache.lookup(order_item.id, fingerprint)
+    if cached is not None:
+        return cached
+
+    started_at = matching_cache.current_version()
+    all_candidates = await _query_supplier_candidates(session, order_item, buyer_profile)
+    candidates = _filter_by_service_radius(all_candidates)
+    scored: List[ScoredCandidate] = []
+    if candidates:
+        stored = await lookup_distances(session, buyer_profile, [c.supplier for c in candidates])
+        distance_map = {supplier_id: row.distance_km for supplier_id, row in stored.items()}
+        missing = [c for c in candidates if c.supplier.id not in stored]
+        if missing:
+            distance_map.update(
+                await compute_distance_batch((buyer_profile.latitude, buyer_profile.longitude), missing)
+            )
+        scored = score_candidates(order, order_item, candidates, distance_map, weights)
+        for candidate in scored:
+            candidate.catalog = matching_cache.snapshot_catalog(candidate.catalog)
+
+    # Suppliers filtered out by service radius still count: moving one or
+    # widening its radius changes the result.
+    dependencies = [matching_cache.part_dependency(normalized)]
+    dependencies.extend(matching_cache.supplier_dependency(c.supplier.id) for c in all_candidates)
+    matching_cache.store(session, order_item.id, fingerprint, started_at, dependencies, scored)
+    return scored
+
+
 async def _log_matching(
     session: AsyncSession, order_item_id: int, candidates: List[ScoredCandidate]
 ) -> None:
@@ -360,6 +472,91 @@ async def _log_matching(
         )
 
 
+async def _propose_best_candidate(
+    session: AsyncSession,
+    order_id: int,
+    item: OrderItem,
+    candidates: List[ScoredCandidate],
+    changed_by_user_id: Optional[int] = None,
+) -> Optional[OrderAssignment]:
+    """Propose the best ranked candidate that still has stock and mark the item MATCHED."""
+    # Hold stock for the best candidate that still has it; a concurrent
+    # match may have taken the last units since candidates were scored.
+    top_candidate = None
+    reservation = None
+    for candidate in candidates:
+        reservation = await hold_stock(session, candidate.catalog.id, item.quantity)
+        if reservation is not None:
+            top_candidate = candidate
+            break
+    if top_candidate is None:
+        return None
+
+    assignment = OrderAssignment(
+        order_item_id=item.id,
+        supplier_id=top_candidate.supplier_id,
+        catalog_id=top_candidate.catalog.id,
+        assigned_price=top_candidate.catalog.unit_price,
+        match_score=top_candidate.total_score,
+        status="PROPOSED",
+    )
+    session.add(assignment)
+    await session.flush()
+    reservation.assignment_id = assignment.id
+
+    previous_item_status = item.status
+    item.status = "MATCHED"
+    session.add(
+        OrderStatusHistory(
+            order_id=order_id,
+            order_item_id=item.id,
+            from_status=previous_item_status,
+            to_status="MATCHED",
+            changed_by=changed_by_user_id,
+        )
+    )
+    return assignment
+
+
+async def _emit_supplier_matched(
+    session: AsyncSession,
+    order_id: int,
+    buyer_profile: BuyerProfile,
+    item_ids: List[int],
+) -> None:
+    supplier_ids = {
+        assignment.supplier_id
+        for assignment in (
+            await session.execute(select(OrderAssignment).where(OrderAssignment.order_item_id.in_(item_ids)))
+        ).scalars()
+    }
+
+    target_user_ids: List[int] = []
+    if buyer_profile.user_id:
+        target_user_ids.append(buyer_profile.user_id)
+
+    if supplier_ids:
+        supplier_result = await session.execute(
+            select(SupplierProfile).where(SupplierProfile.id.in_(supplier_ids))
+        )
+        for supplier in supplier_result.scalars().all():
+            if supplier.user_id:
+                target_user_ids.append(supplier.user_id)
+    # Remove duplicates before event dispatch.
+    target_user_ids = list(set(target_user_ids))
+
+    await emit_event(
+        "SUPPLIER_MATCHED",
+        {
+            "entity_type": "order",
+            "entity_id": order_id,
+            "order_id": order_id,
+            "order_item_ids": item_ids,
+        },
+        target_user_ids,
+    )
+
+
 async def match_order_item(
     session: AsyncSession,
     order_item_id: int,
@@ -376,19 +573,8 @@ async def match_order_item(
     buyer_result = await session.execute(select(BuyerProfile).where(BuyerProfile.id == order.buyer_id))
     buyer_profile = buyer_result.scalar_one()
 
-    candidates = await find_eligible_suppliers(session, order_item, buyer_profile)
-    if not candidates:
-        if not simulate:
-            await _log_matching(session, order_item_id, [])
-            await session.commit()
-        return {"order_item_id": order_item_id, "top_matches": [], "selected_supplier_id": None}
-
-    distance_map = await compute_distance_batch(
-        (buyer_profile.latitude, buyer_profile.longitude),
-        candidates,
-    )
     weights = load_weight_profiles().get(order.urgency, DEFAULT_WEIGHT_PROFILES["standard"])
-    scored = score_candidates(order, order_item, candidates, distance_map, weights)
+    scored = await _score_order_item(session, order, order_item, buyer_profile, weights)
 
     if not simulate:
         await _log_matching(session, order_item_id, scored)
@@ -417,23 +603,55 @@ async def match_full_order(
     weight_profiles = load_weight_profiles()
     per_item_scores: Dict[int, List[ScoredCandidate]] = {}
 
+    weights = weight_profiles.get(order.urgency, DEFAULT_WEIGHT_PROFILES["standard"])
     for item in items:
-        candidates = await find_eligible_suppliers(session, item, buyer_profile)
-        if not candidates:
-            per_item_scores[item.id] = []
-            continue
-        distance_map = await compute_distance_batch(
-            (buyer_profile.latitude, buyer_profile.longitude),
-            candidates,
+        per_item_scores[item.id] = await _score_order_item(session, order, item, buyer_profile, weights)
+
+    assignments_by_item: Dict[int, List[OrderAssignment]] = defaultdict(list)
+    if items:
+        existing_result = await session.execute(
+            select(OrderAssignment).where(OrderAssignment.order_item_id.in_([item.id for item in items]))
         )
-        weights = weight_profiles.get(order.urgency, DEFAULT_WEIGHT_PROFILES["standard"])
-        per_item_scores[item.id] = score_candidates(order, item, candidates, distance_map, weights)
+        for assignment in existing_result.scalars().all():
+            assignments_by_item[assignment.order_item_id].append(assignment)
+    committed_item_ids = {
+        item_id
+        for item_id, assignments in assignments_by_item.items()
+        if any(a.status in {"ACCEPTED", "FULFILLED"} for a in assignments)
+    }
+    allowed = {
+        item_id: _allowed_candidates(candidates, assignments_by_item[item_id])
+        for item_id, candidates in per_item_scores.items()
+    }
 
-    apply_single_supplier_bonus(per_item_scores)
+    selected: Dict[int, ScoredCandidate] = {}
+    if assignment_solver.joint_assignment_enabled():
+        # Items already accepted keep their supplier: they stay out of the
+        # solve and their suppliers cost the rest of the order nothing.
+        already_used = {
+            order_id: {
+                a.supplier_id
+                for item_id in committed_item_ids
+                for a in assignments_by_item[item_id]
+                if a.status in {"ACCEPTED", "FULFILLED"}
+            }
+        }
+        selected = await asyncio.to_thread(
+            assignment_solver.solve_assignment,
+            [
+                assignment_solver.AssignmentItem(item.id, order_id, item.quantity, allowed[item.id])
+                for item in items
+                if item.id not in committed_item_ids
+            ],
+            already_used,
+        )
+    else:
+        apply_single_supplier_bonus(per_item_scores)
 
     results: List[Dict] = []
     for item_id, candidates in per_item_scores.items():
-        results.append(_to_match_result(item_id, candidates))
+        preferred = _with_preferred(allowed[item_id], selected.get(item_id))
+        results.append(_to_match_result(item_id, candidates, preferred[0] if preferred else None))
 
     if simulate:
         return results
@@ -442,42 +660,23 @@ async def match_full_order(
         await _log_matching(session, item_id, candidates)
 
     for item in items:
-        candidates = _rank_candidates(per_item_scores.get(item.id, []))
+        candidates = _with_preferred(allowed.get(item.id, []), selected.get(item.id))
         if not candidates:
             continue
-        top_candidate = candidates[0]
 
-        existing_result = await session.execute(
-            select(OrderAssignment).where(OrderAssignment.order_item_id == item.id)
-        )
-        existing_assignments = existing_result.scalars().all()
-        if any(a.status in {"ACCEPTED", "FULFILLED"} for a in existing_assignments):
+        if item.id in committed_item_ids:
             continue
+        existing_assignments = assignments_by_item.get(item.id, [])
         if existing_assignments:
-            await session.execute(delete(OrderAssignment).where(OrderAssignment.order_item_id == item.id))
-
-        session.add(
-            OrderAssignment(
-                order_item_id=item.id,
-                supplier_id=top_candidate.supplier_id,
-                catalog_id=top_candidate.catalog.id,
-                assigned_price=top_candidate.catalog.unit_price,
-                match_score=top_candidate.total_score,
-                status="PROPOSED",
+            await release_reservations(session, [a.id for a in existing_assignments])
+            # Rejections stay on record, so later passes skip those suppliers too.
+            await session.execute(
+                delete(OrderAssignment).where(
+                    OrderAssignment.order_item_id == item.id, OrderAssignment.status != "REJECTED"
+                )
             )
-        )
 
-        previous_item_status = item.status
-        item.status = "MATCHED"
-        session.add(
-            OrderStatusHistory(
-                order_id=order_id,
-                order_item_id=item.id,
-                from_status=previous_item_status,
-                to_status="MATCHED",
-                changed_by=changed_by_user_id,
-            )
-        )
+        await _propose_best_candidate(session, order_id, item, candidates, changed_by_user_id)
 
     previous_order_status = order.status
     order.status = "MATCHED"
@@ -493,36 +692,148 @@ async def match_full_order(
 
     await session.commit()
 
-    supplier_ids = {
-        assignment.supplier_id
-        for assignment in (
-            await session.execute(select(OrderAssignment).where(OrderAssignment.order_item_id.in_([i.id for i in items])))
-        ).scalars()
-    }
+    await _emit_supplier_matched(session, order_id, buyer_profile, [item.id for item in items])
 
-    target_user_ids: List[int] = []
-    if buyer_profile.user_id:
-        target_user_ids.append(buyer_profile.user_id)
+    return results
 
-    if supplier_ids:
-        supplier_result = await session.execute(
-            select(SupplierProfile).where(SupplierProfile.id.in_(supplier_ids))
-        )
-        for supplier in supplier_result.scalars().all():
-            if supplier.user_id:
-                target_user_ids.append(supplier.user_id)
-    # Remove duplicates before event dispatch.
-    target_user_ids = list(set(target_user_ids))
 
-    await emit_event(
-        "SUPPLIER_MATCHED",
-        {
-            "entity_type": "order",
-            "entity_id": order_id,
-            "order_id": order_id,
-            "order_item_ids": [item.id for item in items],
-        },
-        target_user_ids,
+async def rematch_order_items(session: AsyncSession, item_ids: List[int]) -> RematchResult:
+    """Bring proposals for pending items in line with the current catalog; commits.
+
+    PENDING items are proposed to the best candidate with stock. MATCHED items
+    keep their proposal while its stock is still held (or, for proposals made
+    before holds existed, still on the shelf); otherwise it is withdrawn and
+    the next best candidate proposed. Suppliers that rejected an item are
+    never proposed again for it.
+    """
+    rows = (
+        await session.execute(
+            select(OrderItem, Order, BuyerProfile)
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(BuyerProfile, Order.buyer_id == BuyerProfile.id)
+            .where(
+                OrderItem.id.in_(item_ids),
+                OrderItem.status.in_(REMATCH_ITEM_STATUSES),
+                Order.status.in_(REMATCH_ORDER_STATUSES),
+            )
+        )
+    ).all()
+    result = RematchResult()
+    if not rows:
+        return result
+
+    assignments_by_item: Dict[int, List[OrderAssignment]] = defaultdict(list)
+    assignment_rows = await session.execute(
+        select(OrderAssignment).where(OrderAssignment.order_item_id.in_([item.id for item, _, _ in rows]))
     )
+    for assignment in assignment_rows.scalars():
+        assignments_by_item[assignment.order_item_id].append(assignment)
+
+    proposals = [a for group in assignments_by_item.values() for a in group if a.status == "PROPOSED"]
+    held_ids = set(
+        (
+            await session.execute(
+                select(StockReservation.assignment_id).where(
+                    StockReservation.assignment_id.in_([a.id for a in proposals]),
+                    StockReservation.status == "HELD",
+                )
+            )
+        ).scalars()
+    )
+    unheld_catalog_ids = {a.catalog_id for a in proposals if a.id not in held_ids}
+    shelf_stock: Dict[int, int] = {}
+    if unheld_catalog_ids:
+        stock_rows = await session.execute(
+            select(PartsCatalog.id, PartsCatalog.quantity_in_stock).where(PartsCatalog.id.in_(unheld_catalog_ids))
+        )
+        shelf_stock = dict(stock_rows.all())
 
-    return results
+    weight_profiles = load_weight_profiles()
+    work = []
+    for item, order, buyer_profile in rows:
+        assignments = assignments_by_item[item.id]
+        if any(a.status in {"ACCEPTED", "FULFILLED"} for a in assignments):
+            continue
+        current = [a for a in assignments if a.status == "PROPOSED"]
+        if current and all(a.id in held_ids or shelf_stock.get(a.catalog_id, 0) >= item.quantity for a in current):
+            continue
+        weights = weight_profiles.get(order.urgency, DEFAULT_WEIGHT_PROFILES["standard"])
+        scored = await _score_order_item(session, order, item, buyer_profile, weights)
+        work.append((item, order, buyer_profile, current, scored))
+
+    # Items still waiting are re-scored on every pass; their matching log is
+    # only rewritten when the ranking actually moved.
+    logged_rankings: Dict[int, List[int]] = defaultdict(list)
+    if work:
+        log_rows = await session.execute(
+            select(MatchingLog.order_item_id, MatchingLog.supplier_id)
+            .where(MatchingLog.order_item_id.in_([item.id for item, _, _, _, _ in work]))
+            .order_by(MatchingLog.order_item_id, MatchingLog.rank)
+        )
+        for order_item_id, supplier_id in log_rows.all():
+            logged_rankings[order_item_id].append(supplier_id)
+
+    allowed = {item.id: _allowed_candidates(scored, assignments_by_item[item.id]) for item, _, _, _, scored in work}
+    selected: Dict[int, ScoredCandidate] = {}
+    if work and assignment_solver.joint_assignment_enabled():
+        # One solve for the whole batch: restocked units go where they keep
+        # each order's supplier count lowest, counting suppliers its other
+        # items already use.
+        used_rows = await session.execute(
+            select(OrderItem.order_id, OrderAssignment.supplier_id)
+            .join(OrderAssignment, OrderAssignment.order_item_id == OrderItem.id)
+            .where(
+                OrderItem.order_id.in_({order.id for _, order, _, _, _ in work}),
+                OrderItem.id.notin_(list(allowed)),
+                OrderAssignment.status.in_(("PROPOSED", "ACCEPTED", "FULFILLED")),
+            )
+        )
+        already_used: Dict[int, Set[int]] = defaultdict(set)
+        for order_id, supplier_id in used_rows.all():
+            already_used[order_id].add(supplier_id)
+        selected = await asyncio.to_thread(
+            assignment_solver.solve_assignment,
+            [
+                assignment_solver.AssignmentItem(item.id, order.id, item.quantity, allowed[item.id])
+                for item, order, _, _, _ in work
+            ],
+            already_used,
+        )
+
+    matched_orders: Dict[int, Tuple[Order, BuyerProfile, List[int]]] = {}
+    for item, order, buyer_profile, stale, scored in work:
+        if [c.supplier_id for c in _rank_candidates(scored)] != logged_rankings[item.id]:
+            await _log_matching(session, item.id, scored)
+        if stale:
+            await release_reservations(session, [a.id for a in stale])
+            await session.execute(delete(OrderAssignment).where(OrderAssignment.id.in_([a.id for a in stale])))
+
+        candidates = _with_preferred(allowed[item.id], selected.get(item.id))
+        if await _propose_best_candidate(session, order.id, item, candidates) is not None:
+            result.proposed.append(item.id)
+            matched_orders.setdefault(order.id, (order, buyer_profile, []))[2].append(item.id)
+        elif stale:
+            previous_item_status = item.status
+            item.status = "PENDING"
+            session.add(
+                OrderStatusHistory(
+                    order_id=order.id,
+                    order_item_id=item.id,
+                    from_status=previous_item_status,
+                    to_status="PENDING",
+                )
+            )
+            result.withdrawn.append(item.id)
+
+    for order, _, _ in matched_orders.values():
+        if order.status == "PLACED":
+            order.status = "MATCHED"
+            session.add(
+                OrderStatusHistory(order_id=order.id, order_item_id=None, from_status="PLACED", to_status="MATCHED")
+            )
+
+    await session.commit()
+
+    for order_id, (_, buyer_profile, matched_item_ids) in matched_orders.items():
+        await _emit_supplier_matched(session, order_id, buyer_profile, matched_item_ids)
+    return result
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.events import Notification, NotificationCounter
+
+# user_id -> (version, unread_count) last seen by this process. The
+# notification_counters row is the source of truth and reads always go to it
+# (a primary-key lookup): job workers and other API processes write it too.
+# Every write bumps the version, and this map only accepts newer values, so
+# out-of-order commits never push a stale badge count.
+#
+# Least recently updated users are evicted past the limit. Racing commits
+# land within moments of each other, long before their user falls that far
+# behind.
+NOTIFICATION_COUNTER_CACHE_SIZE = int(os.getenv("NOTIFICATION_COUNTER_CACHE_SIZE", "10000"))
+_cache: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()
+
+
+def remember(values: Dict[int, Tuple[int, int]]) -> Dict[int, int]:
+    """Apply committed ``(version, count)`` values to the cache; returns the counts that changed."""
+    changed: Dict[int, int] = {}
+    for user_id, (version, count) in values.items():
+        current = _cache.get(user_id)
+        if current is not None and current[0] >= version:
+            continue
+        _cache[user_id] = (version, count)
+        _cache.move_to_end(user_id)
+        changed[user_id] = count
+    while len(_cache) > NOTIFICATION_COUNTER_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return changed
+
+
+def forget_all() -> None:
+    _cache.clear()
+
+
+def start_counter(session: AsyncSession, user_id: int) -> None:
+    """Add a new user's zero counter to the caller's transaction, so reads never have to create it."""
+    session.add(NotificationCounter(user_id=user_id, unread_count=0, version=1))
+
+
+async def _backfill(session: AsyncSession, user_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+    """Create counter rows from a one-off COUNT(*) for users that have none yet."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    counts = dict(
+        (
+            await session.execute(
+                select(Notification.user_id, func.count(Notification.id))
+                .where(Notification.user_id.in_(user_ids), Notification.is_read.is_(False))
+                .group_by(Notification.user_id)
+            )
+        ).all()
+    )
+    insert = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(NotificationCounter).values(
+        [{"user_id": user_id, "unread_count": counts.get(user_id, 0), "version": 1} for user_id in user_ids]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread_count": stmt.excluded.unread_count, "version": NotificationCounter.version + 1},
+    ).returning(NotificationCounter.user_id, NotificationCounter.version, NotificationCounter.unread_count)
+    rows = (await session.execute(stmt)).all()
+    return {user_id: (version, count) for user_id, version, count in rows}
+
+
+async def adjust_unread(session: AsyncSession, user_ids: Iterable[int], delta: int) -> Dict[int, Tuple[int, int]]:
+    """Add ``delta`` to each user's counter inside the caller's transaction.
+
+    Flush new notifications first: users without a counter row are backfilled
+    from the table. Returns ``(version, count)`` per user for ``remember`` once
+    the caller has committed.
+    """
+    ids = sorted(set(user_ids))
+    if not ids:
+        return {}
+    new_count = NotificationCounter.unread_count + delta
+    rows = (
+        await session.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id.in_(ids))
+            .values(
+                unread_count=case((new_count < 0, 0), else_=new_count),
+                version=NotificationCounter.version + 1,
+                updated_at=func.current_timestamp(),
+            )
+            .returning(NotificationCounter.user_id, NotificationCounter.version, NotificationCounter.unread_count)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    values = {user_id: (version, count) for user_id, version, count in rows}
+    values.update(await _backfill(session, [user_id for user_id in ids if user_id not in values]))
+    return values
+
+
+async def reset_unread(session: AsyncSession, user_id: int) -> Dict[int, Tuple[int, int]]:
+    rows = (
+        await session.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id == user_id)
+            .values(unread_count=0, version=NotificationCounter.version + 1, updated_at=func.current_timestamp())
+            .returning(NotificationCounter.version, NotificationCounter.unread_count)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    if not rows:
+        return await _backfill(session, [user_id])
+    version, count = rows[0]
+    return {user_id: (version, count)}
+
+
+async def get_unread_count(session: AsyncSession, user_id: int) -> int:
+    """The user's unread count; read-only.
+
+    A user from before counters existed has no row until the first write
+    for them backfills it, so until then the count comes from the table.
+    """
+    row = (
+        await session.execute(
+            select(NotificationCounter.version, NotificationCounter.unread_count).where(
+                NotificationCounter.user_id == user_id
+            )
+        )
+    ).first()
+    if row is None:
+        return await session.scalar(
+            select(func.count(Notification.id)).where(
+                Notification.user_id == user_id, Notification.is_read.is_(False)
+            )
+        )
+    remember({user_id: (row[0], row[1])})
+    return row[1]
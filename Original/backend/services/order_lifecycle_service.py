@@ -5,10 +5,11 @@ from typing import Dict, List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models.inventory import InventoryTransaction, PartsCatalog
+from ..models.inventory import PartsCatalog
 from ..models.orders import Order, OrderAssignment, OrderItem, OrderStatusHistory
 from ..models.users import BuyerProfile, SupplierProfile
 from .integration_events import emit_low_stock_alert, emit_order_status_event
+from .reservation_service import commit_reservation, release_reservations
 
 VALID_ORDER_TRANSITIONS = {
     "PLACED": {"MATCHED", "CANCELLED"},
@@ -108,6 +109,7 @@ async def confirm_order_assignments(
         if assignment is None or assignment.status == "REJECTED":
             continue
 
+        newly_accepted = assignment.status == "PROPOSED"
         if assignment.status != "ACCEPTED":
             assignment.status = "ACCEPTED"
         accepted_assignment_ids.append(assignment.id)
@@ -125,18 +127,14 @@ async def confirm_order_assignments(
                 )
             )
 
-        catalog = await session.get(PartsCatalog, assignment.catalog_id)
+        if newly_accepted and not await commit_reservation(
+            session, assignment.id, assignment.catalog_id, int(item.quantity)
+        ):
+            await session.rollback()
+            raise ValueError(f"Insufficient stock for assignment {assignment.id}")
+        catalog = await session.get(PartsCatalog, assignment.catalog_id, populate_existing=True)
         if catalog is None:
             continue
-        change_amount = -int(item.quantity)
-        catalog.quantity_in_stock = max(0, int(catalog.quantity_in_stock) + change_amount)
-        session.add(
-            InventoryTransaction(
-                catalog_id=catalog.id,
-                change_amount=change_amount,
-                reason="order_confirmed",
-            )
-        )
 
         reorder_point = max(int(catalog.min_order_quantity or 1) * 2, low_stock_threshold)
         if catalog.quantity_in_stock <= reorder_point:
@@ -244,6 +242,10 @@ async def transition_order_status(
             )
 
     if to_status == "CANCELLED":
+        await release_reservations(
+            session,
+            [assignment.id for assignment in assignments if assignment.status == "PROPOSED"],
+        )
         for assignment in assignments:
             if assignment.status not in {"FULFILLED", "REJECTED"}:
                 assignment.status = "REJECTED"
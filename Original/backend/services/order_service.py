@@ -4,11 +4,13 @@ from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, case, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from backend.events.bus import emit_event
+from backend.models.delivery import DeliveryStop
 from backend.models.inventory import InventoryTransaction, PartCategory, PartsCatalog
 from backend.models.order import Order, OrderAssignment, OrderItem, OrderStatusHistory
 from backend.models.users import BuyerProfile, SupplierProfile
@@ -18,8 +20,10 @@ from backend.schemas.order import (
     OrderHistoryEntry,
     OrderItemResponse,
     OrderResponse,
+    OrderSummaryResponse,
 )
-from backend.services.inventory_service import decrement_stock, haversine_km
+from backend.services.inventory_service import check_low_stock, haversine_km
+from backend.services.reservation_service import commit_reservation, hold_stock, release_reservations
 
 ORDER_STATE_MACHINE: Dict[str, List[str]] = {
     "PLACED": ["MATCHED", "CANCELLED"],
@@ -82,8 +86,8 @@ ORDER_TERMINAL_STATES = {"DELIVERED", "CANCELLED"}
 EVENT_QUEUE_KEY = "pending_order_events"
 
 
-def _utc_timestamp() -> str:
-    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(sep=" ", timespec="seconds")
+def _utc_timestamp() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
 
 
 async def _get_supplier_profile_by_user(
@@ -355,11 +359,9 @@ async def create_order(
         raise HTTPException(status_code=404, detail="Buyer profile not found")
 
     urgency = _validate_urgency(order_data.urgency)
-    required_delivery = (
-        order_data.required_delivery_date.isoformat(sep=" ", timespec="seconds")
-        if order_data.required_delivery_date
-        else None
-    )
+    required_delivery = order_data.required_delivery_date
+    if required_delivery is not None and required_delivery.tzinfo is not None:
+        required_delivery = required_delivery.astimezone(timezone.utc).replace(tzinfo=None)
 
     order = Order(
         buyer_id=buyer_id,
@@ -440,6 +442,10 @@ async def assign_supplier_to_item(
     session.add(assignment)
     await session.flush()
 
+    if await hold_stock(session, catalog_id, item.quantity, assignment.id) is None:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Insufficient stock for this assignment")
+
     previous_status = item.status
     if item.status == "PENDING":
         item.status = "MATCHED"
@@ -585,12 +591,15 @@ async def transition_item_status(
     )
 
     if target == "CANCELLED":
+        held_assignment_ids: List[int] = []
         for assignment in item.assignments:
             if assignment.status == "ACCEPTED":
                 await _restore_stock(session, assignment.catalog_id, item.quantity)
                 assignment.status = "REJECTED"
             elif assignment.status == "PROPOSED":
+                held_assignment_ids.append(assignment.id)
                 assignment.status = "REJECTED"
+        await release_reservations(session, held_assignment_ids)
 
     if target == "DELIVERED":
         for assignment in item.assignments:
@@ -636,18 +645,35 @@ async def confirm_assignment(
         if assignment.supplier_id != supplier.id:
             raise HTTPException(status_code=403, detail="Assignment does not belong to supplier")
 
-    stock_ok = await decrement_stock(
+    # Claim the assignment with a conditional UPDATE so concurrent confirmations
+    # of the same assignment cannot both commit its stock.
+    claimed = await session.execute(
+        update(OrderAssignment)
+        .where(OrderAssignment.id == assignment.id, OrderAssignment.status == "PROPOSED")
+        .values(status="ACCEPTED")
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount != 1:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Assignment is no longer proposed")
+    set_committed_value(assignment, "status", "ACCEPTED")
+
+    stock_ok = await commit_reservation(
         session,
+        assignment_id=assignment.id,
         catalog_id=assignment.catalog_id,
         quantity=assignment.order_item.quantity,
     )
     if not stock_ok:
+        await session.rollback()
         raise HTTPException(status_code=400, detail="Insufficient stock for this assignment")
 
-    assignment.status = "ACCEPTED"
+    rejected_sibling_ids: List[int] = []
     for sibling in assignment.order_item.assignments:
         if sibling.id != assignment.id and sibling.status == "PROPOSED":
             sibling.status = "REJECTED"
+            rejected_sibling_ids.append(sibling.id)
+    await release_reservations(session, rejected_sibling_ids)
 
     await transition_item_status(
         session,
@@ -658,6 +684,9 @@ async def confirm_assignment(
     )
 
     await _commit_and_flush_events(session)
+    catalog = await session.get(PartsCatalog, assignment.catalog_id, populate_existing=True)
+    if catalog:
+        await check_low_stock(session, catalog)
     await session.refresh(assignment)
     return assignment
 
@@ -684,6 +713,8 @@ async def reject_assignment(
     if assignment.status == "REJECTED":
         return assignment
 
+    if assignment.status == "PROPOSED":
+        await release_reservations(session, [assignment.id])
     assignment.status = "REJECTED"
 
     item = assignment.order_item
@@ -726,6 +757,7 @@ async def cancel_order(
     elif role != "admin":
         raise HTTPException(status_code=403, detail="Insufficient permissions")
 
+    held_assignment_ids: List[int] = []
     for item in order.items:
         if item.status not in {"CANCELLED", "DELIVERED"}:
             previous_status = item.status
@@ -744,8 +776,11 @@ async def cancel_order(
                 await _restore_stock(session, assignment.catalog_id, item.quantity)
                 assignment.status = "REJECTED"
             elif assignment.status == "PROPOSED":
+                held_assignment_ids.append(assignment.id)
                 assignment.status = "REJECTED"
 
+    await release_reservations(session, held_assignment_ids)
+
     previous_order_status = order.status
     order.status = "CANCELLED"
     order.updated_at = _utc_timestamp()
@@ -865,7 +900,7 @@ def serialize_order(order: Order, include_history: bool = False) -> OrderRespons
     )
 
 
-async def list_orders_for_role(
+async def _order_list_conditions(
     session: AsyncSession,
     user: Dict,
     status_filter: Optional[str],
@@ -874,9 +909,7 @@ async def list_orders_for_role(
     end_date: Optional[str],
     buyer_filter: Optional[int],
     supplier_filter: Optional[int],
-    page: int,
-    page_size: int,
-) -> tuple[List[Order], int]:
+):
     role = user.get("role")
     user_id = int(user.get("user_id"))
 
@@ -921,7 +954,24 @@ async def list_orders_for_role(
     else:
         raise HTTPException(status_code=403, detail="Unsupported role")
 
-    conditions = and_(*base_conditions) if base_conditions else None
+    return and_(*base_conditions) if base_conditions else None
+
+
+async def list_orders_for_role(
+    session: AsyncSession,
+    user: Dict,
+    status_filter: Optional[str],
+    urgency_filter: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    buyer_filter: Optional[int],
+    supplier_filter: Optional[int],
+    page: int,
+    page_size: int,
+) -> tuple[List[Order], int]:
+    conditions = await _order_list_conditions(
+        session, user, status_filter, urgency_filter, start_date, end_date, buyer_filter, supplier_filter
+    )
 
     count_stmt = select(func.count(Order.id))
     if conditions is not None:
@@ -950,6 +1000,144 @@ async def list_orders_for_role(
     return result.scalars().unique().all(), total
 
 
+def _order_summary_columns():
+    # Correlated subqueries, one value per order, mirroring serialize_order:
+    # the item count, the sum of each item's preferred price x quantity
+    # (ACCEPTED/FULFILLED, else PROPOSED), the first item's part, and the
+    # supplier of the first item that has an ACCEPTED (else PROPOSED) match,
+    # with that assignment's drop-off ETA.
+    priced = OrderAssignment.status.in_(["ACCEPTED", "FULFILLED", "PROPOSED"])
+    item_price = (
+        select(OrderAssignment.assigned_price)
+        .where(OrderAssignment.order_item_id == OrderItem.id, priced)
+        .order_by(case((OrderAssignment.status == "PROPOSED", 1), else_=0), OrderAssignment.id)
+        .limit(1)
+        .correlate(OrderItem)
+        .scalar_subquery()
+    )
+    total_items = (
+        select(func.count(OrderItem.id)).where(OrderItem.order_id == Order.id).correlate(Order).scalar_subquery()
+    )
+    total_value = (
+        select(func.coalesce(func.sum(OrderItem.quantity * item_price), 0.0))
+        .where(OrderItem.order_id == Order.id)
+        .correlate(Order)
+        .scalar_subquery()
+    )
+    first_item = (
+        select(OrderItem.id).where(OrderItem.order_id == Order.id).order_by(OrderItem.id).limit(1).correlate(Order)
+    )
+    part_number = select(OrderItem.part_number).where(OrderItem.id == first_item.scalar_subquery()).scalar_subquery()
+    part_description = (
+        select(OrderItem.part_description).where(OrderItem.id == first_item.scalar_subquery()).scalar_subquery()
+    )
+    shown_assignment = (
+        select(OrderAssignment.id)
+        .join(OrderItem, OrderItem.id == OrderAssignment.order_item_id)
+        .where(OrderItem.order_id == Order.id, OrderAssignment.status.in_(["ACCEPTED", "PROPOSED"]))
+        .order_by(OrderItem.id, case((OrderAssignment.status == "ACCEPTED", 0), else_=1), OrderAssignment.id)
+        .limit(1)
+        .correlate(Order)
+        .scalar_subquery()
+    )
+    supplier_name = (
+        select(SupplierProfile.business_name)
+        .join(OrderAssignment, OrderAssignment.supplier_id == SupplierProfile.id)
+        .where(OrderAssignment.id == shown_assignment)
+        .scalar_subquery()
+    )
+    eta = (
+        select(DeliveryStop.eta)
+        .where(DeliveryStop.order_assignment_id == shown_assignment, DeliveryStop.stop_type == "dropoff")
+        .order_by(DeliveryStop.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return (
+        total_items.label("total_items"),
+        total_value.label("total_value"),
+        part_number.label("part_number"),
+        part_description.label("part_description"),
+        supplier_name.label("supplier_business_name"),
+        shown_assignment.label("assignment_id"),
+        eta.label("eta"),
+    )
+
+
+async def list_order_summaries(
+    session: AsyncSession,
+    user: Dict,
+    status_filter: Optional[str],
+    urgency_filter: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    buyer_filter: Optional[int],
+    supplier_filter: Optional[int],
+    page: int,
+    page_size: int,
+) -> tuple[List[OrderSummaryResponse], int]:
+    """The order list as one row per order from a single statement.
+
+    Unlike ``list_orders_for_role`` nothing is loaded per item or assignment,
+    so the cost does not grow with the size of the orders on the page.
+    """
+    conditions = await _order_list_conditions(
+        session, user, status_filter, urgency_filter, start_date, end_date, buyer_filter, supplier_filter
+    )
+    stmt = (
+        select(
+            Order.id,
+            Order.buyer_id,
+            Order.status,
+            Order.urgency,
+            Order.required_delivery_date,
+            Order.created_at,
+            Order.updated_at,
+            BuyerProfile.factory_name.label("buyer_factory_name"),
+            *_order_summary_columns(),
+            func.count().over().label("total"),
+        )
+        .outerjoin(BuyerProfile, BuyerProfile.id == Order.buyer_id)
+        .order_by(Order.created_at.desc())
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+    )
+    if conditions is not None:
+        stmt = stmt.where(conditions)
+
+    rows = (await session.execute(stmt)).mappings().all()
+    if rows:
+        total = rows[0]["total"]
+    else:
+        # Past the last page the window count has no row to ride on.
+        count_stmt = select(func.count(Order.id))
+        if conditions is not None:
+            count_stmt = count_stmt.where(conditions)
+        total = (await session.execute(count_stmt)).scalar_one()
+
+    summaries = [
+        OrderSummaryResponse(
+            id=row["id"],
+            buyer_id=row["buyer_id"],
+            status=row["status"],
+            urgency=row["urgency"],
+            required_delivery_date=row["required_delivery_date"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            buyer_factory_name=row["buyer_factory_name"],
+            total_items=row["total_items"],
+            total_value=round(float(row["total_value"] or 0.0), 2),
+            part_number=row["part_number"],
+            part_description=row["part_description"],
+            supplier_business_name=row["supplier_business_name"],
+            assignment_id=row["assignment_id"],
+            eta=row["eta"],
+        )
+        for row in rows
+    ]
+    return summaries, total
+
+
 async def get_order_history(session: AsyncSession, order_id: int) -> List[OrderHistoryEntry]:
     order = await _get_order_with_relations(session, order_id)
     return [
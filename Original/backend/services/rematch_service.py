@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+from contextvars import ContextVar
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from backend.database import AsyncSessionLocal
+from backend.models.orders import Order, OrderItem
+from backend.services import matching_cache
+from backend.services.matching_service import (
+    REMATCH_ITEM_STATUSES,
+    REMATCH_ORDER_STATUSES,
+    normalize_part_number,
+    rematch_order_items,
+)
+
+logger = logging.getLogger(__name__)
+
+# Catalog writes mark their part numbers dirty; after this many milliseconds
+# the items waiting on those parts are re-matched together. 0 disables it.
+REMATCH_BATCH_MS = int(os.getenv("REMATCH_BATCH_MS", "500"))
+# Items re-matched per transaction.
+REMATCH_BATCH_SIZE = int(os.getenv("REMATCH_BATCH_SIZE", "100"))
+
+_PENDING_KEY = "rematch_index_changes"
+
+
+class PendingItemIndex:
+    """Normalized part number -> ids of order items that can still be re-matched.
+
+    Kept in memory and updated when order item writes commit. Entries may be
+    stale for a moment (an order cancelled after its items were indexed);
+    ``rematch_order_items`` re-checks statuses, so that only costs a lookup.
+    """
+
+    def __init__(self) -> None:
+        self._items_by_part: Dict[str, Set[int]] = {}
+        self._part_by_item: Dict[int, str] = {}
+
+    def add(self, item_id: int, normalized_part_number: str) -> None:
+        self.discard(item_id)
+        self._items_by_part.setdefault(normalized_part_number, set()).add(item_id)
+        self._part_by_item[item_id] = normalized_part_number
+
+    def discard(self, item_id: int) -> None:
+        part = self._part_by_item.pop(item_id, None)
+        if part is None:
+            return
+        items = self._items_by_part.get(part)
+        if items is not None:
+            items.discard(item_id)
+            if not items:
+                del self._items_by_part[part]
+
+    def items_for(self, normalized_part_numbers: Iterable[str]) -> List[int]:
+        found: Set[int] = set()
+        for part in normalized_part_numbers:
+            found.update(self._items_by_part.get(part, ()))
+        return sorted(found)
+
+    def has_part(self, normalized_part_number: str) -> bool:
+        return normalized_part_number in self._items_by_part
+
+    def __len__(self) -> int:
+        return len(self._part_by_item)
+
+    def clear(self) -> None:
+        self._items_by_part.clear()
+        self._part_by_item.clear()
+
+
+index = PendingItemIndex()
+_dirty_parts: Set[str] = set()
+_wakeup: Optional[asyncio.Event] = None
+# Set while a re-match pass runs: the stock it holds for its own proposals is
+# committed through the same change listener and must not queue another pass.
+_rematching: ContextVar[bool] = ContextVar("rematching", default=False)
+
+
+async def load_index() -> int:
+    """Fill the index from the database; returns the number of items indexed."""
+    async with AsyncSessionLocal() as session:
+        rows = await session.execute(
+            select(OrderItem.id, OrderItem.part_number)
+            .join(Order, OrderItem.order_id == Order.id)
+            .where(OrderItem.status.in_(REMATCH_ITEM_STATUSES), Order.status.in_(REMATCH_ORDER_STATUSES))
+        )
+        for item_id, part_number in rows.all():
+            index.add(item_id, normalize_part_number(part_number))
+    return len(index)
+
+
+def mark_parts_dirty(normalized_part_numbers: Iterable[str]) -> None:
+    """Queue items waiting on these parts for the next micro-batch."""
+    waiting = {part for part in normalized_part_numbers if index.has_part(part)}
+    if not waiting:
+        return
+    _dirty_parts.update(waiting)
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _on_catalog_changed(dependencies: Set[Hashable]) -> None:
+    if _rematching.get():
+        return
+    mark_parts_dirty(value for kind, value in dependencies if kind == "part")
+
+
+matching_cache.add_change_listener(_on_catalog_changed)
+
+
+async def run_pending_rematches() -> int:
+    """Re-match every item queued by catalog changes so far; returns items re-matched."""
+    parts = list(_dirty_parts)
+    _dirty_parts.clear()
+    item_ids = index.items_for(parts)
+    token = _rematching.set(True)
+    try:
+        await _rematch_in_batches(item_ids)
+    finally:
+        _rematching.reset(token)
+    return len(item_ids)
+
+
+async def _rematch_in_batches(item_ids: List[int]) -> None:
+    for start in range(0, len(item_ids), REMATCH_BATCH_SIZE):
+        batch = item_ids[start : start + REMATCH_BATCH_SIZE]
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await rematch_order_items(session, batch)
+            if result.proposed or result.withdrawn:
+                logger.info(
+                    "Re-matched %d items after catalog changes: %d proposed, %d withdrawn",
+                    len(batch),
+                    len(result.proposed),
+                    len(result.withdrawn),
+                )
+        except Exception:
+            logger.exception("Incremental re-matching failed for items %s", batch)
+
+
+async def rematch_loop(batch_ms: int = REMATCH_BATCH_MS) -> None:
+    global _wakeup
+    _wakeup = asyncio.Event()
+    try:
+        await load_index()
+    except Exception:
+        logger.exception("Could not load the pending order item index")
+    while True:
+        await _wakeup.wait()
+        # Let the rest of a bulk write (CSV upload, batch confirmations) land
+        # so its parts are handled in one pass.
+        await asyncio.sleep(batch_ms / 1000.0)
+        _wakeup.clear()
+        await run_pending_rematches()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_item_changes(session: Session, flush_context) -> None:
+    changes = None
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, OrderItem) or obj.id is None:
+            continue
+        # Read loaded values only; new items rely on the PENDING server default.
+        loaded = inspect(obj).dict
+        status = loaded.get("status") or "PENDING"
+        part_number = loaded.get("part_number")
+        if changes is None:
+            changes = session.info.setdefault(_PENDING_KEY, {})
+        if obj in session.deleted or status not in REMATCH_ITEM_STATUSES:
+            changes[obj.id] = None
+        elif part_number:
+            changes[obj.id] = normalize_part_number(part_number)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_item_changes(session: Session) -> None:
+    for item_id, part in session.info.pop(_PENDING_KEY, {}).items():
+        if part:
+            index.add(item_id, part)
+        else:
+            index.discard(item_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_item_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.inventory import InventoryTransaction, PartsCatalog, StockReservation
+from backend.services.matching_cache import note_parts_changed
+
+# Stock moves through the ledger in three steps:
+#   hold    PROPOSED assignment, units leave quantity_in_stock (conditional UPDATE)
+#   commit  assignment confirmed, hold becomes an order_confirmed transaction
+#   release assignment rejected or cancelled, units return to quantity_in_stock
+#   expire  hold still HELD after STOCK_HOLD_HOURS, released by the ledger
+#           maintenance pass
+# None of these functions commit; callers own the transaction.
+
+# Hours a hold keeps its units for a proposal nobody confirms; 0 keeps them
+# until the assignment is confirmed, rejected or cancelled.
+STOCK_HOLD_HOURS = float(os.getenv("STOCK_HOLD_HOURS", "24"))
+
+_catalog_table = PartsCatalog.__table__
+_restore_stmt = (
+    update(_catalog_table)
+    .where(_catalog_table.c.id == bindparam("catalog_id"))
+    .values(
+        quantity_in_stock=_catalog_table.c.quantity_in_stock + bindparam("released"),
+        updated_at=bindparam("now"),
+    )
+)
+
+
+def _utc_timestamp() -> datetime:
+    return datetime.utcnow().replace(microsecond=0)
+
+
+async def hold_stock(
+    session: AsyncSession,
+    catalog_id: int,
+    quantity: int,
+    assignment_id: Optional[int] = None,
+) -> Optional[StockReservation]:
+    """Atomically take ``quantity`` units off the shelf; ``None`` if not enough stock."""
+    result = await session.execute(
+        update(PartsCatalog)
+        .where(PartsCatalog.id == catalog_id, PartsCatalog.quantity_in_stock >= quantity)
+        .values(
+            quantity_in_stock=PartsCatalog.quantity_in_stock - quantity,
+            updated_at=_utc_timestamp(),
+        )
+        .returning(PartsCatalog.normalized_part_number)
+        .execution_options(synchronize_session=False)
+    )
+    held = result.first()
+    if held is None:
+        return None
+    note_parts_changed(session, [held[0]])
+
+    reservation = StockReservation(
+        catalog_id=catalog_id,
+        assignment_id=assignment_id,
+        quantity=quantity,
+        status="HELD",
+        expires_at=_utc_timestamp() + timedelta(hours=STOCK_HOLD_HOURS) if STOCK_HOLD_HOURS > 0 else None,
+    )
+    session.add(reservation)
+    return reservation
+
+
+async def commit_reservation(
+    session: AsyncSession,
+    assignment_id: int,
+    catalog_id: int,
+    quantity: int,
+) -> bool:
+    """Turn the hold for an assignment into an ``order_confirmed`` stock movement.
+
+    Assignments proposed before the ledger existed have no hold, and a hold
+    may have expired; either way the stock is taken with the same conditional
+    UPDATE at confirmation time.
+    """
+    now = _utc_timestamp()
+    result = await session.execute(
+        update(StockReservation)
+        .where(StockReservation.assignment_id == assignment_id, StockReservation.status == "HELD")
+        .values(status="COMMITTED", updated_at=now)
+        .returning(StockReservation.catalog_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    committed = result.all()
+
+    if not committed:
+        existing = await session.execute(
+            select(StockReservation.id)
+            .where(
+                StockReservation.assignment_id == assignment_id,
+                # Holds released by expiry are stamped at or after expires_at.
+                or_(
+                    StockReservation.status != "RELEASED",
+                    StockReservation.expires_at.is_(None),
+                    StockReservation.updated_at < StockReservation.expires_at,
+                ),
+            )
+            .limit(1)
+        )
+        if existing.first() is not None:
+            return False
+        reservation = await hold_stock(session, catalog_id, quantity, assignment_id)
+        if reservation is None:
+            return False
+        reservation.status = "COMMITTED"
+        committed = [(catalog_id, quantity)]
+
+    for reserved_catalog_id, reserved_quantity in committed:
+        session.add(
+            InventoryTransaction(
+                catalog_id=reserved_catalog_id,
+                change_amount=-reserved_quantity,
+                reason="order_confirmed",
+            )
+        )
+    return True
+
+
+async def release_reservations(session: AsyncSession, assignment_ids: Iterable[Optional[int]]) -> int:
+    """Release every outstanding hold for the given assignments; returns units restored."""
+    ids = sorted({assignment_id for assignment_id in assignment_ids if assignment_id is not None})
+    if not ids:
+        return 0
+
+    now = _utc_timestamp()
+    result = await session.execute(
+        update(StockReservation)
+        .where(StockReservation.assignment_id.in_(ids), StockReservation.status == "HELD")
+        .values(status="RELEASED", updated_at=now)
+        .returning(StockReservation.catalog_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return await _restore_stock(session, result.all(), now)
+
+
+async def release_expired_holds(session: AsyncSession, now: Optional[datetime] = None) -> int:
+    """Release holds whose ``expires_at`` has passed; returns units restored.
+
+    The assignments stay PROPOSED. Confirming one later takes stock afresh,
+    as for an assignment that never had a hold.
+    """
+    now = (now or datetime.utcnow()).replace(microsecond=0)
+    result = await session.execute(
+        update(StockReservation)
+        .where(StockReservation.status == "HELD", StockReservation.expires_at <= now)
+        .values(status="RELEASED", updated_at=now)
+        .returning(StockReservation.catalog_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return await _restore_stock(session, result.all(), now)
+
+
+async def _restore_stock(session: AsyncSession, holds: Iterable[Tuple[int, int]], now: datetime) -> int:
+    released: Dict[int, int] = defaultdict(int)
+    for catalog_id, quantity in holds:
+        released[catalog_id] += quantity
+    if not released:
+        return 0
+
+    await session.execute(
+        _restore_stmt,
+        [
+            {"catalog_id": catalog_id, "released": quantity, "now": now}
+            for catalog_id, quantity in sorted(released.items())
+        ],
+    )
+    parts = await session.execute(
+        select(PartsCatalog.normalized_part_number).where(PartsCatalog.id.in_(list(released)))
+    )
+    note_parts_changed(session, parts.scalars())
+    return sum(released.values())
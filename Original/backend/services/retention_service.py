@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.models.events import EventLog, Notification
+from backend.services.archive_store import iter_partitions, write_partitions
+
+logger = logging.getLogger(__name__)
+
+# Event log rows older than this move to the archive.
+EVENT_LOG_RETENTION_DAYS = int(os.getenv("EVENT_LOG_RETENTION_DAYS", "90"))
+# Read notifications older than this move to the archive; unread ones stay.
+READ_NOTIFICATION_RETENTION_DAYS = int(os.getenv("READ_NOTIFICATION_RETENTION_DAYS", "30"))
+# Seconds between compactor passes; 0 disables the background task.
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+RETENTION_BATCH_SIZE = 5_000
+
+ARCHIVED_TABLES = ("event_logs", "notifications")
+
+
+@dataclass
+class RetentionResult:
+    event_logs_archived: int = 0
+    notifications_archived: int = 0
+    archive_files: List[str] = field(default_factory=list)
+
+
+async def _archive_rows(
+    session: AsyncSession,
+    table: str,
+    model,
+    columns: Sequence,
+    condition,
+) -> tuple[int, List[str]]:
+    archived = 0
+    files: List[str] = []
+    last_id = 0
+    while True:
+        rows = (
+            await session.execute(
+                select(*columns)
+                .where(model.id > last_id, condition)
+                .order_by(model.id)
+                .limit(RETENTION_BATCH_SIZE)
+            )
+        ).all()
+        if not rows:
+            break
+        files.extend(await asyncio.to_thread(write_partitions, table, [row._asdict() for row in rows]))
+        await session.execute(delete(model).where(model.id.between(rows[0].id, rows[-1].id), condition))
+        await session.commit()
+        archived += len(rows)
+        last_id = rows[-1].id
+    return archived, files
+
+
+async def compact_event_logs(session: AsyncSession, older_than: datetime) -> tuple[int, List[str]]:
+    return await _archive_rows(
+        session,
+        "event_logs",
+        EventLog,
+        [
+            EventLog.id,
+            EventLog.event_type,
+            EventLog.entity_type,
+            EventLog.entity_id,
+            EventLog.payload,
+            EventLog.created_at,
+        ],
+        EventLog.created_at < older_than,
+    )
+
+
+async def compact_notifications(session: AsyncSession, older_than: datetime) -> tuple[int, List[str]]:
+    return await _archive_rows(
+        session,
+        "notifications",
+        Notification,
+        [
+            Notification.id,
+            Notification.user_id,
+            Notification.event_type,
+            Notification.title,
+            Notification.message,
+            Notification.is_read,
+            Notification.metadata_json.label("metadata"),
+            Notification.created_at,
+        ],
+        and_(Notification.is_read.is_(True), Notification.created_at < older_than),
+    )
+
+
+async def run_retention(
+    session: AsyncSession,
+    event_log_days: Optional[int] = None,
+    read_notification_days: Optional[int] = None,
+) -> RetentionResult:
+    now = datetime.utcnow()
+    event_days = EVENT_LOG_RETENTION_DAYS if event_log_days is None else event_log_days
+    notification_days = READ_NOTIFICATION_RETENTION_DAYS if read_notification_days is None else read_notification_days
+
+    result = RetentionResult()
+    result.event_logs_archived, files = await compact_event_logs(session, now - timedelta(days=event_days))
+    result.archive_files.extend(files)
+    result.notifications_archived, files = await compact_notifications(
+        session, now - timedelta(days=notification_days)
+    )
+    result.archive_files.extend(files)
+    return result
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def query_archive(
+    table: str,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    limit: int = 100,
+) -> List[dict]:
+    """Scan archived rows of ``table`` on disk; blocking, run it off the event loop."""
+    if table not in ARCHIVED_TABLES:
+        raise ValueError(f"Unknown archive table: {table}")
+    start = start_date.replace(tzinfo=None) if start_date else None
+    end = end_date.replace(tzinfo=None) if end_date else None
+    wanted = {key: value for key, value in (filters or {}).items() if value is not None}
+
+    def matches(row: dict) -> bool:
+        if any(row.get(key) != value for key, value in wanted.items()):
+            return False
+        if start or end:
+            created_at = _parse_timestamp(row.get("created_at"))
+            if created_at is None:
+                return False
+            if start and created_at < start:
+                return False
+            if end and created_at > end:
+                return False
+        return True
+
+    return list(itertools.islice(iter_partitions(table, start, end, predicate=matches), limit))
+
+
+async def retention_loop(interval_seconds: int = RETENTION_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await run_retention(session)
+            if result.event_logs_archived or result.notifications_archived:
+                logger.info(
+                    "Retention: archived %d event logs and %d read notifications",
+                    result.event_logs_archived,
+                    result.notifications_archived,
+                )
+        except Exception:
+            logger.exception("Retention compaction failed")
@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# In-process road routing from a road extract on disk, used before ORS.
+#
+# The extract is GeoJSON: LineString / MultiLineString features with OSM
+# tags as properties (``highway``, ``maxspeed``, ``oneway``), as written by
+# ``osmium export --geometry-types=linestring``. Lines that share a vertex are
+# joined. Routes minimise travel time. The edges are frozen into sparse
+# matrices at load time and searched with scipy's compiled Dijkstra
+# (``scipy.sparse.csgraph``): one search per source serves a single route or
+# a whole matrix row.
+ROAD_GRAPH_PATH = os.getenv("ROAD_GRAPH_PATH", "")
+# Points farther than this from the nearest road vertex are not routed.
+ROAD_GRAPH_MAX_SNAP_KM = float(os.getenv("ROAD_GRAPH_MAX_SNAP_KM", "5"))
+
+HIGHWAY_SPEEDS_KMPH = {
+    "motorway": 90.0,
+    "motorway_link": 60.0,
+    "trunk": 70.0,
+    "trunk_link": 50.0,
+    "primary": 55.0,
+    "primary_link": 40.0,
+    "secondary": 45.0,
+    "secondary_link": 35.0,
+    "tertiary": 35.0,
+    "tertiary_link": 30.0,
+    "unclassified": 30.0,
+    "residential": 25.0,
+    "living_street": 10.0,
+    "service": 15.0,
+}
+DEFAULT_SPEED_KMPH = 30.0
+# Leg from the requested point to the snapped vertex, driven off-network.
+ACCESS_SPEED_KMPH = 20.0
+_GRID_DEGREES = 0.01
+
+
+def _haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    radius = 6_371_000.0
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return radius * c
+
+
+def _haversine_m_array(lat1, lon1, lat2, lon2):
+    """``_haversine_m`` over numpy arrays (scalars broadcast)."""
+    import numpy as np
+
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2
+    return 6_371_000.0 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _speed_kmph(properties: Dict) -> float:
+    maxspeed = str(properties.get("maxspeed") or "").strip().lower()
+    if maxspeed:
+        number = maxspeed.split()[0]
+        try:
+            value = float(number)
+            return value * 1.609 if "mph" in maxspeed else value
+        except ValueError:
+            pass
+    return HIGHWAY_SPEEDS_KMPH.get(str(properties.get("highway") or ""), DEFAULT_SPEED_KMPH)
+
+
+def _direction(properties: Dict) -> int:
+    """1 forward only, -1 backward only, 0 both ways."""
+    oneway = str(properties.get("oneway") or "").strip().lower()
+    if oneway in {"yes", "true", "1"}:
+        return 1
+    if oneway == "-1":
+        return -1
+    if properties.get("highway") in {"motorway", "motorway_link"} and oneway != "no":
+        return 1
+    return 0
+
+
+@dataclass
+class RoadRoute:
+    distance_km: float
+    duration_minutes: float
+    coordinates: List[List[float]]
+
+
+class RoadNetwork:
+    def __init__(self) -> None:
+        self.lat = array("d")
+        self.lon = array("d")
+        # (source, target) -> (seconds, metres); parallel ways keep the fastest
+        self._edges: Dict[Tuple[int, int], Tuple[float, float]] = {}
+        self._node_ids: Dict[Tuple[float, float], int] = {}
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        # Frozen by prepare(): CSR matrix of travel seconds, vertex coordinates
+        # as numpy arrays and the fastest edge speed (bounds search radii).
+        self._seconds = None
+        self._lat_array = None
+        self._lon_array = None
+        self._max_speed_ms = 0.0
+
+    # -- construction -----------------------------------------------------
+
+    def _node(self, lon: float, lat: float) -> int:
+        key = (round(lat, 7), round(lon, 7))
+        node = self._node_ids.get(key)
+        if node is None:
+            node = len(self.lat)
+            self._node_ids[key] = node
+            self.lat.append(key[0])
+            self.lon.append(key[1])
+            cell = (int(math.floor(key[0] / _GRID_DEGREES)), int(math.floor(key[1] / _GRID_DEGREES)))
+            self._grid.setdefault(cell, []).append(node)
+        return node
+
+    def _add_edge(self, source: int, target: int, metres: float, seconds: float) -> None:
+        current = self._edges.get((source, target))
+        if current is None or seconds < current[0]:
+            self._edges[(source, target)] = (seconds, metres)
+
+    def add_way(self, coordinates: Sequence[Sequence[float]], properties: Dict) -> None:
+        speed_ms = _speed_kmph(properties) / 3.6
+        direction = _direction(properties)
+        nodes = [self._node(float(point[0]), float(point[1])) for point in coordinates]
+        for source, target in zip(nodes, nodes[1:]):
+            if source == target:
+                continue
+            metres = _haversine_m(self.lat[source], self.lon[source], self.lat[target], self.lon[target])
+            seconds = metres / speed_ms
+            if direction >= 0:
+                self._add_edge(source, target, metres, seconds)
+            if direction <= 0:
+                self._add_edge(target, source, metres, seconds)
+
+    @classmethod
+    def from_geojson(cls, path: Path) -> "RoadNetwork":
+        with Path(path).open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        network = cls()
+        features = data.get("features", []) if isinstance(data, dict) else []
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            properties = feature.get("properties") or {}
+            if geometry.get("type") == "LineString":
+                network.add_way(geometry["coordinates"], properties)
+            elif geometry.get("type") == "MultiLineString":
+                for line in geometry["coordinates"]:
+                    network.add_way(line, properties)
+        network._node_ids.clear()
+        network.prepare()
+        network._edges.clear()
+        return network
+
+    def prepare(self) -> None:
+        """Freeze the edges into the sparse matrix and arrays the searches run on."""
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        size = len(self.lat)
+        count = len(self._edges)
+        sources = np.fromiter((edge[0] for edge in self._edges), dtype=np.int32, count=count)
+        targets = np.fromiter((edge[1] for edge in self._edges), dtype=np.int32, count=count)
+        seconds = np.fromiter((value[0] for value in self._edges.values()), dtype=np.float64, count=count)
+        metres = np.fromiter((value[1] for value in self._edges.values()), dtype=np.float64, count=count)
+        self._seconds = csr_matrix((seconds, (sources, targets)), shape=(size, size))
+        self._lat_array = np.frombuffer(self.lat, dtype=np.float64)
+        self._lon_array = np.frombuffer(self.lon, dtype=np.float64)
+        self._max_speed_ms = float((metres / seconds).max()) if count else 0.0
+
+    # -- queries ----------------------------------------------------------
+
+    @property
+    def node_count(self) -> int:
+        return len(self.lat)
+
+    def nearest_node(self, lat: float, lon: float) -> Optional[Tuple[int, float]]:
+        """Closest vertex within ``ROAD_GRAPH_MAX_SNAP_KM`` and its distance in metres."""
+        row = int(math.floor(lat / _GRID_DEGREES))
+        column = int(math.floor(lon / _GRID_DEGREES))
+        max_rings = max(1, int(math.ceil(ROAD_GRAPH_MAX_SNAP_KM / (_GRID_DEGREES * 111.0))))
+        best: Optional[Tuple[int, float]] = None
+        for ring in range(max_rings + 1):
+            for d_row in range(-ring, ring + 1):
+                for d_column in range(-ring, ring + 1):
+                    if max(abs(d_row), abs(d_column)) != ring:
+                        continue
+                    for node in self._grid.get((row + d_row, column + d_column), ()):
+                        metres = _haversine_m(lat, lon, self.lat[node], self.lon[node])
+                        if best is None or metres < best[1]:
+                            best = (node, metres)
+            # A later ring can only hold closer nodes while it is nearer than the best.
+            if best is not None and best[1] <= ring * _GRID_DEGREES * 111_000.0 * math.cos(math.radians(lat)):
+                break
+        if best is None or best[1] > ROAD_GRAPH_MAX_SNAP_KM * 1000.0:
+            return None
+        return best
+
+    def _search(self, source: int, targets: Sequence[int]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Fastest travel seconds and the predecessor tree from ``source``, far enough to settle ``targets``.
+
+        The search is cut off at a travel time radius that starts at twice the
+        straight-line time to the farthest target at the fastest road speed and
+        doubles until every target is reached or the radius stops finding new
+        vertices (the rest is unreachable). Settled work grows with the square
+        of the radius, so nearby targets never pay for the whole extract.
+        """
+        import numpy as np
+        from scipy.sparse.csgraph import dijkstra
+
+        targets = np.asarray(targets, dtype=np.int64)
+        straight = _haversine_m_array(
+            self._lat_array[source], self._lon_array[source], self._lat_array[targets], self._lon_array[targets]
+        )
+        limit = max(2.0 * float(straight.max(initial=0.0)) / self._max_speed_ms, 60.0)
+        reached = -1
+        while True:
+            times, predecessors = dijkstra(
+                self._seconds, directed=True, indices=source, return_predecessors=True, limit=limit
+            )
+            now_reached = int(np.count_nonzero(predecessors >= 0))
+            if np.isfinite(times[targets]).all() or now_reached == reached:
+                return times, predecessors
+            reached = now_reached
+            limit *= 2.0
+
+    def _tree_metres(self, predecessors: "np.ndarray") -> "np.ndarray":
+        """Metres along the fastest-path tree from its root to every vertex (0 where unreached).
+
+        Edge lengths are recomputed from the vertex coordinates, as in
+        ``add_way``. Only the vertices the search reached take part, and
+        pointer jumping adds up each one's path in log2(depth) vectorised
+        rounds instead of a walk per vertex.
+        """
+        import numpy as np
+
+        nodes = np.nonzero(predecessors >= 0)[0]
+        parents = predecessors[nodes]
+        # Compact indices over the tree; the root (the only parent that is not a
+        # reached vertex itself) becomes the extra last slot with zero metres.
+        position = np.full(len(predecessors), len(nodes), dtype=np.int64)
+        position[nodes] = np.arange(len(nodes))
+        up = np.append(position[parents], len(nodes))
+        metres = np.append(
+            _haversine_m_array(
+                self._lat_array[parents], self._lon_array[parents], self._lat_array[nodes], self._lon_array[nodes]
+            ),
+            0.0,
+        )
+        while True:
+            grandparents = up[up]
+            if np.array_equal(grandparents, up):
+                break
+            metres = metres + metres[up]
+            up = grandparents
+        result = np.zeros(len(predecessors))
+        result[nodes] = metres[:-1]
+        return result
+
+    def route(self, origin_lat: float, origin_lng: float, dest_lat: float, dest_lng: float) -> Optional[RoadRoute]:
+        start = self.nearest_node(origin_lat, origin_lng)
+        end = self.nearest_node(dest_lat, dest_lng)
+        if start is None or end is None:
+            return None
+        times, predecessors = self._search(start[0], [end[0]])
+        path_seconds = float(times[end[0]])
+        if path_seconds == math.inf:
+            return None
+        path = [end[0]]
+        while path[-1] != start[0]:
+            path.append(int(predecessors[path[-1]]))
+        path.reverse()
+        path_metres = float(self._tree_metres(predecessors)[end[0]])
+        access_metres = start[1] + end[1]
+        coordinates = [[origin_lng, origin_lat]]
+        coordinates.extend([self.lon[node], self.lat[node]] for node in path)
+        coordinates.append([dest_lng, dest_lat])
+        return RoadRoute(
+            distance_km=(path_metres + access_metres) / 1000.0,
+            duration_minutes=(path_seconds + access_metres / (ACCESS_SPEED_KMPH / 3.6)) / 60.0,
+            coordinates=coordinates,
+        )
+
+    def matrix(
+        self, sources: Sequence[Tuple[float, float]], destinations: Sequence[Tuple[float, float]]
+    ) -> Tuple[List[List[Optional[float]]], List[List[Optional[float]]]]:
+        """Metres and seconds from every source to every destination; ``None`` where unroutable."""
+        snapped_sources = [self.nearest_node(lat, lng) for lat, lng in sources]
+        snapped_destinations = [self.nearest_node(lat, lng) for lat, lng in destinations]
+        wanted = sorted({snap[0] for snap in snapped_destinations if snap is not None})
+        # One search per distinct source vertex: metres and seconds to each wanted vertex.
+        rows: Dict[int, Tuple[Dict[int, float], Dict[int, float]]] = {}
+        for node in {snap[0] for snap in snapped_sources if snap is not None}:
+            if not wanted:
+                rows[node] = ({}, {})
+                continue
+            times, predecessors = self._search(node, wanted)
+            metres = self._tree_metres(predecessors)
+            rows[node] = (dict(zip(wanted, metres[wanted].tolist())), dict(zip(wanted, times[wanted].tolist())))
+
+        distances: List[List[Optional[float]]] = []
+        durations: List[List[Optional[float]]] = []
+        access_speed = ACCESS_SPEED_KMPH / 3.6
+        for (lat, lng), start in zip(sources, snapped_sources):
+            distance_row: List[Optional[float]] = []
+            duration_row: List[Optional[float]] = []
+            for (dest_lat, dest_lng), end in zip(destinations, snapped_destinations):
+                if (lat, lng) == (dest_lat, dest_lng):
+                    distance_row.append(0.0)
+                    duration_row.append(0.0)
+                elif start is None or end is None or rows[start[0]][1][end[0]] == math.inf:
+                    distance_row.append(None)
+                    duration_row.append(None)
+                else:
+                    path_metres = rows[start[0]][0][end[0]]
+                    path_seconds = rows[start[0]][1][end[0]]
+                    access_metres = start[1] + end[1]
+                    distance_row.append(path_metres + access_metres)
+                    duration_row.append(path_seconds + access_metres / access_speed)
+            distances.append(distance_row)
+            durations.append(duration_row)
+        return distances, durations
+
+
+_network: Optional[RoadNetwork] = None
+_load_lock = threading.Lock()
+
+
+def get_road_network() -> Optional[RoadNetwork]:
+    """The loaded network, or ``None`` while it is not configured or still loading."""
+    return _network
+
+
+def load_road_network(path: Optional[str] = None) -> Optional[RoadNetwork]:
+    """Load and preprocess the configured extract; blocking, run it off the event loop."""
+    global _network
+    path = path or ROAD_GRAPH_PATH
+    if not path:
+        return None
+    with _load_lock:
+        if _network is not None:
+            return _network
+        if not Path(path).exists():
+            logger.warning("ROAD_GRAPH_PATH %s does not exist; using ORS/haversine routing", path)
+            return None
+        try:
+            network = RoadNetwork.from_geojson(Path(path))
+        except ImportError:
+            logger.warning("ROAD_GRAPH_PATH is set but scipy is not installed; using ORS/haversine routing")
+            return None
+        logger.info("Road network loaded from %s: %d vertices", path, network.node_count)
+        _network = network
+        return network
+
+
+async def warm_road_network() -> None:
+    """Startup task: load the extract in a worker thread; routing uses ORS until it is ready."""
+    try:
+        await asyncio.to_thread(load_road_network)
+    except Exception:
+        logger.exception("Could not load road network from %s", ROAD_GRAPH_PATH)
+
+
+def reset_road_network() -> None:
+    global _network
+    with _load_lock:
+        _network = None
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.delivery import DeliveryRouteGeometry
+
+logger = logging.getLogger(__name__)
+
+# Route lines are stored as encoded polylines (the Google format, 1e-5 degree
+# precision, about a metre), one row per detail level. "full" keeps every
+# point ORS returned; the others are Douglas–Peucker simplifications with the
+# given tolerance in metres. A 30 km route of ~900 points takes ~21 kB as
+# GeoJSON text, ~3 kB encoded at "full" and ~0.5 kB at "medium".
+DETAIL_TOLERANCE_METERS: Dict[str, float] = {"full": 0.0, "medium": 15.0, "low": 120.0}
+DEFAULT_DETAIL = "medium"
+POLYLINE_PRECISION = 5
+
+_EARTH_RADIUS_M = 6371000.0
+
+
+def encode_polyline(coordinates: Sequence[Sequence[float]], precision: int = POLYLINE_PRECISION) -> str:
+    """Encode GeoJSON ``[lng, lat]`` pairs as a polyline string (lat first, as the format expects)."""
+    factor = 10**precision
+    chunks: List[str] = []
+    previous_lat = previous_lng = 0
+    for point in coordinates:
+        lat = int(round(point[1] * factor))
+        lng = int(round(point[0] * factor))
+        for delta in (lat - previous_lat, lng - previous_lng):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        previous_lat, previous_lng = lat, lng
+    return "".join(chunks)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> List[List[float]]:
+    """Inverse of ``encode_polyline``: GeoJSON ``[lng, lat]`` pairs."""
+    factor = 10**precision
+    coordinates: List[List[float]] = []
+    index = lat = lng = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append([lng / factor, lat / factor])
+    return coordinates
+
+
+def simplify(coordinates: Sequence[Sequence[float]], tolerance_m: float) -> List[List[float]]:
+    """Douglas–Peucker on ``[lng, lat]`` pairs; keeps both endpoints.
+
+    Distances use an equirectangular projection around the line's first
+    point, which is accurate to well under a metre at route scale.
+    """
+    points = [list(point[:2]) for point in coordinates]
+    if tolerance_m <= 0 or len(points) < 3:
+        return points
+
+    cos_lat = math.cos(math.radians(points[0][1]))
+    scale = math.radians(1) * _EARTH_RADIUS_M
+    projected = [((lng * cos_lat) * scale, lat * scale) for lng, lat in points]
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = projected[first], projected[last]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+        farthest, farthest_distance = -1, tolerance_m
+        for index in range(first + 1, last):
+            px, py = projected[index]
+            if length_sq == 0:
+                distance = math.hypot(px - x1, py - y1)
+            else:
+                t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+                distance = math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+            if distance > farthest_distance:
+                farthest, farthest_distance = index, distance
+        if farthest >= 0:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def geometry_levels(delivery_id: int, geometry: Optional[Dict]) -> List[DeliveryRouteGeometry]:
+    """One ``DeliveryRouteGeometry`` per detail level for a GeoJSON LineString; none if it is empty."""
+    coordinates = (geometry or {}).get("coordinates") or []
+    if not coordinates:
+        return []
+    rows = []
+    for detail, tolerance in DETAIL_TOLERANCE_METERS.items():
+        points = simplify(coordinates, tolerance)
+        rows.append(
+            DeliveryRouteGeometry(
+                delivery_id=delivery_id,
+                detail=detail,
+                polyline=encode_polyline(points),
+                point_count=len(points),
+            )
+        )
+    return rows
+
+
+def _legacy_polyline(route_geometry: Optional[str], detail: str) -> Optional[str]:
+    # Deliveries planned before geometry levels existed keep GeoJSON text on
+    # the delivery row; simplify and encode it on read.
+    if not route_geometry:
+        return None
+    try:
+        parsed = json.loads(route_geometry)
+    except json.JSONDecodeError:
+        logger.exception("Invalid stored route geometry")
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    return encode_polyline(simplify(parsed.get("coordinates") or [], DETAIL_TOLERANCE_METERS[detail]))
+
+
+async def load_route_polyline(
+    session: AsyncSession, delivery_id: int, legacy_route_geometry: Optional[str], detail: str = DEFAULT_DETAIL
+) -> Optional[str]:
+    """The encoded polyline for a delivery at ``detail``, or None when it has no route."""
+    polyline = (
+        await session.execute(
+            select(DeliveryRouteGeometry.polyline).where(
+                DeliveryRouteGeometry.delivery_id == delivery_id,
+                DeliveryRouteGeometry.detail == detail,
+            )
+        )
+    ).scalar_one_or_none()
+    if polyline is not None:
+        return polyline
+    return _legacy_polyline(legacy_route_geometry, detail)
+
+
+async def load_route_geometry(
+    session: AsyncSession, delivery_id: int, legacy_route_geometry: Optional[str], detail: str = DEFAULT_DETAIL
+) -> Optional[Dict]:
+    """GeoJSON LineString for a delivery at ``detail``, or None when it has no route."""
+    polyline = await load_route_polyline(session, delivery_id, legacy_route_geometry, detail)
+    if polyline is None:
+        return None
+    return {"type": "LineString", "coordinates": decode_polyline(polyline)}
@@ -1,29 +1,51 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 import math
 import os
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
-import httpx
-from ortools.constraint_solver import pywrapcp, routing_enums_pb2
 from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.database import AsyncSessionLocal
 from ..events.bus import emit_event
-from ..models.delivery import Delivery, DeliveryEtaLog, DeliveryStop
+from ..middleware.metrics import track_ors_call
+from ..models.delivery import Delivery, DeliveryEtaLog, DeliverySegment, DeliveryStop
 from ..models.inventory import PartsCatalog
 from ..models.orders import Order, OrderAssignment, OrderItem
 from ..models.users import BuyerProfile, SupplierProfile
+from . import road_network
+from .route_geometry import (
+    DEFAULT_DETAIL,
+    POLYLINE_PRECISION,
+    geometry_levels,
+    load_route_geometry,
+    load_route_polyline,
+)
+from .distance_table import lookup_distance
 
 logger = logging.getLogger(__name__)
 
 ORS_DIRECTIONS_URL = "https://api.openrouteservice.org/v2/directions/driving-car"
 ORS_MATRIX_URL = "https://api.openrouteservice.org/v2/matrix/driving-car"
+# Leg durations cached at planning time are reused by ETA refreshes and
+# re-routed once older than this, or when either end of the leg moved.
+ETA_SEGMENT_TTL_SECONDS = int(os.getenv("ETA_SEGMENT_TTL_SECONDS", "1800"))
+# Seconds between ETA refresh passes over IN_PROGRESS deliveries; 0 disables
+# the background task.
+ETA_REFRESH_INTERVAL_SECONDS = int(os.getenv("ETA_REFRESH_INTERVAL_SECONDS", "60"))
+# A refresh logs a new ETA and emits ETA_UPDATED only when the delivery's
+# arrival moved by at least this much; smaller drifts are saved silently.
+ETA_UPDATE_THRESHOLD_MINUTES = float(os.getenv("ETA_UPDATE_THRESHOLD_MINUTES", "5"))
+ETA_REFRESH_BATCH_SIZE = 200
+# Legs routed at once when cached ones are missing or stale.
+ETA_ROUTING_CONCURRENCY = int(os.getenv("ETA_ROUTING_CONCURRENCY", "8"))
 
 
 @dataclass
@@ -79,18 +101,6 @@ def _lead_hours(context: AssignmentContext) -> float:
     return float(context.catalog.lead_time_hours or 0.0)
 
 
-def _parse_route_geometry(route_geometry: Optional[str]) -> Optional[Dict]:
-    if not route_geometry:
-        return None
-    try:
-        parsed = json.loads(route_geometry)
-        if isinstance(parsed, dict):
-            return parsed
-    except json.JSONDecodeError:
-        logger.exception("Invalid stored route geometry")
-    return None
-
-
 def _savings_percent(naive_distance: float, optimized_distance: float) -> float:
     if naive_distance <= 0:
         return 0.0
@@ -113,6 +123,16 @@ async def compute_single_route(
             },
         }
 
+    network = road_network.get_road_network()
+    if network is not None:
+        route = await asyncio.to_thread(network.route, origin_lat, origin_lng, dest_lat, dest_lng)
+        if route is not None:
+            return {
+                "distance_km": route.distance_km,
+                "duration_minutes": route.duration_minutes,
+                "geometry": {"type": "LineString", "coordinates": route.coordinates},
+            }
+
     ors_api_key = os.getenv("ORS_API_KEY")
     if not ors_api_key:
         logger.warning("ORS_API_KEY not set. Falling back to Haversine route estimate.")
@@ -123,13 +143,16 @@ async def compute_single_route(
         "end": f"{dest_lng},{dest_lat}",
     }
 
+    import httpx
+
     try:
         async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.get(
-                ORS_DIRECTIONS_URL,
-                params=params,
-                headers={"Authorization": ors_api_key},
-            )
+            with track_ors_call("directions"):
+                response = await client.get(
+                    ORS_DIRECTIONS_URL,
+                    params=params,
+                    headers={"Authorization": ors_api_key},
+                )
             response.raise_for_status()
             data = response.json()
 
@@ -154,6 +177,16 @@ async def compute_distance_matrix(locations: List[Tuple[float, float]]) -> List[
     if not locations:
         return []
 
+    network = road_network.get_road_network()
+    if network is not None:
+        _, durations = await asyncio.to_thread(network.matrix, locations, locations)
+        fallback = _fallback_duration_matrix(locations)
+        # Pairs off the extract (unsnappable or unreachable) keep the estimate.
+        return [
+            [value if value is not None else fallback[i][j] for j, value in enumerate(row)]
+            for i, row in enumerate(durations)
+        ]
+
     ors_api_key = os.getenv("ORS_API_KEY")
     if not ors_api_key:
         logger.warning("ORS_API_KEY not set. Falling back to Haversine matrix estimate.")
@@ -165,13 +198,16 @@ async def compute_distance_matrix(locations: List[Tuple[float, float]]) -> List[
         "metrics": ["duration"],
     }
 
+    import httpx
+
     try:
         async with httpx.AsyncClient(timeout=25.0) as client:
-            response = await client.post(
-                ORS_MATRIX_URL,
-                json=payload,
-                headers={"Authorization": ors_api_key},
-            )
+            with track_ors_call("matrix"):
+                response = await client.post(
+                    ORS_MATRIX_URL,
+                    json=payload,
+                    headers={"Authorization": ors_api_key},
+                )
             response.raise_for_status()
             data = response.json()
 
@@ -211,10 +247,20 @@ def solve_vrp(
     pickups_deliveries: List[Tuple[int, int]],
     time_windows: List[Tuple[int, int]],
     num_vehicles: int = 3,
+    time_limit_seconds: int = 5,
+    solution_limit: Optional[int] = None,
 ) -> List[List[int]]:
+    """Routes as node lists, one per vehicle used.
+
+    The search runs for ``time_limit_seconds``, or stops earlier once it has
+    found ``solution_limit`` solutions. A solution limit makes the work the
+    same on every run, whatever the machine.
+    """
     if not distance_matrix:
         return []
 
+    from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+
     manager = pywrapcp.RoutingIndexManager(len(distance_matrix), num_vehicles, 0)
     routing = pywrapcp.RoutingModel(manager)
 
@@ -251,7 +297,9 @@ def solve_vrp(
     search_parameters = pywrapcp.DefaultRoutingSearchParameters()
     search_parameters.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
     search_parameters.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-    search_parameters.time_limit.seconds = 5
+    search_parameters.time_limit.seconds = time_limit_seconds
+    if solution_limit is not None:
+        search_parameters.solution_limit = solution_limit
 
     solution = routing.SolveWithParameters(search_parameters)
     if solution is None:
@@ -368,7 +416,10 @@ async def _chain_route_points(points: List[Tuple[float, float]]) -> Dict:
     }
 
 
-async def _build_delivery_response(session: AsyncSession, delivery: Delivery) -> Dict:
+async def _build_delivery_response(
+    session: AsyncSession, delivery: Delivery, detail: Optional[str] = DEFAULT_DETAIL
+) -> Dict:
+    """``detail=None`` leaves the route line out, as list views do."""
     stops = (
         await session.execute(
             select(DeliveryStop)
@@ -394,7 +445,11 @@ async def _build_delivery_response(session: AsyncSession, delivery: Delivery) ->
         "total_duration_minutes": delivery.total_duration_minutes,
         "optimized_distance_km": delivery.optimized_distance_km,
         "naive_distance_km": delivery.naive_distance_km,
-        "route_geometry": _parse_route_geometry(delivery.route_geometry),
+        "route_geometry": (
+            await load_route_geometry(session, delivery.id, delivery.route_geometry, detail)
+            if detail is not None
+            else None
+        ),
         "created_at": delivery.created_at,
         "stops": stops,
         "latest_eta": latest_eta_log.estimated_arrival if latest_eta_log else None,
@@ -428,39 +483,38 @@ async def create_single_delivery(
         total_duration_minutes=float(route["duration_minutes"]),
         optimized_distance_km=float(route["distance_km"]),
         naive_distance_km=float(route["distance_km"]),
-        route_geometry=json.dumps(route["geometry"]),
     )
     session.add(delivery)
     await session.flush()
-
-    session.add_all(
-        [
-            DeliveryStop(
-                delivery_id=delivery.id,
-                order_assignment_id=context.assignment.id,
-                stop_type="pickup",
-                sequence_order=1,
-                latitude=context.supplier.latitude,
-                longitude=context.supplier.longitude,
-                time_window_start=now,
-                time_window_end=required_end,
-                eta=pickup_eta,
-            ),
-            DeliveryStop(
-                delivery_id=delivery.id,
-                order_assignment_id=context.assignment.id,
-                stop_type="dropoff",
-                sequence_order=2,
-                latitude=context.buyer.latitude,
-                longitude=context.buyer.longitude,
-                time_window_start=now,
-                time_window_end=required_end,
-                eta=dropoff_eta,
-            ),
-        ]
+    session.add_all(geometry_levels(delivery.id, route["geometry"]))
+
+    pickup_stop = DeliveryStop(
+        delivery_id=delivery.id,
+        order_assignment_id=context.assignment.id,
+        stop_type="pickup",
+        sequence_order=1,
+        latitude=context.supplier.latitude,
+        longitude=context.supplier.longitude,
+        time_window_start=now,
+        time_window_end=required_end,
+        eta=pickup_eta,
+    )
+    dropoff_stop = DeliveryStop(
+        delivery_id=delivery.id,
+        order_assignment_id=context.assignment.id,
+        stop_type="dropoff",
+        sequence_order=2,
+        latitude=context.buyer.latitude,
+        longitude=context.buyer.longitude,
+        time_window_start=now,
+        time_window_end=required_end,
+        eta=dropoff_eta,
     )
+    session.add_all([pickup_stop, dropoff_stop])
 
     session.add(DeliveryEtaLog(delivery_id=delivery.id, estimated_arrival=dropoff_eta))
+    await session.flush()
+    session.add(_segment(delivery.id, pickup_stop, dropoff_stop, float(route["duration_minutes"]), now))
     await session.commit()
 
     await emit_event(
@@ -555,15 +609,16 @@ async def create_batched_delivery(
             total_duration_minutes=float(chained_route["duration_minutes"]),
             optimized_distance_km=float(chained_route["distance_km"]),
             naive_distance_km=0.0,
-            route_geometry=json.dumps(chained_route["geometry"]),
         )
         session.add(delivery)
         await session.flush()
+        session.add_all(geometry_levels(delivery.id, chained_route["geometry"]))
 
         current_time = now
         sequence = 1
         dropoff_etas: List[datetime] = []
         assignment_ids_in_route: List[int] = []
+        route_stops: List[Tuple[DeliveryStop, float]] = []
 
         for idx in range(1, len(executable_nodes)):
             hop_duration = float(chained_route["segment_durations"][idx - 1])
@@ -591,6 +646,7 @@ async def create_batched_delivery(
                 eta=current_time,
             )
             session.add(stop)
+            route_stops.append((stop, hop_duration))
             sequence += 1
             assignment_ids_in_route.append(context.assignment.id)
 
@@ -601,16 +657,23 @@ async def create_batched_delivery(
         for assignment_id in sorted(set(assignment_ids_in_route)):
             if assignment_id not in naive_distance_cache:
                 context = context_by_assignment_id[assignment_id]
-                direct_route = await compute_single_route(
-                    context.supplier.latitude,
-                    context.supplier.longitude,
-                    context.buyer.latitude,
-                    context.buyer.longitude,
-                )
-                naive_distance_cache[assignment_id] = float(direct_route["distance_km"])
+                stored = await lookup_distance(session, context.buyer, context.supplier)
+                if stored is not None:
+                    naive_distance_cache[assignment_id] = float(stored.distance_km)
+                else:
+                    direct_route = await compute_single_route(
+                        context.supplier.latitude,
+                        context.supplier.longitude,
+                        context.buyer.latitude,
+                        context.buyer.longitude,
+                    )
+                    naive_distance_cache[assignment_id] = float(direct_route["distance_km"])
             naive_distance += naive_distance_cache[assignment_id]
 
         delivery.naive_distance_km = naive_distance
+        await session.flush()
+        for (previous_stop, _), (stop, hop_duration) in zip(route_stops, route_stops[1:]):
+            session.add(_segment(delivery.id, previous_stop, stop, hop_duration, now))
         session.add(DeliveryEtaLog(
             delivery_id=delivery.id,
             estimated_arrival=max(dropoff_etas) if dropoff_etas else current_time,
@@ -644,6 +707,105 @@ async def create_batched_delivery(
     return responses
 
 
+async def _ordered_stops(session: AsyncSession, delivery_id: int) -> List[DeliveryStop]:
+    return list(
+        (
+            await session.execute(
+                select(DeliveryStop)
+                .where(DeliveryStop.delivery_id == delivery_id)
+                .order_by(DeliveryStop.sequence_order)
+            )
+        ).scalars()
+    )
+
+
+def _segment(
+    delivery_id: int, previous_stop: DeliveryStop, stop: DeliveryStop, minutes: float, now: datetime
+) -> DeliverySegment:
+    return DeliverySegment(
+        delivery_id=delivery_id,
+        stop_id=stop.id,
+        from_latitude=previous_stop.latitude,
+        from_longitude=previous_stop.longitude,
+        to_latitude=stop.latitude,
+        to_longitude=stop.longitude,
+        duration_minutes=minutes,
+        computed_at=now.replace(tzinfo=None),
+    )
+
+
+def _segment_is_current(segment: DeliverySegment, previous_stop: DeliveryStop, stop: DeliveryStop, now: datetime) -> bool:
+    return (
+        (segment.from_latitude, segment.from_longitude) == (previous_stop.latitude, previous_stop.longitude)
+        and (segment.to_latitude, segment.to_longitude) == (stop.latitude, stop.longitude)
+        and _as_utc(segment.computed_at) >= now - timedelta(seconds=ETA_SEGMENT_TTL_SECONDS)
+    )
+
+
+async def load_segment_durations(
+    session: AsyncSession, stops_by_delivery: Dict[int, List[DeliveryStop]], now: datetime
+) -> Tuple[Dict[int, float], Set[int]]:
+    """Minutes into each stop from the one before it, keyed by stop id, plus the stops whose leg changed.
+
+    Cached legs are reused; missing, stale or moved ones are re-routed and
+    written back to ``session`` (the caller commits). A re-routed leg only
+    counts as changed when its duration moved by more than a second.
+
+    Legs are routed concurrently, up to ``ETA_ROUTING_CONCURRENCY`` at a
+    time, after the read transaction has ended, so no connection is held
+    while ORS answers. ``session`` must have nothing pending when it is
+    called and must not expire on commit.
+    """
+    segments: Dict[int, DeliverySegment] = {}
+    if stops_by_delivery:
+        rows = await session.execute(
+            select(DeliverySegment).where(DeliverySegment.delivery_id.in_(list(stops_by_delivery)))
+        )
+        segments = {segment.stop_id: segment for segment in rows.scalars()}
+
+    minutes: Dict[int, float] = {}
+    changed: Set[int] = set()
+    stale: List[Tuple[int, DeliveryStop, DeliveryStop, Optional[DeliverySegment]]] = []
+    for delivery_id, stops in stops_by_delivery.items():
+        for previous_stop, stop in zip(stops, stops[1:]):
+            segment = segments.get(stop.id)
+            if segment is not None and _segment_is_current(segment, previous_stop, stop, now):
+                minutes[stop.id] = float(segment.duration_minutes)
+            else:
+                stale.append((delivery_id, previous_stop, stop, segment))
+    if not stale:
+        return minutes, changed
+
+    if session.in_transaction():
+        await session.commit()
+    routes = await _route_legs([(previous_stop, stop) for _, previous_stop, stop, _ in stale])
+    for (delivery_id, previous_stop, stop, segment), route in zip(stale, routes):
+        duration = float(route["duration_minutes"])
+        if segment is None:
+            session.add(_segment(delivery_id, previous_stop, stop, duration, now))
+            changed.add(stop.id)
+        else:
+            if abs(float(segment.duration_minutes) - duration) > 1 / 60:
+                changed.add(stop.id)
+            refreshed = _segment(delivery_id, previous_stop, stop, duration, now)
+            for column in ("from_latitude", "from_longitude", "to_latitude", "to_longitude", "duration_minutes", "computed_at"):
+                setattr(segment, column, getattr(refreshed, column))
+        minutes[stop.id] = duration
+    return minutes, changed
+
+
+async def _route_legs(legs: List[Tuple[DeliveryStop, DeliveryStop]]) -> List[Dict]:
+    limit = asyncio.Semaphore(max(1, ETA_ROUTING_CONCURRENCY))
+
+    async def route(previous_stop: DeliveryStop, stop: DeliveryStop) -> Dict:
+        async with limit:
+            return await compute_single_route(
+                previous_stop.latitude, previous_stop.longitude, stop.latitude, stop.longitude
+            )
+
+    return await asyncio.gather(*(route(previous_stop, stop) for previous_stop, stop in legs))
+
+
 async def _target_users_for_delivery(session: AsyncSession, delivery_id: int) -> List[int]:
     assignment_ids = [
         value
@@ -702,7 +864,7 @@ async def list_deliveries_for_user(session: AsyncSession, user: Dict) -> List[Di
 
     responses: List[Dict] = []
     for delivery in deliveries:
-        responses.append(await _build_delivery_response(session, delivery))
+        responses.append(await _build_delivery_response(session, delivery, detail=None))
     return responses
 
 
@@ -745,14 +907,15 @@ async def get_available_confirmed_assignments(session: AsyncSession) -> List[Dic
         )
     return results
 
-async def get_delivery_for_user(session: AsyncSession, delivery_id: int, user: Dict) -> Dict:
+async def _get_delivery_checked(session: AsyncSession, delivery_id: int, user: Dict) -> Delivery:
+    """The delivery, once ``user`` may see it; raises ``ValueError`` or ``PermissionError``."""
     delivery = await session.get(Delivery, delivery_id)
     if delivery is None:
         raise ValueError("Delivery not found")
 
     role = user.get("role")
     if role == "admin":
-        return await _build_delivery_response(session, delivery)
+        return delivery
 
     allowed = False
     user_id = int(user.get("sub") or 0)
@@ -782,13 +945,33 @@ async def get_delivery_for_user(session: AsyncSession, delivery_id: int, user: D
 
     if not allowed:
         raise PermissionError("Not authorized to view this delivery")
+    return delivery
+
 
-    return await _build_delivery_response(session, delivery)
+async def get_delivery_for_user(
+    session: AsyncSession, delivery_id: int, user: Dict, detail: Optional[str] = DEFAULT_DETAIL
+) -> Dict:
+    delivery = await _get_delivery_checked(session, delivery_id, user)
+    return await _build_delivery_response(session, delivery, detail)
 
 
-async def get_delivery_route_geometry(session: AsyncSession, delivery_id: int, user: Dict) -> Dict:
-    delivery_response = await get_delivery_for_user(session, delivery_id, user)
-    return delivery_response.get("route_geometry") or {"type": "LineString", "coordinates": []}
+async def get_delivery_route_geometry(
+    session: AsyncSession,
+    delivery_id: int,
+    user: Dict,
+    detail: str = DEFAULT_DETAIL,
+    encoding: str = "geojson",
+) -> Dict:
+    """Only the route line: access is checked without building the delivery's stops and items."""
+    delivery = await _get_delivery_checked(session, delivery_id, user)
+    if encoding == "polyline":
+        return {
+            "encoding": "polyline",
+            "precision": POLYLINE_PRECISION,
+            "polyline": await load_route_polyline(session, delivery_id, delivery.route_geometry, detail) or "",
+        }
+    geometry = await load_route_geometry(session, delivery_id, delivery.route_geometry, detail)
+    return geometry or {"type": "LineString", "coordinates": []}
 
 
 async def update_delivery_status(
@@ -858,13 +1041,7 @@ async def update_eta(
     if delivery is None:
         raise ValueError("Delivery not found")
 
-    ordered_stops = (
-        await session.execute(
-            select(DeliveryStop)
-            .where(DeliveryStop.delivery_id == delivery_id)
-            .order_by(DeliveryStop.sequence_order)
-        )
-    ).scalars().all()
+    ordered_stops = await _ordered_stops(session, delivery_id)
 
     if not ordered_stops:
         raise ValueError("Delivery has no stops")
@@ -874,19 +1051,11 @@ async def update_eta(
     if not pending_stops:
         pending_stops = [ordered_stops[-1]]
 
+    leg_minutes, _ = await load_segment_durations(session, {delivery_id: pending_stops}, now)
     pending_stops[0].eta = now
     current_time = now
-
-    for idx in range(1, len(pending_stops)):
-        previous_stop = pending_stops[idx - 1]
-        stop = pending_stops[idx]
-        segment = await compute_single_route(
-            previous_stop.latitude,
-            previous_stop.longitude,
-            stop.latitude,
-            stop.longitude,
-        )
-        current_time = current_time + timedelta(minutes=float(segment["duration_minutes"]))
+    for stop in pending_stops[1:]:
+        current_time = current_time + timedelta(minutes=leg_minutes[stop.id])
         stop.eta = current_time
 
     estimated_arrival = pending_stops[-1].eta
@@ -909,6 +1078,179 @@ async def update_eta(
     return await _build_delivery_response(session, refreshed)
 
 
+@dataclass
+class EtaRefreshResult:
+    deliveries: int = 0
+    segments_rerouted: int = 0
+    stops_moved: int = 0
+    events: int = 0
+
+
+def propagate_etas(
+    stops: List[DeliveryStop], leg_minutes: Dict[int, float], changed_legs: Set[int], now: datetime
+) -> Dict[int, datetime]:
+    """New ETA per stop id, for the stops that move.
+
+    Stops whose ETA has passed count as visited. Pending stops keep their
+    ETA up to the first changed leg (or missing ETA); from there on each
+    stop is the previous one plus its leg, never earlier than now. Pickups
+    never move earlier than planned, since that may be when the parts are
+    ready. A delivery whose stops have all passed but is still running is
+    overdue; nothing moves, since re-dating its last stop to now would
+    rewrite it (and announce it) on every pass. ``update_eta`` or a status
+    change settles it.
+    """
+    etas = [_as_utc(stop.eta) if stop.eta is not None else None for stop in stops]
+    first_pending = next((index for index, eta in enumerate(etas) if eta is None or eta >= now), None)
+    if first_pending is None:
+        return {}
+    start = next(
+        (
+            index
+            for index in range(first_pending, len(stops))
+            if etas[index] is None or stops[index].id in changed_legs
+        ),
+        None,
+    )
+    if start is None:
+        return {}
+
+    moved: Dict[int, datetime] = {}
+    previous = etas[start - 1] if start > 0 else None
+    for index in range(start, len(stops)):
+        stop = stops[index]
+        if previous is None:
+            eta = max(now, etas[index] or now)
+        else:
+            eta = max(now, previous + timedelta(minutes=leg_minutes.get(stop.id, 0.0)))
+        if stop.stop_type == "pickup" and etas[index] is not None:
+            eta = max(eta, etas[index])
+        if etas[index] is None or abs((eta - etas[index]).total_seconds()) >= 1:
+            moved[stop.id] = eta
+        previous = eta
+    return moved
+
+
+def _arrival(stops: List[DeliveryStop], moved: Dict[int, datetime]) -> Optional[datetime]:
+    etas = [moved.get(stop.id) or (_as_utc(stop.eta) if stop.eta is not None else None) for stop in stops]
+    dropoffs = [eta for stop, eta in zip(stops, etas) if stop.stop_type == "dropoff" and eta is not None]
+    return max(dropoffs) if dropoffs else etas[-1]
+
+
+async def _refresh_eta_batch(
+    session: AsyncSession, delivery_ids: List[int], now: datetime, result: EtaRefreshResult
+) -> List[Tuple[int, datetime]]:
+    rows = await session.execute(
+        select(DeliveryStop)
+        .where(DeliveryStop.delivery_id.in_(delivery_ids))
+        .order_by(DeliveryStop.delivery_id, DeliveryStop.sequence_order)
+    )
+    stops_by_delivery: Dict[int, List[DeliveryStop]] = defaultdict(list)
+    for stop in rows.scalars():
+        stops_by_delivery[stop.delivery_id].append(stop)
+
+    latest_log = (
+        select(DeliveryEtaLog.delivery_id, func.max(DeliveryEtaLog.id).label("log_id"))
+        .where(DeliveryEtaLog.delivery_id.in_(delivery_ids))
+        .group_by(DeliveryEtaLog.delivery_id)
+        .subquery()
+    )
+    logged = dict(
+        (
+            await session.execute(
+                select(DeliveryEtaLog.delivery_id, DeliveryEtaLog.estimated_arrival).join(
+                    latest_log, DeliveryEtaLog.id == latest_log.c.log_id
+                )
+            )
+        ).all()
+    )
+
+    # Overdue deliveries (every stop passed) keep their ETAs; skip their legs too.
+    pending = {
+        delivery_id: stops
+        for delivery_id, stops in stops_by_delivery.items()
+        if any(stop.eta is None or _as_utc(stop.eta) >= now for stop in stops)
+    }
+    leg_minutes, changed_legs = await load_segment_durations(session, pending, now)
+    result.segments_rerouted += len(changed_legs)
+
+    announcements = []
+    for delivery_id, stops in stops_by_delivery.items():
+        result.deliveries += 1
+        moved = propagate_etas(stops, leg_minutes, changed_legs, now)
+        if not moved:
+            continue
+        for stop in stops:
+            if stop.id in moved:
+                stop.eta = moved[stop.id]
+        result.stops_moved += len(moved)
+
+        arrival = _arrival(stops, moved)
+        previous = logged.get(delivery_id)
+        if arrival is None or (
+            previous is not None
+            and abs((arrival - _as_utc(previous)).total_seconds()) < ETA_UPDATE_THRESHOLD_MINUTES * 60
+        ):
+            continue
+        session.add(DeliveryEtaLog(delivery_id=delivery_id, estimated_arrival=arrival))
+        announcements.append((delivery_id, arrival))
+    await session.commit()
+    return announcements
+
+
+async def refresh_in_progress_etas(now: Optional[datetime] = None) -> EtaRefreshResult:
+    """Bring the ETAs of every IN_PROGRESS delivery up to date; commits per batch."""
+    now = now or datetime.now(timezone.utc)
+    result = EtaRefreshResult()
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            delivery_ids = list(
+                (
+                    await session.execute(
+                        select(Delivery.id)
+                        .where(Delivery.status == "IN_PROGRESS", Delivery.id > last_id)
+                        .order_by(Delivery.id)
+                        .limit(ETA_REFRESH_BATCH_SIZE)
+                    )
+                ).scalars()
+            )
+            if not delivery_ids:
+                return result
+            last_id = delivery_ids[-1]
+            announcements = await _refresh_eta_batch(session, delivery_ids, now, result)
+            for delivery_id, arrival in announcements:
+                await emit_event(
+                    "ETA_UPDATED",
+                    {
+                        "entity_type": "delivery",
+                        "entity_id": delivery_id,
+                        "delivery_id": delivery_id,
+                        "estimated_arrival": arrival.isoformat(),
+                        "changed_by": None,
+                    },
+                    await _target_users_for_delivery(session, delivery_id),
+                )
+                result.events += 1
+
+
+async def eta_refresh_loop(interval_seconds: int = ETA_REFRESH_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            result = await refresh_in_progress_etas()
+            if result.stops_moved or result.events:
+                logger.info(
+                    "ETA refresh: %d deliveries, %d legs re-routed, %d stops moved, %d updates sent",
+                    result.deliveries,
+                    result.segments_rerouted,
+                    result.stops_moved,
+                    result.events,
+                )
+        except Exception:
+            logger.exception("ETA refresh failed")
+
+
 async def get_delivery_stats(session: AsyncSession) -> Dict:
     avg_values = (
         await session.execute(
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import backend.models  # noqa: F401
+from backend import database
+from backend.middleware.metrics import instrument_engine
+from backend.middleware.query_diagnostics import install_query_diagnostics, query_budget, track_queries
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries): fail the test if it executes more than max_queries SQL statements",
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item: pytest.Item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+    with query_budget(int(marker.args[0])):
+        outcome = yield
+    outcome.get_result()
+
+
+@pytest.fixture
+def query_log():
+    with track_queries() as log:
+        yield log
+
+
+@pytest.fixture
+def sessions(tmp_path: Path, monkeypatch):
+    """Session factory for a fresh SQLite database under ``tmp_path`` with every table created.
+
+    It stands in for ``AsyncSessionLocal`` in every backend module that
+    imported it, so services that open their own sessions use the same
+    database. The engine is ``sessions.kw["bind"]``; queries on it count
+    towards ``query_log``, ``query_budget`` and the request metrics.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    instrument_engine(engine)
+    install_query_diagnostics(engine)
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.create_all)
+
+    asyncio.run(create())
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    default = database.AsyncSessionLocal
+    for name, module in list(sys.modules.items()):
+        if name.startswith("backend.") and getattr(module, "AsyncSessionLocal", None) is default:
+            monkeypatch.setattr(module, "AsyncSessionLocal", factory)
+    yield factory
+    asyncio.run(engine.dispose())
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import select
+
+import backend.models  # noqa: F401
+from backend.models.inventory import PartsCatalog
+from backend.models.orders import Order, OrderAssignment, OrderItem
+from backend.models.users import BuyerProfile, SupplierProfile
+from backend.services import assignment_solver, matching_cache, matching_service
+from backend.services.assignment_solver import AssignmentItem, solve_assignment
+from backend.services.matching_cache import CatalogSnapshot
+from backend.services.matching_service import ScoredCandidate
+
+
+def _candidate(catalog_id: int, supplier_id: int, score: float, stock: int = 10) -> ScoredCandidate:
+    catalog = CatalogSnapshot(
+        id=catalog_id,
+        supplier_id=supplier_id,
+        category_id=1,
+        part_name="Part",
+        part_number=f"P-{catalog_id}",
+        brand=None,
+        unit_price=10.0,
+        quantity_in_stock=stock,
+        lead_time_hours=4,
+    )
+    return ScoredCandidate(
+        supplier_id=supplier_id,
+        business_name=f"Supplier {supplier_id}",
+        catalog=catalog,
+        distance_km=5.0,
+        distance_score=0.5,
+        reliability_score=0.5,
+        price_score=0.5,
+        urgency_score=0.5,
+        total_score=score,
+    )
+
+
+def _suppliers(selected):
+    return {item_id: candidate.supplier_id for item_id, candidate in selected.items()}
+
+
+def test_consolidates_an_order_onto_fewer_suppliers() -> None:
+    # Each item has a slightly better specialist; supplier 9 stocks all three.
+    items = [
+        AssignmentItem(item_id, 1, 1, [_candidate(item_id, item_id, 0.80), _candidate(10 + item_id, 9, 0.75)])
+        for item_id in (1, 2, 3)
+    ]
+    assert _suppliers(solve_assignment(items)) == {1: 9, 2: 9, 3: 9}
+    # Worth splitting once the specialists are far enough ahead.
+    assert _suppliers(solve_assignment(items, consolidation_penalty=0.01)) == {1: 1, 2: 2, 3: 3}
+    # A supplier already serving the order costs nothing.
+    assert _suppliers(solve_assignment(items[:1], already_used={1: {1}})) == {1: 1}
+
+
+def test_shared_stock_is_split_across_orders() -> None:
+    scarce = _candidate(1, 1, 0.9, stock=5)
+    items = [
+        AssignmentItem(1, 1, 5, [scarce, _candidate(2, 2, 0.6)]),
+        AssignmentItem(2, 2, 5, [scarce, _candidate(3, 3, 0.2)]),
+        # Nothing in stock for this one.
+        AssignmentItem(3, 2, 20, [_candidate(4, 4, 0.9)]),
+    ]
+    # Order 2 keeps the scarce row: its fallback is much worse than order 1's.
+    assert _suppliers(solve_assignment(items)) == {1: 2, 2: 1}
+
+
+def test_full_order_solve_builds_around_accepted_items(sessions, monkeypatch) -> None:
+    matching_cache.clear()
+    solves = []
+
+    def spy(items, already_used=None, **kwargs):
+        solves.append(({item.item_id: [c.supplier_id for c in item.candidates] for item in items}, already_used))
+        return solve_assignment(items, already_used, **kwargs)
+
+    async def no_emit(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(assignment_solver, "MATCHING_ASSIGNMENT_MODE", "joint")
+    monkeypatch.setattr(assignment_solver, "solve_assignment", spy)
+    monkeypatch.setattr(matching_service, "emit_event", no_emit)
+    monkeypatch.delenv("ORS_API_KEY", raising=False)
+
+    async def run():
+        async with sessions() as session:
+            session.add(BuyerProfile(id=1, factory_name="Plant", latitude=12.97, longitude=77.59))
+            for supplier_id, offset in ((1, 0.01), (2, 0.02)):
+                session.add(
+                    SupplierProfile(
+                        id=supplier_id,
+                        business_name=f"Supplier {supplier_id}",
+                        latitude=12.97 + offset,
+                        longitude=77.59,
+                        service_radius_km=100,
+                    )
+                )
+                for part_index, part in enumerate(("6204-ZZ", "6205-ZZ")):
+                    session.add(
+                        PartsCatalog(
+                            id=supplier_id * 10 + part_index,
+                            supplier_id=supplier_id,
+                            category_id=1,
+                            part_name="Bearing",
+                            part_number=part,
+                            normalized_part_number=part.replace("-", ""),
+                            unit_price=10.0,
+                            quantity_in_stock=20,
+                            lead_time_hours=4,
+                        )
+                    )
+            session.add(Order(id=1, buyer_id=1, status="PLACED"))
+            session.add(OrderItem(id=1, order_id=1, category_id=1, part_number="6204-ZZ", quantity=2, status="MATCHED"))
+            session.add(OrderItem(id=2, order_id=1, category_id=1, part_number="6205-ZZ", quantity=2, status="PENDING"))
+            session.add(OrderItem(id=3, order_id=1, category_id=1, part_number="6204-ZZ", quantity=1, status="PENDING"))
+            session.add(OrderAssignment(id=1, order_item_id=1, supplier_id=2, catalog_id=20, status="ACCEPTED"))
+            session.add(OrderAssignment(id=2, order_item_id=3, supplier_id=2, catalog_id=20, status="REJECTED"))
+            await session.commit()
+
+        async with sessions() as session:
+            await matching_service.match_full_order(session, 1)
+            assignments = (
+                await session.execute(
+                    select(OrderAssignment.order_item_id, OrderAssignment.supplier_id, OrderAssignment.status)
+                    .order_by(OrderAssignment.order_item_id, OrderAssignment.supplier_id)
+                )
+            ).all()
+        return assignments
+
+    assignments = asyncio.run(run())
+    matching_cache.clear()
+
+    # Only the open items are solved, around the accepted supplier. Item 3
+    # cannot go back to the supplier that rejected it, and the rejection stays
+    # on record; with supplier 1 in the order anyway, item 2 joins it.
+    assert solves == [({2: [1, 2], 3: [1]}, {1: {2}})]
+    assert [tuple(row) for row in assignments] == [
+        (1, 2, "ACCEPTED"),
+        (2, 1, "PROPOSED"),
+        (3, 1, "PROPOSED"),
+        (3, 2, "REJECTED"),
+    ]
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+import backend.models  # noqa: F401
+from backend.models.inventory import InventoryTransaction, PartCategory, PartsCatalog
+from backend.models.users import SupplierProfile
+from backend.services import catalog_columnar
+
+
+def _parquet(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def test_import_validates_and_bulk_loads_then_exports(sessions, monkeypatch) -> None:
+    monkeypatch.setattr(catalog_columnar, "CATALOG_COLUMNAR_BATCH_SIZE", 2)
+    emitted = []
+
+    async def record_emit(event_type, payload, target_user_ids, **kwargs):
+        emitted.append((event_type, payload["catalog_id"]))
+
+    monkeypatch.setattr(catalog_columnar, "emit_event", record_emit)
+    upload = pa.table(
+        {
+            "part_name": ["Bearing", "Seal", "  ", "Belt", "Bearing"],
+            "part_number": ["6204-ZZ", "TC-35", "X-1", "5VX-800", "6205"],
+            "category": ["Bearings", "seals", "Seals", "Belts", "bearings"],
+            # Integral floats from a dataframe are accepted for int columns.
+            "quantity": [40.0, 1.0, 1.0, 0.0, 10.0],
+            "unit_price": [12.5, 2.0, 1.0, -4.0, 15.0],
+            "lead_time_hours": pa.array([4, 8, 8, 8, 24], pa.int32()),
+            "min_order_qty": [2, None, 1, 1, 1],
+        }
+    )
+
+    async def run():
+        async with sessions() as session:
+            session.add(SupplierProfile(id=1, user_id=7, business_name="Supplier", latitude=1.0, longitude=1.0))
+            session.add(PartCategory(id=1, name="Seals"))
+            session.add(
+                PartsCatalog(
+                    id=1,
+                    supplier_id=1,
+                    category_id=1,
+                    part_name="Old seal",
+                    part_number="TC-35",
+                    normalized_part_number="TC35",
+                    unit_price=3.0,
+                    quantity_in_stock=1,
+                    lead_time_hours=8,
+                )
+            )
+            await session.commit()
+
+        async with sessions() as session:
+            wrong_type = await catalog_columnar.import_catalog(
+                session, _parquet(upload.set_column(5, "lead_time_hours", pa.array(["4h"] * 5))), 1
+            )
+            result = await catalog_columnar.import_catalog(session, _parquet(upload), 1)
+            catalog = {
+                row.part_number: (row.part_name, row.category_id, row.quantity_in_stock, row.min_order_quantity)
+                for row in (await session.execute(select(PartsCatalog))).scalars()
+            }
+            categories = dict((await session.execute(select(PartCategory.id, PartCategory.name))).all())
+            changes = (
+                await session.execute(
+                    select(
+                        InventoryTransaction.catalog_id,
+                        InventoryTransaction.change_amount,
+                        InventoryTransaction.reason,
+                    ).order_by(InventoryTransaction.id)
+                )
+            ).all()
+
+        exported = {}
+        for export_format in ("parquet", "arrow"):
+            exported[export_format] = b"".join(
+                [chunk async for chunk in catalog_columnar.export_catalog(export_format, supplier_id=1)]
+            )
+        return wrong_type, result, catalog, categories, changes, exported
+
+    wrong_type, result, catalog, categories, changes, exported = asyncio.run(run())
+
+    assert wrong_type.successful == 0
+    assert wrong_type.errors[0].error.startswith("Column lead_time_hours is string, expected int64")
+
+    assert (result.total_rows, result.successful, result.failed) == (5, 3, 2)
+    assert [(error.row_number, error.error) for error in result.errors] == [
+        (3, "part_name is required"),
+        (4, "unit_price must be > 0"),
+    ]
+    assert categories == {1: "Seals", 2: "Bearings"}
+    assert catalog == {
+        "TC-35": ("Seal", 1, 1, 1),
+        "6204-ZZ": ("Bearing", 2, 40, 2),
+        "6205": ("Bearing", 2, 10, 1),
+    }
+    # The seal's stock did not change, so it gets no ledger entry, but it is low.
+    assert changes == [(2, 40, "columnar_upload"), (3, 10, "columnar_upload")]
+    assert emitted == [("LOW_STOCK_ALERT", 1)]
+
+    parquet_rows = pq.read_table(pa.BufferReader(exported["parquet"])).to_pylist()
+    arrow_rows = ipc.open_stream(exported["arrow"]).read_all().to_pylist()
+    assert parquet_rows == arrow_rows
+    assert [(row["part_number"], row["category"], row["quantity"]) for row in parquet_rows] == [
+        ("TC-35", "Seals", 1),
+        ("6204-ZZ", "Bearings", 40),
+        ("6205", "Bearings", 10),
+    ]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import select
+
+import backend.models  # noqa: F401
+from backend.models.matching import BuyerSupplierDistance
+from backend.models.users import BuyerProfile, SupplierProfile
+from backend.services import distance_table
+
+
+def test_table_fills_in_tiles_and_follows_moves(sessions, monkeypatch) -> None:
+    monkeypatch.delenv("ORS_API_KEY", raising=False)
+    monkeypatch.setattr(distance_table, "DISTANCE_TABLE_TILE_SIZE", 1)
+    distance_table._moved_buyers.clear()
+    distance_table._moved_suppliers.clear()
+    tiles = []
+
+    async def fake_matrix(client, api_key, sources, destinations):
+        tiles.append((len(sources), len(destinations)))
+        return [[12_000.0] * len(destinations)] * len(sources), [[900.0] * len(destinations)] * len(sources)
+
+    monkeypatch.setattr(distance_table, "_ors_matrix", fake_matrix)
+
+    async def run():
+        async with sessions() as session:
+            session.add(BuyerProfile(id=1, factory_name="Plant A", latitude=12.97, longitude=77.59))
+            session.add(BuyerProfile(id=2, factory_name="Plant B", latitude=13.05, longitude=77.62))
+            session.add(SupplierProfile(id=1, business_name="Near", latitude=12.99, longitude=77.61))
+            session.add(SupplierProfile(id=2, business_name="Town", latitude=13.20, longitude=77.70))
+            # Delhi: well beyond the 500 km radius from Bangalore.
+            session.add(SupplierProfile(id=3, business_name="Far", latitude=28.61, longitude=77.21))
+            await session.commit()
+        # New profiles are queued for the background task like moved ones.
+        queued = (set(distance_table._moved_buyers), set(distance_table._moved_suppliers))
+        distance_table._moved_buyers.clear()
+        distance_table._moved_suppliers.clear()
+
+        observed = {"queued": queued}
+        async with sessions() as session:
+            observed["first"] = await distance_table.refresh_distance_table(session)
+            observed["again"] = await distance_table.refresh_distance_table(session)
+
+            buyer = await session.get(BuyerProfile, 1)
+            supplier = await session.get(SupplierProfile, 1)
+            supplier.latitude = 12.95
+            await session.commit()
+            observed["moved"] = (set(distance_table._moved_buyers), set(distance_table._moved_suppliers))
+            observed["stale_lookup"] = await distance_table.lookup_distance(session, buyer, supplier)
+            observed["incremental"] = await distance_table.refresh_distance_table(session, supplier_ids={1})
+            fresh = await distance_table.lookup_distance(session, buyer, supplier)
+            observed["fresh_source"] = fresh.source
+
+            monkeypatch.setenv("ORS_API_KEY", "test-key")
+            # Estimates no longer count once ORS is available.
+            observed["estimate_lookup"] = await distance_table.lookup_distance(session, buyer, supplier)
+            observed["upgraded"] = await distance_table.refresh_distance_table(session)
+            rows = (
+                await session.execute(
+                    select(BuyerSupplierDistance)
+                    .order_by(BuyerSupplierDistance.id)
+                    .execution_options(populate_existing=True)
+                )
+            ).scalars().all()
+        return observed, rows
+
+    observed, rows = asyncio.run(run())
+    distance_table._moved_buyers.clear()
+    distance_table._moved_suppliers.clear()
+
+    assert observed["queued"] == ({1, 2}, {1, 2, 3})
+    assert observed["first"] == 4
+    assert observed["again"] == 0
+    assert observed["moved"] == (set(), {1})
+    assert observed["stale_lookup"] is None
+    assert observed["incremental"] == 2
+    assert observed["fresh_source"] == "estimate"
+    assert observed["estimate_lookup"] is None
+    assert observed["upgraded"] == 4
+    assert tiles == [(1, 1)] * 4
+    assert {(row.buyer_id, row.supplier_id) for row in rows} == {(1, 1), (1, 2), (2, 1), (2, 2)}
+    assert {(row.source, row.distance_km, row.duration_minutes) for row in rows} == {("ors", 12.0, 15.0)}
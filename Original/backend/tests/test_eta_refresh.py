@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+import backend.models  # noqa: F401
+from backend.models.delivery import Delivery, DeliveryEtaLog, DeliverySegment, DeliveryStop
+from backend.services import routing_service
+
+
+def test_refresh_reroutes_only_stale_legs_and_moves_downstream_stops(sessions, monkeypatch) -> None:
+    routed: list[tuple] = []
+    events: list[dict] = []
+    leg_minutes = {"fast": 10.0}
+
+    async def fake_route(origin_lat, origin_lng, dest_lat, dest_lng):
+        routed.append((origin_lat, dest_lat))
+        return {"distance_km": 1.0, "duration_minutes": leg_minutes["fast"], "geometry": None}
+
+    async def fake_emit(event_type, payload, target_user_ids=None):
+        events.append(payload)
+
+    async def no_targets(session, delivery_id):
+        return []
+
+    monkeypatch.setattr(routing_service, "compute_single_route", fake_route)
+    monkeypatch.setattr(routing_service, "emit_event", fake_emit)
+    monkeypatch.setattr(routing_service, "_target_users_for_delivery", no_targets)
+
+    now = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+    planned = now.replace(tzinfo=None)
+
+    async def run():
+
+        async with sessions() as session:
+            session.add(Delivery(id=1, delivery_type="batched", status="IN_PROGRESS"))
+            session.add(Delivery(id=2, delivery_type="single", status="PLANNED"))
+            # Pickup already passed, then two dropoffs 10 minutes apart.
+            stops = [
+                DeliveryStop(id=1, delivery_id=1, stop_type="pickup", sequence_order=1, latitude=1.0, longitude=1.0, eta=planned - timedelta(minutes=5)),
+                DeliveryStop(id=2, delivery_id=1, stop_type="dropoff", sequence_order=2, latitude=2.0, longitude=2.0, eta=planned + timedelta(minutes=5)),
+                DeliveryStop(id=3, delivery_id=1, stop_type="dropoff", sequence_order=3, latitude=3.0, longitude=3.0, eta=planned + timedelta(minutes=15)),
+            ]
+            session.add_all(stops)
+            await session.flush()
+            for previous_stop, stop in zip(stops, stops[1:]):
+                session.add(routing_service._segment(1, previous_stop, stop, 10.0, now))
+            session.add(DeliveryEtaLog(delivery_id=1, estimated_arrival=planned + timedelta(minutes=15)))
+            await session.commit()
+
+        # Fresh cached legs and unchanged durations: nothing to do.
+        unchanged = await routing_service.refresh_in_progress_etas(now)
+        routed_while_fresh = len(routed)
+
+        # The last leg went stale and traffic slowed it to 25 minutes.
+        async with sessions() as session:
+            segment = (await session.execute(select(DeliverySegment).where(DeliverySegment.stop_id == 3))).scalar_one()
+            segment.computed_at = planned - timedelta(hours=1)
+            await session.commit()
+        leg_minutes["fast"] = 25.0
+        slowed = await routing_service.refresh_in_progress_etas(now)
+
+        # A second, smaller drift stays under the announcement threshold.
+        async with sessions() as session:
+            segment = (await session.execute(select(DeliverySegment).where(DeliverySegment.stop_id == 3))).scalar_one()
+            segment.computed_at = planned - timedelta(hours=1)
+            await session.commit()
+        leg_minutes["fast"] = 27.0
+        drifted = await routing_service.refresh_in_progress_etas(now)
+
+        async with sessions() as session:
+            etas = dict((await session.execute(select(DeliveryStop.id, DeliveryStop.eta))).all())
+            logs = (await session.execute(select(DeliveryEtaLog))).scalars().all()
+        return unchanged, routed_while_fresh, slowed, drifted, etas, logs
+
+    unchanged, routed_while_fresh, slowed, drifted, etas, logs = asyncio.run(run())
+
+    assert routed_while_fresh == 0
+    assert unchanged.deliveries == 1 and unchanged.stops_moved == 0 and unchanged.events == 0
+    assert routed == [(2.0, 3.0), (2.0, 3.0)]
+    assert slowed.segments_rerouted == 1 and slowed.stops_moved == 1 and slowed.events == 1
+    assert drifted.stops_moved == 1 and drifted.events == 0
+    # Upstream stops keep their ETA; only the stop after the changed leg moves.
+    assert etas[1] == planned - timedelta(minutes=5)
+    assert etas[2] == planned + timedelta(minutes=5)
+    assert etas[3] == planned + timedelta(minutes=32)
+    assert len(logs) == 2
+    assert [event["delivery_id"] for event in events] == [1]
+
+
+def test_refresh_routes_legs_together_and_leaves_overdue_deliveries(sessions, monkeypatch) -> None:
+    in_flight = {"now": 0, "peak": 0}
+    events: list[dict] = []
+
+    async def slow_route(origin_lat, origin_lng, dest_lat, dest_lng):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return {"distance_km": 1.0, "duration_minutes": 10.0, "geometry": None}
+
+    async def fake_emit(event_type, payload, target_user_ids=None):
+        events.append(payload)
+
+    async def no_targets(session, delivery_id):
+        return []
+
+    monkeypatch.setattr(routing_service, "compute_single_route", slow_route)
+    monkeypatch.setattr(routing_service, "emit_event", fake_emit)
+    monkeypatch.setattr(routing_service, "_target_users_for_delivery", no_targets)
+    monkeypatch.setattr(routing_service, "ETA_ROUTING_CONCURRENCY", 3)
+
+    now = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+    planned = now.replace(tzinfo=None)
+
+    async def run():
+
+        async with sessions() as session:
+            # Deliveries 1-4 have no cached legs; 5 is overdue.
+            for delivery_id in range(1, 6):
+                session.add(Delivery(id=delivery_id, delivery_type="single", status="IN_PROGRESS"))
+                offset = -60 if delivery_id == 5 else 5
+                for sequence in (1, 2):
+                    session.add(
+                        DeliveryStop(
+                            delivery_id=delivery_id,
+                            stop_type="pickup" if sequence == 1 else "dropoff",
+                            sequence_order=sequence,
+                            latitude=float(delivery_id),
+                            longitude=float(sequence),
+                            eta=planned + timedelta(minutes=offset + 10 * sequence),
+                        )
+                    )
+            await session.commit()
+
+        first = await routing_service.refresh_in_progress_etas(now)
+        again = await routing_service.refresh_in_progress_etas(now + timedelta(minutes=1))
+        async with sessions() as session:
+            overdue = (
+                await session.execute(select(DeliveryStop.eta).where(DeliveryStop.delivery_id == 5))
+            ).scalars().all()
+        return first, again, overdue
+
+    first, again, overdue = asyncio.run(run())
+
+    assert first.segments_rerouted == 4
+    assert in_flight["peak"] == 3
+    # The overdue delivery is neither routed nor re-dated, pass after pass.
+    assert overdue == [planned - timedelta(minutes=50), planned - timedelta(minutes=40)]
+    assert again.stops_moved == 0 and again.segments_rerouted == 0
+    assert 5 not in [event["delivery_id"] for event in events]
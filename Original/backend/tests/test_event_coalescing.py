@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+import backend.models  # noqa: F401
+from backend.events import bus
+from backend.models.events import EventLog, Notification
+from backend.services import notification_counters
+
+
+class _RecordingSocket:
+    def __init__(self) -> None:
+        self.emitted: list[tuple[str, str]] = []
+
+    async def emit(self, event, data, room=None):
+        self.emitted.append((event, room))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_counters():
+    notification_counters.forget_all()
+    yield
+    notification_counters.forget_all()
+
+
+def test_burst_collapses_into_one_digest_per_recipient(sessions, monkeypatch) -> None:
+    socket = _RecordingSocket()
+    monkeypatch.setattr(bus, "sio_server", socket)
+    monkeypatch.setattr(bus, "NOTIFICATION_COALESCE_WINDOW_MS", 50)
+
+    async def run():
+        for catalog_id in range(1, 41):
+            # User 7 owns every part; user 8 only the even ones.
+            targets = [7, 8] if catalog_id % 2 == 0 else [7]
+            result = await bus.emit_event(
+                "LOW_STOCK_ALERT", {"catalog_id": catalog_id, "part_number": f"P-{catalog_id}"}, targets
+            )
+            assert result["coalesced"] is True
+        await asyncio.sleep(0.2)
+        async with sessions() as session:
+            events = (await session.execute(select(EventLog))).scalars().all()
+            notifications = (await session.execute(select(Notification).order_by(Notification.user_id))).scalars().all()
+        return events, notifications
+
+    events, notifications = asyncio.run(run())
+
+    assert len(events) == 1
+    assert json.loads(events[0].payload)["count"] == 40
+    assert [n.user_id for n in notifications] == [7, 8]
+    assert [json.loads(n.metadata_json)["count"] for n in notifications] == [40, 20]
+    assert notifications[0].title == "Low Stock Alert (40 items)"
+    assert [event for event, _ in socket.emitted].count("notification") == 2
+    assert len(socket.emitted) == 5  # 2 notifications, 1 system_event, 2 unread counts
+
+
+def test_full_batch_flushes_before_window_and_single_event_is_unchanged(sessions, monkeypatch) -> None:
+    monkeypatch.setattr(bus, "NOTIFICATION_COALESCE_WINDOW_MS", 60_000)
+    monkeypatch.setattr(bus, "NOTIFICATION_COALESCE_MAX_ITEMS", 5)
+
+    async def run():
+        for catalog_id in range(6):
+            await bus.emit_event("LOW_STOCK_ALERT", {"catalog_id": catalog_id}, [3])
+        await asyncio.sleep(0.1)
+        async with sessions() as session:
+            after_cap = (await session.execute(select(Notification))).scalars().all()
+        await bus.flush_pending_events()
+        async with sessions() as session:
+            after_flush = (await session.execute(select(Notification).order_by(Notification.id))).scalars().all()
+        return after_cap, after_flush
+
+    after_cap, after_flush = asyncio.run(run())
+
+    assert len(after_cap) == 1
+    assert json.loads(after_cap[0].metadata_json)["count"] == 5
+    assert len(after_flush) == 2
+    assert after_flush[1].title == "Low Stock Alert"
+    assert json.loads(after_flush[1].metadata_json)["catalog_id"] == 5
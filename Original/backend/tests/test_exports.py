@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+
+import backend.models  # noqa: F401
+from backend.models.events import EventLog
+from backend.models.orders import Order, OrderAssignment, OrderItem
+from backend.services import export_service
+
+
+def test_exports_stream_in_batches(sessions, monkeypatch) -> None:
+    monkeypatch.setattr(export_service, "EXPORT_BATCH_SIZE", 2)
+
+    async def collect(stream):
+        return [chunk async for chunk in stream]
+
+    async def run():
+        async with sessions() as session:
+            session.add(Order(id=1, buyer_id=1))
+            session.add(Order(id=2, buyer_id=1))
+            session.add(Order(id=3, buyer_id=1))
+            session.add(OrderItem(id=1, order_id=1, part_number="A", quantity=1))
+            session.add(OrderItem(id=2, order_id=1, part_number="B", quantity=2))
+            session.add(OrderItem(id=3, order_id=2, part_number="C", quantity=3))
+            session.add(OrderAssignment(id=1, order_item_id=1, supplier_id=5, status="REJECTED"))
+            session.add(OrderAssignment(id=2, order_item_id=1, supplier_id=6))
+            session.add(OrderAssignment(id=3, order_item_id=3, supplier_id=5))
+            await session.commit()
+
+        chunks = {
+            "ndjson": await collect(export_service.stream_export("orders", "ndjson")),
+            "csv": await collect(export_service.stream_export("orders", "csv")),
+            "empty": await collect(export_service.stream_export("event_logs", "csv")),
+        }
+        return chunks
+
+    chunks = asyncio.run(run())
+
+    orders = [json.loads(line) for line in b"".join(chunks["ndjson"]).decode().splitlines()]
+    assert [order["id"] for order in orders] == [1, 2, 3]
+    assert [[a["supplier_id"] for a in item["assignments"]] for item in orders[0]["items"]] == [[5, 6], []]
+    assert orders[1]["items"][0]["assignments"][0]["status"] == "PROPOSED"
+    assert orders[2]["items"] == []
+
+    # Five flat rows at two per fetch: the body goes out in three chunks.
+    assert len(chunks["csv"]) == 3
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks["csv"]).decode())))
+    assert [(row["order_id"], row["order_item_id"], row["assignment_id"]) for row in rows] == [
+        ("1", "1", "1"),
+        ("1", "1", "2"),
+        ("1", "2", ""),
+        ("2", "3", "3"),
+        ("3", "", ""),
+    ]
+    assert b"".join(chunks["empty"]).decode().strip() == ",".join(column.name for column in EventLog.__table__.columns)
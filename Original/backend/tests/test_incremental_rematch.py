@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import select
+
+import backend.models  # noqa: F401
+from backend.models.inventory import PartsCatalog, StockReservation
+from backend.models.matching import MatchingLog
+from backend.models.orders import Order, OrderAssignment, OrderItem
+from backend.models.users import BuyerProfile, SupplierProfile
+from backend.services import matching_cache, matching_service, rematch_service
+
+
+def test_restock_rematches_only_waiting_items(sessions, monkeypatch) -> None:
+    matching_cache.clear()
+    rematch_service.index.clear()
+    emitted = []
+
+    async def record_emit(event_type, payload, target_user_ids, **kwargs):
+        emitted.append((event_type, payload["order_id"], payload["order_item_ids"]))
+
+    monkeypatch.setattr(matching_service, "emit_event", record_emit)
+    monkeypatch.delenv("ORS_API_KEY", raising=False)
+
+    async def run():
+
+        async with sessions() as session:
+            session.add(BuyerProfile(id=1, factory_name="Plant", latitude=12.97, longitude=77.59))
+            for supplier_id in (1, 2):
+                session.add(
+                    SupplierProfile(
+                        id=supplier_id,
+                        business_name=f"Supplier {supplier_id}",
+                        latitude=12.98,
+                        longitude=77.6,
+                        service_radius_km=100,
+                    )
+                )
+                session.add(
+                    PartsCatalog(
+                        id=supplier_id,
+                        supplier_id=supplier_id,
+                        category_id=1,
+                        part_name="Bearing",
+                        part_number="6204-ZZ",
+                        normalized_part_number="6204ZZ",
+                        unit_price=10.0,
+                        quantity_in_stock=0,
+                        lead_time_hours=4,
+                    )
+                )
+            session.add(Order(id=1, buyer_id=1, status="PLACED"))
+            session.add(Order(id=2, buyer_id=1, status="MATCHED"))
+            session.add(Order(id=3, buyer_id=1, status="PLACED"))
+            session.add(Order(id=4, buyer_id=1, status="CONFIRMED"))
+            # 1 waits for stock, 2 holds a proposal from before stock holds
+            # existed, 3 was rejected by supplier 1, 4 is past matching.
+            session.add(OrderItem(id=1, order_id=1, part_number="6204 ZZ", quantity=2, status="PENDING"))
+            session.add(OrderItem(id=2, order_id=2, part_number="6204-ZZ", quantity=2, status="MATCHED"))
+            session.add(OrderItem(id=3, order_id=3, part_number="6204zz", quantity=2, status="PENDING"))
+            session.add(OrderItem(id=4, order_id=4, part_number="6204-ZZ", quantity=2, status="CONFIRMED"))
+            session.add(OrderItem(id=5, order_id=1, part_number="OTHER-1", quantity=1, status="PENDING"))
+            session.add(OrderAssignment(id=1, order_item_id=2, supplier_id=2, catalog_id=2, status="PROPOSED"))
+            session.add(OrderAssignment(id=2, order_item_id=3, supplier_id=1, catalog_id=1, status="REJECTED"))
+            await session.commit()
+
+        indexed = await rematch_service.load_index()
+
+        async with sessions() as session:
+            catalog = await session.get(PartsCatalog, 1)
+            catalog.quantity_in_stock = 10
+            await session.commit()
+
+        checked = await rematch_service.run_pending_rematches()
+        # The pass's own stock holds do not queue another pass.
+        requeued = await rematch_service.run_pending_rematches()
+
+        async def item_3_log():
+            async with sessions() as session:
+                return (
+                    await session.execute(select(MatchingLog.id).where(MatchingLog.order_item_id == 3))
+                ).scalars().all()
+
+        logged = await item_3_log()
+        async with sessions() as session:
+            catalog = await session.get(PartsCatalog, 1)
+            catalog.quantity_in_stock += 1
+            await session.commit()
+        rechecked = await rematch_service.run_pending_rematches()
+        # Item 3 is still waiting with the same ranking, so its log is kept.
+        relogged = await item_3_log()
+
+        async with sessions() as session:
+            statuses = dict((await session.execute(select(OrderItem.id, OrderItem.status))).all())
+            proposals = (
+                await session.execute(
+                    select(OrderAssignment.order_item_id, OrderAssignment.supplier_id)
+                    .where(OrderAssignment.status == "PROPOSED")
+                    .order_by(OrderAssignment.order_item_id)
+                )
+            ).all()
+            held = (await session.execute(select(StockReservation.quantity))).scalars().all()
+            stock = await session.scalar(select(PartsCatalog.quantity_in_stock).where(PartsCatalog.id == 1))
+            order_status = await session.scalar(select(Order.status).where(Order.id == 1))
+        return indexed, checked, requeued, rechecked, logged, relogged, statuses, proposals, held, stock, order_status
+
+    (
+        indexed,
+        checked,
+        requeued,
+        rechecked,
+        logged,
+        relogged,
+        statuses,
+        proposals,
+        held,
+        stock,
+        order_status,
+    ) = asyncio.run(run())
+    matching_cache.clear()
+    rematch_service.index.clear()
+
+    assert indexed == 4
+    assert checked == 3
+    assert requeued == 0
+    assert rechecked == 3
+    assert logged and relogged == logged
+    assert statuses == {1: "MATCHED", 2: "MATCHED", 3: "PENDING", 4: "CONFIRMED", 5: "PENDING"}
+    assert [tuple(row) for row in proposals] == [(1, 1), (2, 1)]
+    assert held == [2, 2]
+    assert stock == 7
+    assert order_status == "MATCHED"
+    assert emitted == [("SUPPLIER_MATCHED", 1, [1]), ("SUPPLIER_MATCHED", 2, [2])]
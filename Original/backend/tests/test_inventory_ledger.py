@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, insert, select
+
+import backend.models  # noqa: F401
+from backend.models.inventory import InventoryTransaction
+from backend.services import archive_store, inventory_ledger
+
+
+def test_snapshot_archive_and_balance(tmp_path: Path, sessions, monkeypatch) -> None:
+    monkeypatch.setattr(archive_store, "ARCHIVE_DIR", tmp_path / "archive")
+    old = datetime.utcnow() - timedelta(days=400)
+
+    async def run():
+        async with sessions() as session:
+            await session.execute(
+                insert(InventoryTransaction),
+                [
+                    {"catalog_id": 1, "change_amount": 10, "reason": "restock", "created_at": old},
+                    {"catalog_id": 1, "change_amount": -3, "reason": "order_confirmed", "created_at": old},
+                    {"catalog_id": 2, "change_amount": 5, "reason": "csv_upload", "created_at": old},
+                    {"catalog_id": 2, "change_amount": 1, "reason": "restock", "created_at": old},
+                ],
+            )
+            await session.commit()
+
+            result = await inventory_ledger.run_ledger_maintenance(session, retention_days=30)
+            session.add(InventoryTransaction(catalog_id=1, change_amount=-2, reason="order_confirmed"))
+            await session.commit()
+
+            balance = await inventory_ledger.get_catalog_balance(session, 1)
+            live_rows = await session.scalar(select(func.count(InventoryTransaction.id)))
+        return result, balance, live_rows
+
+    result, balance, live_rows = asyncio.run(run())
+
+    assert result.snapshots_written == 2
+    assert result.transactions_archived == 3
+    assert live_rows == 2
+    assert (balance.balance, balance.snapshot_balance, balance.tail_transactions) == (5, 7, 1)
+    archived = list(inventory_ledger.iter_archived_transactions(catalog_id=1))
+    assert [row["change_amount"] for row in archived] == [10, -3]
+
+
+def test_history_pages_reach_the_archive_only_through_a_cursor(tmp_path: Path, sessions, monkeypatch) -> None:
+    monkeypatch.setattr(archive_store, "ARCHIVE_DIR", tmp_path / "archive")
+    old = datetime.utcnow() - timedelta(days=400)
+    reads = []
+    read_member = archive_store._read_member
+
+    def spy(path, offset, length):
+        reads.append((offset, length))
+        return read_member(path, offset, length)
+
+    monkeypatch.setattr(archive_store, "_read_member", spy)
+
+    async def run():
+        async with sessions() as session:
+            await session.execute(
+                insert(InventoryTransaction),
+                [
+                    {"catalog_id": catalog_id, "change_amount": amount, "reason": "restock", "created_at": old}
+                    for amount in range(1, 7)
+                    for catalog_id in (1, 2)
+                ],
+            )
+            await session.commit()
+            await inventory_ledger.run_ledger_maintenance(session, retention_days=30)
+            for amount in (7, 8, 9):
+                session.add(InventoryTransaction(catalog_id=1, change_amount=amount, reason="restock"))
+            await session.commit()
+
+            first = await inventory_ledger.read_transaction_history(session, 1, limit=5)
+            reads_after_first = len(reads)
+            pages, cursor = [], None
+            while True:
+                page = await inventory_ledger.read_transaction_history(session, 1, limit=2, before_id=cursor)
+                pages.append(page)
+                if page.next_cursor is None:
+                    break
+                cursor = page.next_cursor
+        return first, reads_after_first, pages
+
+    first, reads_after_first, pages = asyncio.run(run())
+
+    # The first page is live only and says where the archive continues.
+    assert [row["change_amount"] for row in first.items] == [9, 8, 7]
+    assert first.older_rows_archived and not first.includes_archived
+    assert first.next_cursor == first.items[-1]["id"]
+    assert reads_after_first == 0
+
+    rows = [row for page in pages for row in page.items]
+    assert [row["change_amount"] for row in rows] == [9, 8, 7, 6, 5, 4, 3, 2, 1]
+    assert [row["archived"] for row in rows] == [False] * 3 + [True] * 6
+    assert all(isinstance(row["created_at"], datetime) for row in rows)
+    assert not pages[0].includes_archived and pages[-1].includes_archived
+    # Archived pages decompress only catalog 1's member of the archive file.
+    assert reads and all(offset is not None for offset, _ in reads)
+    assert len({read for read in reads}) == 1
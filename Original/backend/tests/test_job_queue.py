@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+import backend.models  # noqa: F401
+from backend.models.jobs import BackgroundJob
+from backend.services import job_queue
+
+
+def test_jobs_deduplicate_retry_and_survive_a_restart(sessions, monkeypatch) -> None:
+    calls: list[dict] = []
+
+    async def flaky(payload: dict) -> None:
+        calls.append(payload)
+        if payload.get("fail"):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(job_queue, "_registry", {})
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BASE_SECONDS", 0)
+    job_queue.job_handler("flaky", max_attempts=2)(flaky)
+
+    async def run():
+
+        first = await job_queue.enqueue_job("flaky", {"n": 1}, dedup_key="k")
+        # A rolled-back enqueue leaves nothing behind.
+        async with sessions() as session:
+            await job_queue.enqueue(session, "flaky", {"n": 0})
+            await session.rollback()
+        assert await job_queue.enqueue_job("flaky", {"n": 2}, dedup_key="k") == first
+        failing = await job_queue.enqueue_job("flaky", {"fail": True})
+
+        # A worker dies mid-job: the claim stays RUNNING until its lease expires.
+        crashed = await job_queue.claim_job("flaky")
+        assert crashed.id == first
+        monkeypatch.setattr(job_queue, "JOB_LEASE_SECONDS", -1)
+        assert await job_queue.requeue_expired_jobs() == 1
+
+        statuses = []
+        while (job := await job_queue.claim_job("flaky")) is not None:
+            statuses.append(await job_queue.run_job(job))
+
+        async with sessions() as session:
+            jobs = {job.id: job for job in (await session.execute(select(BackgroundJob))).scalars()}
+            stats = await job_queue.job_stats(session)
+        async with sessions() as session:
+            retried = await job_queue.retry_job(session, failing)
+        return first, failing, jobs, statuses, stats, retried
+
+    first, failing, jobs, statuses, stats, retried = asyncio.run(run())
+
+    assert len(jobs) == 2
+    assert jobs[first].status == "SUCCEEDED"
+    assert jobs[first].attempts == 2
+    assert calls.count({"n": 1}) == 1
+    assert statuses == ["SUCCEEDED", "QUEUED", "FAILED"]
+    assert jobs[failing].status == "FAILED"
+    assert jobs[failing].last_error == "RuntimeError: boom"
+    assert stats["flaky"]["counts"] == {"SUCCEEDED": 1, "FAILED": 1}
+    assert retried.status == "QUEUED" and retried.attempts == 0
+
+
+def test_critical_jobs_run_first_and_preempt_uncommitted_work(sessions, monkeypatch) -> None:
+    started: list[str] = []
+    gate = asyncio.Event()
+
+    async def work(payload: dict) -> None:
+        started.append(payload["name"])
+        if payload["name"] == "bulk":
+            await gate.wait()
+
+    monkeypatch.setattr(job_queue, "_registry", {})
+    monkeypatch.setattr(job_queue, "_pools", {})
+    monkeypatch.setattr(job_queue, "JOB_CRITICAL_RESERVED_WORKERS", 0)
+    job_queue.job_handler("work", concurrency=1)(work)
+    job_queue.registry.reset()
+
+    async def wait_for(condition) -> None:
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("timed out")
+
+    async def run():
+
+        await job_queue.enqueue_job("work", {"name": "standard"}, priority=job_queue.PRIORITY_STANDARD)
+        await job_queue.enqueue_job("work", {"name": "critical"}, priority=job_queue.PRIORITY_CRITICAL)
+        first = await job_queue.claim_job("work")
+        assert first.payload["name"] == "critical"
+        assert await job_queue.claim_job("work", max_priority=job_queue.PRIORITY_CRITICAL) is None
+        await job_queue.run_job(first)
+        await job_queue.run_job(await job_queue.claim_job("work"))
+
+        bulk = await job_queue.enqueue_job("work", {"name": "bulk"})
+        workers = asyncio.create_task(job_queue.run_workers(0.05))
+        await wait_for(lambda: started[-1:] == ["bulk"])
+        await job_queue.enqueue_job("work", {"name": "emergency"}, priority=job_queue.PRIORITY_CRITICAL)
+        await wait_for(lambda: started.count("bulk") == 2)
+        gate.set()
+        await wait_for(lambda: job_queue._pools["work"].slots[0].job is None)
+        async with sessions() as session:
+            job = await session.get(BackgroundJob, bulk)
+        workers.cancel()
+        await asyncio.gather(workers, return_exceptions=True)
+        return job
+
+    bulk = asyncio.run(run())
+
+    assert started == ["critical", "standard", "bulk", "emergency", "bulk"]
+    # The pre-empted attempt is handed back and not counted.
+    assert bulk.status == "SUCCEEDED" and bulk.attempts == 1
+    metrics = job_queue.registry.render_prometheus()
+    assert 'sparehub_job_preemptions_total{job_type="work",priority="standard"} 1' in metrics
+    assert 'sparehub_job_latency_seconds_count{job_type="work",priority="critical"} 2' in metrics
+
+
+def test_order_priority_escalates_near_the_deadline() -> None:
+    now = datetime.utcnow()
+    assert job_queue.order_priority("critical") == job_queue.PRIORITY_CRITICAL
+    assert job_queue.order_priority("standard", now + timedelta(days=5)) == job_queue.PRIORITY_STANDARD
+    assert job_queue.order_priority("standard", now + timedelta(hours=2)) == job_queue.PRIORITY_URGENT
+    assert job_queue.order_priority("urgent", now + timedelta(hours=2)) == job_queue.PRIORITY_CRITICAL
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+import backend.models  # noqa: F401
+from backend.models.inventory import PartsCatalog
+from backend.models.orders import Order, OrderItem
+from backend.models.users import BuyerProfile, SupplierProfile
+from backend.services import matching_cache, matching_service, reservation_service
+
+
+def test_simulate_reuses_scores_until_an_input_changes(sessions, monkeypatch) -> None:
+    matching_cache.clear()
+    distance_calls = []
+    original = matching_service.compute_distance_batch
+
+    async def counting_distance_batch(buyer_coords, candidates):
+        distance_calls.append(len(candidates))
+        return await original(buyer_coords, candidates)
+
+    monkeypatch.setattr(matching_service, "compute_distance_batch", counting_distance_batch)
+    monkeypatch.delenv("ORS_API_KEY", raising=False)
+
+    async def run():
+        async with sessions() as session:
+            session.add(BuyerProfile(id=1, factory_name="Plant", latitude=12.97, longitude=77.59))
+            for supplier_id in (1, 2):
+                session.add(
+                    SupplierProfile(
+                        id=supplier_id,
+                        business_name=f"Supplier {supplier_id}",
+                        latitude=12.9 + supplier_id / 100,
+                        longitude=77.6,
+                        service_radius_km=100,
+                    )
+                )
+                session.add(
+                    PartsCatalog(
+                        id=supplier_id,
+                        supplier_id=supplier_id,
+                        category_id=1,
+                        part_name="Bearing",
+                        part_number="6204-ZZ",
+                        normalized_part_number="6204ZZ",
+                        unit_price=10.0 * supplier_id,
+                        quantity_in_stock=5,
+                        lead_time_hours=4,
+                    )
+                )
+            session.add(Order(id=1, buyer_id=1, urgency="standard"))
+            session.add(OrderItem(id=1, order_id=1, part_number="6204-ZZ", quantity=5))
+            await session.commit()
+
+        async def simulate():
+            async with sessions() as session:
+                return await matching_service.match_order_item(session, 1, simulate=True)
+
+        observed = [await simulate(), await simulate()]
+        calls_after_repeat = len(distance_calls)
+
+        async with sessions() as session:
+            catalog = await session.get(PartsCatalog, 2)
+            catalog.unit_price = 5.0
+            await session.commit()
+        observed.append(await simulate())
+        calls_after_price = len(distance_calls)
+
+        async with sessions() as session:
+            assert await reservation_service.hold_stock(session, 1, 5) is not None
+            await session.rollback()
+        await simulate()
+        calls_after_rollback = len(distance_calls)
+
+        async with sessions() as session:
+            assert await reservation_service.hold_stock(session, 1, 5) is not None
+            await session.commit()
+        observed.append(await simulate())
+
+        async with sessions() as session:
+            supplier = await session.get(SupplierProfile, 2)
+            supplier.reliability_score = 0.9
+            await session.commit()
+        await simulate()
+
+        return observed, calls_after_repeat, calls_after_price, calls_after_rollback
+
+    observed, calls_after_repeat, calls_after_price, calls_after_rollback = asyncio.run(run())
+    matching_cache.clear()
+
+    assert observed[0] == observed[1]
+    assert calls_after_repeat == 1
+    assert observed[2]["selected_supplier_id"] == 2
+    assert calls_after_price == 2
+    assert calls_after_rollback == 2
+    # Supplier 1 sold out, so only supplier 2 is left.
+    assert [match["supplier_id"] for match in observed[3]["top_matches"]] == [2]
+    assert distance_calls == [2, 2, 1, 1]
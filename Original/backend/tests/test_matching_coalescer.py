@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+
+import backend.models  # noqa: F401
+from backend.models.inventory import PartsCatalog
+from backend.models.orders import Order, OrderItem
+from backend.models.users import SupplierProfile
+from backend.services import job_queue, matching_coalescer
+
+
+def test_concurrent_matching_shares_one_run_unless_inputs_change(sessions, monkeypatch) -> None:
+    runs: list[int] = []
+    gate = asyncio.Event()
+
+    async def fake_match_full_order(session, order_id, simulate=False, changed_by_user_id=None):
+        runs.append(order_id)
+        await gate.wait()
+        # The run's own stock hold must not count as an input change.
+        catalog = await session.get(PartsCatalog, 1)
+        catalog.quantity_in_stock -= 1
+        await session.commit()
+        return [{"run": len(runs)}]
+
+    monkeypatch.setattr(matching_coalescer, "match_full_order", fake_match_full_order)
+
+    async def settle() -> None:
+        for _ in range(20):
+            await asyncio.sleep(0)
+
+    async def run():
+        async with sessions() as session:
+            session.add(
+                PartsCatalog(
+                    id=1,
+                    supplier_id=1,
+                    part_name="Bearing",
+                    part_number="6204-ZZ",
+                    normalized_part_number="6204ZZ",
+                    unit_price=10.0,
+                    quantity_in_stock=50,
+                    lead_time_hours=4,
+                )
+            )
+            session.add(Order(id=1, buyer_id=1))
+            session.add(OrderItem(id=1, order_id=1, part_number="6204-ZZ", quantity=5))
+            session.add_all(
+                [
+                    SupplierProfile(id=supplier_id, business_name=f"Supplier {supplier_id}", latitude=0, longitude=0)
+                    for supplier_id in (1, 2)
+                ]
+            )
+            await session.commit()
+
+        # Three callers, one run: the leader's own commit does not trigger a trailing run.
+        callers = [asyncio.create_task(matching_coalescer.match_order_coalesced(1)) for _ in range(3)]
+        await settle()
+        gate.set()
+        shared = await asyncio.gather(*callers)
+
+        # A quantity edit committed while the run is in flight gives joiners one trailing run.
+        gate.clear()
+        leader = asyncio.create_task(matching_coalescer.match_order_coalesced(1))
+        await settle()
+        joiners = [asyncio.create_task(matching_coalescer.match_order_coalesced(1)) for _ in range(2)]
+        await settle()
+        async with sessions() as session:
+            item = await session.get(OrderItem, 1)
+            item.quantity = 7
+            await session.commit()
+        gate.set()
+        trailing = await asyncio.gather(leader, *joiners)
+
+        # Only suppliers listing the order's parts are inputs: supplier 2 is not.
+        async def edit_supplier_during_run(supplier_id: int):
+            gate.clear()
+            leader = asyncio.create_task(matching_coalescer.match_order_coalesced(1))
+            await settle()
+            joiner = asyncio.create_task(matching_coalescer.match_order_coalesced(1))
+            await settle()
+            async with sessions() as session:
+                supplier = await session.get(SupplierProfile, supplier_id)
+                supplier.service_radius_km = 5
+                await session.commit()
+            gate.set()
+            return await asyncio.gather(leader, joiner)
+
+        unrelated = await edit_supplier_during_run(2)
+        candidate = await edit_supplier_during_run(1)
+        return shared, trailing, unrelated, candidate
+
+    shared, trailing, unrelated, candidate = asyncio.run(run())
+
+    assert shared == [[{"run": 1}]] * 3
+    assert trailing == [[{"run": 2}], [{"run": 3}], [{"run": 3}]]
+    assert unrelated == [[{"run": 4}]] * 2
+    assert candidate == [[{"run": 5}], [{"run": 6}]]
+    assert len(runs) == 6
+    assert matching_coalescer.stats()["trailing_runs"] >= 1
+
+
+def test_preempting_a_match_job_cancels_its_run_until_the_run_commits(sessions, monkeypatch) -> None:
+    events: list[tuple[str, int]] = []
+    commit_now = asyncio.Event()
+    release = asyncio.Event()
+
+    async def fake_match_full_order(session, order_id, simulate=False, changed_by_user_id=None):
+        attempt = sum(1 for name, order in events if name == "start" and order == order_id)
+        events.append(("start", order_id))
+        try:
+            if order_id == 1 and attempt == 0:
+                await asyncio.Event().wait()
+            if order_id == 2:
+                await commit_now.wait()
+                catalog = await session.get(PartsCatalog, 1)
+                catalog.quantity_in_stock -= 1
+                await session.commit()
+                await release.wait()
+        except asyncio.CancelledError:
+            events.append(("cancelled", order_id))
+            raise
+        return []
+
+    async def match(payload: dict) -> None:
+        if "order_id" in payload:
+            await matching_coalescer.match_order_coalesced(
+                payload["order_id"], on_commit=job_queue.commit_callback()
+            )
+        else:
+            events.append(("urgent", payload["n"]))
+
+    monkeypatch.setattr(matching_coalescer, "match_full_order", fake_match_full_order)
+    monkeypatch.setattr(job_queue, "_registry", {})
+    monkeypatch.setattr(job_queue, "_pools", {})
+    monkeypatch.setattr(job_queue, "JOB_CRITICAL_RESERVED_WORKERS", 0)
+    job_queue.job_handler("match", concurrency=1)(match)
+    job_queue.registry.reset()
+
+    async def wait_for(condition) -> None:
+        for _ in range(300):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("timed out")
+
+    def preemptions() -> int:
+        metrics = job_queue.registry.render_prometheus()
+        return metrics.count('sparehub_job_preemptions_total{job_type="match",priority="standard"} 1')
+
+    async def run():
+        async with sessions() as session:
+            session.add(
+                PartsCatalog(
+                    id=1,
+                    supplier_id=1,
+                    part_name="Bearing",
+                    part_number="6204-ZZ",
+                    normalized_part_number="6204ZZ",
+                    unit_price=10.0,
+                    quantity_in_stock=50,
+                    lead_time_hours=4,
+                )
+            )
+            session.add_all([Order(id=1, buyer_id=1), Order(id=2, buyer_id=1)])
+            await session.commit()
+        workers = asyncio.create_task(job_queue.run_workers(0.05))
+
+        # The pre-empted job was the run's only caller and nothing was committed:
+        # the run is cancelled with it, then redone when the job comes back.
+        await job_queue.enqueue_job("match", {"order_id": 1})
+        await wait_for(lambda: ("start", 1) in events)
+        await job_queue.enqueue_job("match", {"n": 1}, priority=job_queue.PRIORITY_CRITICAL)
+        await wait_for(lambda: events.count(("start", 1)) == 2)
+        await wait_for(lambda: job_queue._pools["match"].slots[0].job is None)
+
+        # A job that joined a run started elsewhere counts as committed once the
+        # run commits, so it is not pre-empted and the run is left alone.
+        outside = asyncio.create_task(matching_coalescer.match_order_coalesced(2))
+        await wait_for(lambda: ("start", 2) in events)
+        await job_queue.enqueue_job("match", {"order_id": 2})
+        await wait_for(lambda: 2 in matching_coalescer._flights and matching_coalescer._flights[2].waiters == 2)
+        commit_now.set()
+        await wait_for(lambda: job_queue._pools["match"].slots[0].committed)
+        await job_queue.enqueue_job("match", {"n": 2}, priority=job_queue.PRIORITY_CRITICAL)
+        await asyncio.sleep(0.2)
+        blocked = ("urgent", 2) not in events
+        release.set()
+        await outside
+        await wait_for(lambda: ("urgent", 2) in events)
+
+        workers.cancel()
+        await asyncio.gather(workers, return_exceptions=True)
+        return blocked
+
+    blocked = asyncio.run(run())
+
+    assert events[:4] == [("start", 1), ("cancelled", 1), ("urgent", 1), ("start", 1)]
+    assert blocked
+    assert ("cancelled", 2) not in events and events.count(("start", 2)) == 1
+    assert preemptions() == 1
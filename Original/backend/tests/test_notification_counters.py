@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import func, insert, select, update
+
+import backend.models  # noqa: F401
+from backend.models.events import Notification, NotificationCounter
+from backend.services import notification_counters
+
+
+def test_counter_backfills_then_tracks_deltas(sessions, monkeypatch) -> None:
+    notification_counters.forget_all()
+    monkeypatch.setattr(notification_counters, "NOTIFICATION_COUNTER_CACHE_SIZE", 1)
+
+    async def run():
+        row = {"event_type": "ORDER_PLACED", "title": "t", "message": "m"}
+        async with sessions() as session:
+            await session.execute(
+                insert(Notification),
+                [{**row, "user_id": 1, "is_read": False}] * 3 + [{**row, "user_id": 1, "is_read": True}],
+            )
+            await session.commit()
+
+            # Reading leaves the database alone; the first write backfills the row.
+            observed = [await notification_counters.get_unread_count(session, 1)]
+            rows_after_read = await session.scalar(select(func.count()).select_from(NotificationCounter))
+
+            await session.execute(insert(Notification), [{**row, "user_id": 1, "is_read": False}])
+            values = await notification_counters.adjust_unread(session, [1, 2], 1)
+            await session.commit()
+            pushed = notification_counters.remember(values)
+            cached = list(notification_counters._cache)
+            observed.append(await notification_counters.get_unread_count(session, 1))
+
+            stale = {1: (values[1][0] - 1, 99)}
+            assert notification_counters.remember(stale) == {}
+
+            values = await notification_counters.reset_unread(session, 1)
+            await session.commit()
+            notification_counters.remember(values)
+            observed.append(await notification_counters.get_unread_count(session, 1))
+
+            # Another process (a job worker) bumps the counter without this
+            # process's map hearing about it.
+            await session.execute(
+                update(NotificationCounter)
+                .where(NotificationCounter.user_id == 1)
+                .values(unread_count=2, version=NotificationCounter.version + 1)
+            )
+            await session.commit()
+            observed.append(await notification_counters.get_unread_count(session, 1))
+        return observed, rows_after_read, pushed, cached
+
+    observed, rows_after_read, pushed, cached = asyncio.run(run())
+    notification_counters.forget_all()
+
+    assert observed == [3, 4, 0, 2]
+    assert rows_after_read == 0
+    # Neither user had a counter row; both are backfilled from the table.
+    assert pushed == {1: 4, 2: 0}
+    # The cache keeps only the most recently updated users.
+    assert cached == [2]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import backend.models  # noqa: F401
+from backend.models.delivery import Delivery, DeliveryStop
+from backend.models.orders import Order, OrderAssignment, OrderItem
+from backend.models.users import BuyerProfile, SupplierProfile
+from backend.services.order_service import list_order_summaries, list_orders_for_role, serialize_order
+
+ADMIN = {"role": "admin", "user_id": 1}
+DROPOFF_ETA = datetime(2026, 3, 2, 9, 30)
+NO_FILTERS = dict(
+    status_filter=None,
+    urgency_filter=None,
+    start_date=None,
+    end_date=None,
+    buyer_filter=None,
+    supplier_filter=None,
+)
+
+
+def _seed(session: AsyncSession, order_count: int, items_per_order: int) -> None:
+    session.add(BuyerProfile(id=1, factory_name="Plant", latitude=12.97, longitude=77.59))
+    for supplier_id in (1, 2):
+        session.add(
+            SupplierProfile(id=supplier_id, business_name=f"Supplier {supplier_id}", latitude=12.98, longitude=77.6)
+        )
+    assignment_id = 0
+    shown_assignment = {}
+    for order_id in range(1, order_count + 1):
+        session.add(
+            Order(id=order_id, buyer_id=1, status="MATCHED", created_at=datetime(2026, 3, 1) + timedelta(hours=order_id))
+        )
+        for index in range(items_per_order):
+            item_id = order_id * 100 + index
+            session.add(
+                OrderItem(
+                    id=item_id,
+                    order_id=order_id,
+                    category_id=1,
+                    part_number=f"P-{item_id}",
+                    part_description="Bearing" if index == 0 else None,
+                    quantity=index + 1,
+                    status="MATCHED",
+                )
+            )
+            # Item 0 has no match yet, item 1 a proposal and a rejection, the
+            # rest an accepted match after a proposal from the other supplier.
+            if index == 0:
+                statuses = []
+            elif index == 1:
+                statuses = [("REJECTED", 1), ("PROPOSED", 2)]
+            else:
+                statuses = [("PROPOSED", 1), ("ACCEPTED", 2)]
+            for status, supplier_id in statuses:
+                assignment_id += 1
+                if index == 1 and status == "PROPOSED":
+                    shown_assignment[order_id] = assignment_id
+                session.add(
+                    OrderAssignment(
+                        id=assignment_id,
+                        order_item_id=item_id,
+                        supplier_id=supplier_id,
+                        catalog_id=1,
+                        assigned_price=10.0 * supplier_id + index,
+                        status=status,
+                    )
+                )
+    # The newest order's shown assignment (item 1's proposal) has a planned drop-off.
+    session.add(Delivery(id=1, status="PLANNED"))
+    session.add(
+        DeliveryStop(
+            delivery_id=1,
+            order_assignment_id=shown_assignment[order_count],
+            stop_type="dropoff",
+            sequence_order=2,
+            latitude=12.97,
+            longitude=77.59,
+            eta=DROPOFF_ETA,
+        )
+    )
+
+
+@pytest.mark.parametrize("items_per_order", [3, 12])
+def test_summaries_match_full_view_with_constant_query_count(sessions, query_log, items_per_order: int) -> None:
+    async def run():
+        async with sessions() as session:
+            _seed(session, order_count=4, items_per_order=items_per_order)
+            await session.commit()
+
+        async with sessions() as session:
+            before = query_log.count
+            summaries, total = await list_order_summaries(session, ADMIN, page=1, page_size=3, **NO_FILTERS)
+            page_queries = query_log.count - before
+            orders, _ = await list_orders_for_role(session, ADMIN, page=1, page_size=3, **NO_FILTERS)
+            full = [serialize_order(order) for order in orders]
+            past_end, past_total = await list_order_summaries(session, ADMIN, page=9, page_size=3, **NO_FILTERS)
+        return summaries, total, full, page_queries, past_end, past_total
+
+    summaries, total, full, page_queries, past_end, past_total = asyncio.run(run())
+
+    assert total == 4 and past_total == 4 and past_end == []
+    assert [summary.id for summary in summaries] == [order.id for order in full]
+    for summary, order in zip(summaries, full):
+        assert summary.total_items == order.total_items
+        assert summary.total_value == order.total_value
+        assert summary.buyer_factory_name == "Plant"
+        assert summary.part_number == order.items[0].part_number
+        assert summary.part_description == "Bearing"
+        # Item 0 is unmatched, item 1 only proposed to supplier 2.
+        assert summary.supplier_business_name == "Supplier 2"
+        proposal = next(a for a in order.items[1].assignments if a.status == "PROPOSED")
+        assert summary.assignment_id == proposal.id
+        assert summary.eta == (DROPOFF_ETA if summary.id == 4 else None)
+
+    # One statement per page whatever the size of the orders on it.
+    assert page_queries == 1
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import asyncio
+
+from backend.middleware import auth
+
+
+def test_hash_cost_and_needs_rehash() -> None:
+    hashed = auth.hash_password("password123", rounds=4)
+
+    assert auth.hash_cost(hashed) == 4
+    assert auth.needs_rehash(hashed) == (auth.BCRYPT_ROUNDS != 4)
+    assert auth.hash_cost("not-a-bcrypt-hash") is None
+
+
+def test_async_verify_runs_in_pool() -> None:
+    hashed = auth.hash_password("password123", rounds=4)
+
+    async def run() -> tuple[bool, bool]:
+        ok = await auth.verify_password_async("password123", hashed)
+        bad = await auth.verify_password_async("wrong-password", hashed)
+        return ok, bad
+
+    ok, bad = asyncio.run(run())
+    auth.shutdown_hash_executor()
+
+    assert ok is True
+    assert bad is False
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import get_db
+from backend.middleware import query_diagnostics
+
+
+async def _run_selects(sessions, count: int) -> None:
+    async with sessions() as session:
+        for value in range(count):
+            await session.execute(text("SELECT :value"), {"value": value})
+
+
+def test_query_log_fixture_counts_statements(sessions, query_log) -> None:
+    asyncio.run(_run_selects(sessions, 3))
+
+    assert query_log.count == 3
+    assert query_log.repeated(2) == [("SELECT ?", 3)]
+
+
+def test_query_budget_raises_when_exceeded(sessions) -> None:
+    with pytest.raises(query_diagnostics.QueryBudgetExceeded, match="budget is 2"):
+        with query_diagnostics.query_budget(2):
+            asyncio.run(_run_selects(sessions, 3))
+
+
+@pytest.mark.query_budget(3)
+def test_query_budget_marker_allows_work_within_budget(sessions) -> None:
+    asyncio.run(_run_selects(sessions, 3))
+
+
+def test_middleware_flags_repeated_statement(sessions, caplog) -> None:
+    app = FastAPI()
+    app.add_middleware(query_diagnostics.QueryDiagnosticsMiddleware, threshold=2)
+
+    async def test_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = test_db
+
+    @app.get("/orders")
+    async def list_orders(db: AsyncSession = Depends(get_db)):
+        for order_id in range(4):
+            await db.execute(text("SELECT :order_id"), {"order_id": order_id})
+        return []
+
+    async def run() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/orders")
+
+    with caplog.at_level(logging.WARNING, logger=query_diagnostics.__name__):
+        asyncio.run(run())
+
+    assert "Possible N+1 in GET /orders: statement executed 4 times: SELECT ?" in caplog.text
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import get_db
+from backend.middleware import metrics
+
+
+def _build_app(sessions) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware, server_timing=True)
+
+    async def test_db():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = test_db
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int, db: AsyncSession = Depends(get_db)):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+        metrics.record_ors_call("matrix", 0.01)
+        return {"id": item_id}
+
+    return app
+
+
+def test_middleware_attributes_sql_and_ors_to_route_template(sessions) -> None:
+    metrics.registry.reset()
+    app = _build_app(sessions)
+
+    async def run() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/items/1")
+            return await client.get("/items/2")
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert 'db;desc="2 queries"' in response.headers["server-timing"]
+    body = metrics.registry.render_prometheus()
+    assert 'sparehub_http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in body
+    assert 'sparehub_db_statements_total{method="GET",route="/items/{item_id}"} 4' in body
+    assert 'sparehub_ors_calls_total{method="GET",route="/items/{item_id}"} 2' in body
+
+
+def test_tasks_spawned_by_a_request_report_as_background() -> None:
+    metrics.registry.reset()
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    spawned = []
+
+    async def after_response():
+        await asyncio.sleep(0.01)
+        metrics.record_ors_call("matrix", 0.01)
+
+    @app.get("/spawn")
+    async def spawn():
+        spawned.append(metrics.create_background_task(after_response()))
+        return {}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/spawn")
+        await asyncio.gather(*spawned)
+
+    asyncio.run(run())
+
+    body = metrics.registry.render_prometheus()
+    assert 'sparehub_ors_calls_total{method="GET",route="/spawn"} 0' in body
+    assert 'sparehub_ors_calls_total{method="",route="<background>"} 1' in body
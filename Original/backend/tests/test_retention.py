@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, select
+
+import backend.models  # noqa: F401
+from backend.models.events import EventLog, Notification
+from backend.services import archive_store, retention_service
+
+
+def test_retention_archives_old_rows_and_keeps_unread(tmp_path: Path, sessions, monkeypatch) -> None:
+    monkeypatch.setattr(archive_store, "ARCHIVE_DIR", tmp_path / "archive")
+    old = datetime.utcnow() - timedelta(days=200)
+    recent = datetime.utcnow() - timedelta(days=1)
+
+    async def run():
+        async with sessions() as session:
+            await session.execute(
+                insert(EventLog),
+                [
+                    {"event_type": "ORDER_PLACED", "entity_type": "orders", "entity_id": 1, "created_at": old},
+                    {"event_type": "ORDER_PLACED", "entity_type": "orders", "entity_id": 2, "created_at": recent},
+                ],
+            )
+            notification = {"event_type": "ORDER_PLACED", "title": "t", "message": "m", "user_id": 7}
+            await session.execute(
+                insert(Notification),
+                [
+                    {**notification, "is_read": True, "created_at": old},
+                    {**notification, "is_read": False, "created_at": old},
+                    {**notification, "is_read": True, "created_at": recent},
+                ],
+            )
+            await session.commit()
+
+            result = await retention_service.run_retention(session, event_log_days=90, read_notification_days=30)
+            live_events = (await session.execute(select(EventLog.entity_id))).scalars().all()
+            live_notifications = (await session.execute(select(Notification.is_read))).scalars().all()
+        return result, live_events, live_notifications
+
+    result, live_events, live_notifications = asyncio.run(run())
+
+    assert (result.event_logs_archived, result.notifications_archived) == (1, 1)
+    assert live_events == [2]
+    assert sorted(live_notifications) == [False, True]
+
+    archived = retention_service.query_archive(
+        "notifications", start_date=old - timedelta(days=1), filters={"user_id": 7}
+    )
+    assert [(row["user_id"], row["is_read"]) for row in archived] == [(7, True)]
+    assert retention_service.query_archive("event_logs", end_date=old - timedelta(days=40)) == []
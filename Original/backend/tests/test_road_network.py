@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+from backend.services import road_network, routing_service
+
+
+def _line(coordinates, **properties):
+    return {"type": "Feature", "properties": properties, "geometry": {"type": "LineString", "coordinates": coordinates}}
+
+
+def _write_extract(path: Path) -> Path:
+    # A -- B -- C along a slow road, plus a faster one-way bypass A -> D -> C.
+    # E sits on a road that touches nothing else.
+    a, b, c, d = [77.60, 12.90], [77.61, 12.90], [77.62, 12.90], [77.61, 12.91]
+    features = [
+        _line([a, b, c], highway="residential"),
+        {
+            "type": "Feature",
+            "properties": {"highway": "primary", "oneway": "yes"},
+            "geometry": {"type": "MultiLineString", "coordinates": [[a, d], [d, c]]},
+        },
+        _line([[77.70, 12.90], [77.71, 12.90]], highway="residential"),
+    ]
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+    return path
+
+
+def test_routes_follow_speed_and_oneway(tmp_path: Path) -> None:
+    network = road_network.RoadNetwork.from_geojson(_write_extract(tmp_path / "roads.geojson"))
+
+    forward = network.route(12.90, 77.60, 12.90, 77.62)
+    backward = network.route(12.90, 77.62, 12.90, 77.60)
+    # The bypass is longer but faster; it cannot be driven backwards.
+    assert [12.91, 77.61] in [[lat, lon] for lon, lat in forward.coordinates]
+    assert [12.90, 77.61] in [[lat, lon] for lon, lat in backward.coordinates]
+    assert forward.distance_km > backward.distance_km
+    assert forward.duration_minutes < backward.duration_minutes
+
+    assert network.route(12.90, 77.60, 12.90, 77.70) is None
+    assert network.route(13.50, 77.60, 12.90, 77.62) is None
+
+    distances, durations = network.matrix([(12.90, 77.60)], [(12.90, 77.62), (12.90, 77.70), (12.90, 77.60)])
+    assert distances[0][0] == forward.distance_km * 1000
+    assert durations[0][0] == forward.duration_minutes * 60
+    assert distances[0][1:] == [None, 0.0]
+
+
+def test_routing_service_prefers_the_loaded_network(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("ORS_API_KEY", "unused")
+    road_network.reset_road_network()
+    road_network.load_road_network(str(_write_extract(tmp_path / "roads.geojson")))
+    try:
+        route = asyncio.run(routing_service.compute_single_route(12.90, 77.60, 12.90, 77.62))
+        matrix = asyncio.run(routing_service.compute_distance_matrix([(12.90, 77.60), (12.90, 77.70)]))
+    finally:
+        road_network.reset_road_network()
+
+    assert len(route["geometry"]["coordinates"]) == 5
+    # Unreachable pairs keep the haversine estimate instead of failing.
+    assert matrix[0][1] == routing_service._fallback_duration_matrix([(12.90, 77.60), (12.90, 77.70)])[0][1]
+
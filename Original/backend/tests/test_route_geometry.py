@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+
+import pytest
+
+import backend.models  # noqa: F401
+from backend.models.delivery import Delivery
+from backend.services import route_geometry, routing_service
+
+
+def _winding_route(points: int = 600) -> list[list[float]]:
+    coordinates, lat, lng = [], 12.90, 77.60
+    for index in range(points):
+        heading = math.sin(index / 15.0)
+        lat += math.cos(heading) * 0.0003
+        lng += math.sin(heading) * 0.0003
+        coordinates.append([round(lng, 5), round(lat, 5)])
+    return coordinates
+
+
+def test_polyline_matches_the_reference_encoding() -> None:
+    coordinates = [[-120.2, 38.5], [-120.95, 40.7], [-126.453, 43.252]]
+    encoded = route_geometry.encode_polyline(coordinates)
+    assert encoded == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert route_geometry.decode_polyline(encoded) == coordinates
+
+
+def test_levels_shrink_the_route_and_stay_on_it(sessions) -> None:
+    coordinates = _winding_route()
+    geojson = {"type": "LineString", "coordinates": coordinates}
+
+    async def run():
+        async with sessions() as session:
+            session.add(Delivery(id=1))
+            session.add(Delivery(id=2, route_geometry=json.dumps(geojson)))
+            await session.flush()
+            levels = route_geometry.geometry_levels(1, geojson)
+            session.add_all(levels)
+            await session.commit()
+            loaded = {
+                detail: await route_geometry.load_route_geometry(session, 1, None, detail)
+                for detail in route_geometry.DETAIL_TOLERANCE_METERS
+            }
+            legacy = await route_geometry.load_route_geometry(session, 2, json.dumps(geojson), "low")
+            missing = await route_geometry.load_route_geometry(session, 3, None)
+        return levels, loaded, legacy, missing
+
+    levels, loaded, legacy, missing = asyncio.run(run())
+
+    sizes = {level.detail: len(level.polyline) for level in levels}
+    assert sizes["full"] * 5 < len(json.dumps(geojson))
+    assert sizes["low"] < sizes["medium"] < sizes["full"]
+    assert loaded["full"]["coordinates"] == coordinates
+    # Simplified levels keep the endpoints and a subset of the original points.
+    for detail in ("medium", "low"):
+        points = loaded[detail]["coordinates"]
+        assert points[0] == coordinates[0] and points[-1] == coordinates[-1]
+        assert all(point in coordinates for point in points)
+        assert len(points) < len(coordinates) / 4
+    assert legacy == loaded["low"]
+    assert missing is None
+
+
+def test_geometry_endpoint_checks_access_without_building_the_delivery(sessions, query_log) -> None:
+    coordinates = _winding_route(50)
+    admin = {"role": "admin", "sub": "1"}
+
+    async def run():
+        async with sessions() as session:
+            session.add(Delivery(id=1))
+            await session.flush()
+            session.add_all(route_geometry.geometry_levels(1, {"type": "LineString", "coordinates": coordinates}))
+            await session.commit()
+
+        query_log.statements.clear()
+        async with sessions() as session:
+            encoded = await routing_service.get_delivery_route_geometry(session, 1, admin, "full", "polyline")
+            geojson = await routing_service.get_delivery_route_geometry(session, 1, admin, "full")
+            with pytest.raises(PermissionError):
+                await routing_service.get_delivery_route_geometry(session, 1, {"role": "buyer", "sub": "9"})
+        return encoded, geojson
+
+    encoded, geojson = asyncio.run(run())
+
+    assert route_geometry.decode_polyline(encoded["polyline"]) == coordinates
+    assert geojson["coordinates"] == coordinates
+    # Each call looks the delivery up, then reads only the stored polyline;
+    # the buyer is refused after the access check.
+    assert query_log.count == 6
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import backend.models  # noqa: F401
+from backend import database
+from backend.models.inventory import InventoryTransaction
+from backend.middleware.query_diagnostics import install_query_diagnostics, track_queries
+
+
+def test_init_db_skips_ddl_while_schema_version_is_current(tmp_path: Path, monkeypatch) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schema.db'}")
+    install_query_diagnostics(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    version = database.SCHEMA_VERSION
+    # The first boot creates the ledger with the reasons an older build allowed.
+    (reason_check,) = database._check_constraints(InventoryTransaction.__table__)
+    current_reasons = reason_check.sqltext
+    monkeypatch.setattr(reason_check, "sqltext", text("reason IN ('restock','csv_upload')"))
+
+    async def boot():
+        with track_queries() as log:
+            ran = await database.init_db()
+        return ran, log.count
+
+    async def recorded():
+        async with engine.connect() as conn:
+            row = (await conn.execute(select(database.schema_version_table))).one()
+        return row.version, row.fingerprint
+
+    async def run():
+        first = await boot()
+        restart = await boot()
+        stored = await recorded()
+        # A model change shipped without a version bump still gets its DDL,
+        # but does not take over the record from the build that wrote it.
+        monkeypatch.setattr(database, "schema_fingerprint", lambda: "changed")
+        changed = await boot()
+        changed_record = await recorded()
+        # A newer version records itself, and brings back a nullable column
+        # an existing table lacks.
+        # and rebuilds a table whose check constraint allows more values now.
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX ix_stock_reservations_status_expires"))
+            await conn.execute(text("ALTER TABLE stock_reservations DROP COLUMN expires_at"))
+            await conn.execute(
+                text("INSERT INTO inventory_transactions (id, change_amount, reason) VALUES (7, 5, 'restock')")
+            )
+            await conn.execute(text("DELETE FROM inventory_transactions"))
+            await conn.execute(
+                text("INSERT INTO inventory_transactions (id, change_amount, reason) VALUES (3, 2, 'csv_upload')")
+            )
+        monkeypatch.setattr(reason_check, "sqltext", current_reasons)
+        monkeypatch.setattr(database, "SCHEMA_VERSION", version + 1)
+        newer = await boot()
+        newer_record = await recorded()
+        async with engine.begin() as conn:
+            columns = await conn.run_sync(
+                lambda sync_conn: [column["name"] for column in inspect(sync_conn).get_columns("stock_reservations")]
+            )
+            await conn.execute(
+                text("INSERT INTO inventory_transactions (change_amount, reason) VALUES (1, 'columnar_upload')")
+            )
+            ledger = (await conn.execute(text("SELECT id, reason FROM inventory_transactions ORDER BY id"))).all()
+            indexes = await conn.run_sync(
+                lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes("inventory_transactions")}
+            )
+        # An older build never touches a newer schema.
+        monkeypatch.setattr(database, "SCHEMA_VERSION", version)
+        older = await boot()
+        await engine.dispose()
+        return first, restart, stored, changed, changed_record, newer, newer_record, columns, ledger, indexes, older
+
+    (
+        first,
+        restart,
+        stored,
+        changed,
+        changed_record,
+        newer,
+        newer_record,
+        columns,
+        ledger,
+        indexes,
+        older,
+    ) = asyncio.run(run())
+
+    assert first[0] is True and first[1] > 20
+    assert restart == (False, 1)
+    assert stored[0] == version
+    assert changed[0] is True
+    assert changed_record == stored
+    assert newer[0] is True
+    assert newer_record == (version + 1, "changed")
+    assert "expires_at" in columns
+    # Rows and the id sequence survive the rebuild, so id 7 is not reused.
+    assert [tuple(row) for row in ledger] == [(3, "csv_upload"), (8, "columnar_upload")]
+    assert "ix_inventory_transactions_catalog_created" in indexes
+    assert older == (False, 1)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import zlib
+from types import SimpleNamespace
+from typing import List
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+from backend import serialization
+from backend.middleware import compression
+from backend.middleware.compression import CompressionMiddleware
+from backend.serialization import OrjsonResponse, SocketJson, typed_response
+
+
+class _Row(BaseModel):
+    id: int
+    name: str
+
+
+_ROWS = TypeAdapter(List[_Row])
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI(default_response_class=OrjsonResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/rows", response_model=List[_Row])
+    async def rows(count: int):
+        return typed_response(_ROWS, [_Row(id=index, name=f"row {index}") for index in range(count)])
+
+    @app.get("/counts")
+    async def counts():
+        return {1: "one", "two": 2}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for index in range(100):
+                yield f'{{"id": {index}}}\n'.encode()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+def test_typed_and_default_responses_compress_large_bodies() -> None:
+    app = _build_app()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            large = await client.get("/rows", params={"count": 200}, headers={"Accept-Encoding": "gzip"})
+            small = await client.get("/rows", params={"count": 2}, headers={"Accept-Encoding": "gzip"})
+            counts = await client.get("/counts")
+            schema = (await client.get("/openapi.json")).json()
+        return large, small, counts, schema
+
+    large, small, counts, schema = asyncio.run(run())
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert int(large.headers["content-length"]) < len(large.content) / 5
+    assert large.json()[199] == {"id": 199, "name": "row 199"}
+    assert "content-encoding" not in small.headers
+    assert small.json() == [{"id": 0, "name": "row 0"}, {"id": 1, "name": "row 1"}]
+    assert counts.json() == {"1": "one", "two": 2}
+    # The route still documents its response model.
+    assert "_Row" in json.dumps(schema["paths"]["/rows"]["get"]["responses"]["200"])
+
+
+def test_socket_json_matches_stdlib_packets() -> None:
+    payload = {"event_type": "ETA_UPDATED", "metadata": {"delivery_id": 4}, "ids": [1, 2], "note": "ünïcode"}
+    encoded = SocketJson.dumps(payload, separators=(",", ":"))
+    assert json.loads(encoded) == payload
+    assert SocketJson.loads(encoded) == payload
+    assert SocketJson.loads(encoded.encode("utf-8")) == payload
+
+
+class _StubBrotliCompressor:
+    # Stands in for brotli.Compressor; zlib keeps the output checkable.
+    def __init__(self, quality: int) -> None:
+        self.quality = quality
+        self._compressor = zlib.compressobj()
+
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def test_brotli_is_preferred_when_accepted_and_installed(monkeypatch) -> None:
+    monkeypatch.setattr(compression, "brotli", SimpleNamespace(Compressor=_StubBrotliCompressor))
+    app = _build_app()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Accept-Encoding": "gzip, br;q=1.0"}
+            rows = await client.get("/rows", params={"count": 200}, headers=headers)
+            stream = await client.get("/stream", headers=headers)
+            gzip_only = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        return rows, stream, gzip_only
+
+    rows, stream, gzip_only = asyncio.run(run())
+
+    assert rows.headers["content-encoding"] == "br"
+    assert rows.headers["vary"] == "Accept-Encoding"
+    assert int(rows.headers["content-length"]) == len(rows.content)
+    assert json.loads(zlib.decompress(rows.content))[199] == {"id": 199, "name": "row 199"}
+    # Streamed bodies are compressed chunk by chunk without a Content-Length.
+    assert stream.headers["content-encoding"] == "br" and "content-length" not in stream.headers
+    assert zlib.decompress(stream.content).decode().splitlines()[99] == '{"id": 99}'
+    assert gzip_only.headers["content-encoding"] == "gzip"
+    assert gzip_only.text.splitlines()[99] == '{"id": 99}'
+
+
+def test_msgpack_socket_serializer_requires_the_package(monkeypatch) -> None:
+    monkeypatch.setattr(serialization, "SOCKETIO_SERIALIZER", "msgpack")
+    monkeypatch.setitem(sys.modules, "msgpack", SimpleNamespace())
+    assert serialization.socketio_server_options() == {"serializer": "msgpack", "json": SocketJson}
+
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+    with pytest.raises(RuntimeError, match="msgpack package"):
+        serialization.socketio_server_options()
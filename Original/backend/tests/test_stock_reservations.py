@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, text
+
+import backend.models  # noqa: F401
+from backend import database
+from backend.models.inventory import InventoryTransaction, PartsCatalog, StockReservation
+from backend.models.orders import Order, OrderAssignment, OrderItem
+from backend.services import inventory_ledger, reservation_service
+
+
+async def _stock(sessions, stock: int) -> None:
+    async with sessions() as session:
+        session.add(
+            PartsCatalog(
+                id=1,
+                supplier_id=1,
+                category_id=1,
+                part_name="Bearing",
+                part_number="6204-ZZ",
+                normalized_part_number="6204ZZ",
+                unit_price=10.0,
+                quantity_in_stock=stock,
+                lead_time_hours=4,
+            )
+        )
+        await session.commit()
+
+
+def test_concurrent_holds_never_oversell(sessions) -> None:
+    async def run() -> tuple[int, int, int]:
+        await _stock(sessions, 10)
+
+        async def hold(assignment_id: int) -> bool:
+            async with sessions() as session:
+                reservation = await reservation_service.hold_stock(session, 1, 1, assignment_id)
+                await session.commit()
+                return reservation is not None
+
+        results = await asyncio.gather(*(hold(assignment_id) for assignment_id in range(1, 41)))
+        async with sessions() as session:
+            stock = await session.scalar(select(PartsCatalog.quantity_in_stock).where(PartsCatalog.id == 1))
+            held = await session.scalar(select(func.sum(StockReservation.quantity)))
+        return sum(results), stock, held
+
+    granted, stock, held = asyncio.run(run())
+
+    assert granted == 10
+    assert stock == 0
+    assert held == 10
+
+
+def test_commit_and_bulk_release(sessions) -> None:
+    async def run():
+        await _stock(sessions, 10)
+        async with sessions() as session:
+            for assignment_id in (1, 2, 3):
+                assert await reservation_service.hold_stock(session, 1, 3, assignment_id) is not None
+            assert await reservation_service.hold_stock(session, 1, 3, 4) is None
+
+            assert await reservation_service.commit_reservation(session, 1, 1, 3) is True
+            assert await reservation_service.commit_reservation(session, 1, 1, 3) is False
+            released = await reservation_service.release_reservations(session, [1, 2, 3])
+            await session.commit()
+
+            stock = await session.scalar(select(PartsCatalog.quantity_in_stock).where(PartsCatalog.id == 1))
+            movements = (await session.execute(select(InventoryTransaction.change_amount))).scalars().all()
+        return released, stock, movements
+
+    released, stock, movements = asyncio.run(run())
+
+    assert released == 6
+    assert stock == 7
+    assert movements == [-3]
+
+
+def test_expired_holds_go_back_on_the_shelf(sessions) -> None:
+    async def run():
+        await _stock(sessions, 10)
+        async with sessions() as session:
+            for assignment_id in (1, 2):
+                await reservation_service.hold_stock(session, 1, 3, assignment_id)
+            await session.commit()
+
+        async with sessions() as session:
+            early = await reservation_service.release_expired_holds(session, datetime.utcnow() + timedelta(hours=1))
+            # Assignment 1 is confirmed in time; 2 is left to lapse.
+            await reservation_service.commit_reservation(session, 1, 1, 3)
+            await session.commit()
+        async with sessions() as session:
+            expired = await reservation_service.release_expired_holds(session, datetime.utcnow() + timedelta(days=2))
+            await session.commit()
+            stock_after_expiry = await session.scalar(select(PartsCatalog.quantity_in_stock))
+            # A late confirmation takes stock afresh.
+            confirmed_late = await reservation_service.commit_reservation(session, 2, 1, 3)
+            await session.commit()
+            statuses = (
+                await session.execute(select(StockReservation.status).order_by(StockReservation.id))
+            ).scalars().all()
+            stock = await session.scalar(select(PartsCatalog.quantity_in_stock))
+            # Nothing left to expire for the maintenance pass.
+            maintenance = await inventory_ledger.run_ledger_maintenance(session)
+        return early, expired, stock_after_expiry, confirmed_late, statuses, stock, maintenance
+
+    early, expired, stock_after_expiry, confirmed_late, statuses, stock, maintenance = asyncio.run(run())
+
+    assert early == 0
+    assert expired == 3 and stock_after_expiry == 7
+    assert confirmed_late is True
+    assert statuses == ["COMMITTED", "RELEASED", "COMMITTED"]
+    assert stock == 4
+    assert maintenance.holds_expired == 0
+
+
+def test_deleting_an_assignment_detaches_its_holds(sessions) -> None:
+    engine = sessions.kw["bind"]
+
+    async def run():
+        await _stock(sessions, 10)
+        async with sessions() as session:
+            session.add(Order(id=1, buyer_id=1, status="MATCHED"))
+            session.add(OrderItem(id=1, order_id=1, part_number="6204-ZZ", quantity=2, status="MATCHED"))
+            session.add(OrderAssignment(id=1, order_item_id=1, supplier_id=1, catalog_id=1, status="PROPOSED"))
+            await reservation_service.hold_stock(session, 1, 2, 1)
+            await session.commit()
+
+        database.enable_sqlite_foreign_keys(engine)
+        # Pooled connections predate the listener.
+        await engine.dispose()
+        async with sessions() as session:
+            foreign_keys = await session.scalar(text("PRAGMA foreign_keys"))
+            await session.execute(delete(OrderAssignment).where(OrderAssignment.id == 1))
+            await session.commit()
+            holds = (await session.execute(select(StockReservation.assignment_id))).scalars().all()
+        return foreign_keys, holds
+
+    foreign_keys, holds = asyncio.run(run())
+
+    assert foreign_keys == 1
+    assert holds == [None]
@@ -40,6 +40,15 @@ export function useNotifications() {
     return cleanup;
   }, [on]);
 
+  // The server pushes the authoritative unread count on connect and on every change
+  useEffect(() => {
+    const cleanup = on('unread_count', (data: unknown) => {
+      const { count } = data as { count: number };
+      setUnreadCount(count);
+    });
+    return cleanup;
+  }, [on]);
+
   const markRead = useCallback(async (id: number) => {
     try {
       await markNotificationRead(id);
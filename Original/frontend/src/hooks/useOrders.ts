@@ -3,6 +3,7 @@ import { useCallback, useEffect, useState } from 'react';
 import {
   confirmOrderAssignment,
   getOrder,
+  getOrderSummaries,
   getOrders,
   rejectOrderAssignment,
   transitionItemStatus,
@@ -18,7 +19,8 @@ interface UseOrdersResult {
   runAction: (orderId: string, action: OrderAction, matchId?: string) => Promise<void>;
 }
 
-export function useOrders(status?: string): UseOrdersResult {
+// ``view: 'summary'`` suits list pages that never read an order's items.
+export function useOrders(status?: string, view: 'full' | 'summary' = 'full'): UseOrdersResult {
   const [orders, setOrders] = useState<Order[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -27,14 +29,14 @@ export function useOrders(status?: string): UseOrdersResult {
     setLoading(true);
     setError(null);
     try {
-      const data = await getOrders(status);
+      const data = view === 'summary' ? await getOrderSummaries(status) : await getOrders(status);
       setOrders(data);
     } catch (fetchError) {
       setError(fetchError instanceof Error ? fetchError.message : 'Failed to load orders');
     } finally {
       setLoading(false);
     }
-  }, [status]);
+  }, [status, view]);
 
   const runAction = useCallback(
     async (orderId: string, action: OrderAction, matchId?: string) => {
@@ -13,7 +13,7 @@ import { getOrderDetailPath } from '@/utils/routes';
 export function ActiveOrders() {
   const navigate = useNavigate();
   const { user } = useAuth();
-  const { orders, loading, error, refetch, runAction } = useOrders('active');
+  const { orders, loading, error, refetch, runAction } = useOrders('active', 'summary');
 
   useEffect(() => {
     const timer = window.setInterval(() => {
@@ -3,6 +3,8 @@ import type {
   DeliveryDto,
   OrderAssignmentDto,
   OrderDto,
+  OrderSummaryDto,
+  OrderSummaryListDto,
   OrdersListDto,
 } from '@/services/api/contracts';
 import type { Order, RouteData, RouteLeg } from '@/types';
@@ -93,6 +95,32 @@ export function toOrdersView(list: OrdersListDto): Order[] {
   return list.items.map(toOrderView);
 }
 
+// Summary rows carry no items; pages that need them load the order itself.
+export function toOrderSummaryView(summary: OrderSummaryDto): Order {
+  return {
+    id: summary.id,
+    orderId: String(summary.id),
+    status: summary.status,
+    urgency: normalizeUrgency(summary.urgency),
+    partName: summary.part_description ?? summary.part_number ?? `Order #${summary.id}`,
+    partNumber: summary.part_number ?? '--',
+    buyerCompany: summary.buyer_factory_name ?? undefined,
+    supplierName: summary.supplier_business_name ?? undefined,
+    etaMinutesRemaining: summary.eta ? minutesUntil(summary.eta) : undefined,
+    createdAt: summary.created_at ?? new Date().toISOString(),
+    created_at: summary.created_at ?? undefined,
+    updatedAt: summary.updated_at ?? undefined,
+    updated_at: summary.updated_at ?? undefined,
+    totalItems: summary.total_items,
+    totalValue: summary.total_value,
+    items: [],
+  };
+}
+
+export function toOrderSummariesView(list: OrderSummaryListDto): Order[] {
+  return list.items.map(toOrderSummaryView);
+}
+
 export function filterOrdersByScope(
   orders: Order[],
   statusScope?: string,
@@ -204,6 +204,31 @@ export interface OrdersListDto {
   total: number;
 }
 
+export interface OrderSummaryDto {
+  id: number;
+  buyer_id: number;
+  status: BackendOrderStatus;
+  urgency: string;
+  required_delivery_date: string | null;
+  created_at: string | null;
+  updated_at: string | null;
+  buyer_factory_name: string | null;
+  total_items: number;
+  total_value: number;
+  part_number: string | null;
+  part_description: string | null;
+  supplier_business_name: string | null;
+  assignment_id: number | null;
+  eta: string | null;
+}
+
+export interface OrderSummaryListDto {
+  items: OrderSummaryDto[];
+  page: number;
+  page_size: number;
+  total: number;
+}
+
 export interface NotificationDto {
   id: number;
   user_id: number;
@@ -6,6 +6,7 @@ export {
   getOrder,
   getRoute,
   getOrders,
+  getOrderSummaries,
   getOrdersEnvelope,
   transitionOrderStatus,
   transitionItemStatus,
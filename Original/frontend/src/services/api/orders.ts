@@ -5,10 +5,17 @@ import type {
   OrderCreateDto,
   OrderDto,
   OrderHistoryDto,
+  OrderSummaryListDto,
   OrdersListDto,
   StatusTransitionDto,
 } from '@/services/api/contracts';
-import { toOrderView, toOrdersView, toRouteView, filterOrdersByScope } from '@/services/adapters/ordersAdapter';
+import {
+  toOrderSummariesView,
+  toOrderView,
+  toOrdersView,
+  toRouteView,
+  filterOrdersByScope,
+} from '@/services/adapters/ordersAdapter';
 import type {
   CreateOrderInput,
   MatchResponse,
@@ -98,6 +105,25 @@ export async function getOrders(
   return filterOrdersByScope(toOrdersView(response), status);
 }
 
+// The summary view: one row per order without items, assignments or history.
+export async function getOrderSummaries(
+  status?: string,
+  page = 1,
+  pageSize = 100,
+): Promise<Order[]> {
+  const params = new URLSearchParams();
+  params.set('view', 'summary');
+  params.set('page', String(page));
+  params.set('page_size', String(pageSize));
+
+  if (status && status !== 'all' && status !== 'active') {
+    params.set('status', status);
+  }
+
+  const response = await request<OrderSummaryListDto>(`/api/orders?${params.toString()}`);
+  return filterOrdersByScope(toOrderSummariesView(response), status);
+}
+
 export async function getOrdersEnvelope(
   status?: string,
   page = 1,